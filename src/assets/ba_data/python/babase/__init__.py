@@ -148,7 +148,7 @@ from babase._appmode import (
 )
 from babase._appsubsystem import AppSubsystem
 from babase._appmodeselector import AppModeSelector
-from babase._appconfig import AppConfig
+from babase._appconfig import AppConfig, AppConfigCommitStats
 from babase._apputils import (
     AppHealthSubsystem,
     is_browser_likely_available,
@@ -231,6 +231,7 @@ from babase._meta import MetadataSubsystem
 from babase._assetsubsystem import (
     AssetSubsystem,
     make_progress_reporter,
+    PrefetchGroup,
     ResolveResult,
     ResolveProgress,
     ResolvePhase,
@@ -268,6 +269,7 @@ __all__ = [
     'App',
     'AppComponentSubsystem',
     'AppConfig',
+    'AppConfigCommitStats',
     'AppHealthSubsystem',
     'AppIntent',
     'AppIntentDefault',
@@ -409,6 +411,7 @@ __all__ = [
     'Plugin',
     'PluginSubsystem',
     'PluginSpec',
+    'PrefetchGroup',
     'print_load_info',
     'pushcall',
     'quit',
@@ -3,7 +3,12 @@
 """Provides the AppConfig class."""
 
 import json
+import time
+import hashlib
 import logging
+import threading
+from functools import partial
+from dataclasses import dataclass, replace
 from typing import TYPE_CHECKING
 
 from efro.util import strip_exception_tracebacks
@@ -22,6 +27,36 @@ _COMMIT_QUIET_SECONDS = 5.0
 _COMMIT_MAX_DELAY_SECONDS = 20.0
 
 
+@dataclass
+class AppConfigCommitStats:
+    """Running totals for app-config commits.
+
+    Fetch via :attr:`babase.AppConfig.commit_stats`.
+    """
+
+    #: Commits made (each takes one snapshot on the logic thread).
+    commits: int = 0
+
+    #: Commits that actually wrote to disk.
+    writes: int = 0
+
+    #: Commits skipped because nothing changed since the last write.
+    unchanged: int = 0
+
+    #: Logic-thread time taken by the most recent snapshot, in seconds.
+    last_snapshot_seconds: float = 0.0
+
+    #: Longest logic-thread snapshot time seen, in seconds.
+    max_snapshot_seconds: float = 0.0
+
+    #: Time taken formatting and writing the most recent write (off the
+    #: logic thread, except for suspend/shutdown writes), in seconds.
+    last_write_seconds: float = 0.0
+
+    #: Size in bytes of the most recent write.
+    last_write_bytes: int = 0
+
+
 class AppConfig(dict):
     """A special dict that holds persistent app configuration values.
 
@@ -43,6 +78,17 @@ class AppConfig(dict):
         self._oldest_dirty_time: float | None = None
         self._newest_dirty_time: float | None = None
         self._commit_timer_pending = False
+        self._writer = _ConfigWriter()
+
+        #: If True, the config is written to disk without indentation.
+        #: Smaller and quicker to write, but harder to hand-edit; useful
+        #: for servers and other setups with large configs.
+        self.compact_storage = False
+
+    @property
+    def commit_stats(self) -> AppConfigCommitStats:
+        """Stats on config commits so far this run (a snapshot copy)."""
+        return self._writer.get_stats()
 
     def resolve(self, key: str) -> Any:
         """Given a string key, return a config value (type varies).
@@ -156,7 +202,9 @@ class AppConfig(dict):
         assert _babase.in_logic_thread()
         if self._oldest_dirty_time is None:
             return
-        self._commit_to_disk()
+        # We may be about to be suspended or killed; write before
+        # returning rather than handing off to a background thread.
+        self._commit_to_disk(wait=True)
 
     def _commit_timer_cb(self) -> None:
         self._commit_timer_pending = False
@@ -181,11 +229,26 @@ class AppConfig(dict):
         with _babase.ContextRef.empty():
             _babase.apptimer(max(delay, 0.0) + 0.01, self._commit_timer_cb)
 
-    def _commit_to_disk(self) -> None:
+    def _commit_to_disk(self, wait: bool = False) -> None:
         self._oldest_dirty_time = None
         self._newest_dirty_time = None
+
+        # The only part that has to happen here on the logic thread is
+        # capturing our current contents; a compact unsorted dump is
+        # the cheapest way to do that. Key sorting, formatting, hashing,
+        # and file IO all happen in the writer.
+        start = time.monotonic()
+        snapshot = self._snapshot()
+        self._writer.submit(
+            snapshot,
+            compact=self.compact_storage,
+            snapshot_seconds=time.monotonic() - start,
+            wait=wait,
+        )
+
+    def _snapshot(self) -> str:
         try:
-            cfgs = json.dumps(self, indent=1, sort_keys=True)
+            return json.dumps(self, separators=(',', ':'))
         except Exception as exc:
             # This is almost always a mod having stored a
             # non-json-friendly value in the config. Prominently name
@@ -213,9 +276,88 @@ class AppConfig(dict):
                 ' non-json-friendly value in the config.',
                 droppeddesc,
             )
-            # (No sort_keys here; a mixed-key-type dict would break it.)
-            cfgs = json.dumps(pruned, indent=1)
-        _babase.commit_app_config(cfgs)
+            return json.dumps(pruned, separators=(',', ':'))
+
+
+class _ConfigWriter:
+    """Formats and writes app-config snapshots to disk.
+
+    Writes normally happen on a short-lived background thread. Snapshots
+    are numbered and a write only lands if it is newer than the last
+    one written, so a slow background write can never clobber a newer
+    one made synchronously at suspend/shutdown.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seq = 0
+
+        # Guarded by _lock.
+        self._written_seq = 0
+        self._written_key: tuple[bytes, bool] | None = None
+        self._stats = AppConfigCommitStats()
+
+    def get_stats(self) -> AppConfigCommitStats:
+        """Return a copy of current stats."""
+        with self._lock:
+            return replace(self._stats)
+
+    def submit(
+        self,
+        snapshot: str,
+        *,
+        compact: bool,
+        snapshot_seconds: float,
+        wait: bool,
+    ) -> None:
+        """Write a snapshot; in the background unless ``wait`` is set."""
+        assert _babase.in_logic_thread()
+        self._seq += 1
+        with self._lock:
+            stats = self._stats
+            stats.commits += 1
+            stats.last_snapshot_seconds = snapshot_seconds
+            stats.max_snapshot_seconds = max(
+                stats.max_snapshot_seconds, snapshot_seconds
+            )
+        call = partial(self._write, self._seq, snapshot, compact)
+        if wait:
+            call()
+        else:
+            threading.Thread(target=call, name='appconfig-write').start()
+
+    def _write(self, seq: int, snapshot: str, compact: bool) -> None:
+        with self._lock:
+            if seq <= self._written_seq:
+                # Something newer already landed.
+                return
+            start = time.monotonic()
+
+            # Keys all come back as strings here, so sorting can't trip
+            # over mixed key types.
+            data = json.dumps(
+                json.loads(snapshot),
+                sort_keys=True,
+                indent=None if compact else 1,
+                separators=(',', ':') if compact else None,
+            )
+            encoded = data.encode()
+            key = (hashlib.sha256(encoded).digest(), compact)
+            if key == self._written_key:
+                self._written_seq = seq
+                self._stats.unchanged += 1
+                return
+            try:
+                _babase.commit_app_config(data)
+            except Exception:
+                # Leave _written_key alone so the next commit retries.
+                logging.exception('Error writing app config to disk.')
+                return
+            self._written_seq = seq
+            self._written_key = key
+            self._stats.writes += 1
+            self._stats.last_write_seconds = time.monotonic() - start
+            self._stats.last_write_bytes = len(encoded)
 
 
 # Sentinel used by _pruned_json() to signal 'remove this value'.
@@ -26,9 +26,12 @@ selection (step 5) layer on top of this in later steps.
 import os
 import json
 import time
+import heapq
 import random
 import asyncio
+import itertools
 import tempfile
+import threading
 from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from dataclasses import dataclass, field, replace
@@ -79,18 +82,24 @@ _ResolveAccum = tuple[
     dict[str, dict[str, str]],
 ]
 
-#: Max concurrent CAS-blob downloads, run on a dedicated thread pool (NOT the
-#: shared app threadpool). Each in-flight download buffers its whole blob in
-#: RAM, so peak download memory is roughly this times blob-size -- a real
-#: constraint on low-end Android (scarce RAM + an aggressive low-memory killer).
-#: Set to 8 from measured numbers: a warm-node sweep showed near-linear speedup
-#: through 4 and a further ~20% at 8 (download throughput still climbing, not
-#: yet bandwidth-saturated), so 8 meaningfully cuts time-to-first-menu while
-#: staying under the urllib3 pool's per-host maxsize (10) so connections get
-#: reused rather than churned. Overridable via BA_BLOB_DOWNLOAD_CONCURRENCY for
-#: testing; if you raise it past 10, bump that maxsize in _env.py to match.
-_BLOB_DOWNLOAD_CONCURRENCY = int(
-    os.environ.get('BA_BLOB_DOWNLOAD_CONCURRENCY', '8')
+#: Ceiling on concurrent CAS-blob downloads, run on a dedicated thread pool
+#: (NOT the shared app threadpool). How many actually run at once adapts
+#: between 1 and this per node (see bacommon.assetcas.CasFetchConcurrency):
+#: a warm-node sweep showed near-linear speedup through 4 and a further ~20%
+#: at 8, but slow mobile links do better with fewer. Kept at the urllib3
+#: pool's per-host maxsize (10) so connections get reused rather than
+#: churned; if you raise it, bump that maxsize in _env.py to match.
+_BLOB_DOWNLOAD_CONCURRENCY_MAX = 10
+
+#: Where the adaptive download concurrency starts for a fresh node.
+_BLOB_DOWNLOAD_CONCURRENCY_INITIAL = 4
+
+#: Testing override: pin download concurrency at a fixed value (disables
+#: adaptation).
+_BLOB_DOWNLOAD_CONCURRENCY_FIXED = (
+    int(os.environ['BA_BLOB_DOWNLOAD_CONCURRENCY'])
+    if 'BA_BLOB_DOWNLOAD_CONCURRENCY' in os.environ
+    else None
 )
 
 #: Per-request timeout for individual CAS-blob downloads. The shared
@@ -108,9 +117,9 @@ _BLOB_DOWNLOAD_TIMEOUT_SECONDS = 60.0
 #: which breaks the strip_exception_tracebacks cycle discipline), so
 #: without this a single transient stall on ONE blob fails an entire
 #: bring-up. That matters because blobs are by far the most numerous
-#: request a resolve makes -- dozens to hundreds across
-#: ``_BLOB_DOWNLOAD_CONCURRENCY`` workers -- so they are where a blip is
-#: overwhelmingly most likely to land. Observed 2026-08-07: one blob's
+#: request a resolve makes -- dozens to hundreds across up to
+#: ``_BLOB_DOWNLOAD_CONCURRENCY_MAX`` workers -- so they are where a blip
+#: is overwhelmingly most likely to land. Observed 2026-08-07: one blob's
 #: TLS handshake stalled and took construct-mode down with it.
 #:
 #: The manifest path already does this (``_tier1_manifests_with_retries``)
@@ -329,6 +338,7 @@ class _GcSweepStats:
     freed_files: int
     freed_bytes: int
     shards_done: int
+    shards_skipped: int
     cut_off: bool
     next_shard: int
     sweep_secs: float
@@ -368,6 +378,9 @@ class _PkgManifests:
     #: Short-lived ``/casblob`` capability token; ``None`` when the
     #: server returned none (fine when nothing needs fetching).
     token: securedata.Archive | None
+    #: Data-blob hash -> indexes of the resolve's :class:`PrefetchGroup`
+    #: entries whose paths reference it. Only blobs in some group appear.
+    groups: dict[str, set[int]] = field(default_factory=dict)
 
 
 @dataclass
@@ -452,6 +465,42 @@ class ResolveProgress:
     bytes_done: int = 0
     bytes_total: int = 0
 
+    #: Live state of the adaptive download concurrency (how many blob
+    #: fetches may run at once, and the throughput/latency/error figures
+    #: driving that), or ``None`` before any download this session.
+    #: Diagnostic; handy for a debug overlay.
+    download_concurrency: assetcas.CasConcurrencyState | None = None
+
+
+@dataclass
+class PrefetchGroup:
+    """Assets a resolve should download ahead of the rest.
+
+    Passed (in priority order) as ``prefetch`` to
+    :meth:`AssetSubsystem.resolve`, e.g. the assets the upcoming map or
+    activity needs first. Blobs in earlier groups are fetched before those
+    in later ones, and before anything ungrouped; flavor-manifests always
+    come first regardless, as they arrive inline with the resolve itself.
+
+    Native registration stays all-or-nothing at the end of the resolve;
+    ``on_ready`` reports when a group's content has *landed*, so callers
+    can act on partial progress (say, readying a map's loading screen or
+    queueing the next prefetch) while the rest downloads.
+    """
+
+    #: Logical asset paths, as keyed in flavor-manifests (e.g.
+    #: ``'textures/bombColor'``). Paths no resolved package contains are
+    #: ignored.
+    paths: set[str]
+
+    #: Restrict matching to this package; by default a path matches in
+    #: any package of the resolve.
+    apverid: str | None = None
+
+    #: Called once on the logic thread when every blob the group's paths
+    #: need is on disk. Not called if the resolve fails first.
+    on_ready: Callable[[], None] | None = None
+
 
 #: Min seconds between throttled progress updates. The resolve emits one
 #: event per blob / build-unit completed (see :meth:`_emit_progress`); this
@@ -670,6 +719,41 @@ class _CacheManifest:
     layout_version: Annotated[int, IOAttrs('v')] = 1
 
 
+#: Layout version of :class:`_GcState`; a mismatch on load discards it
+#: (costing one full mark + sweep, nothing more).
+_GC_STATE_LAYOUT_VERSION = 1
+
+
+@ioprepped
+@dataclass
+class _GcState:
+    """GC bookkeeping carried between runs to keep each pass incremental.
+
+    Lives at ``<cache_dir>/gc_state.json``. Purely an accelerator: losing
+    it just means the next pass re-parses every live flavor-manifest and
+    sweeps every shard, exactly as with no state at all.
+    """
+
+    #: Flavor-manifest hash -> the data-blob hashes it references, for
+    #: every flavor-manifest live as of the last mark. Flavor-manifests
+    #: are content-addressed, so an entry can never go stale; mark only
+    #: has to read and parse manifests that are new since the last run.
+    reachable: Annotated[dict[str, list[str]], IOAttrs('r')] = field(
+        default_factory=dict
+    )
+
+    #: Shard hex -> the shard dir's mtime_ns when a sweep last left it
+    #: holding only live blobs. While the dir's mtime still matches, the
+    #: only way it can have gained garbage is a blob falling out of the
+    #: live set -- and mark clears the entries of exactly those shards --
+    #: so the sweep skips it without listing it.
+    clean_shards: Annotated[dict[str, int], IOAttrs('c')] = field(
+        default_factory=dict
+    )
+
+    layout_version: Annotated[int, IOAttrs('v')] = 1
+
+
 class _ResolveGate:
     """Serial admission gate for asset resolves, with two priority classes.
 
@@ -718,6 +802,107 @@ class _ResolveGate:
             self._cond.notify_all()
 
 
+class _PrioritySlots:
+    """Concurrency limiter admitting waiters by priority (internal).
+
+    Bounds in-flight blob downloads like a semaphore, but when a slot
+    frees it goes to the waiter with the lowest priority value (FIFO
+    among equals) rather than the longest-waiting one. The bound is read
+    from ``limit`` on every admission, so it can move while in use (the
+    adaptive download concurrency). Kept within the download pool's size
+    so that pool's own FIFO queue stays empty and this is what decides
+    fetch order, across every package of a resolve. Logic-thread only.
+    """
+
+    def __init__(self, limit: Callable[[], int]) -> None:
+        self._limit = limit
+        self._in_use = 0
+        self._seq = itertools.count()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+
+    async def acquire(self, priority: int) -> None:
+        """Wait for a slot."""
+        if self._in_use < self._limit() and not self._waiters:
+            self._in_use += 1
+            return
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Handed a slot just as we were cancelled; pass it on.
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Return a slot, waking the highest-priority waiters it allows."""
+        self._in_use -= 1
+        while self._waiters and self._in_use < self._limit():
+            _priority, _seq, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                self._in_use += 1
+                fut.set_result(None)
+
+
+class _PrefetchTracker:
+    """Per-resolve bookkeeping for :class:`PrefetchGroup` (internal).
+
+    Maps manifest paths to group indexes, and tracks which blobs each
+    group still waits on so ``on_ready`` can fire as soon as the last
+    one lands. A group can only be ready once every package in the
+    resolve has reported its blobs (a later package could add more), so
+    readiness is checked only with nothing left acquiring.
+    Logic-thread only (apart from :meth:`groups_for`, which is pure).
+    """
+
+    def __init__(self, groups: list[PrefetchGroup]) -> None:
+        self.groups = groups
+        self._pending: list[set[str]] = [set() for _g in groups]
+        self._fired = [False] * len(groups)
+
+    def groups_for(self, apverid: str, path: str) -> set[int]:
+        """Indexes of groups containing ``path`` in ``apverid``."""
+        return {
+            i
+            for i, group in enumerate(self.groups)
+            if path in group.paths
+            and (group.apverid is None or group.apverid == apverid)
+        }
+
+    def rank(self, groups: set[int] | None) -> int:
+        """Fetch priority for a blob in ``groups`` (lower goes first)."""
+        return min(groups) if groups else len(self.groups)
+
+    def add_pending(self, filehash: str, groups: set[int]) -> None:
+        """Note a grouped blob that isn't on disk yet."""
+        for i in groups:
+            self._pending[i].add(filehash)
+
+    def blob_done(self, filehash: str) -> None:
+        """Note a blob that just landed."""
+        for pending in self._pending:
+            pending.discard(filehash)
+
+    def fire_ready(self, *, all_acquired: bool, force: bool = False) -> None:
+        """Call ``on_ready`` for groups newly complete.
+
+        ``force`` fires everything not yet fired (for a resolve that has
+        succeeded, where by definition everything is present).
+        """
+        if not (all_acquired or force):
+            return
+        for i, group in enumerate(self.groups):
+            if self._fired[i] or (self._pending[i] and not force):
+                continue
+            self._fired[i] = True
+            if group.on_ready is not None:
+                try:
+                    group.on_ready()
+                except Exception:
+                    logger.exception('Error in prefetch-group callback.')
+
+
 class AssetSubsystem(AppSubsystem):
     """Subsystem for acquiring + tracking downloadable asset packages.
 
@@ -848,7 +1033,7 @@ class AssetSubsystem(AppSubsystem):
         # Dedicated, deliberately-small pool for CAS-blob downloads, kept
         # separate from the shared app threadpool so a big download burst can't
         # starve other background work (and vice versa). Bounded at
-        # _BLOB_DOWNLOAD_CONCURRENCY -- see that constant for why low.
+        # _BLOB_DOWNLOAD_CONCURRENCY_MAX -- see that constant for why low.
         #
         # Created on demand per resolve (see _download_executor) and torn down
         # in resolve()'s finally, so its worker threads exist ONLY while a
@@ -862,6 +1047,29 @@ class AssetSubsystem(AppSubsystem):
         # is negligible next to the network IO it wraps.
         self._download_pool: ThreadPoolExecutor | None = None
 
+        # Adaptive download concurrency for the node we're fetching from
+        # (None until the first download). Kept across resolves so what
+        # we've learned about the link carries over; replaced when the
+        # node changes. See _download_concurrency_for.
+        self._download_concurrency: assetcas.CasFetchConcurrency | None = None
+        self._download_concurrency_node: str | None = None
+
+        # Per-resolve fetch ordering: the priority limiter that hands out
+        # download-pool slots, and the prefetch groups being tracked. Set
+        # up at the top of resolve() and cleared in its finally.
+        self._download_slots = _PrioritySlots(self._download_limit)
+        self._prefetch = _PrefetchTracker([])
+
+        # Blob-presence indexes for the writable and bundle roots, so
+        # resolve-time presence diffs are dict lookups instead of an
+        # os.stat per blob. Created on first use (see _presence_indexes)
+        # since app paths aren't available yet at construction; the lock
+        # covers that creation, as the first use may be off-thread.
+        self._presence_lock = threading.Lock()
+        self._presence: (
+            tuple[assetcas.CasPresenceIndex, assetcas.CasPresenceIndex] | None
+        ) = None
+
     @override
     def on_app_running(self) -> None:
         # Register the GC pass as a shutdown task. It runs concurrently
@@ -880,17 +1088,52 @@ class AssetSubsystem(AppSubsystem):
         are single-in-flight, so there's no concurrency on this attribute.
         """
         if self._download_pool is None:
-            logger.info(
-                'Creating blob-download pool (%d workers).',
-                _BLOB_DOWNLOAD_CONCURRENCY,
+            workers = (
+                _BLOB_DOWNLOAD_CONCURRENCY_FIXED
+                or _BLOB_DOWNLOAD_CONCURRENCY_MAX
             )
+            logger.info('Creating blob-download pool (%d workers).', workers)
             self._download_pool = ThreadPoolExecutor(
-                max_workers=_BLOB_DOWNLOAD_CONCURRENCY,
+                max_workers=workers,
                 thread_name_prefix='baassetdl',
                 initializer=_init_blob_download_thread,
             )
         return self._download_pool
 
+    def _download_concurrency_for(
+        self, base_url: str
+    ) -> assetcas.CasFetchConcurrency:
+        """Return the adaptive download-concurrency controller for a node.
+
+        One per node: what the controller has learned describes the link
+        to that node, so a node change starts a fresh one. Logic thread.
+        """
+        ctrl = self._download_concurrency
+        if ctrl is None or self._download_concurrency_node != base_url:
+            fixed = _BLOB_DOWNLOAD_CONCURRENCY_FIXED
+            if fixed is not None:
+                ctrl = assetcas.CasFetchConcurrency(
+                    initial=fixed, minimum=fixed, maximum=fixed
+                )
+            else:
+                ctrl = assetcas.CasFetchConcurrency(
+                    initial=_BLOB_DOWNLOAD_CONCURRENCY_INITIAL,
+                    maximum=_BLOB_DOWNLOAD_CONCURRENCY_MAX,
+                )
+            self._download_concurrency = ctrl
+            self._download_concurrency_node = base_url
+        return ctrl
+
+    def _download_limit(self) -> int:
+        """Current cap on in-flight blob downloads (for _PrioritySlots)."""
+        ctrl = self._download_concurrency
+        if ctrl is None:
+            return (
+                _BLOB_DOWNLOAD_CONCURRENCY_FIXED
+                or _BLOB_DOWNLOAD_CONCURRENCY_INITIAL
+            )
+        return ctrl.limit
+
     # ---------------------------------------------------------------------
     # Paths.
 
@@ -914,6 +1157,62 @@ class AssetSubsystem(AppSubsystem):
         """Persisted rotating GC shard cursor path."""
         return os.path.join(_babase.app.env.cache_directory, 'gc_resume_shard')
 
+    @property
+    def _gc_state_path(self) -> str:
+        """Persisted incremental-GC state path (see :class:`_GcState`)."""
+        return os.path.join(_babase.app.env.cache_directory, 'gc_state.json')
+
+    @property
+    def _presence_index_path(self) -> str:
+        """Persisted writable-root blob-presence index path."""
+        return os.path.join(
+            _babase.app.env.cache_directory, 'assets_presence.json'
+        )
+
+    @property
+    def _bundle_presence_index_path(self) -> str:
+        """Persisted bundle-root blob-presence index path.
+
+        Lives in the cache dir since the bundle itself is read-only. The
+        bundle only changes on app update, so after the first launch of a
+        build this validates without rescanning anything.
+        """
+        return os.path.join(
+            _babase.app.env.cache_directory, 'assets_bundle_presence.json'
+        )
+
+    def _presence_indexes(
+        self,
+    ) -> tuple[assetcas.CasPresenceIndex, assetcas.CasPresenceIndex]:
+        """Return the (writable, bundle) presence indexes."""
+        with self._presence_lock:
+            if self._presence is None:
+                self._presence = (
+                    assetcas.CasPresenceIndex(
+                        self._writable_assets_root, self._presence_index_path
+                    ),
+                    assetcas.CasPresenceIndex(
+                        self._bundle_assets_root,
+                        self._bundle_presence_index_path,
+                    ),
+                )
+            return self._presence
+
+    def _refresh_presence(self) -> None:
+        """Load/revalidate the presence indexes. Off-thread; blocking.
+
+        Run at the top of each resolve so the lookups that follow (some
+        on the logic thread) are pure in-memory work, and so changes to
+        the roots since the last resolve are picked up.
+        """
+        for index in self._presence_indexes():
+            index.refresh()
+
+    def _save_presence(self) -> None:
+        """Persist the presence indexes if changed. Off-thread; blocking."""
+        for index in self._presence_indexes():
+            index.save()
+
     def _writable_blob_path(self, filehash: str) -> str:
         """Path a CAS blob would occupy in the writable root."""
         return assetcas.cas_blob_path(self._writable_assets_root, filehash)
@@ -1108,6 +1407,7 @@ class AssetSubsystem(AppSubsystem):
         on_progress: Callable[[ResolveProgress], None] | None = None,
         language: Locale | None = None,
         background: bool = False,
+        prefetch: list[PrefetchGroup] | None = None,
     ) -> ResolveResult:
         """Make every requested asset-package-version available natively.
 
@@ -1142,6 +1442,11 @@ class AssetSubsystem(AppSubsystem):
         a decorative/prefetch resolve that queues behind -- and never
         blocks -- foreground (interactive) resolves; foreground is the
         default and matches all interactive/dialog-backed callers.
+
+        ``prefetch`` orders downloads by need: blobs of earlier
+        :class:`PrefetchGroup` entries are fetched first, and each group's
+        ``on_ready`` fires as soon as its own blobs have landed rather than
+        when the whole resolve completes.
         """
         assert _babase.in_logic_thread()
 
@@ -1171,6 +1476,8 @@ class AssetSubsystem(AppSubsystem):
         self._progress_t_start = _babase.apptime()
         self._progress_phase_logged = None
         self._progress_build_phase = None
+        self._download_slots = _PrioritySlots(self._download_limit)
+        self._prefetch = _PrefetchTracker(list(prefetch or []))
         # Bundle-hiding (BA_ASSET_NO_BUNDLE_REUSE) applies only to a
         # resolve that can actually download what it then considers
         # missing. Scoped to the resolve so the bootstrap local resolve
@@ -1199,6 +1506,7 @@ class AssetSubsystem(AppSubsystem):
                 self._download_pool.shutdown(wait=True, cancel_futures=True)
                 self._download_pool = None
             self._progress_cb = None
+            self._prefetch = _PrefetchTracker([])
             self._bundle_hidden = False
             await self._gate.release()
             logger.debug('resolve: released (background=%s).', background)
@@ -1229,6 +1537,9 @@ class AssetSubsystem(AppSubsystem):
             )
         cb = self._progress_cb
         if cb is not None:
+            ctrl = self._download_concurrency
+            if ctrl is not None:
+                self._progress.download_concurrency = ctrl.state()
             cb(replace(self._progress))
 
     def _derive_aggregate_progress(self) -> None:
@@ -1552,6 +1863,7 @@ class AssetSubsystem(AppSubsystem):
         # the whole set in a single off-thread pass — no per-package round-
         # trips, no download machinery, no network. The per-package async
         # path below is used only when something must actually be fetched.
+        await self._run_in_pool(self._refresh_presence)
         offline = await self._run_in_pool(
             self._resolve_offline_sync, apverids, language
         )
@@ -1584,7 +1896,11 @@ class AssetSubsystem(AppSubsystem):
 
         register_resolved_apverids(apverids)
         self._reload_language()
+        # Anything prefetch groups didn't already report (warm path,
+        # nothing to fetch, builtin fallbacks) is here now by definition.
+        self._prefetch.fire_ready(all_acquired=True, force=True)
         await self._run_in_pool(self._commit_manifest, manifest_pkgs, now)
+        await self._run_in_pool(self._save_presence)
 
         logger.info(
             'Resolved %d package(s): %d bucket(s) registered%s'
@@ -2264,6 +2580,7 @@ class AssetSubsystem(AppSubsystem):
         coords: dict[str, str] = {}
         fm_writes: dict[str, bytes] = {}
         data_needed: dict[str, int] = {}
+        blob_groups: dict[str, set[int]] = {}
         for coord, flavor_manifest in response.buckets.items():
             coords[coord] = flavor_manifest.hash
             # Dedupe by hash: a flavor-manifest blob is often shared across
@@ -2277,9 +2594,14 @@ class AssetSubsystem(AppSubsystem):
             # The manifest carries only canonical content identity (hash +
             # size); a blob's transfer encoding is negotiated per /casblob
             # download (see _acquire_data_blob), not recorded here.
-            for info in parsed['e'].values():
+            for path, info in parsed['e'].items():
+                path_groups = self._prefetch.groups_for(apverid, path)
                 for comp in info.values():
                     data_needed[comp['h']] = comp['s']
+                    if path_groups:
+                        blob_groups.setdefault(comp['h'], set()).update(
+                            path_groups
+                        )
 
         if fm_writes:
             await asyncio.gather(
@@ -2296,6 +2618,7 @@ class AssetSubsystem(AppSubsystem):
             # Only meaningful if something actually needs fetching; a
             # fully-local package legitimately has neither.
             token=response.token,
+            groups=blob_groups,
         )
 
     async def _fetch_blobs(self, pkg: _PkgManifests) -> None:
@@ -2309,6 +2632,10 @@ class AssetSubsystem(AppSubsystem):
         Blobs claimed here are recorded globally, so two packages
         referencing the same blob (common for shared flavor-manifests)
         fetch it once rather than racing to fetch it twice.
+
+        Fetches are admitted to the pool in priority order (see
+        :class:`_PrioritySlots`): blobs of earlier prefetch groups first,
+        then the rest in manifest order.
         """
         # The node can drop between the manifest phase (which waits for
         # it) and here -- our blobs may have queued behind another
@@ -2327,9 +2654,17 @@ class AssetSubsystem(AppSubsystem):
             for h, s in pkg.needed.items()
             if h not in self._fetch_claimed and not self._present(h, s)
         ]
+        # Grouped blobs we (or a sibling package) still have to fetch.
+        # Registered before any await, like the claim below, so a group
+        # can't look complete while one of its blobs is unaccounted for.
+        prefetch = self._prefetch
+        for h, groups in pkg.groups.items():
+            if not self._present(h, pkg.needed[h]):
+                prefetch.add_pending(h, groups)
         if not to_fetch:
             self._acquire_pending.discard(pkg.apverid)
             self._emit_progress()
+            prefetch.fire_ready(all_acquired=not self._acquire_pending)
             return
         if pkg.token is None:
             raise AssetResolveError(
@@ -2341,6 +2676,7 @@ class AssetSubsystem(AppSubsystem):
                 f'{pkg.apverid}: not connected to a node; cannot download.'
             )
         token_header = self._encode_token(pkg.token)
+        concurrency = self._download_concurrency_for(base_url)
 
         # Claim before the first await: another package's task may reach
         # here while we're suspended, and must see these as taken.
@@ -2365,6 +2701,12 @@ class AssetSubsystem(AppSubsystem):
         # therefore monotonic) byte total.
         self._acquire_pending.discard(pkg.apverid)
         self._emit_progress()
+        prefetch.fire_ready(all_acquired=not self._acquire_pending)
+
+        # Most-needed first. sort() is stable, so manifest order holds
+        # within a rank; the slots keep that order across packages.
+        to_fetch.sort(key=lambda item: prefetch.rank(pkg.groups.get(item[0])))
+        slots = self._download_slots
 
         # gather() surfaces only the first failure to our caller;
         # sibling fetches failing after that get consumed *inside*
@@ -2377,13 +2719,20 @@ class AssetSubsystem(AppSubsystem):
         async def _fetch(h: str, s: int) -> None:
             nonlocal have_failure
             try:
-                await self._run_in_pool(
-                    self._acquire_data_blob,
-                    base_url,
-                    token_header,
-                    (h, s),
-                    executor=self._download_executor(),
-                )
+                await slots.acquire(prefetch.rank(pkg.groups.get(h)))
+                concurrency.started()
+                try:
+                    await self._run_in_pool(
+                        self._acquire_data_blob,
+                        base_url,
+                        token_header,
+                        (h, s),
+                        concurrency,
+                        executor=self._download_executor(),
+                    )
+                finally:
+                    concurrency.finished()
+                    slots.release()
             except Exception as exc:
                 # Un-claim so a later resolve retries this blob. Claims
                 # exist to stop two packages fetching the same blob at
@@ -2401,6 +2750,8 @@ class AssetSubsystem(AppSubsystem):
             self._progress.blobs_done += 1
             self._progress.bytes_done += s
             self._emit_progress()
+            prefetch.blob_done(h)
+            prefetch.fire_ready(all_acquired=not self._acquire_pending)
 
         await asyncio.gather(*[_fetch(h, s) for h, s in to_fetch])
 
@@ -2629,19 +2980,21 @@ class AssetSubsystem(AppSubsystem):
         Probes the writable cache root and (unless bundle reuse is
         disabled for the resolve in flight) the bundle root.
         Present-but-wrong-size counts as absent so it gets
-        refetched/overwritten. The free ``st_size`` check is a cheap catch
-        for external truncation/tampering, not a content proof.
+        refetched/overwritten. Answered from the in-memory presence
+        indexes (see :class:`bacommon.assetcas.CasPresenceIndex`), so
+        this is cheap enough to call per blob on the logic thread.
         """
-        roots = [self._writable_assets_root]
-        if not self._bundle_hidden:
-            roots.append(self._bundle_assets_root)
-        return assetcas.blob_present(roots, filehash, size)
+        writable, bundle = self._presence_indexes()
+        if writable.present(filehash, size):
+            return True
+        return not self._bundle_hidden and bundle.present(filehash, size)
 
     def _acquire_data_blob(
         self,
         base_url: str,
         token_header: str,
         blob: tuple[str, int],
+        concurrency: assetcas.CasFetchConcurrency,
     ) -> None:
         """Fetch one data blob from the node and atomically write it.
 
@@ -2649,16 +3002,21 @@ class AssetSubsystem(AppSubsystem):
         shared :func:`bacommon.assetcas.download_cas_blob`, which
         advertises the encodings we can decode, decodes per the encoding
         the node reports it served (``X-Cas-Compression``), then
-        sha256-verifies + atomically writes the canonical bytes.
+        sha256-verifies + atomically writes the canonical bytes. The body
+        is streamed to disk, so a transient failure mid-transfer leaves a
+        partial that the next attempt here resumes with a Range request.
         ``base_url``'s scheme mirrors the transport session's security
         (see :meth:`_node_base_url`); integrity is guaranteed by the CAS
         hash check either way. The local cache always stores uncompressed
-        blobs. Off-thread; blocking.
+        blobs. Each attempt's outcome feeds ``concurrency`` so the number
+        of downloads in flight tracks what the link can take.
+        Off-thread; blocking.
         """
         filehash, size = blob
         url = f'{base_url}/casblob/{filehash}'
         attempt = 1
         while True:
+            start = time.monotonic()
             try:
                 assetcas.download_cas_blob(
                     _babase.app.net.urllib3pool,
@@ -2668,42 +3026,52 @@ class AssetSubsystem(AppSubsystem):
                     token_header=token_header,
                     dest_root=self._writable_assets_root,
                     timeout_seconds=_BLOB_DOWNLOAD_TIMEOUT_SECONDS,
+                    presence=self._presence_indexes()[0],
                 )
+                concurrency.record(size, time.monotonic() - start, True)
                 return
             except assetcas.CasDownloadError as exc:
                 # A structured refusal from the node (non-200, bad or
                 # missing encoding header, verify failure). Not a blip;
-                # retrying won't change the answer.
-                raise AssetResolveError(str(exc)) from exc
+                # retrying won't change the answer. The exception is
+                # 5xx: an overloaded or ailing node, which counts
+                # against the link like a network failure.
+                if not exc.server_error:
+                    raise AssetResolveError(str(exc)) from exc
+                failure: Exception = exc
             except Exception as exc:
                 # Network-level failure escaping urllib3 (timeouts, reset
                 # connections, dns). download_cas_blob only converts its
                 # own structured errors, so these arrive raw.
-                if (
-                    not is_urllib3_communication_error(exc, url=url)
-                    or attempt >= _BLOB_DOWNLOAD_MAX_ATTEMPTS
-                ):
+                if not is_urllib3_communication_error(exc, url=url):
                     raise AssetResolveError(
                         f'casblob GET for {filehash} failed: {exc}'
                     ) from exc
-                logger.info(
-                    'casblob %s: transient download failure'
-                    ' (attempt %d of %d); retrying in %.0fs (%s).',
-                    filehash[:12],
-                    attempt,
-                    _BLOB_DOWNLOAD_MAX_ATTEMPTS,
-                    _BLOB_DOWNLOAD_RETRY_DELAY_SECONDS,
-                    exc,
-                )
-                # We're consuming this exception; strip its traceback so
-                # frame locals don't linger in a reference cycle. This is
-                # exactly the discipline that keeps urllib3's own retries
-                # switched off, so it matters here.
-                strip_exception_tracebacks(exc)
-                # Blocking sleep is correct -- we're already off-thread
-                # in a blob-download worker.
-                time.sleep(_BLOB_DOWNLOAD_RETRY_DELAY_SECONDS)
-                attempt += 1
+                failure = exc
+            concurrency.record(0, time.monotonic() - start, False)
+            if attempt >= _BLOB_DOWNLOAD_MAX_ATTEMPTS:
+                raise AssetResolveError(
+                    f'casblob GET for {filehash} failed: {failure}'
+                ) from failure
+            logger.info(
+                'casblob %s: transient download failure'
+                ' (attempt %d of %d); retrying in %.0fs (%s).',
+                filehash[:12],
+                attempt,
+                _BLOB_DOWNLOAD_MAX_ATTEMPTS,
+                _BLOB_DOWNLOAD_RETRY_DELAY_SECONDS,
+                failure,
+            )
+            # We're consuming this exception; strip its traceback so
+            # frame locals don't linger in a reference cycle. This is
+            # exactly the discipline that keeps urllib3's own retries
+            # switched off, so it matters here.
+            strip_exception_tracebacks(failure)
+            del failure
+            # Blocking sleep is correct -- we're already off-thread
+            # in a blob-download worker.
+            time.sleep(_BLOB_DOWNLOAD_RETRY_DELAY_SECONDS)
+            attempt += 1
 
     def _cas_write(self, filehash: str, data: bytes) -> None:
         """Atomically write a CAS blob into the writable root.
@@ -2713,7 +3081,12 @@ class AssetSubsystem(AppSubsystem):
         blocking.
         """
         try:
-            assetcas.cas_write(self._writable_assets_root, filehash, data)
+            assetcas.cas_write(
+                self._writable_assets_root,
+                filehash,
+                data,
+                presence=self._presence_indexes()[0],
+            )
         except assetcas.CasDownloadError as exc:
             raise AssetResolveError(str(exc)) from exc
 
@@ -2836,6 +3209,12 @@ class AssetSubsystem(AppSubsystem):
         CAS root is swept under a wall-clock budget. Safe to be cut off at
         any point (interleaved unlink + persisted rotating cursor ⇒ durable
         monotonic progress that converges over a run or two).
+
+        Both phases are incremental across runs via :class:`_GcState`:
+        mark parses only flavor-manifests it hasn't seen before, and the
+        sweep lists only shards that changed or lost live blobs since they
+        were last swept. On an unchanged cache a pass is a manifest
+        rewrite plus a ``stat`` per shard.
         """
         deadline = time.monotonic() + _GC_BUDGET_SECONDS
 
@@ -2844,8 +3223,11 @@ class AssetSubsystem(AppSubsystem):
             logger.debug('Asset GC: no writable CAS root; nothing to do.')
             return
 
-        live, mark_secs = self._gc_mark()
-        stats = self._gc_sweep(root, live, deadline)
+        state = self._load_gc_state()
+        live, mark_secs = self._gc_mark(state)
+        stats = self._gc_sweep(root, live, deadline, state)
+        self._persist_gc_state(state)
+        self._save_presence()
 
         if stats.cut_off:
             logger.info(
@@ -2863,20 +3245,24 @@ class AssetSubsystem(AppSubsystem):
         else:
             logger.info(
                 'Asset GC: freed %d file(s) / %d bytes (full sweep,'
-                ' %d non-empty shard(s)). mark %.3fs, sweep %.3fs.',
+                ' %d shard(s) listed, %d unchanged). mark %.3fs,'
+                ' sweep %.3fs.',
                 stats.freed_files,
                 stats.freed_bytes,
                 stats.shards_done,
+                stats.shards_skipped,
                 mark_secs,
                 stats.sweep_secs,
             )
 
-    def _gc_mark(self) -> tuple[set[str], float]:
+    def _gc_mark(self, state: _GcState) -> tuple[set[str], float]:
         """Compute the live blob set and atomically rewrite the manifest.
 
         Returns ``(live_blob_hashes, mark_wall_seconds)``. The manifest is
         the source of truth, so it's rewritten here (before any sweep) to
-        keep only surviving packages/refs + only-live timestamps.
+        keep only surviving packages/refs + only-live timestamps. The GC
+        state is then persisted too, so the shards this mark found newly
+        dead blobs in stay marked for sweeping even if we're cut off.
         """
         start = time.monotonic()
         manifest = self._load_manifest()
@@ -2884,7 +3270,7 @@ class AssetSubsystem(AppSubsystem):
         cutoff = now - _GC_CUTOFF_SECONDS
 
         live_fm, new_packages = self._gc_survivors(manifest, cutoff)
-        live = self._gc_reachable(live_fm)
+        live = self._gc_reachable(live_fm, state)
 
         # Prune the timestamp table to only-live flavor-manifests.
         new_fmlu = {
@@ -2897,6 +3283,7 @@ class AssetSubsystem(AppSubsystem):
                 layout_version=_CACHE_MANIFEST_LAYOUT_VERSION,
             )
         )
+        self._persist_gc_state(state)
         return live, time.monotonic() - start
 
     def _gc_survivors(
@@ -2935,33 +3322,59 @@ class AssetSubsystem(AppSubsystem):
                 )
         return live_fm, new_packages
 
-    def _gc_reachable(self, live_fm: set[str]) -> set[str]:
+    def _gc_reachable(self, live_fm: set[str], state: _GcState) -> set[str]:
         """Live set = live flavor-manifest blobs ∪ their reachable data blobs.
 
         Reachable data is discovered by reading each present flavor-manifest
-        blob and collecting the data-blob hashes it references.
+        blob and collecting the data-blob hashes it references -- or, for
+        manifests seen by an earlier run, from ``state.reachable``. Updates
+        ``state`` in place: the reachability cache is narrowed to this
+        live set, and any shard holding a blob that just dropped out of it
+        loses its clean mark so the sweep revisits it.
         """
         live: set[str] = set(live_fm)
+        reachable: dict[str, list[str]] = {}
+        parsed = 0
         for fm_hash in live_fm:
-            fm_path = self._locate_blob(fm_hash)
-            if fm_path is None:
+            blobs = state.reachable.get(fm_hash)
+            if blobs is None:
+                fm_path = self._locate_blob(fm_hash)
+                if fm_path is None:
+                    continue
+                try:
+                    with open(fm_path, 'rb') as infile:
+                        blobs = list(
+                            assetcas.parse_flavor_manifest_blobs(infile.read())
+                        )
+                except Exception as exc:
+                    logger.exception(
+                        'Asset GC: error reading flavor-manifest %s;'
+                        ' skipping.',
+                        fm_hash,
+                    )
+                    strip_exception_tracebacks(exc)
+                    continue
+                parsed += 1
+            reachable[fm_hash] = blobs
+            live.update(blobs)
+
+        for fm_hash, blobs in state.reachable.items():
+            if fm_hash in reachable:
                 continue
-            try:
-                with open(fm_path, 'rb') as infile:
-                    parsed = json.loads(infile.read())
-                for info in parsed['e'].values():
-                    for comp in info.values():
-                        live.add(comp['h'])
-            except Exception as exc:
-                logger.exception(
-                    'Asset GC: error reading flavor-manifest %s; skipping.',
-                    fm_hash,
-                )
-                strip_exception_tracebacks(exc)
+            for filehash in (fm_hash, *blobs):
+                if filehash not in live:
+                    state.clean_shards.pop(filehash[:2], None)
+        state.reachable = reachable
+        logger.debug(
+            'Asset GC: %d live flavor-manifest(s), %d parsed, %d cached.',
+            len(live_fm),
+            parsed,
+            len(reachable) - parsed,
+        )
         return live
 
     def _gc_sweep(
-        self, root: str, live: set[str], deadline: float
+        self, root: str, live: set[str], deadline: float, state: _GcState
     ) -> _GcSweepStats:
         """Delete writable-root blobs not in ``live``, within the budget.
 
@@ -2969,11 +3382,23 @@ class AssetSubsystem(AppSubsystem):
         unlink is interleaved with the scan (visited garbage is gone even if
         cut off) and the cursor is advanced + persisted per shard so
         progress survives a cutoff and a fixed order can't perpetually stall.
+        Deleted blobs are dropped from the writable presence index.
+        Leftover ``.tmp_`` files go through
+        :func:`bacommon.assetcas.discard_cas_temp`, which spares recent
+        ones and partials of downloads in progress.
+
+        Shards still carrying a clean mark in ``state`` at their current
+        dir mtime are skipped unlisted; each shard swept here gets a fresh
+        mark unless its mtime is too recent to trust (see
+        :func:`bacommon.assetcas.cas_mtime_racy`). The caller persists
+        ``state``.
         """
         sweep_start = time.monotonic()
+        presence = self._presence_indexes()[0]
         freed_files = 0
         freed_bytes = 0
         shards_done = 0
+        shards_skipped = 0
         cut_off = False
         cursor = self._read_gc_cursor()
         next_shard = cursor
@@ -2981,36 +3406,123 @@ class AssetSubsystem(AppSubsystem):
             shard = (cursor + i) % _CAS_SHARD_COUNT
             shard_hex = f'{shard:02x}'
             shard_dir = os.path.join(root, shard_hex)
-            if os.path.isdir(shard_dir):
+            mtime = self._gc_dir_mtime(shard_dir)
+            if state.clean_shards.get(shard_hex) == mtime:
+                shards_skipped += 1
+            elif mtime:
+                clean = True
                 try:
                     entries = list(os.scandir(shard_dir))
                 except OSError:
                     entries = []
+                    clean = False
                 for entry in entries:
+                    if entry.name.startswith('.'):
+                        # Temp files and partials; in-flight ones are
+                        # left alone, and keep the shard unclean so we
+                        # come back for them.
+                        freed = assetcas.discard_cas_temp(
+                            root, shard_hex, entry.name
+                        )
+                        if freed is None:
+                            clean = False
+                        else:
+                            freed_files += 1
+                            freed_bytes += freed
+                        continue
                     if shard_hex + entry.name in live:
                         continue
+                    before = presence.dir_mtime(shard_hex + entry.name)
                     try:
                         size = entry.stat().st_size
                         os.unlink(entry.path)
                         freed_files += 1
                         freed_bytes += size
                     except OSError:
-                        pass
+                        clean = False
+                    else:
+                        presence.discard(shard_hex + entry.name, before)
                 shards_done += 1
+                # A mark taken in the same mtime tick as a write we
+                # didn't see would hide that write from every later
+                # sweep; leave such shards for the next one.
+                mtime = self._gc_dir_mtime(shard_dir)
+                if clean and not assetcas.cas_mtime_racy(mtime):
+                    state.clean_shards[shard_hex] = mtime
+                # Cursor writes only where real work happened; skipped
+                # shards are a stat apiece to redo.
+                self._write_gc_cursor((shard + 1) % _CAS_SHARD_COUNT)
+            else:
+                state.clean_shards[shard_hex] = 0
             next_shard = (shard + 1) % _CAS_SHARD_COUNT
-            self._write_gc_cursor(next_shard)
             if time.monotonic() >= deadline:
                 cut_off = True
                 break
+        self._write_gc_cursor(next_shard)
         return _GcSweepStats(
             freed_files=freed_files,
             freed_bytes=freed_bytes,
             shards_done=shards_done,
+            shards_skipped=shards_skipped,
             cut_off=cut_off,
             next_shard=next_shard,
             sweep_secs=time.monotonic() - sweep_start,
         )
 
+    @staticmethod
+    def _gc_dir_mtime(path: str) -> int:
+        """A shard dir's mtime_ns, or 0 if it doesn't exist."""
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _load_gc_state(self) -> _GcState:
+        """Load the persisted GC state (fresh if absent/unreadable)."""
+        path = self._gc_state_path
+        try:
+            with open(path, encoding='utf-8') as infile:
+                state = dataclass_from_json(_GcState, infile.read())
+        except FileNotFoundError:
+            return _GcState(layout_version=_GC_STATE_LAYOUT_VERSION)
+        except Exception as exc:
+            logger.warning(
+                'Error loading asset GC state %s; starting fresh.',
+                path,
+                exc_info=True,
+            )
+            strip_exception_tracebacks(exc)
+            return _GcState(layout_version=_GC_STATE_LAYOUT_VERSION)
+        if state.layout_version != _GC_STATE_LAYOUT_VERSION:
+            return _GcState(layout_version=_GC_STATE_LAYOUT_VERSION)
+        return state
+
+    def _persist_gc_state(self, state: _GcState) -> None:
+        """Atomically persist the GC state.
+
+        Atomic so a clean mark can never be read back without the
+        reachability cache it was computed against. Not ``fsync``-ed:
+        an older state is still self-consistent, it just leaves more
+        work for the next pass.
+        """
+        path = self._gc_state_path
+        destdir = os.path.dirname(path)
+        try:
+            os.makedirs(destdir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=destdir, prefix='.tmp_gc_')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as outfile:
+                    outfile.write(dataclass_to_json(state))
+                os.replace(tmp, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            logger.exception('Error persisting asset GC state %s.', path)
+
     def _read_gc_cursor(self) -> int:
         """Read the persisted rotating shard cursor (0 if absent/invalid)."""
         try:
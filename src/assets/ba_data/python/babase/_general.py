@@ -517,10 +517,14 @@ class WeakMethod:
         return f'<babase.WeakMethod object; func={self.func!r}>'
 
 
-def verify_object_death(obj: object) -> None:
+def verify_object_death(
+    obj: object, *, on_result: Callable[[bool], Any] | None = None
+) -> None:
     """Warn if an object does not get freed within a short period.
 
-    This can be handy to detect and prevent memory/resource leaks.
+    This can be handy to detect and prevent memory/resource leaks. If
+    ``on_result`` is passed, it is called with whether the object died
+    once the check runs.
     """
 
     try:
@@ -536,12 +540,18 @@ def verify_object_death(obj: object) -> None:
     # Make this timer in an empty context; don't want it dying with the
     # scene/etc.
     with _babase.ContextRef.empty():
-        _babase.apptimer(delay, CallStrict(_verify_object_death, ref))
+        _babase.apptimer(
+            delay, CallStrict(_verify_object_death, ref, on_result)
+        )
 
 
-def _verify_object_death(wref: weakref.ref) -> None:
+def _verify_object_death(
+    wref: weakref.ref, on_result: Callable[[bool], Any] | None
+) -> None:
     obj = wref()
     if obj is None:
+        if on_result is not None:
+            on_result(True)
         return
 
     try:
@@ -555,6 +565,9 @@ def _verify_object_death(wref: weakref.ref) -> None:
         f' {Clr.BLD}{obj}{Clr.RST}\n'
         'See efro.debug for ways to debug this.'
     )
+    del obj
+    if on_result is not None:
+        on_result(False)
 
 
 def storagename(suffix: str | None = None) -> str:
@@ -250,18 +250,11 @@ class LogReporter:
 
             # Tripped. This entry's index is the cache's current end:
             # emits and callbacks share the LogHandler thread, and the
-            # handler appends before running callbacks. (get_cached
-            # takes the handler's cache lock, which is safe here: the
-            # handler never runs callbacks while holding it. Config
-            # also cannot be set until well after our callback was
-            # registered, so replayed pre-registration entries -- for
-            # which this index math would be wrong -- can never trip.)
-            trigger_index = (
-                self._log_handler.get_cached(
-                    start_index=0, max_entries=0
-                ).log_size
-                - 1
-            )
+            # handler appends before running callbacks. (Config cannot
+            # be set until well after our callback was registered, so
+            # replayed pre-registration entries -- for which this
+            # index math would be wrong -- can never trip.)
+            trigger_index = self._log_handler.log_size - 1
             self._window = LogReportWindow.from_trigger(trigger_index, spec)
             self._trigger_level = entry.level
             self._trigger_phrase = phrase
@@ -2,9 +2,9 @@
 #
 """Functionality related to dynamic discoverability of classes."""
 
-import time
+import os
 import logging
-from threading import Thread
+from threading import Thread, Event
 from functools import partial
 from typing import TYPE_CHECKING
 
@@ -43,6 +43,7 @@ class MetadataSubsystem:
 
         # Results populated once scan is complete.
         self.scanresults: ScanResults | None = None
+        self._scan_done = Event()
 
         self._scan_complete_cb: Callable[[], None] | None = None
 
@@ -72,6 +73,7 @@ class MetadataSubsystem:
             expected_api_version=env.api_version,
             deprecated_export_shortcuts=_DEPRECATED_EXPORT_SHORTCUTS,
             expects_extras=True,
+            cache_path=os.path.join(env.cache_directory, 'metascan.json'),
         )
 
         lifecyclelog.debug('meta-scan bg thread kicked off')
@@ -157,14 +159,10 @@ class MetadataSubsystem:
 
             # Now wait a bit for the scan to complete. Eventually error
             # though if it doesn't.
-            starttime = time.time()
-            while self.scanresults is None:
-                time.sleep(0.05)
-                if time.time() - starttime > 10.0:
-                    raise TimeoutError(
-                        'timeout waiting for meta scan to complete.'
-                    )
+            if not self._scan_done.wait(timeout=10.0):
+                raise TimeoutError('timeout waiting for meta scan to complete.')
 
+        assert self.scanresults is not None
         return self.scanresults
 
     def _run_scan_in_bg(self) -> None:
@@ -180,6 +178,7 @@ class MetadataSubsystem:
 
         # Place results and tell the logic thread they're ready.
         self.scanresults = results
+        self._scan_done.set()
         lifecyclelog.debug('meta-scan bg thread done')
         _babase.pushcall(self._handle_scan_results, from_other_thread=True)
 
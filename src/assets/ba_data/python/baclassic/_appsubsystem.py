@@ -35,6 +35,7 @@ if TYPE_CHECKING:
     import bacommon.classic
     import bacommon.clienteffect as clfx
     import bacommon.clouddialog.basic as bcdlg
+    from bacommon.loadtest import LoadTestConfig
     from bascenev1lib.actor import spazappearance
     from bauiv1lib.party import PartyWindow
 
@@ -706,6 +707,25 @@ class ClassicAppSubsystem(babase.AppSubsystem):
             attract_mode=attract_mode,
         )
 
+    def run_load_test(self, config: LoadTestConfig) -> None:
+        """Run a headless load test and write a json report when done.
+
+        Runs sessions from a playlist with synthetic players and bots
+        for a set duration, recording logic lag, memory growth, and
+        activities that fail to die. Handy for catching performance
+        regressions in game modes; see :mod:`bacommon.loadtest`. For
+        example, from ``--exec`` code on a headless build::
+
+          from bacommon.loadtest import LoadTestConfig
+
+          babase.app.classic.run_load_test(
+              LoadTestConfig(playlist_name='My Playlist', bot_count=4)
+          )
+        """
+        from baclassic._benchmark import run_load_test
+
+        run_load_test(config)
+
     def get_input_device_mapped_value(
         self,
         device: bascenev1.InputDevice,
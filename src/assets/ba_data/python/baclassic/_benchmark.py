@@ -2,10 +2,23 @@
 #
 """Benchmark/Stress-Test related functionality."""
 
+import os
+import gc
+import time
 import random
+import logging
+import weakref
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, override
 
+from efro.util import utc_now
+from efro.dataclassio import dataclass_to_json
+from bacommon.loadtest import (
+    LogicLagStats,
+    LoadTestReport,
+    LoadTestActivityReport,
+)
+
 import babase
 import bascenev1
 import _baclassic
@@ -13,6 +26,17 @@ import _baclassic
 if TYPE_CHECKING:
     from typing import Any
 
+    from bacommon.loadtest import LoadTestConfig
+    from bascenev1lib.actor.spazbot import SpazBot, SpazBotSet
+
+# How often load tests measure logic lag (seconds).
+_LOAD_TEST_SAMPLE_INTERVAL = 0.05
+
+# How long a finished load test waits for leak checks before reporting.
+_LOAD_TEST_LEAK_CHECK_TIMEOUT = 20.0
+
+_g_load_test: _LoadTest | None = None
+
 
 def run_cpu_benchmark() -> None:
     """Run a cpu benchmark."""
@@ -180,6 +204,284 @@ def _reset_stress_test(args: _StressTestArgs) -> None:
         babase.apptimer(1.0, babase.CallStrict(_start_stress_test, args))
 
 
+def run_load_test(config: LoadTestConfig) -> None:
+    """Run a headless load test and write a report when done."""
+    global _g_load_test  # pylint: disable=global-statement
+
+    if _g_load_test is not None:
+        raise RuntimeError('A load test is already running.')
+    with babase.ContextRef.empty():
+        _g_load_test = _LoadTest(config)
+
+
+def _get_rss() -> int | None:
+    """Return our resident set size in bytes (None if unsupported)."""
+    try:
+        with open('/proc/self/statm', encoding='utf-8') as infile:
+            pages = int(infile.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _ActivityRecord:
+    """What a load test has seen of one activity."""
+
+    def __init__(self, activity: bascenev1.Activity, start_time: float) -> None:
+        self.activity = weakref.ref(activity)
+        self.activity_type = type(activity).__name__
+        self.start_time = start_time
+        self.end_time: float | None = None
+        self.lag_samples: list[float] = []
+        self.max_players = 0
+        self.bots: SpazBotSet | None = None
+        self.bots_pending = 0
+        self.bots_spawned = 0
+        self.rss_start = _get_rss()
+        self.rss_end: int | None = None
+        self.python_objects_start = len(gc.get_objects())
+        self.python_objects_end = 0
+        self.leak_check_started = False
+        self.leaked: bool | None = None
+
+    def finish(self, end_time: float) -> None:
+        """Note that the activity has left the foreground."""
+        self.end_time = end_time
+        self.rss_end = _get_rss()
+        self.python_objects_end = len(gc.get_objects())
+
+        # Don't let our bots keep anything alive.
+        self.bots = None
+
+    def on_bot_spawned(self, bot: SpazBot) -> None:
+        """Called when one of our bots appears."""
+        del bot  # Unused.
+        self.bots_pending -= 1
+        self.bots_spawned += 1
+
+    def on_death_verified(self, died: bool) -> None:
+        """Called with the result of our activity's leak check."""
+        self.leaked = not died
+
+    def get_report(self, now: float) -> LoadTestActivityReport:
+        """Summarize what we saw."""
+        end_time = now if self.end_time is None else self.end_time
+        return LoadTestActivityReport(
+            activity_type=self.activity_type,
+            start_time=self.start_time,
+            duration=end_time - self.start_time,
+            logic_lag=LogicLagStats.from_samples(self.lag_samples),
+            max_players=self.max_players,
+            bots_spawned=self.bots_spawned,
+            rss_start=self.rss_start,
+            rss_end=self.rss_end,
+            python_objects_start=self.python_objects_start,
+            python_objects_end=self.python_objects_end,
+            leaked=self.leaked,
+        )
+
+
+class _LoadTest:
+    """A load test in progress."""
+
+    def __init__(self, config: LoadTestConfig) -> None:
+        from bascenev1 import DualTeamSession, FreeForAllSession
+
+        self._config = config
+        self._start_time = time.monotonic()
+        self._start_datetime = utc_now()
+        self._end_time: float | None = None
+        self._rss_start = self._rss_max = _get_rss()
+        self._python_objects_start = len(gc.get_objects())
+        self._lag_samples: list[float] = []
+        self._records: list[_ActivityRecord] = []
+        self._current: _ActivityRecord | None = None
+        self._last_sample_time = self._start_time
+
+        sessiontype: type[bascenev1.Session]
+        appconfig = babase.app.config
+        if config.playlist_type == 'Teams':
+            sessiontype = DualTeamSession
+            appconfig['Team Tournament Playlist Selection'] = (
+                config.playlist_name
+            )
+            appconfig['Team Tournament Playlist Randomize'] = 0
+        elif config.playlist_type == 'Free-For-All':
+            sessiontype = FreeForAllSession
+            appconfig['Free-for-All Playlist Selection'] = config.playlist_name
+            appconfig['Free-for-All Playlist Randomize'] = 0
+        else:
+            raise ValueError(
+                f'Invalid playlist_type {config.playlist_type!r};'
+                " expected 'Teams' or 'Free-For-All'."
+            )
+
+        logging.info(
+            'Starting load test (%s playlist %r, %d players, %d bots,'
+            ' %.0fs, seed %d).',
+            config.playlist_type,
+            config.playlist_name,
+            config.player_count,
+            config.bot_count,
+            config.duration,
+            config.seed,
+        )
+        random.seed(config.seed)
+        bascenev1.new_host_session(sessiontype)
+        _baclassic.set_stress_testing(
+            True, config.player_count, False, config.seed
+        )
+        self._sample_timer: babase.AppTimer | None = babase.AppTimer(
+            _LOAD_TEST_SAMPLE_INTERVAL, self._sample, repeat=True
+        )
+        self._update_timer: babase.AppTimer | None = babase.AppTimer(
+            1.0, self._update, repeat=True
+        )
+        self._end_timer: babase.AppTimer | None = babase.AppTimer(
+            config.duration, self._end
+        )
+
+    def _sample(self) -> None:
+        now = time.monotonic()
+        lag = max(
+            0.0, now - self._last_sample_time - _LOAD_TEST_SAMPLE_INTERVAL
+        )
+        self._last_sample_time = now
+        elapsed = now - self._start_time
+
+        if self._end_time is None:
+            self._lag_samples.append(lag)
+            activity = bascenev1.get_foreground_host_activity()
+            record = self._current
+            if activity is not (None if record is None else record.activity()):
+                if record is not None:
+                    record.finish(elapsed)
+                record = self._current = (
+                    None
+                    if activity is None
+                    else _ActivityRecord(activity, elapsed)
+                )
+                if record is not None:
+                    self._records.append(record)
+            if activity is not None and record is not None:
+                record.lag_samples.append(lag)
+                record.max_players = max(
+                    record.max_players, len(activity.players)
+                )
+            del activity  # Don't hold on to this.
+
+        self._check_leaks()
+
+        # Once finished, report when all leak checks are done (or when
+        # we've waited long enough).
+        if self._end_time is not None and (
+            all(r.leaked is not None for r in self._records)
+            or elapsed - self._end_time > _LOAD_TEST_LEAK_CHECK_TIMEOUT
+        ):
+            self._finish()
+
+    def _check_leaks(self) -> None:
+        for record in self._records:
+            if record.leak_check_started:
+                continue
+            activity = record.activity()
+            if activity is None:
+                record.leak_check_started = True
+                record.leaked = False
+            elif activity.expired:
+                record.leak_check_started = True
+                babase.verify_object_death(
+                    activity, on_result=record.on_death_verified
+                )
+
+    def _update(self) -> None:
+        from bascenev1lib.actor.spazbot import SpazBotSet, BrawlerBot
+
+        rss = _get_rss()
+        if rss is not None:
+            self._rss_max = max(rss, self._rss_max or 0)
+
+        # Keep our bot count up in games.
+        record = self._current
+        if record is None or not self._config.bot_count:
+            return
+        activity = record.activity()
+        if (
+            not isinstance(activity, bascenev1.GameActivity)
+            or not activity.has_begun()
+            or activity.has_ended()
+            or activity.expired
+        ):
+            return
+        with activity.context:
+            if record.bots is None:
+                record.bots = SpazBotSet()
+            missing = (
+                self._config.bot_count
+                - len(record.bots.get_living_bots())
+                - record.bots_pending
+            )
+            for _i in range(missing):
+                record.bots_pending += 1
+                record.bots.spawn_bot(
+                    BrawlerBot,
+                    pos=activity.map.get_ffa_start_position(activity.players),
+                    spawn_time=1.0,
+                    on_spawn_call=record.on_bot_spawned,
+                )
+
+    def _end(self) -> None:
+        self._end_time = time.monotonic() - self._start_time
+        self._end_timer = None
+        self._update_timer = None
+        _baclassic.set_stress_testing(False, 0, False)
+        if self._current is not None:
+            self._current.finish(self._end_time)
+            self._current = None
+
+        # Ending the session expires its activities so we can check
+        # them for leaks.
+        session = bascenev1.get_foreground_host_session()
+        if session is not None:
+            session.end()
+
+    def _finish(self) -> None:
+        global _g_load_test  # pylint: disable=global-statement
+
+        assert self._end_time is not None
+        self._sample_timer = None
+        _g_load_test = None
+
+        report = LoadTestReport(
+            config=self._config,
+            app_version=babase.app.env.engine_version,
+            build_number=babase.app.env.engine_build_number,
+            start_time=self._start_datetime,
+            duration=self._end_time,
+            logic_lag=LogicLagStats.from_samples(self._lag_samples),
+            rss_start=self._rss_start,
+            rss_end=_get_rss(),
+            rss_max=self._rss_max,
+            python_objects_start=self._python_objects_start,
+            python_objects_end=len(gc.get_objects()),
+            activities=[r.get_report(self._end_time) for r in self._records],
+        )
+        with open(self._config.report_path, 'w', encoding='utf-8') as outfile:
+            outfile.write(dataclass_to_json(report, pretty=True))
+        logging.info(
+            'Load test done (p99 logic lag %.1fms); wrote %s.',
+            report.logic_lag.p99 * 1000.0,
+            self._config.report_path,
+        )
+        if report.leaked_activity_types:
+            logging.warning(
+                'Activities leaked during load test: %s.',
+                ', '.join(sorted(report.leaked_activity_types)),
+            )
+        if self._config.quit_when_done:
+            babase.quit()
+
+
 def run_media_reload_benchmark() -> None:
     """Kick off a benchmark to test media reloading speeds."""
     babase.reload_media()
@@ -0,0 +1,241 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Performance metrics for servers, served in Prometheus text format."""
+
+import gc
+import time
+import asyncio
+import logging
+import weakref
+from collections import deque
+from functools import partial
+from typing import TYPE_CHECKING
+
+from bacommon.prometheus import Histogram, render_metric, handle_scrape
+
+import babase
+import bascenev1
+
+if TYPE_CHECKING:
+    from typing import Any
+
+# Histogram bucket upper bounds (seconds). Logic lag is how late our
+# watch timer runs; a long logic-thread tick delays it by about that
+# tick's length, so this doubles as a tick-duration histogram for ticks
+# that matter.
+_LOGIC_LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_GC_PAUSE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+# Per-second totals from bascenev1.get_client_net_stats() and the
+# metrics we serve them as.
+_NET_STATS = {
+    'bytes_out': 'Bytes sent to clients (uncompressed)',
+    'bytes_out_compressed': 'Bytes sent to clients over the wire',
+    'messages_out': 'Packets sent to clients',
+    'bytes_resent': 'Bytes re-sent to clients for lost packets',
+    'message_resends': 'Packets re-sent to clients',
+    'bytes_in': 'Bytes received from clients (uncompressed)',
+    'bytes_in_compressed': 'Bytes received from clients over the wire',
+    'messages_in': 'Packets received from clients',
+}
+
+
+class ServerMetrics:
+    """Samples server performance and serves it to Prometheus scrapers.
+
+    Metrics are served at ``http://127.0.0.1:<port>/metrics`` from the
+    logic thread's event loop, so each scrape sees a consistent
+    snapshot. The server controller feeds us logic-lag samples; garbage
+    collection pauses are measured as they happen.
+    """
+
+    def __init__(self, port: int) -> None:
+        self._port = port
+        self._server: asyncio.Server | None = None
+        self._logic_lag = Histogram(_LOGIC_LAG_BUCKETS)
+
+        # Collections can happen in any thread and during any
+        # allocation (including our own while rendering), so _on_gc just
+        # queues (pause, collected) pairs for the logic thread to fold
+        # in. No lock here: one held while rendering would deadlock
+        # against a collection triggered on the same thread.
+        self._gc_events: deque[tuple[float, int]] = deque()
+        self._gc_pauses = Histogram(_GC_PAUSE_BUCKETS)
+        self._gc_collected = 0
+        self._gc_start_time: float | None = None
+
+        # Tick-timer calls, by activity type; accumulated across
+        # activities so these can be counters.
+        self._tick_timer_calls: dict[str, int] = {}
+        self._scheduler: weakref.ref[bascenev1.TickScheduler] | None = None
+        self._scheduler_calls = 0
+
+        gc.callbacks.append(self._on_gc)
+        babase.app.create_async_task(self._serve(), name='server metrics')
+
+    def sample(self, logic_lag: float) -> None:
+        """Record a logic lag measurement and sample activity stats.
+
+        Should be called regularly from the logic thread.
+        """
+        self._logic_lag.observe(logic_lag)
+        self._fold_gc_events()
+
+        activity = bascenev1.get_foreground_host_activity()
+        scheduler = None if activity is None else activity.tick_scheduler
+        if scheduler is not (
+            None if self._scheduler is None else self._scheduler()
+        ):
+            self._scheduler = (
+                None if scheduler is None else weakref.ref(scheduler)
+            )
+            self._scheduler_calls = 0
+        if activity is not None and scheduler is not None:
+            label = type(activity).__name__
+            self._tick_timer_calls[label] = (
+                self._tick_timer_calls.get(label, 0)
+                + scheduler.call_count
+                - self._scheduler_calls
+            )
+            self._scheduler_calls = scheduler.call_count
+
+    def render(self) -> str:
+        """Return all current metrics in Prometheus text format."""
+        # pylint: disable=too-many-locals
+        out: list[str] = []
+        render_metric(
+            out,
+            'ballistica_app_time_seconds',
+            'gauge',
+            'Time the app has been running.',
+            babase.apptime(),
+        )
+        self._logic_lag.render(
+            out,
+            'ballistica_logic_lag_seconds',
+            'How late logic-thread timers run (long ticks delay them).',
+        )
+
+        self._fold_gc_events()
+        self._gc_pauses.render(
+            out,
+            'ballistica_gc_pause_seconds',
+            'Python garbage collection pauses.',
+        )
+        render_metric(
+            out,
+            'ballistica_gc_collected_objects_total',
+            'counter',
+            'Objects freed by Python garbage collection.',
+            self._gc_collected,
+        )
+        try:
+            gcmode = babase.app.gc.mode.value
+        except RuntimeError:
+            gcmode = None
+        if gcmode is not None:
+            render_metric(
+                out,
+                'ballistica_gc_mode',
+                'gauge',
+                'Current garbage collection mode.',
+                {f'mode="{gcmode}"': 1},
+            )
+
+        roster = [
+            c for c in bascenev1.get_game_roster() if c['client_id'] != -1
+        ]
+        render_metric(
+            out,
+            'ballistica_clients',
+            'gauge',
+            'Connected clients.',
+            len(roster),
+        )
+        render_metric(
+            out,
+            'ballistica_players',
+            'gauge',
+            'Players in the game.',
+            sum(len(c['players']) for c in roster),
+        )
+
+        netstats = bascenev1.get_client_net_stats()
+        for key, helptext in _NET_STATS.items():
+            render_metric(
+                out,
+                f'ballistica_net_{key}_per_second',
+                'gauge',
+                f'{helptext} over the last second.',
+                netstats[key],
+            )
+
+        render_metric(
+            out,
+            'ballistica_tick_timer_calls_total',
+            'counter',
+            'Tick-timer calls made, by activity type.',
+            {f'activity="{k}"': v for k, v in self._tick_timer_calls.items()},
+        )
+        activity = bascenev1.get_foreground_host_activity()
+        if activity is not None and not activity.expired:
+            label = f'activity="{type(activity).__name__}"'
+            scheduler = activity.tick_scheduler
+            render_metric(
+                out,
+                'ballistica_activity_tick_timers',
+                'gauge',
+                'Tick-timers scheduled in the current activity.',
+                {label: scheduler.timer_count},
+            )
+            render_metric(
+                out,
+                'ballistica_activity_tick_native_timers',
+                'gauge',
+                'Native timers running tick-timers in the current activity.',
+                {label: scheduler.native_timer_count},
+            )
+            with activity.context:
+                nodecount = len(bascenev1.getnodes())
+            render_metric(
+                out,
+                'ballistica_activity_nodes',
+                'gauge',
+                'Nodes in the current activity.',
+                {label: nodecount},
+            )
+
+        out.append('')
+        return '\n'.join(out)
+
+    def _fold_gc_events(self) -> None:
+        while self._gc_events:
+            pause, collected = self._gc_events.popleft()
+            self._gc_pauses.observe(pause)
+            self._gc_collected += collected
+
+    def _on_gc(self, phase: str, info: dict[str, Any]) -> None:
+        if phase == 'start':
+            self._gc_start_time = time.perf_counter()
+            return
+        if self._gc_start_time is None:
+            return
+        duration = time.perf_counter() - self._gc_start_time
+        self._gc_start_time = None
+        self._gc_events.append((duration, info['collected']))
+
+    async def _serve(self) -> None:
+        try:
+            self._server = await asyncio.start_server(
+                partial(handle_scrape, render=self.render),
+                '127.0.0.1',
+                self._port,
+            )
+        except OSError as exc:
+            logging.warning(
+                'Unable to serve metrics on port %d: %s.', self._port, exc
+            )
+            return
+        logging.info(
+            'Serving metrics at http://127.0.0.1:%d/metrics.', self._port
+        )
@@ -2,12 +2,18 @@
 #
 """Functionality related to running the game in server-mode."""
 
+import os
 import sys
 import time
+import asyncio
+import weakref
 import logging
 from typing import TYPE_CHECKING
 
+from efro.rpc import RPCEndpoint
+from efro.error import CommunicationError
 from efro.terminal import Clr
+from efro.message import MessageSender, BoolResponse
 from bacommon.servermanager import (
     ServerCommand,
     StartServerModeCommand,
@@ -16,14 +22,30 @@ from bacommon.servermanager import (
     ChatMessageCommand,
     ScreenMessageCommand,
     ClientListCommand,
+    ClientListResponse,
     KickCommand,
+    StatusCommand,
+    ServerStatusResponse,
+    ServerClientInfo,
+    ServerStatus,
+    ServerEvent,
+    ServerEventType,
+    ServerEventMessage,
+    ServerHelloMessage,
+    ServerTelemetryMessage,
+    ControlChannelReceiver,
+    get_manager_to_server_protocol,
+    get_server_to_manager_protocol,
 )
 import babase
 import bascenev1
 
+from baclassic._servermetrics import ServerMetrics
+
 if TYPE_CHECKING:
-    from typing import Any
+    from typing import Any, Awaitable
 
+    from efro.message import Message
     from bacommon.servermanager import ServerConfig
 
 
@@ -38,58 +60,170 @@ def _cmd(command_data: bytes) -> None:
 
     if isinstance(command, StartServerModeCommand):
         assert babase.app.classic.server is None
-        babase.app.classic.server = ServerController(command.config)
-        return
-
-    if isinstance(command, ShutdownCommand):
-        assert babase.app.classic.server is not None
-        babase.app.classic.server.shutdown(
-            reason=command.reason, immediate=command.immediate
+        babase.app.classic.server = ServerController(
+            command.config,
+            control_address=command.control_address,
+            control_token=command.control_token,
+            telemetry_interval=command.telemetry_interval,
         )
         return
 
-    if isinstance(command, ChatMessageCommand):
-        assert babase.app.classic.server is not None
-        bascenev1.chatmessage(command.message, clients=command.clients)
-        return
-
-    if isinstance(command, ScreenMessageCommand):
-        assert babase.app.classic.server is not None
-
-        # Note: we have to do transient messages if
-        # clients is specified, so they won't show up
-        # in replays.
-        bascenev1.broadcastmessage(
-            command.message,
-            color=command.color,
-            clients=command.clients,
-            transient=command.clients is not None,
-        )
-        return
+    assert babase.app.classic.server is not None
 
+    # Over stdin there's nobody to answer, so just print client lists.
     if isinstance(command, ClientListCommand):
-        assert babase.app.classic.server is not None
         babase.app.classic.server.print_client_list()
         return
 
-    if isinstance(command, KickCommand):
-        assert babase.app.classic.server is not None
-        babase.app.classic.server.kick(
-            client_id=command.client_id, ban_time=command.ban_time
+    babase.app.classic.server.run_command(command)
+
+
+def _client_name(client: dict[str, Any]) -> str:
+    """Return the account name for a game roster entry."""
+    import json
+
+    return json.loads(client['spec_string'])['n']
+
+
+class _ManagerLink:
+    """A server's control channel to its server manager.
+
+    Commands come in and telemetry and events go out as efro.messages
+    over an efro.rpc connection running in the logic thread's event
+    loop.
+    """
+
+    receiver = ControlChannelReceiver(get_manager_to_server_protocol())
+    sender = MessageSender(get_server_to_manager_protocol())
+
+    def __init__(
+        self, controller: ServerController, address: tuple[str, int]
+    ) -> None:
+        self._controller = controller
+        self._address = address
+        self._endpoint: RPCEndpoint | None = None
+
+    def start(self, token: str) -> None:
+        """Connect and introduce ourself."""
+        babase.app.create_async_task(
+            self._run(token), name='server manager link'
+        )
+
+    @property
+    def connected(self) -> bool:
+        """Whether we can currently send stuff."""
+        return self._endpoint is not None and not self._endpoint.is_closing()
+
+    def send(self, message: Message) -> None:
+        """Send a message to the server manager (if connected).
+
+        Messages go out in the order they are sent; the manager doesn't
+        answer them so we don't wait on anything.
+        """
+        if not self.connected:
+            return
+
+        # Note: endpoints must be used from within their event loop, so
+        # we do the actual sending in a task. Tasks start in the order
+        # they are created, so ordering is preserved.
+        babase.app.create_async_task(
+            self._send(message), name='server manager send'
         )
-        return
 
-    print(
-        f'{Clr.SRED}ERROR: server process'
-        f' got unknown command: {type(command)}{Clr.RST}'
-    )
+    async def _send(self, message: Message) -> None:
+        if not self.connected:
+            return
+        try:
+            await self.sender.send_async(self, message)
+        except CommunicationError:
+            # Connection trouble shows up in the endpoint itself.
+            pass
+
+    async def _run(self, token: str) -> None:
+        try:
+            reader, writer = await asyncio.open_connection(*self._address)
+        except OSError as exc:
+            logging.warning(
+                'Unable to connect to server manager at %s:%d: %s;'
+                ' only accepting commands through stdin.',
+                *self._address,
+                exc,
+            )
+            return
+        self._endpoint = RPCEndpoint(
+            self._handle_raw_message, reader, writer, 'server manager link'
+        )
+        self.send(ServerHelloMessage(token=token))
+        await self._endpoint.run()
+        self._endpoint = None
+        logging.warning('Lost connection to server manager.')
+
+    @sender.send_async_method
+    def _send_raw_message(self, data: bytes) -> Awaitable[bytes]:
+        assert self._endpoint is not None
+        return self._endpoint.send_message(data)
+
+    async def _handle_raw_message(self, data: bytes) -> bytes:
+        return self.receiver.handle_raw_message(self, data)
+
+    @receiver.handler
+    def _handle_shutdown(self, msg: ShutdownCommand) -> None:
+        self._controller.run_command(msg)
+
+    @receiver.handler
+    def _handle_chat_message(self, msg: ChatMessageCommand) -> None:
+        self._controller.run_command(msg)
+
+    @receiver.handler
+    def _handle_screen_message(self, msg: ScreenMessageCommand) -> None:
+        self._controller.run_command(msg)
+
+    @receiver.handler
+    def _handle_client_list(self, msg: ClientListCommand) -> ClientListResponse:
+        del msg  # Unused.
+        return ClientListResponse(clients=self._controller.get_client_list())
+
+    @receiver.handler
+    def _handle_kick(self, msg: KickCommand) -> BoolResponse:
+        return BoolResponse(
+            value=self._controller.kick(
+                client_id=msg.client_id, ban_time=msg.ban_time
+            )
+        )
+
+    @receiver.handler
+    def _handle_status(self, msg: StatusCommand) -> ServerStatusResponse:
+        del msg  # Unused.
+        return ServerStatusResponse(status=self._controller.get_status())
 
 
 class ServerController:
     """Overall controller for the app in server mode."""
 
-    def __init__(self, config: ServerConfig) -> None:
+    # How often we measure logic thread lag and (with a server manager
+    # connected) look for roster/session changes.
+    WATCH_INTERVAL = 0.25
+
+    def __init__(
+        self,
+        config: ServerConfig,
+        *,
+        control_address: tuple[str, int] | None = None,
+        control_token: str | None = None,
+        telemetry_interval: float = 1.0,
+    ) -> None:
         self._config = config
+        self._link: _ManagerLink | None = None
+        self._watch_timer: babase.AppTimer | None = None
+        self._telemetry_timer: babase.AppTimer | None = None
+        self._metrics: ServerMetrics | None = None
+        self._last_watch_time = time.monotonic()
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_samples = 0
+        self._roster_names: dict[int, str] = {}
+        self._session: weakref.ref[bascenev1.Session] | None = None
+        self._activity: weakref.ref[bascenev1.Activity] | None = None
         self._playlist_name = '__default__'
         self._ran_access_check = False
         self._prep_timer: babase.AppTimer | None = None
@@ -120,10 +254,168 @@ class ServerController:
                 0.25, self._prepare_to_serve, repeat=True
             )
 
+            self._watch_timer = babase.AppTimer(
+                self.WATCH_INTERVAL, self._watch, repeat=True
+            )
+
+            if self._config.metrics_port is not None:
+                self._metrics = ServerMetrics(self._config.metrics_port)
+
+            # Keep our server manager informed if it wants us to.
+            if control_address is not None and control_token is not None:
+                self._link = _ManagerLink(self, control_address)
+                self._link.start(control_token)
+                self._telemetry_timer = babase.AppTimer(
+                    telemetry_interval, self._send_telemetry, repeat=True
+                )
+
+    def run_command(self, command: ServerCommand) -> None:
+        """Run a command from our server manager."""
+        if isinstance(command, ShutdownCommand):
+            self.shutdown(reason=command.reason, immediate=command.immediate)
+        elif isinstance(command, ChatMessageCommand):
+            bascenev1.chatmessage(command.message, clients=command.clients)
+        elif isinstance(command, ScreenMessageCommand):
+            # Note: we have to do transient messages if
+            # clients is specified, so they won't show up
+            # in replays.
+            bascenev1.broadcastmessage(
+                command.message,
+                color=command.color,
+                clients=command.clients,
+                transient=command.clients is not None,
+            )
+        elif isinstance(command, KickCommand):
+            self.kick(client_id=command.client_id, ban_time=command.ban_time)
+        else:
+            print(
+                f'{Clr.SRED}ERROR: server process'
+                f' got unknown command: {type(command)}{Clr.RST}'
+            )
+
+    def get_status(self) -> ServerStatus:
+        """Return our current status.
+
+        Logic lag values cover the time since we last sent telemetry.
+        """
+        roster = [
+            c for c in bascenev1.get_game_roster() if c['client_id'] != -1
+        ]
+        return ServerStatus(
+            time=time.time(),
+            party_name=self._config.party_name,
+            client_count=len(roster),
+            player_count=sum(len(c['players']) for c in roster),
+            max_party_size=self._config.max_party_size,
+            session_type=(
+                None
+                if bascenev1.get_foreground_host_session() is None
+                else self._config.session_type
+            ),
+            logic_lag_avg=(
+                self._lag_total / self._lag_samples
+                if self._lag_samples
+                else 0.0
+            ),
+            logic_lag_max=self._lag_max,
+        )
+
+    def get_client_list(self) -> list[ServerClientInfo]:
+        """Return info about all connected clients."""
+        return [
+            ServerClientInfo(
+                client_id=client['client_id'],
+                name=_client_name(client),
+                account_id=client['account_id'],
+                players=[p['name'] for p in client['players']],
+            )
+            for client in bascenev1.get_game_roster()
+            if client['client_id'] != -1
+        ]
+
+    def _send_telemetry(self) -> None:
+        assert self._link is not None
+        if self._link.connected:
+            self._link.send(ServerTelemetryMessage(status=self.get_status()))
+        self._lag_total = self._lag_max = 0.0
+        self._lag_samples = 0
+
+    def _watch(self) -> None:
+        """Measure how we're keeping up and look for things to report."""
+        now = time.monotonic()
+        lag = max(0.0, now - self._last_watch_time - self.WATCH_INTERVAL)
+        self._last_watch_time = now
+        self._lag_total += lag
+        self._lag_max = max(self._lag_max, lag)
+        self._lag_samples += 1
+        if self._metrics is not None:
+            self._metrics.sample(lag)
+
+        # Roster/session tracking only feeds the server manager; skip it
+        # when there's nobody to tell. Starting from scratch on the next
+        # connect means a new manager gets the current state as events.
+        if self._link is None or not self._link.connected:
+            self._roster_names = {}
+            self._session = self._activity = None
+            return
+
+        events: list[ServerEvent] = []
+        curtime = time.time()
+
+        roster_names = {
+            c['client_id']: _client_name(c)
+            for c in bascenev1.get_game_roster()
+            if c['client_id'] != -1
+        }
+        for client_id, name in roster_names.items():
+            if client_id not in self._roster_names:
+                events.append(
+                    ServerEvent(
+                        ServerEventType.CLIENT_JOINED, curtime, client_id, name
+                    )
+                )
+        for client_id, name in self._roster_names.items():
+            if client_id not in roster_names:
+                events.append(
+                    ServerEvent(
+                        ServerEventType.CLIENT_LEFT, curtime, client_id, name
+                    )
+                )
+        self._roster_names = roster_names
+
+        # Note: we only hold weak refs so we don't keep these alive.
+        session = bascenev1.get_foreground_host_session()
+        if session is not (None if self._session is None else self._session()):
+            self._session = None if session is None else weakref.ref(session)
+            events.append(
+                ServerEvent(
+                    ServerEventType.SESSION_CHANGED,
+                    curtime,
+                    detail=(
+                        None if session is None else type(session).__name__
+                    ),
+                )
+            )
+        activity = bascenev1.get_foreground_host_activity()
+        if activity is not (
+            None if self._activity is None else self._activity()
+        ):
+            self._activity = None if activity is None else weakref.ref(activity)
+            events.append(
+                ServerEvent(
+                    ServerEventType.ACTIVITY_CHANGED,
+                    curtime,
+                    detail=(
+                        None if activity is None else type(activity).__name__
+                    ),
+                )
+            )
+
+        if events:
+            self._link.send(ServerEventMessage(events=events))
+
     def print_client_list(self) -> None:
         """Print info about all connected clients."""
-        import json
-
         roster = bascenev1.get_game_roster()
         title1 = 'Client ID'
         title2 = 'Account Name'
@@ -138,26 +430,28 @@ class ServerController:
         for client in roster:
             if client['client_id'] == -1:
                 continue
-            spec = json.loads(client['spec_string'])
-            name = spec['n']
+            name = _client_name(client)
             players = ', '.join(n['name'] for n in client['players'])
             clientid = client['client_id']
             out += f'\n{clientid:<{col1}} {name:<{col2}} {players}'
         print(out)
 
-    def kick(self, client_id: int, ban_time: int | None) -> None:
+    def kick(self, client_id: int, ban_time: int | None) -> bool:
         """Kick the provided client id.
 
         ban_time is provided in seconds.
         If ban_time is None, ban duration will be determined automatically.
         Pass 0 or a negative number for no ban time.
+        Returns whether the client could be kicked.
         """
 
         # FIXME: this case should be handled under the hood.
         if ban_time is None:
             ban_time = 300
 
-        bascenev1.disconnect_client(client_id=client_id, ban_time=ban_time)
+        return bascenev1.disconnect_client(
+            client_id=client_id, ban_time=ban_time
+        )
 
     def shutdown(self, reason: ShutdownReason, immediate: bool) -> None:
         """Set the app to quit either now or at the next clean opportunity."""
@@ -230,8 +524,6 @@ class ServerController:
         )
 
     def _access_check_response(self, data: dict[str, Any] | None) -> None:
-        import os
-
         if data is None:
             print('error on UDP port access check (internet down?)')
         else:
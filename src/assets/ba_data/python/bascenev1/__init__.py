@@ -87,6 +87,7 @@ from _bascenev1 import (
     emitfx,
     end_host_scanning,
     get_chat_messages,
+    get_client_net_stats,
     get_client_ping,
     get_connection_to_host_info,
     get_connection_to_host_info_2,
@@ -274,8 +275,10 @@ from bascenev1._session import (
     set_player_rejoin_cooldown,
     set_max_players_override,
 )
+from bascenev1._spatial import SpatialIndex
 from bascenev1._stats import PlayerScoredMessage, PlayerRecord, Stats
 from bascenev1._team import SessionTeam, Team, EmptyTeam
+from bascenev1._tick import TickScheduler, TickTimer, ticktimer
 from bascenev1._teamgame import TeamGameActivity
 
 __all__ = [
@@ -355,6 +358,7 @@ __all__ = [
     'GameResults',
     'GameTip',
     'get_chat_messages',
+    'get_client_net_stats',
     'get_client_ping',
     'get_connection_to_host_info',
     'get_connection_to_host_info_2',
@@ -503,6 +507,7 @@ __all__ = [
     'ShouldShatterMessage',
     'show_damage_count',
     'Sound',
+    'SpatialIndex',
     'StandLocation',
     'FeedbackEvent',
     'StandMessage',
@@ -512,6 +517,9 @@ __all__ = [
     'TeamGameActivity',
     'Texture',
     'ThawMessage',
+    'TickScheduler',
+    'ticktimer',
+    'TickTimer',
     'time',
     'Time',
     'timer',
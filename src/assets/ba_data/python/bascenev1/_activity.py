@@ -9,6 +9,8 @@ from typing import TYPE_CHECKING
 import babase
 import _bascenev1
 from bascenev1._messages import UNHANDLED
+from bascenev1._spatial import SpatialIndex
+from bascenev1._tick import TickScheduler
 
 if TYPE_CHECKING:
     from typing import Any, Self
@@ -175,6 +177,13 @@ class Activity[PlayerT: bascenev1.Player, TeamT: bascenev1.Team]:
         self._stats: bascenev1.Stats | None = None
         self._customdata: dict | None = {}
 
+        # Living players by position; rebuilt lazily at most once per
+        # scene step (see spatial_index).
+        self._spatial_index: SpatialIndex[PlayerT] = SpatialIndex()
+        self._spatial_index_step: int | None = None
+
+        self._tick_scheduler: TickScheduler | None = None
+
     def __del__(self) -> None:
         # If the activity has been run then we should have already cleaned
         # it up, but we still need to run expire calls for un-run activities.
@@ -241,6 +250,38 @@ class Activity[PlayerT: bascenev1.Player, TeamT: bascenev1.Team]:
         assert isinstance(self._customdata, dict)
         return self._customdata
 
+    @property
+    def spatial_index(self) -> SpatialIndex[PlayerT]:
+        """Living players indexed by position, for proximity queries.
+
+        Use this for things like 'nearest enemy', 'players near this
+        flag' or 'closest teammate' instead of looping over
+        :attr:`players`; queries only look at players nearby. Items are
+        tagged with their team, so
+        :meth:`~bascenev1.SpatialIndex.nearest_team_member` works.
+
+        Refreshed from player positions on first access each scene step,
+        so it costs nothing when unused. Players spawning or dying later
+        in that same step don't show up until the next one.
+        """
+        globalsnode = self._globalsnode
+        step = globalsnode.step if globalsnode else None
+        if step is None or step != self._spatial_index_step:
+            self._spatial_index_step = step
+            index = self._spatial_index
+            index.clear()
+            for player in self.players:
+                if player.is_alive():
+                    index.insert(player, player.node.position, player.team)
+        return self._spatial_index
+
+    @property
+    def tick_scheduler(self) -> TickScheduler:
+        """Runs this activity's :class:`~bascenev1.TickTimer`-s."""
+        if self._tick_scheduler is None:
+            self._tick_scheduler = TickScheduler()
+        return self._tick_scheduler
+
     @property
     def expired(self) -> bool:
         """Whether the activity is expired.
@@ -769,6 +810,10 @@ class Activity[PlayerT: bascenev1.Player, TeamT: bascenev1.Team]:
         # Don't want to be holding any delay-delete refs at this point.
         self._prune_delay_deletes()
 
+        # Tick-timer calls often hold refs to actors; let them go.
+        if self._tick_scheduler is not None:
+            self._tick_scheduler.clear()
+
         self._expire_actors()
         self._expire_players()
         self._expire_teams()
@@ -2,6 +2,7 @@
 #
 """Map related functionality."""
 
+import math
 import random
 from typing import TYPE_CHECKING, overload, override
 
@@ -9,6 +10,7 @@ import babase
 
 import _bascenev1
 from bascenev1._actor import Actor
+from bascenev1._spatial import SpatialIndex
 
 if TYPE_CHECKING:
     from typing import Sequence, Any, Literal
@@ -380,11 +382,14 @@ class Map(Actor):
         will be as far from these players as possible.
         """
 
-        # Get positions for existing players.
-        player_pts = []
+        # Index existing players by position. (Not the activity's own
+        # index even for its own player list; that one is only rebuilt
+        # once per step and would miss players spawned in the same step,
+        # as everyone is at game start.)
+        index: SpatialIndex[bascenev1.Player] = SpatialIndex()
         for player in players:
             if player.is_alive():
-                player_pts.append(player.position)
+                index.insert(player, player.node.position)
 
         def _getpt() -> Sequence[float]:
             point = self.ffa_spawn_points[self._next_ffa_start_index]
@@ -400,7 +405,7 @@ class Map(Actor):
             )
             return point
 
-        if not player_pts:
+        if not index:
             return _getpt()
 
         # Let's calc several start points and then pick whichever is
@@ -408,10 +413,10 @@ class Map(Actor):
         farthestpt_dist = -1.0
         farthestpt = None
         for _i in range(10):
-            testpt = babase.Vec3(_getpt())
+            testpt = _getpt()
             closest_player_dist = 9999.0
-            for ppt in player_pts:
-                dist = (ppt - testpt).length()
+            for closest in index.nearest(testpt):
+                dist = math.dist(closest.node.position, testpt)
                 closest_player_dist = min(dist, closest_player_dist)
             if closest_player_dist > farthestpt_dist:
                 farthestpt_dist = closest_player_dist
@@ -353,6 +353,7 @@ async def resolve_asset_packages_with_dialog(
     *,
     task: asyncio.Task[None] | None,
     context: str,
+    prefetch: list[babase.PrefetchGroup] | None = None,
 ) -> bool:
     """Resolve asset-packages, downloading with a cancelable dialog.
 
@@ -365,6 +366,8 @@ async def resolve_asset_packages_with_dialog(
     the all-local common case stays instant with no dialog flash.
     ``task`` is the enclosing async task, cancelled if the user hits the
     dialog's cancel button; ``context`` is a short label for logs.
+    ``prefetch`` is passed through to :meth:`babase.AssetSubsystem.resolve`
+    to order the download.
     """
     # The wrapper import stays deferred: bascenev1 is fully imported by
     # the time this runs; the cycle pylint sees is structural only.
@@ -402,6 +405,7 @@ async def resolve_asset_packages_with_dialog(
             allow_downloads=True,
             on_download_starting=ensure_dialog,
             on_progress=babase.make_progress_reporter(on_update),
+            prefetch=prefetch,
         )
     except asyncio.CancelledError:
         if dialog is not None:
@@ -556,10 +560,15 @@ async def _prejoin_and_connect(
                 port,
                 len(requirements.asset_packages),
             )
+            # Each package's language data goes ahead of its bulk
+            # (meshes, textures, audio). It's what the lobby and chat
+            # show first, and being small it's all safely in the cache
+            # even if a slow download gets cancelled and retried.
             if not await resolve_asset_packages_with_dialog(
                 requirements.asset_packages,
                 task=task,
                 context=f'join {address}:{port}',
+                prefetch=[babase.PrefetchGroup(paths={'language'})],
             ):
                 return
 
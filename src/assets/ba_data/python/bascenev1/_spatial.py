@@ -0,0 +1,198 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Spatial indexing for proximity queries."""
+
+import math
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Sequence
+
+    type _Entry[T] = tuple[float, float, float, T, Any]
+
+
+class SpatialIndex[T]:
+    """A uniform-grid index of items by position, for proximity queries.
+
+    Items are bucketed into square cells by their x/z position (maps are
+    much wider than they are tall); distances are full 3d. Queries visit
+    only the cells that could hold an answer, so they cost roughly the
+    number of items nearby rather than the number in total.
+
+    Positions are captured at :meth:`insert` time; rebuild the index
+    (:meth:`clear` then :meth:`insert`) when things move. For players,
+    :attr:`bascenev1.Activity.spatial_index` does this automatically.
+    """
+
+    def __init__(self, cell_size: float = 4.0) -> None:
+        if cell_size <= 0.0:
+            raise ValueError('cell_size must be positive.')
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int], list[_Entry[T]]] = {}
+        self._count = 0
+        self._min_cx = self._max_cx = self._min_cz = self._max_cz = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self) -> None:
+        """Remove all items."""
+        self._cells.clear()
+        self._count = 0
+
+    def insert(
+        self, item: T, position: Sequence[float], team: Any = None
+    ) -> None:
+        """Add an item at a position, optionally tagged with a team."""
+        x, y, z = position[0], position[1], position[2]
+        cx, cz = self._cell(x, z)
+        if self._count == 0:
+            self._min_cx = self._max_cx = cx
+            self._min_cz = self._max_cz = cz
+        else:
+            self._min_cx = min(self._min_cx, cx)
+            self._max_cx = max(self._max_cx, cx)
+            self._min_cz = min(self._min_cz, cz)
+            self._max_cz = max(self._max_cz, cz)
+        self._cells.setdefault((cx, cz), []).append((x, y, z, item, team))
+        self._count += 1
+
+    def nearest(
+        self,
+        point: Sequence[float],
+        k: int = 1,
+        *,
+        max_distance: float | None = None,
+        condition: Callable[[T], bool] | None = None,
+    ) -> list[T]:
+        """Return up to ``k`` items closest to a point, nearest first.
+
+        Items farther than ``max_distance`` (if given) or for which
+        ``condition`` returns False are skipped.
+        """
+        return self._nearest(
+            point,
+            k,
+            max_distance,
+            None if condition is None else lambda item, _team: condition(item),
+        )
+
+    def within_radius(
+        self,
+        point: Sequence[float],
+        radius: float,
+        *,
+        condition: Callable[[T], bool] | None = None,
+    ) -> list[T]:
+        """Return all items within ``radius`` of a point, nearest first."""
+        if not self._count:
+            return []
+        px, py, pz = point[0], point[1], point[2]
+        min_cx, min_cz = self._cell(px - radius, pz - radius)
+        max_cx, max_cz = self._cell(px + radius, pz + radius)
+        min_cx, min_cz = max(min_cx, self._min_cx), max(min_cz, self._min_cz)
+        max_cx, max_cz = min(max_cx, self._max_cx), min(max_cz, self._max_cz)
+        radius_sq = radius * radius
+        found: list[tuple[float, int, T]] = []
+        for cx in range(min_cx, max_cx + 1):
+            for cz in range(min_cz, max_cz + 1):
+                for x, y, z, item, _team in self._cells.get((cx, cz), ()):
+                    dx, dy, dz = x - px, y - py, z - pz
+                    dist_sq = dx * dx + dy * dy + dz * dz
+                    if dist_sq > radius_sq:
+                        continue
+                    if condition is not None and not condition(item):
+                        continue
+                    found.append((dist_sq, len(found), item))
+        found.sort()
+        return [item for _dist, _seq, item in found]
+
+    def nearest_team_member(
+        self,
+        point: Sequence[float],
+        team: Any,
+        *,
+        exclude: T | None = None,
+    ) -> T | None:
+        """Return the item on ``team`` closest to a point, if any.
+
+        ``exclude`` lets an item look for its nearest teammate without
+        finding itself.
+        """
+        result = self._nearest(
+            point,
+            1,
+            None,
+            lambda item, itemteam: itemteam is team and item is not exclude,
+        )
+        return result[0] if result else None
+
+    def _nearest(
+        self,
+        point: Sequence[float],
+        k: int,
+        max_distance: float | None,
+        accept: Callable[[T, Any], bool] | None,
+    ) -> list[T]:
+        if k <= 0 or not self._count:
+            return []
+        px, py, pz = point[0], point[1], point[2]
+        cx, cz = self._cell(px, pz)
+        max_ring = max(
+            cx - self._min_cx,
+            self._max_cx - cx,
+            cz - self._min_cz,
+            self._max_cz - cz,
+        )
+        max_dist_sq = math.inf
+        if max_distance is not None:
+            max_dist_sq = max_distance * max_distance
+            max_ring = min(max_ring, int(max_distance / self._cell_size) + 1)
+
+        found: list[tuple[float, int, T]] = []
+        seq = 0
+        for ring in range(max_ring + 1):
+            for entries in self._ring_cells(cx, cz, ring):
+                for x, y, z, item, team in entries:
+                    dx, dy, dz = x - px, y - py, z - pz
+                    dist_sq = dx * dx + dy * dy + dz * dz
+                    if dist_sq > max_dist_sq:
+                        continue
+                    if accept is not None and not accept(item, team):
+                        continue
+                    found.append((dist_sq, seq, item))
+                    seq += 1
+            # Anything in cells beyond this ring is at least this far
+            # away; once we have k results no farther than that, done.
+            if len(found) >= k:
+                found.sort()
+                reach = ring * self._cell_size
+                if found[k - 1][0] <= reach * reach:
+                    break
+        found.sort()
+        return [item for _dist, _seq, item in found[:k]]
+
+    def _cell(self, x: float, z: float) -> tuple[int, int]:
+        return (
+            math.floor(x / self._cell_size),
+            math.floor(z / self._cell_size),
+        )
+
+    def _ring_cells(self, cx: int, cz: int, ring: int) -> list[list[_Entry[T]]]:
+        """Return the populated cells at exactly ``ring`` cells away."""
+        cells = self._cells
+        if ring == 0:
+            entries = cells.get((cx, cz))
+            return [] if entries is None else [entries]
+        out: list[list[_Entry[T]]] = []
+        for dx in range(-ring, ring + 1):
+            for key in ((cx + dx, cz - ring), (cx + dx, cz + ring)):
+                entries = cells.get(key)
+                if entries is not None:
+                    out.append(entries)
+        for dz in range(-ring + 1, ring):
+            for key in ((cx - ring, cz + dz), (cx + ring, cz + dz)):
+                entries = cells.get(key)
+                if entries is not None:
+                    out.append(entries)
+        return out
@@ -0,0 +1,210 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Coalesced repeating timers for activities."""
+
+import math
+import weakref
+import logging
+from typing import TYPE_CHECKING
+
+import babase
+
+import _bascenev1
+
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+    import bascenev1
+
+#: Each period's cycle is split into this many phase slots; timers whose
+#: first tick falls in the same slot share one native timer. A timer's
+#: first tick can land up to this fraction of a period early or late;
+#: after that it ticks every period exactly.
+_PHASE_SLOTS = 4
+
+
+class TickTimer:
+    """A repeating scene-time timer, coalesced with others like it.
+
+    Use this in place of a repeating :class:`bascenev1.Timer` for
+    periodic ticks (score updates, countdowns, decay, etc). Within an
+    activity, all tick-timers with the same period and a similar phase
+    share a single native timer and get dispatched together in one
+    Python call, so a busy game carries a handful of native timers
+    instead of hundreds.
+
+    Like a :class:`bascenev1.Timer`, it stops when it is no longer
+    referenced or when :meth:`cancel` is called. If ``owner`` is given
+    it also stops for good once that :class:`bascenev1.Actor` no longer
+    exists. The first call can come up to a quarter period early or
+    late; subsequent calls are exactly ``period`` apart.
+
+    Outside of an activity context this simply wraps a
+    :class:`bascenev1.Timer`.
+    """
+
+    def __init__(
+        self,
+        period: float,
+        call: Callable[[], Any],
+        *,
+        owner: bascenev1.Actor | None = None,
+    ) -> None:
+        if period <= 0.0:
+            raise ValueError('period must be positive.')
+        self.period = period
+        self.call = call
+        self._owner = None if owner is None else weakref.ref(owner)
+        self._due = 0.0
+        self._cancelled = False
+        self._fallback: bascenev1.Timer | None = None
+        activity = _bascenev1.getactivity(doraise=False)
+        if activity is None:
+            self._fallback = _bascenev1.Timer(period, call, repeat=True)
+        else:
+            activity.tick_scheduler.add(self)
+
+    def cancel(self) -> None:
+        """Stop the timer; it will not fire again."""
+        self._cancelled = True
+        self._fallback = None
+
+    def _expire(self) -> None:
+        # Like native timers when their activity dies, drop our call so
+        # whatever it references can go too.
+        self.cancel()
+        self.call = _noop
+
+    def is_dead(self) -> bool:
+        """Whether the timer has stopped for good."""
+        if self._cancelled:
+            return True
+        if self._owner is not None:
+            owner = self._owner()
+            return owner is None or not owner.exists()
+        return False
+
+
+def _noop() -> None:
+    pass
+
+
+def ticktimer(
+    period: float,
+    call: Callable[[], Any],
+    *,
+    owner: bascenev1.Actor | None = None,
+) -> None:
+    """Schedule a repeating call for the lifetime of the current activity.
+
+    The fire-and-forget form of :class:`bascenev1.TickTimer`, for the
+    common ``bs.timer(period, call, repeat=True)`` pattern. Runs until
+    the activity ends or, if given, ``owner`` no longer exists.
+    """
+    activity = _bascenev1.getactivity(doraise=False)
+    if activity is None:
+        _bascenev1.timer(period, call, repeat=True)
+        return
+    activity.tick_scheduler.retain(TickTimer(period, call, owner=owner))
+
+
+class _Bucket:
+    """Tick-timers sharing one period and phase slot."""
+
+    def __init__(self) -> None:
+        self.members: list[weakref.ref[TickTimer]] = []
+        self.timer: bascenev1.Timer | None = None
+
+
+class TickScheduler:
+    """Runs an activity's tick-timers off as few native timers as possible.
+
+    Each activity has one, at :attr:`bascenev1.Activity.tick_scheduler`.
+    Most code should not need to touch it directly; use
+    :class:`bascenev1.TickTimer` or :func:`bascenev1.ticktimer`.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: dict[tuple[float, int], _Bucket] = {}
+        self._retained: set[TickTimer] = set()
+
+        #: Total tick-timer calls made so far.
+        self.call_count = 0
+
+    @property
+    def native_timer_count(self) -> int:
+        """How many native timers are currently running tick-timers."""
+        return len(self._buckets)
+
+    @property
+    def timer_count(self) -> int:
+        """How many tick-timers are scheduled.
+
+        Dead timers still count until their next dispatch prunes them.
+        """
+        return sum(len(b.members) for b in self._buckets.values())
+
+    def add(self, timer: TickTimer) -> None:
+        """Start running a tick-timer. Must be in the activity's context."""
+        # pylint: disable=protected-access
+        period = timer.period
+        now = _bascenev1.time()
+        timer._due = now + period
+        phase = math.fmod(now, period) / period
+        key = (period, min(int(phase * _PHASE_SLOTS), _PHASE_SLOTS - 1))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+            bucket.timer = _bascenev1.Timer(
+                period,
+                babase.WeakCallStrict(self._dispatch, key),
+                repeat=True,
+            )
+        bucket.members.append(weakref.ref(timer))
+
+    def retain(self, timer: TickTimer) -> None:
+        """Keep a tick-timer alive until it dies or the activity ends."""
+        self._retained.add(timer)
+
+    def clear(self) -> None:
+        """Stop everything (called as the activity expires)."""
+        # pylint: disable=protected-access
+        for bucket in self._buckets.values():
+            for ref in bucket.members:
+                timer = ref()
+                if timer is not None:
+                    timer._expire()
+        self._buckets.clear()
+        self._retained.clear()
+
+    def _dispatch(self, key: tuple[float, int]) -> None:
+        # pylint: disable=protected-access
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return
+
+        # A bucket's members can be up to a phase slot off from the
+        # bucket itself; anything due within that counts as due now.
+        due_by = _bascenev1.time() + key[0] / _PHASE_SLOTS
+
+        # Swap in a fresh list so timers added by callbacks as we go
+        # land there and don't fire until the next round.
+        members = bucket.members
+        bucket.members = []
+        for ref in members:
+            timer = ref()
+            if timer is None:
+                continue
+            if timer.is_dead():
+                self._retained.discard(timer)
+                continue
+            bucket.members.append(ref)
+            if timer._due > due_by:
+                continue
+            self.call_count += 1
+            try:
+                timer.call()
+            except Exception:
+                logging.exception('Error in tick-timer call %s.', timer)
+        if not bucket.members:
+            del self._buckets[key]
@@ -1188,9 +1188,7 @@ class TNTSpawner:
         self._update()
 
         # Go with slightly more than 1 second to avoid timer stacking.
-        self._update_timer = bs.Timer(
-            1.1, bs.WeakCallStrict(self._update), repeat=True
-        )
+        self._update_timer = bs.TickTimer(1.1, bs.WeakCallStrict(self._update))
 
     def _update(self) -> None:
         tnt_alive = self._tnt is not None and self._tnt.node
@@ -53,8 +53,8 @@ class ControlsGuide(bs.Actor):
         self._dead = False
         self._bright = bright
         self._cancel_timer: bs.Timer | None = None
-        self._fade_in_timer: bs.Timer | None = None
-        self._update_timer: bs.Timer | None = None
+        self._fade_in_timer: bs.TickTimer | None = None
+        self._update_timer: bs.TickTimer | None = None
         self._title_text: bs.Node | None
         clr: Sequence[float]
         punch_pos = (position[0] - offs * 1.1, position[1])
@@ -293,8 +293,8 @@ class ControlsGuide(bs.Actor):
                     self.handlemessage, bs.DieMessage(immediate=True)
                 ),
             )
-        self._fade_in_timer = bs.Timer(
-            1.0, bs.WeakCallStrict(self._check_fade_in), repeat=True
+        self._fade_in_timer = bs.TickTimer(
+            1.0, bs.WeakCallStrict(self._check_fade_in), owner=self
         )
         self._check_fade_in()  # Do one check immediately.
 
@@ -354,8 +354,8 @@ class ControlsGuide(bs.Actor):
                 bs.WeakCallStrict(self.handlemessage, bs.DieMessage()),
             )
         self._update()
-        self._update_timer = bs.Timer(
-            1.0, bs.WeakCallStrict(self._update), repeat=True
+        self._update_timer = bs.TickTimer(
+            1.0, bs.WeakCallStrict(self._update), owner=self
         )
 
     def _update(self) -> None:
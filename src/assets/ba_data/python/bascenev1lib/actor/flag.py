@@ -209,8 +209,8 @@ class Flag(bs.Actor):
         self._counter: bs.Node | None
         if self._dropped_timeout is not None:
             self._count = self._dropped_timeout
-            self._tick_timer = bs.Timer(
-                1.0, call=bs.WeakCallStrict(self._tick), repeat=True
+            self._tick_timer = bs.TickTimer(
+                1.0, bs.WeakCallStrict(self._tick), owner=self
             )
             self._counter = bs.newnode(
                 'text',
@@ -142,8 +142,8 @@ class RespawnIcon:
         self._respawn_time = bs.time() + respawn_time
         self._dec_timer: bs.Timer | None = None
         self._update()
-        self._timer: bs.Timer | None = bs.Timer(
-            1.0, bs.WeakCallStrict(self._update), repeat=True
+        self._timer: bs.TickTimer | None = bs.TickTimer(
+            1.0, bs.WeakCallStrict(self._update)
         )
 
     @property
@@ -38,7 +38,7 @@ class _Entry:
         self._cover_tex = builtinassets.textures.ui_atlas.get()
         self._mesh = classicassets.meshes.meter_transparent.get()
         self._pos: Sequence[float] | None = None
-        self._flash_timer: bs.Timer | None = None
+        self._flash_timer: bs.TickTimer | None = None
         self._flash_counter: int | None = None
         self._flash_colors: bool | None = None
         self._score: float | None = None
@@ -179,9 +179,7 @@ class _Entry:
 
     def flash(self, countdown: bool, extra_flash: bool) -> None:
         """Flash momentarily."""
-        self._flash_timer = bs.Timer(
-            0.1, bs.WeakCallStrict(self._do_flash), repeat=True
-        )
+        self._flash_timer = bs.TickTimer(0.1, bs.WeakCallStrict(self._do_flash))
         if countdown:
             self._flash_counter = 10
         else:
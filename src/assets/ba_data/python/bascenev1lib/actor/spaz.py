@@ -189,7 +189,7 @@ class Spaz(bs.Actor):
         self.shield_hitpoints: int | None = None
         self.shield_hitpoints_max = 650
         self.shield_decay_rate = 0
-        self.shield_decay_timer: bs.Timer | None = None
+        self.shield_decay_timer: bs.TickTimer | None = None
         self._boxing_gloves_wear_off_timer: bs.Timer | None = None
         self._boxing_gloves_wear_off_flash_timer: bs.Timer | None = None
         self._bomb_wear_off_timer: bs.Timer | None = None
@@ -638,8 +638,8 @@ class Spaz(bs.Actor):
         factory.shield_up_sound.play(1.0, position=self.node.position)
 
         if self.shield_decay_rate > 0:
-            self.shield_decay_timer = bs.Timer(
-                0.5, bs.WeakCallStrict(self.shield_decay), repeat=True
+            self.shield_decay_timer = bs.TickTimer(
+                0.5, bs.WeakCallStrict(self.shield_decay), owner=self
             )
             # So user can see the decay.
             self.shield.always_show_health_bar = True
@@ -4,6 +4,7 @@
 
 # pylint: disable=too-many-lines
 
+import math
 import random
 import weakref
 import logging
@@ -24,6 +25,90 @@ DEFAULT_BOT_HIGHLIGHT = (0.1, 0.3, 0.1)
 PRO_BOT_COLOR = (1.0, 0.2, 0.1)
 PRO_BOT_HIGHLIGHT = (0.6, 0.1, 0.05)
 
+#: Where a bot is aiming this tick: (distance to target, distance to
+#: lead point, lead-point direction x, lead-point direction z, can attack).
+#: All on the ground plane. Plain tuples since thousands of these get
+#: made per second in big waves.
+type BotAim = tuple[float, float, float, float, bool]
+
+
+def bot_aim(
+    bot_x: float,
+    bot_z: float,
+    target_x: float,
+    target_z: float,
+    target_vel_x: float,
+    target_vel_z: float,
+    lead_amount: float,
+    can_attack: bool,
+) -> BotAim:
+    """Work out a bot's aim at a target on the ground plane.
+
+    Bots aim at a point out in front of a moving target; the further
+    away the target, the further out in front.
+    """
+    diff_x = target_x - bot_x
+    diff_z = target_z - bot_z
+    dist_raw = math.hypot(diff_x, diff_z)
+    lead = dist_raw * 0.3 * lead_amount
+    diff_x += target_vel_x * lead
+    diff_z += target_vel_z * lead
+    dist = math.hypot(diff_x, diff_z)
+    if dist > 0.0:
+        return dist_raw, dist, diff_x / dist, diff_z / dist, can_attack
+    return dist_raw, dist, 0.0, 0.0, can_attack
+
+
+def batch_bot_aims(
+    bot_pts: Sequence[float], player_pts: Sequence[float]
+) -> list[BotAim | None]:
+    """Pick targets and aims for many bots in a single pass.
+
+    ``bot_pts`` is flat ``x, y, z, lead_amount`` per bot and
+    ``player_pts`` is flat ``x, y, z, vel_x, vel_z`` per player. Each bot
+    targets the nearest player not significantly below it, exactly as
+    :meth:`SpazBot.update_ai` does on its own; returns its aim at that
+    player or None if there is none. Plain float math with no per-pair
+    allocations, so a tick's worth of bots costs one tight loop instead
+    of a Vec3-heavy scan per bot.
+    """
+    aims: list[BotAim | None] = []
+    pcount = len(player_pts)
+    for i in range(0, len(bot_pts), 4):
+        bot_x = bot_pts[i]
+        min_y = bot_pts[i + 1] - 5.0
+        bot_z = bot_pts[i + 2]
+        best = -1
+        best_dist_sq = 0.0
+        for j in range(0, pcount, 5):
+            # Ignore players significantly below the bot (keeps bots
+            # from following players off cliffs).
+            if player_pts[j + 1] <= min_y:
+                continue
+            diff_x = player_pts[j] - bot_x
+            diff_y = player_pts[j + 1] - bot_pts[i + 1]
+            diff_z = player_pts[j + 2] - bot_z
+            dist_sq = diff_x * diff_x + diff_y * diff_y + diff_z * diff_z
+            if best < 0 or dist_sq < best_dist_sq:
+                best = j
+                best_dist_sq = dist_sq
+        if best < 0:
+            aims.append(None)
+            continue
+        aims.append(
+            bot_aim(
+                bot_x,
+                bot_z,
+                player_pts[best],
+                player_pts[best + 2],
+                player_pts[best + 3],
+                player_pts[best + 4],
+                bot_pts[i + 3],
+                True,
+            )
+        )
+    return aims
+
 
 class SpazBotPunchedMessage:
     """A message saying a bs.SpazBot got punched."""
@@ -194,9 +279,7 @@ class SpazBot(Spaz):
         self._player_pts = pts
 
     def update_ai(self) -> None:
-        # pylint: disable=too-many-statements
         """Should be called periodically to update the spaz' AI."""
-        # pylint: disable=too-many-branches
         if self.update_callback is not None:
             if self.update_callback(self):
                 # Bot has been handled.
@@ -205,12 +288,52 @@ class SpazBot(Spaz):
         if not self.node:
             return
 
+        if self._update_ai_special():
+            return
+
         pos = self.node.position
-        our_pos = bs.Vec3(pos[0], 0, pos[2])
-        can_attack = True
+        aim: BotAim | None = None
+        target_pt, target_vel = self._get_target_player_pt()
+        if target_pt is not None:
+            assert target_vel is not None
+            aim = bot_aim(
+                pos[0],
+                pos[2],
+                target_pt[0],
+                target_pt[2],
+                target_vel[0],
+                target_vel[2],
+                self._lead_amount,
+                True,
+            )
+        self._update_ai_aimed(pos, aim)
+
+    def update_ai_batched(self, aim: BotAim | None) -> None:
+        """Update the AI using an aim worked out by batch_bot_aims().
+
+        Used by bs.SpazBotSet to update many bots per tick without each
+        one scanning for its own target. Behaves exactly like
+        update_ai(), including honoring update_callback.
+        """
+        if self.update_callback is not None:
+            if self.update_callback(self):
+                # Bot has been handled.
+                return
+
+        if not self.node:
+            return
 
-        target_pt_raw: bs.Vec3 | None
-        target_vel: bs.Vec3 | None
+        if self._update_ai_special():
+            return
+
+        self._update_ai_aimed(self.node.position, aim)
+
+    def _update_ai_special(self) -> bool:
+        """Handle cases that don't involve a target player.
+
+        Returns True if the bot has been handled.
+        """
+        assert self.node
 
         # If we're a flag-bearer, we're pretty simple-minded - just walk
         # towards the flag and try to pick it up.
@@ -228,6 +351,8 @@ class SpazBot(Spaz):
 
             # Otherwise try to go pick it up.
             elif self.target_flag.node:
+                pos = self.node.position
+                our_pos = bs.Vec3(pos[0], 0, pos[2])
                 target_pt_raw = bs.Vec3(*self.target_flag.node.position)
                 diff = target_pt_raw - our_pos
                 diff = bs.Vec3(diff[0], 0, diff[2])  # Don't care about y.
@@ -238,7 +363,7 @@ class SpazBot(Spaz):
                 if self.node.hold_node:
                     self.on_pickup_press()
                     self.on_pickup_release()
-                    return
+                    return True
 
                 # If we're a runner, run only when not super-near the flag.
                 if self.run and dist > 3.0:
@@ -253,7 +378,7 @@ class SpazBot(Spaz):
                 if dist < 1.25:
                     self.on_pickup_press()
                     self.on_pickup_release()
-            return
+            return True
 
         # Not a flag-bearer. If we're holding anything but a bomb, drop it.
         if self.node.hold_node:
@@ -261,16 +386,29 @@ class SpazBot(Spaz):
             if not holding_bomb:
                 self.on_pickup_press()
                 self.on_pickup_release()
-                return
+                return True
+        return False
 
-        target_pt_raw, target_vel = self._get_target_player_pt()
-
-        if target_pt_raw is None:
+    def _update_ai_aimed(
+        self, pos: Sequence[float], aim: BotAim | None
+    ) -> None:
+        """Run the attack state machine given where we're aiming."""
+        # pylint: disable=too-many-statements
+        # pylint: disable=too-many-branches
+        assert self.node
+        if aim is None:
             # Use default target if we've got one.
             if self.target_point_default is not None:
-                target_pt_raw = self.target_point_default
-                target_vel = bs.Vec3(0, 0, 0)
-                can_attack = False
+                aim = bot_aim(
+                    pos[0],
+                    pos[2],
+                    self.target_point_default[0],
+                    self.target_point_default[2],
+                    0.0,
+                    0.0,
+                    self._lead_amount,
+                    False,
+                )
 
             # With no target, we stop moving and drop whatever we're holding.
             else:
@@ -281,22 +419,7 @@ class SpazBot(Spaz):
                     self.on_pickup_release()
                 return
 
-        # We don't want height to come into play.
-        target_pt_raw[1] = 0.0
-        assert target_vel is not None
-        target_vel[1] = 0.0
-
-        dist_raw = (target_pt_raw - our_pos).length()
-
-        # Use a point out in front of them as real target.
-        # (more out in front the farther from us they are)
-        target_pt = (
-            target_pt_raw + target_vel * dist_raw * 0.3 * self._lead_amount
-        )
-
-        diff = target_pt - our_pos
-        dist = diff.length()
-        to_target = diff.normalized()
+        dist_raw, dist, to_target_x, to_target_z, can_attack = aim
 
         if self._mode == 'throw':
             # We can only throw if alive and well.
@@ -346,8 +469,8 @@ class SpazBot(Spaz):
                     else:
                         # Earlier we can hold or move backward for a whiplash.
                         speed = 0.0125
-                self.on_move_left_right(to_target.x * speed)
-                self.on_move_up_down(to_target.z * -1.0 * speed)
+                self.on_move_left_right(to_target_x * speed)
+                self.on_move_up_down(to_target_z * -1.0 * speed)
 
         elif self._mode == 'charge':
             if random.random() < 0.3:
@@ -366,15 +489,15 @@ class SpazBot(Spaz):
                     self._running = False
                     self.on_run(0.0)
 
-            self.on_move_left_right(to_target.x * self._charge_speed)
-            self.on_move_up_down(to_target.z * -1.0 * self._charge_speed)
+            self.on_move_left_right(to_target_x * self._charge_speed)
+            self.on_move_up_down(to_target_z * -1.0 * self._charge_speed)
 
         elif self._mode == 'wait':
             # Every now and then, aim towards our target.
             # Other than that, just stand there.
             if int(bs.time() * 1000.0) % 1234 < 100:
-                self.on_move_left_right(to_target.x * (400.0 / 33000))
-                self.on_move_up_down(to_target.z * (-400.0 / 33000))
+                self.on_move_left_right(to_target_x * (400.0 / 33000))
+                self.on_move_up_down(to_target_z * (-400.0 / 33000))
             else:
                 self.on_move_left_right(0)
                 self.on_move_up_down(0)
@@ -388,8 +511,8 @@ class SpazBot(Spaz):
             else:
                 self._running = False
                 self.on_run(0.0)
-            self.on_move_left_right(to_target.x * -1.0)
-            self.on_move_up_down(to_target.z)
+            self.on_move_left_right(to_target_x * -1.0)
+            self.on_move_up_down(to_target_z)
 
         # We might wanna switch states unless we're doing a throw
         # (in which case that's our sole concern).
@@ -431,7 +554,9 @@ class SpazBot(Spaz):
             elif dist < self.charge_dist_min and not self._charge_closing_in:
                 # ..unless we're near an edge, in which case we've got no
                 # choice but to charge.
-                if self.map.is_point_near_edge(our_pos, self._running):
+                if self.map.is_point_near_edge(
+                    bs.Vec3(pos[0], 0, pos[2]), self._running
+                ):
                     if self._mode != 'charge':
                         self._mode = 'charge'
                         self._lead_amount = 0.2
@@ -445,7 +570,9 @@ class SpazBot(Spaz):
             elif (
                 dist < self.charge_dist_max
                 or dist > self.throw_dist_max
-                or self.map.is_point_near_edge(our_pos, self._running)
+                or self.map.is_point_near_edge(
+                    bs.Vec3(pos[0], 0, pos[2]), self._running
+                )
             ):
                 if self._mode != 'charge':
                     self._mode = 'charge'
@@ -973,6 +1100,12 @@ class SpazBotSet:
     category: Bot Classes
     """
 
+    #: Update bots through one batched target/aim pass per tick (see
+    #: batch_bot_aims()) rather than having each bot scan for its own
+    #: target. Same behavior either way; batched is much cheaper with
+    #: lots of bots and players.
+    batched_ai = True
+
     def __init__(self) -> None:
         """Create a bot-set."""
 
@@ -1081,9 +1214,50 @@ class SpazBotSet:
             except Exception:
                 logging.exception('Error on bot-set _update.')
 
+        self._update_bots(bot_list, player_pts)
+
+    def _update_bots(
+        self,
+        bot_list: list[SpazBot],
+        player_pts: list[tuple[bs.Vec3, bs.Vec3]],
+    ) -> None:
+        """Run an AI tick for some bots against the given targets."""
+        if not self.batched_ai:
+            for bot in bot_list:
+                bot.set_player_points(player_pts)
+                bot.update_ai()
+            return
+
+        flat_players: list[float] = []
+        for plpt, plvel in player_pts:
+            flat_players += (plpt[0], plpt[1], plpt[2], plvel[0], plvel[2])
+
+        # Bots with a custom update_ai() or targeting get update_ai()
+        # called as before; the rest share one batched aim pass.
+        flat_bots: list[float] = []
+        batched: list[bool] = []
         for bot in bot_list:
             bot.set_player_points(player_pts)
-            bot.update_ai()
+            bottype = type(bot)
+            # pylint: disable=protected-access
+            overridden = (
+                bottype.update_ai is not SpazBot.update_ai
+                or bottype._get_target_player_pt
+                is not SpazBot._get_target_player_pt
+            )
+            use_batch = not overridden and bool(bot.node)
+            batched.append(use_batch)
+            if use_batch:
+                pos = bot.node.position
+                flat_bots += (pos[0], pos[1], pos[2], bot._lead_amount)
+        aims = iter(batch_bot_aims(flat_bots, flat_players))
+
+        # Apply in the original order so callbacks see the same sequence.
+        for bot, use_batch in zip(bot_list, batched):
+            if use_batch:
+                bot.update_ai_batched(next(aims))
+            else:
+                bot.update_ai()
 
     def clear(self) -> None:
         """Immediately clear out any bots in the set."""
@@ -1206,6 +1380,4 @@ class DemoSpazBotSet(SpazBotSet):
                     (bs.Vec3(node.position), bs.Vec3(node.velocity))
                 )
 
-        for bot in bot_list:
-            bot.set_player_points(spaz_pts)
-            bot.update_ai()
+        self._update_bots(bot_list, spaz_pts)
@@ -305,7 +305,7 @@ class CaptureTheFlagGame(bs.TeamGameActivity[Player, Team]):
         super().on_begin()
         self.setup_standard_time_limit(self._time_limit)
         self.setup_standard_powerup_drops()
-        bs.timer(1.0, call=self._tick, repeat=True)
+        bs.ticktimer(1.0, bs.WeakCallStrict(self._tick))
 
     def _spawn_flag_for_team(self, team: Team) -> None:
         team.flag = CTFFlag(team)
@@ -156,7 +156,7 @@ class ChosenOneGame(bs.TeamGameActivity[Player, Team]):
         self.setup_standard_powerup_drops()
         self._flag_spawn_pos = self.map.get_flag_position(None)
         Flag.project_stand(self._flag_spawn_pos)
-        bs.timer(1.0, call=self._tick, repeat=True)
+        bs.ticktimer(1.0, bs.WeakCallStrict(self._tick))
 
         mat = self._reset_region_material = bs.Material()
         mat.add_actions(
@@ -367,7 +367,7 @@ class EliminationGame(bs.TeamGameActivity[Player, Team]):
 
         # We could check game-over conditions at explicit trigger points,
         # but lets just do the simple thing and poll it.
-        bs.timer(1.0, self._update, repeat=True)
+        bs.ticktimer(1.0, bs.WeakCallStrict(self._update))
 
     def _update_solo_mode(self) -> None:
         # For both teams, find the first player on the spawn order list with
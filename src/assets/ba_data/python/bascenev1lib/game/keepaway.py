@@ -119,7 +119,7 @@ class KeepAwayGame(bs.TeamGameActivity[Player, Team]):
             1: classicassets.audio.announce_one.get(),
         }
         self._flag_spawn_pos: Sequence[float] | None = None
-        self._update_timer: bs.Timer | None = None
+        self._update_timer: bs.TickTimer | None = None
         self._holding_players: list[Player] = []
         self._flag_state: FlagState | None = None
         self._flag_light: bs.Node | None = None
@@ -164,7 +164,7 @@ class KeepAwayGame(bs.TeamGameActivity[Player, Team]):
         self.setup_standard_powerup_drops()
         self._flag_spawn_pos = self.map.get_flag_position(None)
         self._spawn_flag()
-        self._update_timer = bs.Timer(1.0, call=self._tick, repeat=True)
+        self._update_timer = bs.TickTimer(1.0, bs.WeakCallStrict(self._tick))
         self._update_flag_state()
         Flag.project_stand(self._flag_spawn_pos)
 
@@ -177,7 +177,7 @@ class KingOfTheHillGame(bs.TeamGameActivity[Player, Team]):
         self.setup_standard_time_limit(self._time_limit)
         self.setup_standard_powerup_drops()
         self._flag_pos = self.map.get_flag_position(None)
-        bs.timer(1.0, self._tick, repeat=True)
+        bs.ticktimer(1.0, bs.WeakCallStrict(self._tick))
         self._flag_state = FlagState.NEW
         Flag.project_stand(self._flag_pos)
         self._flag = Flag(
@@ -9,11 +9,13 @@ import sys
 import time
 import json
 import signal
+import asyncio
+import secrets
 import tomllib
 import logging
 import subprocess
 from pathlib import Path
-from threading import Lock, Thread, current_thread
+from threading import Lock, Event, Thread, Condition, current_thread
 from typing import TYPE_CHECKING
 
 # We make use of the bacommon and efro packages as well as site-packages
@@ -24,19 +26,73 @@ sys.path += [
     str(Path(Path(__file__).parent, 'dist', 'ba_data', 'python-site-packages')),
 ]
 
-from bacommon.servermanager import ServerConfig, StartServerModeCommand
-from efro.dataclassio import dataclass_from_dict, dataclass_validate
-from efro.error import CleanError
+from bacommon.servermanager import (
+    ServerConfig,
+    ServerFleetConfig,
+    StartServerModeCommand,
+    ServerHelloMessage,
+    ServerTelemetryMessage,
+    ServerEventMessage,
+    ControlChannelReceiver,
+    get_manager_to_server_protocol,
+    get_server_to_manager_protocol,
+)
+from efro.dataclassio import (
+    dataclass_to_json,
+    dataclass_from_dict,
+    dataclass_validate,
+)
+from efro.error import CleanError, CommunicationError
+from efro.message import MessageSender
+from efro.rpc import RPCEndpoint
 from efro.terminal import Clr
 
 if TYPE_CHECKING:
     from types import FrameType
-    from bacommon.servermanager import ServerCommand
-
-VERSION_STR = '1.3.6'
+    from typing import IO, Awaitable, Callable
+    from efro.message import Response
+    from bacommon.servermanager import (
+        ServerCommand,
+        ServerStatus,
+        ServerEvent,
+        ServerClientInfo,
+        ServerFleetStatus,
+    )
+
+VERSION_STR = '1.5.1'
 
 # Version history:
 #
+# 1.5.1
+#
+#  - Fleet instances get their own metrics_port (offset by port_stride
+#    like their game ports) when metrics are enabled.
+#
+# 1.5.0
+#
+#  - Server binaries now connect back to the server manager over a
+#    local control channel (efro.message over efro.rpc) once they enter
+#    server mode. Commands go over it with typed responses
+#    (clientlist() and get_clients() no longer rely on printed output,
+#    kick() reports whether it worked), and binaries stream telemetry
+#    (client counts, logic-thread lag, session type) and events (clients
+#    joining/leaving, session/activity changes) back up; see
+#    get_status() and add_event_call(). Raw cmd() statements still go
+#    through stdin.
+#
+#  - The server manager's supervisor loop now sleeps until something
+#    happens (a command, a process exit, a timer coming due) instead of
+#    polling.
+#
+# 1.4.0
+#
+#  - Added fleet mode (--fleet) for running many server binaries from
+#    one server manager. Instances get their own ports, party names,
+#    and root dirs derived from a template config, can be pinned to
+#    cpu cores, restart in a staggered fashion with exponential backoff
+#    after crashes, and report client counts to a combined status
+#    view ('mgr.status()' and fleet_status.json).
+#
 # 1.3.6
 #
 #  - Minor tweak to disable new native REPL since we rely on the simple old
@@ -122,28 +178,411 @@ VERSION_STR = '1.3.6'
 #  - Initial release.
 
 
-class ServerManagerApp:
-    """An app which manages BallisticaKit server execution.
+def _write_binary_config(config: ServerConfig, ba_root_path: str) -> None:
+    """Write files that must exist at server binary launch."""
+
+    os.makedirs(ba_root_path, exist_ok=True)
+    cfgpath = os.path.join(ba_root_path, 'config.json')
+    if os.path.exists(cfgpath):
+        with open(cfgpath, encoding='utf-8') as infile:
+            bincfg = json.loads(infile.read())
+    else:
+        bincfg = {}
+
+    # Some of our config values translate directly into the
+    # ballisticakit config file; the rest we pass at runtime.
+
+    # IMPORTANT: Make sure we *ALWAYS* push values (or lack thereof)
+    # through; otherwise stale values from previous runs can linger
+    # in the bincfg.
+
+    bincfg['Port'] = config.port
+    bincfg['Auto Balance Teams'] = config.auto_balance_teams
+    bincfg['Show Tutorial'] = config.show_tutorial
+
+    binkey = 'SceneV1 Host Protocol'
+    if config.protocol_version is not None:
+        bincfg[binkey] = config.protocol_version
+    elif binkey in bincfg:
+        del bincfg[binkey]
+
+    binkey = 'Custom Team Names'
+    if config.team_names is not None:
+        bincfg[binkey] = config.team_names
+    elif binkey in bincfg:
+        del bincfg[binkey]
+
+    binkey = 'Custom Team Colors'
+    if config.team_colors is not None:
+        bincfg[binkey] = config.team_colors
+    elif binkey in bincfg:
+        del bincfg[binkey]
+
+    bincfg['Idle Exit Minutes'] = config.idle_exit_minutes
+
+    binkey = 'Log Levels'
+    if config.log_levels is not None:
+        # Users supply us log level names like NOTSET; convert those
+        # to numeric vals which the engine expects.
+        bincfg[binkey] = {
+            key: logging.getLevelName(val)
+            for key, val in config.log_levels.items()
+        }
+    elif binkey in bincfg:
+        del bincfg[binkey]
+
+    # We feed the binary commands through stdin, so make sure it
+    # is using the simple old dumb path for that.
+    bincfg['Use Native Python REPL'] = False
+
+    with open(cfgpath, 'w', encoding='utf-8') as outfile:
+        outfile.write(json.dumps(bincfg))
+
+
+def _launch_server_binary(
+    config: ServerConfig,
+    ba_root_path: str,
+    initial_exec_code: str | None,
+    output: IO[bytes] | None = None,
+) -> subprocess.Popen[bytes]:
+    """Launch a server binary; we feed it commands through its stdin.
+
+    If output is passed, the binary's stdout and stderr go there instead
+    of to our own.
+    """
+    # pylint: disable=consider-using-with
+
+    # Set particular things that can *only* be passed as args and
+    # not config vals (because they need to be handled by the binary
+    # before spinning up Python or whatnot).
+    extra_args: list[str] = []
+
+    if config.dont_write_bytecode:
+        extra_args += ['--dont-write-bytecode']
+
+    if initial_exec_code is not None:
+        # Forward the wrapper's --exec value through to the
+        # subprocess binary's own --exec arg.
+        extra_args += ['--exec', initial_exec_code]
+
+    env = dict(os.environ)
+
+    # Set an environment var so the server process knows its being
+    # run under us. This causes it to ignore ctrl-c presses and
+    # other slight behavior tweaks. Hmm; should this be an argument
+    # instead?
+    env['BA_SERVER_WRAPPER_MANAGED'] = '1'
+
+    # Set an environment var to change the device name. Device name
+    # is used while making connection with master server,
+    # cloud-console recognize us with this name.
+    env['BA_DEVICE_NAME'] = config.party_name
+
+    binary_name = (
+        'BallisticaKitHeadless.exe'
+        if os.name == 'nt'
+        else './ballisticakit_headless'
+    )
+    return subprocess.Popen(
+        [binary_name, '--config-dir', ba_root_path] + extra_args,
+        stdin=subprocess.PIPE,
+        stdout=output,
+        stderr=None if output is None else subprocess.STDOUT,
+        cwd='dist',
+        env=env,
+    )
+
+
+def _send_to_server(
+    process: subprocess.Popen[bytes],
+    command: str | ServerCommand,
+    channel: _ControlChannel | None = None,
+) -> None:
+    """Send a command or a raw Python statement to a server binary.
+
+    Commands go over the binary's control channel if one is passed and
+    connected; everything else goes through its stdin.
+    """
+    import pickle
+
+    if (
+        channel is not None
+        and channel.connected
+        and not isinstance(command, str)
+    ):
+        channel.send_nowait(command)
+        return
+
+    assert process.stdin is not None
+
+    # If we're passing a raw string to exec, no need to wrap it in any
+    # proper structure.
+    if isinstance(command, str):
+        process.stdin.write((command + '\n').encode())
+    else:
+        val = repr(pickle.dumps(command))
+        assert '\n' not in val
+        execcode = (
+            f'import baclassic._servermode;'
+            f' baclassic._servermode._cmd({val})\n'
+        ).encode()
+        process.stdin.write(execcode)
+    process.stdin.flush()
 
-    Handles configuring, launching, re-launching, and otherwise
-    managing BallisticaKit operating in server mode.
+
+def _watch_process(process: subprocess.Popen[bytes], wakeup: Event) -> None:
+    """Set wakeup when a process exits."""
+
+    def _watch() -> None:
+        process.wait()
+        wakeup.set()
+
+    Thread(target=_watch, daemon=True).start()
+
+
+def _exit_minutes(config: ServerConfig) -> tuple[float, float]:
+    """Return how long a server should run before clean/unclean exits.
+
+    We enforce 6 and 7 hour maximums if the config doesn't ask for
+    less.
     """
+    clean_exit_minutes = 360.0
+    if config.clean_exit_minutes is not None:
+        clean_exit_minutes = min(clean_exit_minutes, config.clean_exit_minutes)
+    unclean_exit_minutes = 420.0
+    if config.unclean_exit_minutes is not None:
+        unclean_exit_minutes = min(
+            unclean_exit_minutes, config.unclean_exit_minutes
+        )
+    return clean_exit_minutes, unclean_exit_minutes
 
-    # How many seconds we wait after asking our subprocess to do an immediate
-    # shutdown before bringing down the hammer.
-    IMMEDIATE_SHUTDOWN_TIME_LIMIT = 5.0
+
+def _print_client_list(clients: list[ServerClientInfo]) -> None:
+    title1 = 'Client ID'
+    title2 = 'Account Name'
+    title3 = 'Players'
+    col1 = 10
+    col2 = 16
+    out = f'{Clr.BLD}{title1:<{col1}} {title2:<{col2}} {title3}{Clr.RST}'
+    for client in clients:
+        players = ', '.join(client.players)
+        out += f'\n{client.client_id:<{col1}} {client.name:<{col2}} {players}'
+    print(out, flush=True)
+
+
+class _ControlConnection:
+    """A connection from a server binary to our control server."""
+
+    receiver = ControlChannelReceiver(get_server_to_manager_protocol())
+    sender = MessageSender(get_manager_to_server_protocol())
+
+    def __init__(
+        self,
+        server: _ControlServer,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        self._server = server
+        self.channel: _ControlChannel | None = None
+        self.endpoint = RPCEndpoint(
+            self._handle_raw_message, reader, writer, 'server control'
+        )
+
+    @sender.send_async_method
+    def _send_raw_message(self, data: bytes) -> Awaitable[bytes]:
+        return self.endpoint.send_message(data)
+
+    async def _handle_raw_message(self, data: bytes) -> bytes:
+        return self.receiver.handle_raw_message(self, data)
+
+    @receiver.handler
+    def _handle_hello(self, msg: ServerHelloMessage) -> None:
+        channel = self._server.get_channel(msg.token)
+        if channel is None or self.channel is not None:
+            # Not a process we launched (or a confused one); hang up
+            # once we've answered.
+            asyncio.get_running_loop().call_soon(self.endpoint.close)
+            return
+        self.channel = channel
+        channel.attach(self)
+
+    @receiver.handler
+    def _handle_telemetry(self, msg: ServerTelemetryMessage) -> None:
+        if self.channel is not None:
+            self.channel.status = msg.status
+
+    @receiver.handler
+    def _handle_events(self, msg: ServerEventMessage) -> None:
+        if self.channel is not None:
+            for call in self.channel.event_calls:
+                for event in msg.events:
+                    try:
+                        call(event)
+                    except Exception:
+                        logging.exception('Error in server event call.')
+
+
+class _ControlChannel:
+    """Control channel to a single server binary process.
+
+    Binaries connect and introduce themselves with our token once they
+    enter server mode. Methods can be called from any thread.
+    """
+
+    # How long send() waits for a response by default.
+    DEFAULT_TIMEOUT = 10.0
+
+    def __init__(self, server: _ControlServer, token: str) -> None:
+        self._server = server
+        self.token = token
+        self._connection: _ControlConnection | None = None
+
+        # The most recent telemetry from the binary.
+        self.status: ServerStatus | None = None
+
+        # Called with events from the binary (in the control thread).
+        self.event_calls: list[Callable[[ServerEvent], None]] = []
+
+    @property
+    def connected(self) -> bool:
+        """Whether the binary is currently connected."""
+        connection = self._connection
+        return connection is not None and not connection.endpoint.is_closing()
+
+    def attach(self, connection: _ControlConnection) -> None:
+        """Called in the control thread when the binary connects."""
+        self._connection = connection
+
+    def detach(self, connection: _ControlConnection) -> None:
+        """Called in the control thread when the binary disconnects."""
+        if self._connection is connection:
+            self._connection = None
+
+    def send(
+        self, command: ServerCommand, timeout: float = DEFAULT_TIMEOUT
+    ) -> Response | None:
+        """Send a command to the binary and wait for its response.
+
+        Raises an efro.error.CommunicationError if the binary is not
+        connected or does not answer in time.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._send(command, timeout), self._server.loop
+        ).result()
+
+    def send_nowait(self, command: ServerCommand) -> None:
+        """Send a command to the binary without waiting for a response.
+
+        Commands sent this way are delivered in order. Errors get
+        printed.
+        """
+        asyncio.run_coroutine_threadsafe(
+            self._send_nowait(command), self._server.loop
+        )
+
+    async def _send(
+        self, command: ServerCommand, timeout: float
+    ) -> Response | None:
+        connection = self._connection
+        if connection is None or connection.endpoint.is_closing():
+            raise CommunicationError('Server binary is not connected.')
+        try:
+            return await asyncio.wait_for(
+                connection.sender.send_async(connection, command), timeout
+            )
+        except TimeoutError as exc:
+            raise CommunicationError(
+                'Timed out waiting for server binary.'
+            ) from exc
+
+    async def _send_nowait(self, command: ServerCommand) -> None:
+        try:
+            await self._send(command, self.DEFAULT_TIMEOUT)
+        except Exception as exc:
+            print(
+                f'{Clr.RED}Error sending {type(command).__name__}'
+                f' to server: {exc}{Clr.RST}',
+                flush=True,
+            )
+
+
+class _ControlServer:
+    """Accepts control channel connections from our server binaries.
+
+    Runs its own asyncio event loop in a background thread.
+    """
 
     def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.address: tuple[str, int] | None = None
+        self._channels: dict[str, _ControlChannel] = {}
+        self._lock = Lock()
+        self._server: asyncio.Server | None = None
+
+    def start(self) -> None:
+        """Start listening on a local port."""
+        Thread(target=self.loop.run_forever, daemon=True).start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            self._start_server(), self.loop
+        ).result()
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.address = (host, port)
+
+    async def _start_server(self) -> asyncio.Server:
+        return await asyncio.start_server(
+            self._handle_connection, '127.0.0.1', 0
+        )
+
+    def create_channel(self) -> _ControlChannel:
+        """Create a channel for a binary we're about to launch."""
+        channel = _ControlChannel(self, secrets.token_hex(16))
+        with self._lock:
+            self._channels[channel.token] = channel
+        return channel
+
+    def remove_channel(self, channel: _ControlChannel) -> None:
+        """Forget a channel (once its binary has exited)."""
+        with self._lock:
+            self._channels.pop(channel.token, None)
+
+    def get_channel(self, token: str) -> _ControlChannel | None:
+        """Return the channel for a token, if there is one."""
+        with self._lock:
+            return self._channels.get(token)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = _ControlConnection(self, reader, writer)
+        await connection.endpoint.run()
+        if connection.channel is not None:
+            connection.channel.detach(connection)
+
+
+class _ManagerAppBase:
+    """Functionality shared by our server manager apps."""
+
+    # How many seconds we wait after asking a subprocess to do an
+    # immediate shutdown before bringing down the hammer.
+    IMMEDIATE_SHUTDOWN_TIME_LIMIT = 5.0
+
+    # Config files we look for next to this script ('.toml' or '.json'
+    # gets tacked on).
+    CONFIG_FILE_BASENAME = 'config'
+
+    # How often we look at the config file's mod-time.
+    CONFIG_CHECK_INTERVAL = 3.123
+
+    # Longest our bg thread sleeps when nothing is due; just a
+    # safety net since anything that needs it wakes it up.
+    MAX_WAIT_TIME = 5.0
+
+    def __init__(self, ba_root_path: str) -> None:
         self._user_provided_config_path: str | None = None
-        self._config = ServerConfig()
-        self._ba_root_path = os.path.abspath('dist/ba_root')
+        self._ba_root_path = os.path.abspath(ba_root_path)
         self._initial_exec_code: str | None = None
         self._interactive = sys.stdin.isatty()
-        self._wrapper_shutdown_desired = False
         self._done = False
-        self._subprocess_commands: list[str | ServerCommand] = []
-        self._subprocess_commands_lock = Lock()
-        self._subprocess_force_kill_time: float | None = None
         self._auto_restart = True
         self._config_auto_restart = True
         self._config_mtime: float | None = None
@@ -151,14 +590,12 @@ class ServerManagerApp:
         self._should_report_subprocess_error = False
         self._running = False
         self._interpreter_start_time: float | None = None
-        self._subprocess: subprocess.Popen[bytes] | None = None
-        self._subprocess_launch_time: float | None = None
-        self._subprocess_sent_config_auto_restart = False
-        self._subprocess_sent_clean_exit = False
-        self._subprocess_sent_unclean_exit = False
-        self._subprocess_thread: Thread | None = None
-        self._subprocess_exited_cleanly: bool | None = None
+        self._bg_thread: Thread | None = None
         self._did_multi_config_warning = False
+        self._control_server = _ControlServer()
+
+        # Set to wake our bg thread when something needs its attention.
+        self._wakeup = Event()
 
         # This may override the above defaults.
         self._parse_command_line_args()
@@ -168,16 +605,6 @@ class ServerManagerApp:
         # attempts.
         self.load_config(strict=True, print_confirmation=False)
 
-    @property
-    def config(self) -> ServerConfig:
-        """The current config for the app."""
-        return self._config
-
-    @config.setter
-    def config(self, value: ServerConfig) -> None:
-        dataclass_validate(value)
-        self._config = value
-
     def _prerun(self) -> None:
         """Common code at the start of any run."""
 
@@ -204,16 +631,19 @@ class ServerManagerApp:
         # not be the case (we support being called from any location).
         os.chdir(os.path.abspath(os.path.dirname(__file__)))
 
+        # Binaries we launch connect back to us here.
+        self._control_server.start()
+
         # Fire off a background thread to wrangle our server binaries.
-        self._subprocess_thread = Thread(target=self._bg_thread_main)
-        self._subprocess_thread.start()
+        self._bg_thread = Thread(target=self._bg_thread_main)
+        self._bg_thread.start()
 
     def _postrun(self) -> None:
         """Common code at the end of any run."""
         print(f'{Clr.CYN}Server manager shutting down...{Clr.RST}', flush=True)
 
-        assert self._subprocess_thread is not None
-        if self._subprocess_thread.is_alive():
+        assert self._bg_thread is not None
+        if self._bg_thread.is_alive():
             print(
                 f'{Clr.CYN}Waiting for subprocess exit...{Clr.RST}', flush=True
             )
@@ -221,7 +651,8 @@ class ServerManagerApp:
         # Mark ourselves as shutting down and wait for the process to
         # wrap up.
         self._done = True
-        self._subprocess_thread.join()
+        self._wakeup.set()
+        self._bg_thread.join()
 
         # If there's a server error we should care about, exit the
         # entire wrapper uncleanly.
@@ -293,134 +724,6 @@ class ServerManagerApp:
 
         self._postrun()
 
-    def cmd(self, statement: str) -> None:
-        """Exec a Python command on the current running server subprocess.
-
-        Note that commands are executed asynchronously and no status or
-        return value is accessible from this manager app.
-        """
-        if not isinstance(statement, str):
-            raise TypeError(f'Expected a string arg; got {type(statement)}')
-        with self._subprocess_commands_lock:
-            self._subprocess_commands.append(statement)
-        self._block_for_command_completion()
-
-    def _block_for_command_completion(self) -> None:
-        # Ideally we'd block here until the command was run so our
-        # prompt would print after it's results. We currently don't get
-        # any response from the app so the best we can do is block until
-        # our bg thread has sent it. In the future we can perhaps add a
-        # proper 'command port' interface for proper blocking two way
-        # communication.
-        while True:
-            with self._subprocess_commands_lock:
-                if not self._subprocess_commands:
-                    break
-            time.sleep(0.1)
-
-        # One last short delay so if we come out *just* as the command
-        # is sent we'll hopefully still give it enough time to
-        # process/print.
-        time.sleep(0.1)
-
-    def screenmessage(
-        self,
-        message: str,
-        color: tuple[float, float, float] | None = None,
-        clients: list[int] | None = None,
-    ) -> None:
-        """Display a screen-message.
-
-        This will have no name attached and not show up in chat history.
-        They will show up in replays, however (unless clients is passed).
-        """
-        from bacommon.servermanager import ScreenMessageCommand
-
-        self._enqueue_server_command(
-            ScreenMessageCommand(message=message, color=color, clients=clients)
-        )
-
-    def chatmessage(
-        self, message: str, clients: list[int] | None = None
-    ) -> None:
-        """Send a chat message from the server.
-
-        This will have the server's name attached and will be logged
-        in client chat windows, just like other chat messages.
-        """
-        from bacommon.servermanager import ChatMessageCommand
-
-        self._enqueue_server_command(
-            ChatMessageCommand(message=message, clients=clients)
-        )
-
-    def clientlist(self) -> None:
-        """Print a list of connected clients."""
-        from bacommon.servermanager import ClientListCommand
-
-        self._enqueue_server_command(ClientListCommand())
-        self._block_for_command_completion()
-
-    def kick(self, client_id: int, ban_time: int | None = None) -> None:
-        """Kick the client with the provided id.
-
-        If ban_time is provided, the client will be banned for that
-        length of time in seconds. If it is None, ban duration will
-        be determined automatically. Pass 0 or a negative number for no
-        ban time.
-        """
-        from bacommon.servermanager import KickCommand
-
-        self._enqueue_server_command(
-            KickCommand(client_id=client_id, ban_time=ban_time)
-        )
-
-    def restart(self, immediate: bool = True) -> None:
-        """Restart the server subprocess.
-
-        By default, the current server process will exit immediately.
-        If 'immediate' is passed as False, however, it will instead exit at
-        the next clean transition point (the end of a series, etc).
-        """
-        from bacommon.servermanager import ShutdownCommand, ShutdownReason
-
-        self._enqueue_server_command(
-            ShutdownCommand(
-                reason=ShutdownReason.RESTARTING, immediate=immediate
-            )
-        )
-
-        # If we're asking for an immediate restart but don't get one
-        # within the grace period, bring down the hammer.
-        if immediate:
-            self._subprocess_force_kill_time = (
-                time.time() + self.IMMEDIATE_SHUTDOWN_TIME_LIMIT
-            )
-
-    def shutdown(self, immediate: bool = True) -> None:
-        """Shut down the server subprocess and exit the wrapper.
-
-        By default, the current server process will exit immediately.
-        If 'immediate' is passed as False, however, it will instead exit at
-        the next clean transition point (the end of a series, etc).
-        """
-        from bacommon.servermanager import ShutdownCommand, ShutdownReason
-
-        self._enqueue_server_command(
-            ShutdownCommand(reason=ShutdownReason.NONE, immediate=immediate)
-        )
-
-        # An explicit shutdown means we know to bail completely once
-        # this subprocess completes.
-        self._wrapper_shutdown_desired = True
-
-        # If we're asking for an immediate shutdown but don't get one
-        # within the grace period, bring down the hammer.
-        if immediate:
-            self._subprocess_force_kill_time = (
-                time.time() + self.IMMEDIATE_SHUTDOWN_TIME_LIMIT
-            )
-
     def _parse_command_line_args(self) -> None:
         """Parse command line args."""
         # pylint: disable=too-many-branches
@@ -433,6 +736,9 @@ class ServerManagerApp:
             if arg == '--help':
                 self.print_help()
                 sys.exit(0)
+            elif arg == '--fleet':
+                # Handled by main() when picking which app to run.
+                i += 1
             elif arg == '--config':
                 if i + 1 >= argc:
                     raise CleanError('Expected a config path as next arg.')
@@ -561,6 +867,22 @@ class ServerManagerApp:
                 ' will be automatically restarted if changes to the server'
                 ' config file are detected. This disables that behavior.'
             )
+            + '\n'
+            f'{Clr.BLD}--fleet{Clr.RST}\n'
+            + cls._par(
+                'Run a fleet of server binaries instead of just one. Each'
+                ' instance gets its own port, party name, and root directory'
+                ' derived from a single template config, and all of them are'
+                ' managed by this one script. The config file defaults to'
+                ' \'fleet_config.toml\' or \'fleet_config.json\' and holds a'
+                ' ServerFleetConfig, with the template config in its'
+                ' \'server\' section. The root directory defaults to'
+                ' \'dist/ba_root_fleet\'; each instance uses a numbered'
+                ' subdirectory of it and writes its output to a'
+                ' \'server.log\' file there. A combined'
+                ' \'fleet_status.json\' is kept up to date in the root'
+                ' directory as well.'
+            )
         )
         print(out)
 
@@ -576,7 +898,7 @@ class ServerManagerApp:
         maxtries = 11
         for trynum in range(maxtries):
             try:
-                self._config = self._load_config_from_file(
+                self._load_config_from_file(
                     print_confirmation=print_confirmation
                 )
                 return
@@ -618,12 +940,13 @@ class ServerManagerApp:
         # Otherwise look for config.toml or config.json in the same dir
         # as our script. Need to work in abs paths since we may chdir when
         # we start running.
+        basename = self.CONFIG_FILE_BASENAME
         toml_path = os.path.abspath(
-            os.path.join(os.path.dirname(__file__), 'config.toml')
+            os.path.join(os.path.dirname(__file__), f'{basename}.toml')
         )
         toml_exists = os.path.exists(toml_path)
         json_path = os.path.abspath(
-            os.path.join(os.path.dirname(__file__), 'config.json')
+            os.path.join(os.path.dirname(__file__), f'{basename}.json')
         )
         json_exists = os.path.exists(json_path)
 
@@ -631,7 +954,7 @@ class ServerManagerApp:
         if toml_exists and json_exists and not self._did_multi_config_warning:
             self._did_multi_config_warning = True
             print(
-                f'{Clr.YLW}Both config.toml and config.json'
+                f'{Clr.YLW}Both {basename}.toml and {basename}.json'
                 f' found; will use json.{Clr.RST}',
                 flush=True,
             )
@@ -639,8 +962,7 @@ class ServerManagerApp:
             return json_path
         return toml_path
 
-    def _load_config_from_file(self, print_confirmation: bool) -> ServerConfig:
-        out: ServerConfig | None = None
+    def _load_config_from_file(self, print_confirmation: bool) -> None:
 
         config_path = self._get_config_path()
 
@@ -657,9 +979,10 @@ class ServerManagerApp:
                         f' config.{Clr.RST}',
                         flush=True,
                     )
+                self._apply_config(None)
                 self._config_mtime = None
                 self._last_config_mtime_check_time = time.time()
-                return ServerConfig()
+                return
 
             # Don't be so lenient if the user pointed us at one though.
             raise RuntimeError(f"Config file not found: '{config_path}'.")
@@ -675,7 +998,7 @@ class ServerManagerApp:
                     f" path must end with '.toml' or '.json'."
                 )
 
-        out = dataclass_from_dict(ServerConfig, user_config_raw)
+        self._apply_config(user_config_raw)
 
         # Update our known mod-time since we know it exists.
         self._config_mtime = Path(config_path).stat().st_mtime
@@ -686,7 +1009,51 @@ class ServerManagerApp:
                 f'{Clr.CYN}Valid server config file loaded.{Clr.RST}',
                 flush=True,
             )
-        return out
+
+    def _apply_config(self, raw: dict | None) -> None:
+        """Set our config from raw config file data.
+
+        None means no config file was found and defaults should be used.
+        Should raise an exception if the data is invalid.
+        """
+        raise NotImplementedError()
+
+    def _config_file_changed(self, now: float) -> bool:
+        """Return whether the config file looks to have been modified.
+
+        Only actually checks every few seconds.
+        """
+        if (
+            self._last_config_mtime_check_time is not None
+            and (now - self._last_config_mtime_check_time)
+            <= self.CONFIG_CHECK_INTERVAL
+        ):
+            return False
+        self._last_config_mtime_check_time = now
+        mtime: float | None
+        config_path = self._get_config_path()
+        if os.path.isfile(config_path):
+            mtime = Path(config_path).stat().st_mtime
+        else:
+            mtime = None
+        return mtime != self._config_mtime
+
+    def _get_wait_time(self, now: float, deadlines: list[float]) -> float:
+        """How long our bg thread can sleep given upcoming deadlines.
+
+        Includes the next config file check if we're watching it.
+        """
+        if (
+            self._auto_restart
+            and self._config_auto_restart
+            and self._last_config_mtime_check_time is not None
+        ):
+            deadlines.append(
+                self._last_config_mtime_check_time
+                + self.CONFIG_CHECK_INTERVAL
+                + 0.01
+            )
+        return max(0.0, min([now + self.MAX_WAIT_TIME] + deadlines) - now)
 
     def _enable_tab_completion(self, locs: dict) -> None:
         """Enable tab-completion on platforms where available (linux/mac)."""
@@ -702,70 +1069,284 @@ class ServerManagerApp:
 
     def _bg_thread_main(self) -> None:
         """Top level method run by our bg thread."""
-        while not self._done:
-            self._run_server_cycle()
+        raise NotImplementedError()
 
     def _handle_term_signal(self, sig: int, frame: FrameType | None) -> None:
         """Handle signals (will always run in the main thread)."""
         del sig, frame  # Unused.
         sys.exit(1 if self._should_report_subprocess_error else 0)
 
-    def _run_server_cycle(self) -> None:
-        """Spin up the server subprocess and run it until exit."""
-        # pylint: disable=consider-using-with
-
-        # Reload our config, and update our overall behavior based on
-        # it. We do non-strict this time to give the user repeated
-        # attempts if if they mess up while modifying the config on the
-        # fly.
-        self.load_config(strict=False, print_confirmation=True)
 
-        self._prep_subprocess_environment()
-
-        # Launch the binary and grab its stdin; we'll use this to feed
-        # it commands.
-        self._subprocess_launch_time = time.time()
+class ServerManagerApp(_ManagerAppBase):
+    """An app which manages BallisticaKit server execution.
 
-        # Set an environment var so the server process knows its being
-        # run under us. This causes it to ignore ctrl-c presses and
-        # other slight behavior tweaks. Hmm; should this be an argument
-        # instead?
-        os.environ['BA_SERVER_WRAPPER_MANAGED'] = '1'
+    Handles configuring, launching, re-launching, and otherwise
+    managing BallisticaKit operating in server mode.
+    """
 
-        # Set particular things that can *only* be passed as args and
-        # not config vals (because they need to be handled by the binary
-        # before spinning up Python or whatnot).
-        extra_args: list[str] = []
+    # How often the server binary sends us telemetry.
+    TELEMETRY_INTERVAL = 1.0
 
-        if self._config.dont_write_bytecode:
-            extra_args += ['--dont-write-bytecode']
+    def __init__(self) -> None:
+        self._config = ServerConfig()
+        self._wrapper_shutdown_desired = False
+        self._subprocess_commands: list[str | ServerCommand] = []
+        self._subprocess_commands_lock = Lock()
+        self._subprocess_commands_sent = Condition(
+            self._subprocess_commands_lock
+        )
+        self._subprocess_force_kill_time: float | None = None
+        self._subprocess: subprocess.Popen[bytes] | None = None
+        self._channel: _ControlChannel | None = None
+        self._event_calls: list[Callable[[ServerEvent], None]] = []
+        self._subprocess_launch_time: float | None = None
+        self._subprocess_sent_config_auto_restart = False
+        self._subprocess_sent_clean_exit = False
+        self._subprocess_sent_unclean_exit = False
+        self._subprocess_exited_cleanly: bool | None = None
+        super().__init__('dist/ba_root')
+
+    @property
+    def config(self) -> ServerConfig:
+        """The current config for the app."""
+        return self._config
 
-        if self._initial_exec_code is not None:
-            # Forward the wrapper's --exec value through to the
-            # subprocess binary's own --exec arg.
-            extra_args += ['--exec', self._initial_exec_code]
+    @config.setter
+    def config(self, value: ServerConfig) -> None:
+        dataclass_validate(value)
+        self._config = value
 
-        # Set an environment var to change the device name. Device name
-        # is used while making connection with master server,
-        # cloud-console recognize us with this name.
-        os.environ['BA_DEVICE_NAME'] = self._config.party_name
+    def cmd(self, statement: str) -> None:
+        """Exec a Python command on the current running server subprocess.
 
-        print(f'{Clr.CYN}Launching server subprocess...{Clr.RST}', flush=True)
-        binary_name = (
-            'BallisticaKitHeadless.exe'
-            if os.name == 'nt'
-            else './ballisticakit_headless'
+        Note that commands are executed asynchronously and no status or
+        return value is accessible from this manager app.
+        """
+        if not isinstance(statement, str):
+            raise TypeError(f'Expected a string arg; got {type(statement)}')
+        self._enqueue_server_command(statement)
+        self._block_for_command_completion()
+
+    def _block_for_command_completion(self) -> None:
+        # Raw statements go through stdin and don't answer, so the best
+        # we can do is wait until our bg thread has sent them.
+        with self._subprocess_commands_lock:
+            self._subprocess_commands_sent.wait_for(
+                lambda: not self._subprocess_commands, timeout=5.0
+            )
+
+        # One last short delay so if we come out *just* as the command
+        # is sent we'll hopefully still give it enough time to
+        # process/print.
+        time.sleep(0.1)
+
+    def get_status(self) -> ServerStatus:
+        """Return the server's current status.
+
+        Raises an efro.error.CommunicationError if the server is not
+        connected to us (it connects once it enters server mode).
+        """
+        from bacommon.servermanager import StatusCommand, ServerStatusResponse
+
+        response = self._get_channel().send(StatusCommand())
+        assert isinstance(response, ServerStatusResponse)
+        return response.status
+
+    def get_clients(self) -> list[ServerClientInfo]:
+        """Return info about connected clients.
+
+        Raises an efro.error.CommunicationError if the server is not
+        connected to us.
+        """
+        from bacommon.servermanager import ClientListCommand, ClientListResponse
+
+        response = self._get_channel().send(ClientListCommand())
+        assert isinstance(response, ClientListResponse)
+        return response.clients
+
+    def add_event_call(self, call: Callable[[ServerEvent], None]) -> None:
+        """Register a call for events from the server.
+
+        Events include clients joining and leaving and session and
+        activity changes. The call runs in a background thread.
+        """
+        self._event_calls.append(call)
+        channel = self._channel
+        if channel is not None:
+            channel.event_calls.append(call)
+
+    def _get_channel(self) -> _ControlChannel:
+        channel = self._channel
+        if channel is None or not channel.connected:
+            raise CommunicationError('Server is not connected.')
+        return channel
+
+    def _send_server_command_now(
+        self, command: ServerCommand
+    ) -> Response | None:
+        """Send a command and wait for its response if possible.
+
+        If the server is not connected to us yet the command is instead
+        enqueued to go through its stdin, and None is returned.
+        """
+        channel = self._channel
+        if channel is None or not channel.connected:
+            self._enqueue_server_command(command)
+            return None
+        return channel.send(command)
+
+    def screenmessage(
+        self,
+        message: str,
+        color: tuple[float, float, float] | None = None,
+        clients: list[int] | None = None,
+    ) -> None:
+        """Display a screen-message.
+
+        This will have no name attached and not show up in chat history.
+        They will show up in replays, however (unless clients is passed).
+        """
+        from bacommon.servermanager import ScreenMessageCommand
+
+        self._send_server_command_now(
+            ScreenMessageCommand(message=message, color=color, clients=clients)
+        )
+
+    def chatmessage(
+        self, message: str, clients: list[int] | None = None
+    ) -> None:
+        """Send a chat message from the server.
+
+        This will have the server's name attached and will be logged
+        in client chat windows, just like other chat messages.
+        """
+        from bacommon.servermanager import ChatMessageCommand
+
+        self._send_server_command_now(
+            ChatMessageCommand(message=message, clients=clients)
+        )
+
+    def clientlist(self) -> None:
+        """Print a list of connected clients."""
+        from bacommon.servermanager import ClientListCommand
+
+        if self._channel is None or not self._channel.connected:
+            # The server prints the list itself in this case.
+            self._enqueue_server_command(ClientListCommand())
+            self._block_for_command_completion()
+            return
+        _print_client_list(self.get_clients())
+
+    def kick(self, client_id: int, ban_time: int | None = None) -> bool | None:
+        """Kick the client with the provided id.
+
+        If ban_time is provided, the client will be banned for that
+        length of time in seconds. If it is None, ban duration will
+        be determined automatically. Pass 0 or a negative number for no
+        ban time.
+
+        Returns whether the client could be kicked, or None if the
+        server is not connected to us yet (in which case the command is
+        sent through its stdin).
+        """
+        from efro.message import BoolResponse
+        from bacommon.servermanager import KickCommand
+
+        response = self._send_server_command_now(
+            KickCommand(client_id=client_id, ban_time=ban_time)
         )
+        if response is None:
+            return None
+        assert isinstance(response, BoolResponse)
+        return response.value
+
+    def restart(self, immediate: bool = True) -> None:
+        """Restart the server subprocess.
+
+        By default, the current server process will exit immediately.
+        If 'immediate' is passed as False, however, it will instead exit at
+        the next clean transition point (the end of a series, etc).
+        """
+        from bacommon.servermanager import ShutdownCommand, ShutdownReason
+
+        self._enqueue_server_command(
+            ShutdownCommand(
+                reason=ShutdownReason.RESTARTING, immediate=immediate
+            )
+        )
+
+        # If we're asking for an immediate restart but don't get one
+        # within the grace period, bring down the hammer.
+        if immediate:
+            self._subprocess_force_kill_time = (
+                time.time() + self.IMMEDIATE_SHUTDOWN_TIME_LIMIT
+            )
+
+    def shutdown(self, immediate: bool = True) -> None:
+        """Shut down the server subprocess and exit the wrapper.
+
+        By default, the current server process will exit immediately.
+        If 'immediate' is passed as False, however, it will instead exit at
+        the next clean transition point (the end of a series, etc).
+        """
+        from bacommon.servermanager import ShutdownCommand, ShutdownReason
+
+        self._enqueue_server_command(
+            ShutdownCommand(reason=ShutdownReason.NONE, immediate=immediate)
+        )
+
+        # An explicit shutdown means we know to bail completely once
+        # this subprocess completes.
+        self._wrapper_shutdown_desired = True
+
+        # If we're asking for an immediate shutdown but don't get one
+        # within the grace period, bring down the hammer.
+        if immediate:
+            self._subprocess_force_kill_time = (
+                time.time() + self.IMMEDIATE_SHUTDOWN_TIME_LIMIT
+            )
+
+    def _apply_config(self, raw: dict | None) -> None:
+        self._config = (
+            ServerConfig()
+            if raw is None
+            else dataclass_from_dict(ServerConfig, raw)
+        )
+
+    def _bg_thread_main(self) -> None:
+        """Top level method run by our bg thread."""
+        while not self._done:
+            self._run_server_cycle()
+
+    def _run_server_cycle(self) -> None:
+        """Spin up the server subprocess and run it until exit."""
+
+        # Reload our config, and update our overall behavior based on
+        # it. We do non-strict this time to give the user repeated
+        # attempts if if they mess up while modifying the config on the
+        # fly.
+        self.load_config(strict=False, print_confirmation=True)
+
         assert self._ba_root_path is not None
+        _write_binary_config(self._config, self._ba_root_path)
+
+        # Launch the binary and grab its stdin; we'll use this to feed
+        # it commands.
+        self._subprocess_launch_time = time.time()
+
+        print(f'{Clr.CYN}Launching server subprocess...{Clr.RST}', flush=True)
         self._subprocess = None
 
+        # It connects back to us through this once it's running.
+        self._channel = self._control_server.create_channel()
+        self._channel.event_calls += self._event_calls
+
         # Launch!
         try:
-            self._subprocess = subprocess.Popen(
-                [binary_name, '--config-dir', self._ba_root_path] + extra_args,
-                stdin=subprocess.PIPE,
-                cwd='dist',
+            self._subprocess = _launch_server_binary(
+                self._config, self._ba_root_path, self._initial_exec_code
             )
+            _watch_process(self._subprocess, self._wakeup)
         except Exception as exc:
             self._subprocess_exited_cleanly = False
             print(
@@ -783,6 +1364,8 @@ class ServerManagerApp:
             )
 
         self._kill_subprocess()
+        self._control_server.remove_channel(self._channel)
+        self._channel = None
 
         assert self._subprocess_exited_cleanly is not None
 
@@ -827,67 +1410,6 @@ class ServerManagerApp:
                 # interpreter call.
                 os.kill(os.getpid(), signal.SIGTERM)
 
-    def _prep_subprocess_environment(self) -> None:
-        """Write files that must exist at process launch."""
-
-        assert self._ba_root_path is not None
-        os.makedirs(self._ba_root_path, exist_ok=True)
-        cfgpath = os.path.join(self._ba_root_path, 'config.json')
-        if os.path.exists(cfgpath):
-            with open(cfgpath, encoding='utf-8') as infile:
-                bincfg = json.loads(infile.read())
-        else:
-            bincfg = {}
-
-        # Some of our config values translate directly into the
-        # ballisticakit config file; the rest we pass at runtime.
-
-        # IMPORTANT: Make sure we *ALWAYS* push values (or lack thereof)
-        # through; otherwise stale values from previous runs can linger
-        # in the bincfg.
-
-        bincfg['Port'] = self._config.port
-        bincfg['Auto Balance Teams'] = self._config.auto_balance_teams
-        bincfg['Show Tutorial'] = self._config.show_tutorial
-
-        binkey = 'SceneV1 Host Protocol'
-        if self._config.protocol_version is not None:
-            bincfg[binkey] = self._config.protocol_version
-        elif binkey in bincfg:
-            del bincfg[binkey]
-
-        binkey = 'Custom Team Names'
-        if self._config.team_names is not None:
-            bincfg[binkey] = self._config.team_names
-        elif binkey in bincfg:
-            del bincfg[binkey]
-
-        binkey = 'Custom Team Colors'
-        if self._config.team_colors is not None:
-            bincfg[binkey] = self._config.team_colors
-        elif binkey in bincfg:
-            del bincfg[binkey]
-
-        bincfg['Idle Exit Minutes'] = self._config.idle_exit_minutes
-
-        binkey = 'Log Levels'
-        if self._config.log_levels is not None:
-            # Users supply us log level names like NOTSET; convert those
-            # to numeric vals which the engine expects.
-            bincfg[binkey] = {
-                key: logging.getLevelName(val)
-                for key, val in self._config.log_levels.items()
-            }
-        elif binkey in bincfg:
-            del bincfg[binkey]
-
-        # We feed the binary commands through stdin, so make sure it
-        # is using the simple old dumb path for that.
-        bincfg['Use Native Python REPL'] = False
-
-        with open(cfgpath, 'w', encoding='utf-8') as outfile:
-            outfile.write(json.dumps(bincfg))
-
     def _enqueue_server_command(self, command: ServerCommand) -> None:
         """Enqueue a command to be sent to the server.
 
@@ -895,39 +1417,43 @@ class ServerManagerApp:
         """
         with self._subprocess_commands_lock:
             self._subprocess_commands.append(command)
+        self._wakeup.set()
 
-    def _send_server_command(self, command: ServerCommand) -> None:
+    def _send_server_command(self, command: str | ServerCommand) -> None:
         """Send a command to the server.
 
         Must be called from the server process thread.
         """
-        import pickle
-
-        assert current_thread() is self._subprocess_thread
+        assert current_thread() is self._bg_thread
         assert self._subprocess is not None
-        assert self._subprocess.stdin is not None
-        val = repr(pickle.dumps(command))
-        assert '\n' not in val
-        execcode = (
-            f'import baclassic._servermode;'
-            f' baclassic._servermode._cmd({val})\n'
-        ).encode()
-        self._subprocess.stdin.write(execcode)
-        self._subprocess.stdin.flush()
+        _send_to_server(self._subprocess, command, self._channel)
 
     def _run_subprocess_until_exit(self) -> None:
         if self._subprocess is None:
             return
 
-        assert current_thread() is self._subprocess_thread
+        assert current_thread() is self._bg_thread
         assert self._subprocess.stdin is not None
+        assert self._subprocess_launch_time is not None
+        launch_time = self._subprocess_launch_time
 
         # Send the initial server config which should kick things off
         # (but make sure its values are still valid first).
         dataclass_validate(self._config)
-        self._send_server_command(StartServerModeCommand(self._config))
+        assert self._channel is not None
+        self._send_server_command(
+            StartServerModeCommand(
+                self._config,
+                control_address=self._control_server.address,
+                control_token=self._channel.token,
+                telemetry_interval=self.TELEMETRY_INTERVAL,
+            )
+        )
 
         while True:
+            # Anything that happens from here on wakes us back up.
+            self._wakeup.clear()
+
             # If the app is trying to shut down, nope out immediately.
             if self._done:
                 break
@@ -935,14 +1461,9 @@ class ServerManagerApp:
             # Pass along any commands to our process.
             with self._subprocess_commands_lock:
                 for incmd in self._subprocess_commands:
-                    # If we're passing a raw string to exec, no need to
-                    # wrap it in any proper structure.
-                    if isinstance(incmd, str):
-                        self._subprocess.stdin.write((incmd + '\n').encode())
-                        self._subprocess.stdin.flush()
-                    else:
-                        self._send_server_command(incmd)
+                    self._send_server_command(incmd)
                 self._subprocess_commands = []
+                self._subprocess_commands_sent.notify_all()
 
             # Request restarts/shut-downs for various reasons.
             self._request_shutdowns_or_restarts()
@@ -974,10 +1495,18 @@ class ServerManagerApp:
                 self._subprocess_exited_cleanly = code == 0
                 break
 
-            time.sleep(0.25)
+            # Sleep until something happens or our next timer is due.
+            now = time.time()
+            deadlines = [
+                launch_time + minutes * 60.0 + 0.01
+                for minutes in _exit_minutes(self._config)
+            ]
+            if self._subprocess_force_kill_time is not None:
+                deadlines.append(self._subprocess_force_kill_time)
+            self._wakeup.wait(self._get_wait_time(now, deadlines))
 
     def _request_shutdowns_or_restarts(self) -> None:
-        assert current_thread() is self._subprocess_thread
+        assert current_thread() is self._bg_thread
         assert self._subprocess_launch_time is not None
         now = time.time()
         minutes_since_launch = (now - self._subprocess_launch_time) / 60.0
@@ -988,77 +1517,54 @@ class ServerManagerApp:
             and self._config_auto_restart
             and not self._subprocess_sent_config_auto_restart
         ):
-            if (
-                self._last_config_mtime_check_time is None
-                or (now - self._last_config_mtime_check_time) > 3.123
-            ):
-                self._last_config_mtime_check_time = now
-                mtime: float | None
-                config_path = self._get_config_path()
-                if os.path.isfile(config_path):
-                    mtime = Path(config_path).stat().st_mtime
-                else:
-                    mtime = None
-                if mtime != self._config_mtime:
-                    print(
-                        f'{Clr.CYN}Config-file change detected;'
-                        f' requesting immediate restart.{Clr.RST}',
-                        flush=True,
-                    )
-                    self.restart(immediate=True)
-                    self._subprocess_sent_config_auto_restart = True
-
-        # Attempt clean exit if our clean-exit-time passes (and enforce
-        # a 6 hour max if not provided).
-        clean_exit_minutes = 360.0
-        if self._config.clean_exit_minutes is not None:
-            clean_exit_minutes = min(
-                clean_exit_minutes, self._config.clean_exit_minutes
-            )
-        if clean_exit_minutes is not None:
-            if (
-                minutes_since_launch > clean_exit_minutes
-                and not self._subprocess_sent_clean_exit
-            ):
-                opname = 'restart' if self._auto_restart else 'shutdown'
+            if self._config_file_changed(now):
                 print(
-                    f'{Clr.CYN}clean_exit_minutes'
-                    f' ({clean_exit_minutes})'
-                    f' elapsed; requesting soft'
-                    f' {opname}.{Clr.RST}',
+                    f'{Clr.CYN}Config-file change detected;'
+                    f' requesting immediate restart.{Clr.RST}',
                     flush=True,
                 )
-                if self._auto_restart:
-                    self.restart(immediate=False)
-                else:
-                    self.shutdown(immediate=False)
-                self._subprocess_sent_clean_exit = True
-
-        # Attempt unclean exit if our unclean-exit-time passes (and
-        # enforce a 7 hour max if not provided).
-        unclean_exit_minutes = 420.0
-        if self._config.unclean_exit_minutes is not None:
-            unclean_exit_minutes = min(
-                unclean_exit_minutes, self._config.unclean_exit_minutes
+                self.restart(immediate=True)
+                self._subprocess_sent_config_auto_restart = True
+
+        # Attempt clean exit if our clean-exit-time passes, and unclean
+        # exit if our unclean-exit-time does (see _exit_minutes() for
+        # the maximums we enforce).
+        clean_exit_minutes, unclean_exit_minutes = _exit_minutes(self._config)
+        if (
+            minutes_since_launch > clean_exit_minutes
+            and not self._subprocess_sent_clean_exit
+        ):
+            opname = 'restart' if self._auto_restart else 'shutdown'
+            print(
+                f'{Clr.CYN}clean_exit_minutes'
+                f' ({clean_exit_minutes})'
+                f' elapsed; requesting soft'
+                f' {opname}.{Clr.RST}',
+                flush=True,
             )
-        if unclean_exit_minutes is not None:
-            if (
-                minutes_since_launch > unclean_exit_minutes
-                and not self._subprocess_sent_unclean_exit
-            ):
-                opname = 'restart' if self._auto_restart else 'shutdown'
-                print(
-                    f'{Clr.CYN}unclean_exit_minutes'
-                    f' ({unclean_exit_minutes})'
-                    f' elapsed; requesting immediate'
-                    f' {opname}.{Clr.RST}',
-                    flush=True,
-                )
-                if self._auto_restart:
-                    self.restart(immediate=True)
-                else:
-                    self.shutdown(immediate=True)
-                self._subprocess_sent_unclean_exit = True
+            if self._auto_restart:
+                self.restart(immediate=False)
+            else:
+                self.shutdown(immediate=False)
+            self._subprocess_sent_clean_exit = True
+
+        if (
+            minutes_since_launch > unclean_exit_minutes
+            and not self._subprocess_sent_unclean_exit
+        ):
+            opname = 'restart' if self._auto_restart else 'shutdown'
+            print(
+                f'{Clr.CYN}unclean_exit_minutes'
+                f' ({unclean_exit_minutes})'
+                f' elapsed; requesting immediate'
+                f' {opname}.{Clr.RST}',
+                flush=True,
+            )
+            if self._auto_restart:
+                self.restart(immediate=True)
+            else:
+                self.shutdown(immediate=True)
+            self._subprocess_sent_unclean_exit = True
 
     def _reset_subprocess_vars(self) -> None:
         self._subprocess = None
@@ -1071,7 +1577,7 @@ class ServerManagerApp:
 
     def _kill_subprocess(self) -> None:
         """End the server subprocess if it still exists."""
-        assert current_thread() is self._subprocess_thread
+        assert current_thread() is self._bg_thread
         if self._subprocess is None:
             return
 
@@ -1089,10 +1595,884 @@ class ServerManagerApp:
         print(f'{Clr.CYN}Subprocess stopped.{Clr.RST}', flush=True)
 
 
+class _FleetInstance:
+    """One server binary managed by a ServerFleetApp."""
+
+    def __init__(
+        self, index: int, config: ServerConfig, root_path: str
+    ) -> None:
+        self.index = index
+        self.config = config
+        self.root_path = root_path
+        self.cores: list[int] | None = None
+
+        # Removed from the fleet by a config change; stop and don't
+        # relaunch.
+        self.retired = False
+        self.commands: list[str | ServerCommand] = []
+        self.launches = 0
+        self.last_exit_code: int | None = None
+
+        # Restart backoff state.
+        self.backoff = 0.0
+        self.next_launch_time = 0.0
+
+        # A requested restart that hasn't been sent yet.
+        self.restart_time: float | None = None
+        self.restart_immediate = True
+
+        # Per-process state.
+        self.process: subprocess.Popen[bytes] | None = None
+        self.channel: _ControlChannel | None = None
+        self.launch_time: float | None = None
+        self.repin_pending = False
+        self.stopping = False
+        self.restart_requested = False
+        self.force_kill_time: float | None = None
+        self.sent_clean_exit = False
+        self.sent_unclean_exit = False
+
+    @property
+    def number(self) -> int:
+        """Instance number as shown to users (counting from 1)."""
+        return self.index + 1
+
+    @property
+    def log_path(self) -> str:
+        """Where the binary's output goes."""
+        return os.path.join(self.root_path, 'server.log')
+
+    def reset_process_vars(self) -> None:
+        """Clear per-process state once a process is gone."""
+        self.process = None
+        self.channel = None
+        self.launch_time = None
+        self.repin_pending = False
+        self.stopping = False
+        self.restart_requested = False
+        self.force_kill_time = None
+        self.sent_clean_exit = False
+        self.sent_unclean_exit = False
+
+
+class ServerFleetApp(_ManagerAppBase):
+    """An app which manages a fleet of BallisticaKit servers.
+
+    Like ServerManagerApp, but runs ServerFleetConfig.instance_count
+    server binaries at once, each on its own port and in its own root
+    directory, all supervised from one background thread.
+    """
+
+    CONFIG_FILE_BASENAME = 'fleet_config'
+
+    # Status reports older than this many status intervals are ignored.
+    STATUS_STALE_INTERVALS = 3.0
+
+    def __init__(self) -> None:
+        self._config = ServerFleetConfig()
+        self._instances: list[_FleetInstance] = []
+        self._lock = Lock()
+        self._shutdown_desired = False
+        self._shutdown_immediate = True
+        self._shutdown_sent = False
+        self._next_launch_time = 0.0
+        self._next_status_write_time = 0.0
+        self._did_affinity_warning = False
+        self._event_calls: list[Callable[[int, ServerEvent], None]] = []
+        super().__init__('dist/ba_root_fleet')
+
+    @property
+    def config(self) -> ServerFleetConfig:
+        """The current config for the app."""
+        return self._config
+
+    def get_status(self) -> ServerFleetStatus:
+        """Return the status of all instances.
+
+        Instance statuses come from the telemetry they send us.
+        """
+        from bacommon.servermanager import (
+            ServerFleetStatus,
+            ServerFleetInstanceStatus,
+        )
+
+        now = time.time()
+        instances: list[ServerFleetInstanceStatus] = []
+        for inst in list(self._instances):
+            process = inst.process
+            launch_time = inst.launch_time
+            status: ServerStatus | None = None
+            uptime: float | None = None
+            if process is None:
+                state = (
+                    'waiting' if self._should_launch(inst, None) else 'stopped'
+                )
+            else:
+                status = self._get_instance_status(inst, now)
+                uptime = None if launch_time is None else now - launch_time
+                if inst.stopping:
+                    state = 'stopping'
+                elif status is not None:
+                    state = 'running'
+                elif uptime is not None and uptime < 60.0:
+                    state = 'starting'
+                else:
+                    state = 'unresponsive'
+            instances.append(
+                ServerFleetInstanceStatus(
+                    instance=inst.number,
+                    port=inst.config.port,
+                    pid=None if process is None else process.pid,
+                    state=state,
+                    uptime=uptime,
+                    restarts=max(0, inst.launches - 1),
+                    last_exit_code=inst.last_exit_code,
+                    status=status,
+                )
+            )
+        return ServerFleetStatus(
+            time=now,
+            instances=instances,
+            client_count=sum(
+                i.status.client_count for i in instances if i.status
+            ),
+            player_count=sum(
+                i.status.player_count for i in instances if i.status
+            ),
+        )
+
+    def status(self) -> None:
+        """Print the status of all instances."""
+        fleet = self.get_status()
+        print(
+            f'{Clr.BLD}{"Inst":>4} {"Port":>5} {"PID":>7} {"State":<12}'
+            f' {"Uptime":>9} {"Restarts":>8} {"Clients":>7}'
+            f' {"Players":>7}{Clr.RST}'
+        )
+        for inst in fleet.instances:
+            uptime = (
+                '-' if inst.uptime is None else _format_duration(inst.uptime)
+            )
+            status = inst.status
+            print(
+                f'{inst.instance:>4} {inst.port:>5}'
+                f' {"-" if inst.pid is None else inst.pid:>7}'
+                f' {inst.state:<12} {uptime:>9} {inst.restarts:>8}'
+                f' {"-" if status is None else status.client_count:>7}'
+                f' {"-" if status is None else status.player_count:>7}'
+            )
+        print(
+            f'Total: {fleet.client_count} clients,'
+            f' {fleet.player_count} players.',
+            flush=True,
+        )
+
+    def get_clients(self, instance: int) -> list[ServerClientInfo]:
+        """Return info about clients connected to an instance.
+
+        Raises an efro.error.CommunicationError if the instance is not
+        connected to us (it connects once it enters server mode).
+        """
+        from bacommon.servermanager import ClientListCommand, ClientListResponse
+
+        response = self._get_channel(instance).send(ClientListCommand())
+        assert isinstance(response, ClientListResponse)
+        return response.clients
+
+    def clientlist(self, instance: int | None = None) -> None:
+        """Print a list of clients connected to one or all instances."""
+        for inst in self._get_instances(instance):
+            print(f'{Clr.CYN}Instance {inst.number}:{Clr.RST}', flush=True)
+            try:
+                _print_client_list(self.get_clients(inst.number))
+            except CommunicationError as exc:
+                print(f'{Clr.RED}{exc}{Clr.RST}', flush=True)
+
+    def add_event_call(self, call: Callable[[int, ServerEvent], None]) -> None:
+        """Register a call for events from instances.
+
+        Events include clients joining and leaving and session and
+        activity changes. The call is passed the instance number along
+        with each event and runs in a background thread.
+        """
+        self._event_calls.append(call)
+
+    def cmd(self, statement: str, instance: int | None = None) -> None:
+        """Exec a Python command on one or all server subprocesses.
+
+        Note that commands are executed asynchronously, and any output
+        goes to the instances' server.log files.
+        """
+        if not isinstance(statement, str):
+            raise TypeError(f'Expected a string arg; got {type(statement)}')
+        self._enqueue_server_command(statement, instance)
+
+    def screenmessage(
+        self,
+        message: str,
+        color: tuple[float, float, float] | None = None,
+        clients: list[int] | None = None,
+        instance: int | None = None,
+    ) -> None:
+        """Display a screen-message on one or all servers.
+
+        This will have no name attached and not show up in chat history.
+        They will show up in replays, however (unless clients is passed).
+        """
+        from bacommon.servermanager import ScreenMessageCommand
+
+        self._enqueue_server_command(
+            ScreenMessageCommand(message=message, color=color, clients=clients),
+            instance,
+        )
+
+    def chatmessage(
+        self,
+        message: str,
+        clients: list[int] | None = None,
+        instance: int | None = None,
+    ) -> None:
+        """Send a chat message from one or all servers.
+
+        This will have the server's name attached and will be logged
+        in client chat windows, just like other chat messages.
+        """
+        from bacommon.servermanager import ChatMessageCommand
+
+        self._enqueue_server_command(
+            ChatMessageCommand(message=message, clients=clients), instance
+        )
+
+    def kick(
+        self, instance: int, client_id: int, ban_time: int | None = None
+    ) -> bool | None:
+        """Kick a client from a server.
+
+        See ServerManagerApp.kick() for details on ban_time and the
+        return value.
+        """
+        from efro.message import BoolResponse
+        from bacommon.servermanager import KickCommand
+
+        command = KickCommand(client_id=client_id, ban_time=ban_time)
+        channel = self._get_instances(instance)[0].channel
+        if channel is None or not channel.connected:
+            self._enqueue_server_command(command, instance)
+            return None
+        response = channel.send(command)
+        assert isinstance(response, BoolResponse)
+        return response.value
+
+    def restart(
+        self, instance: int | None = None, immediate: bool = True
+    ) -> None:
+        """Restart one or all server subprocesses.
+
+        When restarting all of them, restarts are staggered by the
+        config's restart_stagger_seconds. By default each process exits
+        immediately when its turn comes. If 'immediate' is passed as
+        False, it will instead exit at the next clean transition point
+        (the end of a series, etc).
+        """
+        self._schedule_restarts(self._get_instances(instance), immediate)
+
+    def shutdown(self, immediate: bool = True) -> None:
+        """Shut down all server subprocesses and exit the wrapper.
+
+        By default, the server processes will exit immediately.
+        If 'immediate' is passed as False, however, they will instead exit
+        at their next clean transition point (the end of a series, etc).
+        """
+        with self._lock:
+            self._shutdown_immediate = immediate
+            self._shutdown_desired = True
+        self._wakeup.set()
+
+    def _get_instances(self, instance: int | None) -> list[_FleetInstance]:
+        instances = [i for i in self._instances if not i.retired]
+        if instance is None:
+            return instances
+        if not 1 <= instance <= len(instances):
+            raise ValueError(
+                f'Invalid instance {instance};'
+                f' expected 1 through {len(instances)}.'
+            )
+        return [instances[instance - 1]]
+
+    def _get_channel(self, instance: int) -> _ControlChannel:
+        channel = self._get_instances(instance)[0].channel
+        if channel is None or not channel.connected:
+            raise CommunicationError(f'Instance {instance} is not connected.')
+        return channel
+
+    def _enqueue_server_command(
+        self, command: str | ServerCommand, instance: int | None
+    ) -> None:
+        """Enqueue a command to be sent to one or all servers.
+
+        Can be called from any thread.
+        """
+        with self._lock:
+            for inst in self._get_instances(instance):
+                inst.commands.append(command)
+        self._wakeup.set()
+
+    def _schedule_restarts(
+        self, instances: list[_FleetInstance], immediate: bool
+    ) -> None:
+        now = time.time()
+        stagger = self._config.restart_stagger_seconds
+        with self._lock:
+            for i, inst in enumerate(instances):
+                inst.restart_time = now + i * stagger
+                inst.restart_immediate = immediate
+        self._wakeup.set()
+
+    def _apply_config(self, raw: dict | None) -> None:
+        config = (
+            ServerFleetConfig()
+            if raw is None
+            else dataclass_from_dict(ServerFleetConfig, raw)
+        )
+        if config.instance_count < 1:
+            raise ValueError('instance_count must be at least 1.')
+        if config.cores_per_instance < 1:
+            raise ValueError('cores_per_instance must be at least 1.')
+        last_port = (
+            config.server.port
+            + (config.instance_count - 1) * config.port_stride
+        )
+        if not 0 < last_port < 65536:
+            raise ValueError(f'Instance port {last_port} is out of range.')
+        if config.server.metrics_port is not None:
+            last_port = (
+                config.server.metrics_port
+                + (config.instance_count - 1) * config.port_stride
+            )
+            if not 0 < last_port < 65536:
+                raise ValueError(
+                    f'Instance metrics port {last_port} is out of range.'
+                )
+
+        # Make sure the name format works before we rely on it.
+        self._instance_config(config, 0)
+
+        self._config = config
+
+        with self._lock:
+            for index in range(len(self._instances), config.instance_count):
+                self._instances.append(
+                    _FleetInstance(
+                        index,
+                        self._instance_config(config, index),
+                        os.path.join(self._ba_root_path, str(index + 1)),
+                    )
+                )
+            for inst in self._instances:
+                inst.retired = inst.index >= config.instance_count
+                if not inst.retired:
+                    inst.config = self._instance_config(config, inst.index)
+            self._assign_cores()
+
+    @staticmethod
+    def _instance_config(config: ServerFleetConfig, index: int) -> ServerConfig:
+        import dataclasses
+
+        template = config.server
+        return dataclasses.replace(
+            template,
+            port=template.port + index * config.port_stride,
+            metrics_port=(
+                None
+                if template.metrics_port is None
+                else template.metrics_port + index * config.port_stride
+            ),
+            party_name=config.party_name_format.format(
+                party_name=template.party_name, instance=index + 1
+            ),
+        )
+
+    def _assign_cores(self) -> None:
+        """Hand out cpu cores to instances round-robin."""
+        available: list[int] | None = None
+        if self._config.cpu_affinity:
+            if sys.platform == 'linux':
+                available = sorted(os.sched_getaffinity(0))
+            elif not self._did_affinity_warning:
+                self._did_affinity_warning = True
+                print(
+                    f'{Clr.YLW}cpu_affinity is only supported on Linux;'
+                    f' ignoring it.{Clr.RST}',
+                    flush=True,
+                )
+        for inst in self._instances:
+            if not available:
+                inst.cores = None
+                continue
+            count = min(self._config.cores_per_instance, len(available))
+            start = inst.index * count
+            inst.cores = [
+                available[(start + i) % len(available)] for i in range(count)
+            ]
+
+    def _bg_thread_main(self) -> None:
+        """Top level method run by our bg thread."""
+        try:
+            while not self._done:
+                # Anything that happens from here on wakes us back up.
+                self._wakeup.clear()
+                self._update_fleet(time.time())
+                now = time.time()
+                self._wakeup.wait(
+                    self._get_wait_time(now, self._get_deadlines())
+                )
+        finally:
+            self._stop_all_instances()
+
+    def _get_deadlines(self) -> list[float]:
+        """Return times when we'll have something to do."""
+        deadlines = [self._next_status_write_time]
+        for inst in list(self._instances):
+            if inst.process is None:
+                if self._should_launch(inst, None):
+                    deadlines.append(
+                        max(inst.next_launch_time, self._next_launch_time)
+                    )
+                continue
+            if inst.restart_time is not None:
+                deadlines.append(inst.restart_time)
+            if inst.force_kill_time is not None:
+                deadlines.append(inst.force_kill_time)
+            if inst.launch_time is not None:
+                if inst.repin_pending:
+                    deadlines.append(inst.launch_time + 10.01)
+                deadlines += [
+                    inst.launch_time + minutes * 60.0 + 0.01
+                    for minutes in _exit_minutes(inst.config)
+                ]
+        return deadlines
+
+    def _update_fleet(self, now: float) -> None:
+        assert current_thread() is self._bg_thread
+
+        if (
+            self._auto_restart
+            and self._config_auto_restart
+            and not self._shutdown_desired
+            and self._config_file_changed(now)
+        ):
+            self._reload_config()
+
+        if self._shutdown_desired and not self._shutdown_sent:
+            self._shutdown_sent = True
+            for inst in self._instances:
+                self._stop_instance(
+                    inst, restart=False, immediate=self._shutdown_immediate
+                )
+
+        for inst in list(self._instances):
+            try:
+                self._update_instance(inst, now)
+            except Exception as exc:
+                print(
+                    f'{Clr.RED}Error managing server instance'
+                    f' {inst.number}: {exc}{Clr.RST}',
+                    flush=True,
+                )
+
+        # Forget about retired instances once they're gone.
+        with self._lock:
+            self._instances = [
+                i
+                for i in self._instances
+                if not (i.retired and i.process is None)
+            ]
+
+        if now >= self._next_status_write_time:
+            self._next_status_write_time = (
+                now + self._config.status_interval_seconds
+            )
+            try:
+                self._write_fleet_status()
+            except Exception as exc:
+                print(
+                    f'{Clr.RED}Error writing fleet status: {exc}{Clr.RST}',
+                    flush=True,
+                )
+
+        # If everything has stopped for good, exit the whole wrapper.
+        if all(
+            i.process is None and not self._should_launch(i, None)
+            for i in self._instances
+        ):
+            # EW: it seems that if we die before the main thread has
+            # fully started up the interpreter, its possible that it
+            # will not break out of its loop via the usual SystemExit
+            # that gets sent when we die.
+            if self._interactive and (
+                self._interpreter_start_time is None
+                or now - self._interpreter_start_time < 0.5
+            ):
+                return
+
+            # Only do this if the main thread is not already waiting for
+            # us to die; otherwise it can lead to deadlock. (we hang in
+            # os.kill while main thread is blocked in Thread.join)
+            if not self._done:
+                self._done = True
+
+                # This should break the main thread out of its blocking
+                # interpreter call.
+                os.kill(os.getpid(), signal.SIGTERM)
+
+    def _reload_config(self) -> None:
+        """Pick up a changed config and roll it out to instances."""
+
+        # Unlike the single-server case we only try once here; we don't
+        # want to hold up supervising everything else. A fixed config
+        # file will be noticed as another change.
+        try:
+            self._load_config_from_file(print_confirmation=True)
+        except Exception as exc:
+            print(
+                f'{Clr.RED}Error loading config file:\n{exc}.{Clr.RST}\n'
+                f'{Clr.CYN}Existing config values will be used.{Clr.RST}',
+                flush=True,
+            )
+            config_path = self._get_config_path()
+            self._config_mtime = (
+                Path(config_path).stat().st_mtime
+                if os.path.isfile(config_path)
+                else None
+            )
+            return
+
+        print(
+            f'{Clr.CYN}Config-file change detected;'
+            f' requesting staggered restarts.{Clr.RST}',
+            flush=True,
+        )
+        for inst in self._instances:
+            if inst.retired:
+                self._stop_instance(inst, restart=False, immediate=True)
+        self._schedule_restarts(
+            [i for i in self._instances if i.process is not None],
+            immediate=True,
+        )
+
+    def _should_launch(self, inst: _FleetInstance, now: float | None) -> bool:
+        """Whether an instance should be launched (now or eventually)."""
+        if inst.retired or self._shutdown_desired:
+            return False
+        if inst.launches and not self._auto_restart:
+            return False
+        return now is None or (
+            now >= inst.next_launch_time and now >= self._next_launch_time
+        )
+
+    def _update_instance(self, inst: _FleetInstance, now: float) -> None:
+        if inst.process is None:
+            if self._should_launch(inst, now):
+                self._launch_instance(inst, now)
+            return
+
+        # Pass along any commands to the process.
+        with self._lock:
+            commands, inst.commands = inst.commands, []
+        for command in commands:
+            _send_to_server(inst.process, command, inst.channel)
+
+        # The binary spins up more threads as it starts; make sure
+        # they all end up pinned too.
+        if inst.repin_pending:
+            assert inst.launch_time is not None
+            if now - inst.launch_time > 10.0:
+                inst.repin_pending = False
+                self._pin_instance(inst)
+
+        self._request_instance_shutdowns_or_restarts(inst, now)
+
+        if inst.force_kill_time is not None and now > inst.force_kill_time:
+            print(
+                f'{Clr.CYN}Immediate shutdown time limit'
+                f' ({self.IMMEDIATE_SHUTDOWN_TIME_LIMIT:.1f} seconds)'
+                f' expired; force-killing instance'
+                f' {inst.number}...{Clr.RST}',
+                flush=True,
+            )
+            inst.process.kill()
+            self._handle_instance_exit(inst, inst.process.wait(), now)
+            return
+
+        # Watch for the server process exiting.
+        code = inst.process.poll()
+        if code is not None:
+            self._handle_instance_exit(inst, code, now)
+
+    def _launch_instance(self, inst: _FleetInstance, now: float) -> None:
+        inst.launches += 1
+        inst.launch_time = now
+        self._next_launch_time = now + self._config.restart_stagger_seconds
+        print(
+            f'{Clr.CYN}Launching server instance {inst.number}'
+            f' (port {inst.config.port})...{Clr.RST}',
+            flush=True,
+        )
+        try:
+            _write_binary_config(inst.config, inst.root_path)
+
+            # It connects back to us through this once it's running.
+            channel = inst.channel = self._control_server.create_channel()
+            channel.event_calls.append(
+                lambda event: self._handle_instance_event(inst.number, event)
+            )
+
+            with open(inst.log_path, 'ab') as logfile:
+                inst.process = _launch_server_binary(
+                    inst.config,
+                    inst.root_path,
+                    self._initial_exec_code,
+                    output=logfile,
+                )
+            _watch_process(inst.process, self._wakeup)
+            self._pin_instance(inst)
+            inst.repin_pending = inst.cores is not None
+            dataclass_validate(inst.config)
+            _send_to_server(
+                inst.process,
+                StartServerModeCommand(
+                    inst.config,
+                    control_address=self._control_server.address,
+                    control_token=channel.token,
+                    telemetry_interval=self._config.status_interval_seconds,
+                ),
+            )
+        except Exception as exc:
+            print(
+                f'{Clr.RED}Error launching server instance'
+                f' {inst.number}: {exc}{Clr.RST}',
+                flush=True,
+            )
+            if inst.process is None:
+                self._handle_instance_exit(inst, None, now)
+            else:
+                inst.force_kill_time = now
+
+    def _handle_instance_event(self, number: int, event: ServerEvent) -> None:
+        for call in self._event_calls:
+            call(number, event)
+
+    def _pin_instance(self, inst: _FleetInstance) -> None:
+        """Pin all of an instance's threads to its cores."""
+        if inst.cores is None or inst.process is None:
+            return
+        if sys.platform == 'linux':
+            pid = inst.process.pid
+            try:
+                tids = [int(t) for t in os.listdir(f'/proc/{pid}/task')]
+            except OSError:
+                tids = [pid]
+            for tid in tids:
+                try:
+                    os.sched_setaffinity(tid, inst.cores)
+                except OSError:
+                    # Thread (or process) went away in the meantime.
+                    pass
+
+    def _stop_instance(
+        self, inst: _FleetInstance, restart: bool, immediate: bool
+    ) -> None:
+        """Ask an instance's process to exit."""
+        from bacommon.servermanager import ShutdownCommand, ShutdownReason
+
+        if inst.process is None:
+            return
+        inst.stopping = True
+        inst.restart_requested = restart
+        try:
+            _send_to_server(
+                inst.process,
+                ShutdownCommand(
+                    reason=(
+                        ShutdownReason.RESTARTING
+                        if restart
+                        else ShutdownReason.NONE
+                    ),
+                    immediate=immediate,
+                ),
+                inst.channel,
+            )
+        except OSError:
+            # Broken pipe; it's on its way out already and we'll see
+            # it exit.
+            pass
+
+        # If we're asking for an immediate exit but don't get one
+        # within the grace period, bring down the hammer.
+        if immediate and inst.force_kill_time is None:
+            inst.force_kill_time = (
+                time.time() + self.IMMEDIATE_SHUTDOWN_TIME_LIMIT
+            )
+
+    def _request_instance_shutdowns_or_restarts(
+        self, inst: _FleetInstance, now: float
+    ) -> None:
+        assert inst.launch_time is not None
+        minutes_since_launch = (now - inst.launch_time) / 60.0
+
+        with self._lock:
+            restart_time = inst.restart_time
+            if restart_time is not None and now >= restart_time:
+                inst.restart_time = None
+        if restart_time is not None and now >= restart_time:
+            self._stop_instance(
+                inst, restart=True, immediate=inst.restart_immediate
+            )
+
+        # Same exit timers as ServerManagerApp.
+        clean_exit_minutes, unclean_exit_minutes = _exit_minutes(inst.config)
+        if minutes_since_launch > clean_exit_minutes and not (
+            inst.sent_clean_exit
+        ):
+            opname = 'restart' if self._auto_restart else 'shutdown'
+            print(
+                f'{Clr.CYN}Instance {inst.number}: clean_exit_minutes'
+                f' ({clean_exit_minutes}) elapsed; requesting soft'
+                f' {opname}.{Clr.RST}',
+                flush=True,
+            )
+            self._stop_instance(
+                inst, restart=self._auto_restart, immediate=False
+            )
+            inst.sent_clean_exit = True
+
+        if minutes_since_launch > unclean_exit_minutes and not (
+            inst.sent_unclean_exit
+        ):
+            opname = 'restart' if self._auto_restart else 'shutdown'
+            print(
+                f'{Clr.CYN}Instance {inst.number}: unclean_exit_minutes'
+                f' ({unclean_exit_minutes}) elapsed; requesting immediate'
+                f' {opname}.{Clr.RST}',
+                flush=True,
+            )
+            self._stop_instance(
+                inst, restart=self._auto_restart, immediate=True
+            )
+            inst.sent_unclean_exit = True
+
+    def _handle_instance_exit(
+        self, inst: _FleetInstance, code: int | None, now: float
+    ) -> None:
+        """Deal with an instance's process having exited.
+
+        A code of None means it failed to launch at all.
+        """
+        assert inst.launch_time is not None
+        config = self._config
+        runtime = now - inst.launch_time
+
+        # Exits we asked for don't count against an instance, but
+        # crashes back off exponentially (starting over after a good
+        # long run) so a broken instance doesn't spin.
+        if code == 0 or inst.restart_requested:
+            inst.backoff = 0.0
+        elif inst.backoff == 0.0 or runtime >= (
+            config.restart_backoff_reset_seconds
+        ):
+            inst.backoff = config.restart_backoff_min_seconds
+        else:
+            inst.backoff = min(
+                inst.backoff * 2.0, config.restart_backoff_max_seconds
+            )
+        inst.next_launch_time = now + inst.backoff
+        inst.last_exit_code = code
+
+        if code != 0 and not self._auto_restart:
+            self._should_report_subprocess_error = True
+
+        clr = Clr.CYN if code == 0 else Clr.RED
+        msg = (
+            f'{clr}Server instance {inst.number} exited with code {code}'
+            f' after {_format_duration(runtime)}'
+        )
+        if inst.backoff and self._should_launch(inst, None):
+            msg += f'; relaunching in {inst.backoff:.0f}s'
+        print(f'{msg}.{Clr.RST}', flush=True)
+        if inst.channel is not None:
+            self._control_server.remove_channel(inst.channel)
+        inst.reset_process_vars()
+
+    def _stop_all_instances(self) -> None:
+        """End all instance processes that still exist."""
+        running = [i for i in self._instances if i.process is not None]
+        if not running:
+            return
+        print(f'{Clr.CYN}Stopping subprocesses...{Clr.RST}', flush=True)
+
+        # First, ask them nicely to die and give them a moment. If that
+        # doesn't work, bring down the hammer.
+        for inst in running:
+            assert inst.process is not None
+            inst.process.terminate()
+        deadline = time.time() + 10.0
+        for inst in running:
+            assert inst.process is not None
+            try:
+                inst.process.wait(timeout=max(0.0, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                inst.process.kill()
+                inst.process.wait()
+            if inst.channel is not None:
+                self._control_server.remove_channel(inst.channel)
+            inst.reset_process_vars()
+        print(f'{Clr.CYN}Subprocesses stopped.{Clr.RST}', flush=True)
+
+    def _get_instance_status(
+        self, inst: _FleetInstance, now: float
+    ) -> ServerStatus | None:
+        """Return an instance's latest status if it is fresh."""
+        channel = inst.channel
+        if channel is None or not channel.connected:
+            return None
+        status = channel.status
+        if status is None:
+            return None
+        max_age = self.STATUS_STALE_INTERVALS * (
+            self._config.status_interval_seconds
+        )
+        if now - status.time > max_age:
+            return None
+        return status
+
+    def _write_fleet_status(self) -> None:
+        os.makedirs(self._ba_root_path, exist_ok=True)
+        path = os.path.join(self._ba_root_path, 'fleet_status.json')
+        tmppath = f'{path}.tmp'
+        with open(tmppath, 'w', encoding='utf-8') as outfile:
+            outfile.write(dataclass_to_json(self.get_status()))
+        os.replace(tmppath, path)
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f'{hours}h{minutes:02d}m'
+    if minutes:
+        return f'{minutes}m{secs:02d}s'
+    return f'{secs}s'
+
+
 def main() -> None:
     """Run the BallisticaKit server manager."""
     try:
-        ServerManagerApp().run()
+        app: _ManagerAppBase = (
+            ServerFleetApp()
+            if '--fleet' in sys.argv[1:]
+            else ServerManagerApp()
+        )
+        app.run()
     except CleanError as exc:
         # For clean errors, do a simple print and fail; no
         # tracebacks/etc. Any others will bubble up and give us the
@@ -3,6 +3,7 @@
 #include "ballistica/classic/python/methods/python_methods_classic.h"
 
 #include <algorithm>
+#include <optional>
 #include <string>
 #include <vector>
 
@@ -158,13 +159,25 @@ static auto PySetStressTesting(PyObject* self, PyObject* args) -> PyObject* {
   int enable;
   int player_count;
   int attract_mode;
-  if (!PyArg_ParseTuple(args, "pip", &enable, &player_count, &attract_mode)) {
+  PyObject* seed_obj{Py_None};
+  if (!PyArg_ParseTuple(args, "pip|O", &enable, &player_count, &attract_mode,
+                        &seed_obj)) {
     return nullptr;
   }
-  g_base->logic->event_loop()->PushCall([enable, player_count, attract_mode] {
-    g_classic->stress_test()->Set(enable, player_count, attract_mode);
-    g_base->input->set_attract_mode(enable && attract_mode);
-  });
+  std::optional<unsigned int> seed;
+  if (seed_obj != Py_None) {
+    seed = static_cast<unsigned int>(Python::GetInt64(seed_obj));
+  }
+  g_base->logic->event_loop()->PushCall(
+      [enable, player_count, attract_mode, seed] {
+        // Seeding makes synthetic input repeatable (as far as the rest
+        // of the engine's random-number use allows).
+        if (seed.has_value()) {
+          srand(*seed);  // NOLINT
+        }
+        g_classic->stress_test()->Set(enable, player_count, attract_mode);
+        g_base->input->set_attract_mode(enable && attract_mode);
+      });
   Py_RETURN_NONE;
   BA_PYTHON_CATCH;
 }
@@ -176,7 +189,8 @@ static PyMethodDef PySetStressTestingDef = {
 
     "set_stress_testing(testing: bool,\n"
     "                        player_count: int,\n"
-    "                        attract_mode: bool) -> None\n"
+    "                        attract_mode: bool,\n"
+    "                        seed: int | None = None) -> None\n"
     "\n"
     "(internal)",
 };
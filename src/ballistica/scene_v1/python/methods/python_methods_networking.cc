@@ -809,6 +809,66 @@ static PyMethodDef PyGetClientPingDef = {
     "Return the current ping (RTT in ms) for a connected client.\n"
     "Returns -1.0 if client_id is invalid.\n"};
 
+// ------------------------- get_client_net_stats ------------------------------
+
+static auto PyGetClientNetStats(PyObject* self, PyObject* args,
+                                PyObject* keywds) -> PyObject* {
+  BA_PYTHON_TRY;
+  BA_PRECONDITION(g_base->InLogicThread());
+  static const char* kwlist[] = {nullptr};
+  if (!PyArg_ParseTupleAndKeywords(args, keywds, "",
+                                   const_cast<char**>(kwlist))) {
+    return nullptr;
+  }
+  int64_t bytes_out = 0;
+  int64_t bytes_out_compressed = 0;
+  int64_t messages_out = 0;
+  int64_t bytes_resent = 0;
+  int64_t message_resends = 0;
+  int64_t bytes_in = 0;
+  int64_t bytes_in_compressed = 0;
+  int64_t messages_in = 0;
+  if (auto* appmode = classic::ClassicAppMode::GetActiveOrWarn()) {
+    for (auto&& i : appmode->connections()->connections_to_clients()) {
+      ConnectionToClient* client = i.second.get();
+      bytes_out += client->GetBytesOutPerSecond();
+      bytes_out_compressed += client->GetBytesOutPerSecondCompressed();
+      messages_out += client->GetMessagesOutPerSecond();
+      bytes_resent += client->GetBytesResentPerSecond();
+      message_resends += client->GetMessageResendsPerSecond();
+      bytes_in += client->GetBytesInPerSecond();
+      bytes_in_compressed += client->GetBytesInPerSecondCompressed();
+      messages_in += client->GetMessagesInPerSecond();
+    }
+  }
+  return Py_BuildValue(
+      "{sLsLsLsLsLsLsLsL}", "bytes_out", static_cast<long long>(bytes_out),
+      "bytes_out_compressed", static_cast<long long>(bytes_out_compressed),
+      "messages_out", static_cast<long long>(messages_out), "bytes_resent",
+      static_cast<long long>(bytes_resent), "message_resends",
+      static_cast<long long>(message_resends), "bytes_in",
+      static_cast<long long>(bytes_in), "bytes_in_compressed",
+      static_cast<long long>(bytes_in_compressed), "messages_in",
+      static_cast<long long>(messages_in));
+  BA_PYTHON_CATCH;
+}
+
+static PyMethodDef PyGetClientNetStatsDef = {
+    "get_client_net_stats",            // name
+    (PyCFunction)PyGetClientNetStats,  // method
+    METH_VARARGS | METH_KEYWORDS,      // flags
+
+    "get_client_net_stats() -> dict[str, int]\n"
+    "\n"
+    "Return per-second network traffic totals for all client connections.\n"
+    "\n"
+    "Values cover the most recent full second. 'bytes_out' and 'bytes_in'\n"
+    "are uncompressed sizes; '_compressed' variants are what actually\n"
+    "went over the wire.\n"
+    "\n"
+    ":meta private:",
+};
+
 // ----------------------------- get_game_port ---------------------------------
 
 static auto PyGetGamePort(PyObject* self, PyObject* args) -> PyObject* {
@@ -1051,6 +1111,7 @@ auto PythonMethodsNetworking::GetMethods() -> std::vector<PyMethodDef> {
       PyDisconnectClientDef,
       PyGetClientPublicDeviceUUIDDef,
       PyGetClientPingDef,
+      PyGetClientNetStatsDef,
       PyGetConnectionToHostInfoDef,
       PyGetConnectionToHostInfo2Def,
       PyClientInfoQueryResponseDef,
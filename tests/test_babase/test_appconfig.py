@@ -0,0 +1,66 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for babase's app-config writes.
+
+The snippet swaps the native disk write out for a recorder, but still
+needs the engine binary to import babase.
+"""
+
+import pytest
+
+from batools import apprun
+
+_WRITER_CODE = '''
+import types
+
+from babase import _appconfig
+
+written = []
+failing = False
+
+def _commit(data):
+    if failing:
+        raise OSError('disk full')
+    written.append(data)
+
+_appconfig._babase = types.SimpleNamespace(
+    in_logic_thread=lambda: True, commit_app_config=_commit
+)
+
+# A slow background write finishing after a newer one doesn't land.
+writer = _appconfig._ConfigWriter()
+writer._write(2, '{"a": 2}', True)
+writer._write(1, '{"a": 1}', True)
+assert written == ['{"a":2}'], written
+
+# Same data (in any key order, in the same format) isn't rewritten.
+writer._write(3, '{"b": 1, "a": 2}', True)
+writer._write(4, '{"a": 2, "b": 1}', True)
+assert written[1:] == ['{"a":2,"b":1}'], written
+writer._write(5, '{"a": 2, "b": 1}', False)
+assert written[2:] == ['{\\n "a": 2,\\n "b": 1\\n}'], written
+stats = writer.get_stats()
+assert (stats.writes, stats.unchanged) == (3, 1), stats
+
+# A failed write is retried by the next commit, even with the same data.
+written.clear()
+writer = _appconfig._ConfigWriter()
+failing = True
+writer.submit('{"a": 3}', compact=True, snapshot_seconds=0.01, wait=True)
+assert written == []
+failing = False
+writer.submit('{"a": 3}', compact=True, snapshot_seconds=0.02, wait=True)
+assert written == ['{"a":3}'], written
+stats = writer.get_stats()
+assert (stats.commits, stats.writes, stats.unchanged) == (2, 1, 0), stats
+assert stats.max_snapshot_seconds == 0.02
+assert stats.last_write_bytes == len(written[0])
+'''
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+def test_config_writer() -> None:
+    """Writes land in order, skip unchanged data, and retry failures."""
+    apprun.python_command(_WRITER_CODE, purpose='app config testing')
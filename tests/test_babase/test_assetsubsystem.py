@@ -0,0 +1,284 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for babase's asset subsystem internals.
+
+These poke at private AssetSubsystem machinery with the network and
+filesystem-heavy parts swapped out, so they run quickly, but they still
+need the engine binary to import babase.
+"""
+
+import pytest
+
+from batools import apprun
+
+_LINK_FAILURE_CODE = '''
+import babase
+from babase import _assetsubsystem as asub
+from bacommon import assetcas
+
+asub._BLOB_DOWNLOAD_RETRY_DELAY_SECONDS = 0.0
+
+class _Concurrency:
+    def __init__(self):
+        self.results = []
+
+    def record(self, nbytes, seconds, ok):
+        self.results.append(ok)
+
+def _fail_with(status):
+    def _download(*args, **kwargs):
+        raise assetcas.CasDownloadError('nope', http_status=status)
+    return _download
+
+# Overloaded nodes count against the link (and get retried); refusals
+# don't.
+for status, expected in (
+    (503, [False] * asub._BLOB_DOWNLOAD_MAX_ATTEMPTS),
+    (403, []),
+):
+    assetcas.download_cas_blob = _fail_with(status)
+    concurrency = _Concurrency()
+    try:
+        babase.app.assets._acquire_data_blob(
+            'https://node.test', 'tok', ('ab' * 32, 5), concurrency
+        )
+    except babase.AssetResolveError:
+        pass
+    else:
+        raise AssertionError('expected AssetResolveError')
+    assert concurrency.results == expected, (status, concurrency.results)
+'''
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+def test_blob_server_errors_are_link_failures() -> None:
+    """5xx blob responses feed back-off; other refusals don't."""
+    apprun.python_command(_LINK_FAILURE_CODE, purpose='asset fetch testing')
+
+
+_GC_CODE = '''
+import os
+import time
+import tempfile
+
+from babase import _assetsubsystem as asub
+from bacommon import assetcas
+
+tmpdir = tempfile.mkdtemp()
+
+class _Assets(asub.AssetSubsystem):
+    _writable_assets_root = os.path.join(tmpdir, 'assets')
+    _bundle_assets_root = os.path.join(tmpdir, 'bundle')
+    _gc_cursor_path = os.path.join(tmpdir, 'gc_resume_shard')
+    _gc_state_path = os.path.join(tmpdir, 'gc_state.json')
+    _presence_index_path = os.path.join(tmpdir, 'presence.json')
+    _bundle_presence_index_path = os.path.join(tmpdir, 'bpresence.json')
+
+# Flavor-manifests here are just newline-separated blob hashes.
+parses = []
+
+def _parse(data):
+    parses.append(data)
+    return data.decode().split()
+
+assetcas.parse_flavor_manifest_blobs = _parse
+
+assets = _Assets()
+root = assets._writable_assets_root
+
+def _write(filehash, data=b'x'):
+    path = os.path.join(root, filehash[:2], filehash[2:])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as outfile:
+        outfile.write(data)
+
+def _exists(filehash):
+    return os.path.exists(os.path.join(root, filehash[:2], filehash[2:]))
+
+def _age(*filehashes):
+    # Shards changed within the racy window don't get clean marks.
+    old = time.time_ns() - 10 * assetcas._MTIME_RACY_NS
+    for filehash in filehashes:
+        os.utime(os.path.join(root, filehash[:2]), ns=(old, old))
+
+fm_a, data_a = 'a1' * 32, 'b1' * 32
+fm_b, data_b = 'a2' * 32, 'b2' * 32
+_write(data_a)
+_write(data_b)
+_write(fm_a, data_a.encode())
+_write(fm_b, data_b.encode())
+
+# Freshly written shards are swept but not marked clean yet.
+state = asub._GcState(layout_version=asub._GC_STATE_LAYOUT_VERSION)
+live = assets._gc_reachable({fm_a, fm_b}, state)
+stats = assets._gc_sweep(root, live, time.monotonic() + 60.0, state)
+assert (stats.freed_files, stats.shards_done) == (0, 4)
+for filehash in (fm_a, data_a, fm_b, data_b):
+    assert filehash[:2] not in state.clean_shards
+parses.clear()
+_age(fm_a, data_a, fm_b, data_b)
+
+# First pass parses both manifests and sweeps (and cleans) every shard.
+state = asub._GcState(layout_version=asub._GC_STATE_LAYOUT_VERSION)
+live = assets._gc_reachable({fm_a, fm_b}, state)
+assert live == {fm_a, data_a, fm_b, data_b}
+assert len(parses) == 2
+stats = assets._gc_sweep(root, live, time.monotonic() + 60.0, state)
+assert (stats.freed_files, stats.shards_done) == (0, 4)
+assert not stats.cut_off
+for filehash in (fm_a, data_a, fm_b, data_b):
+    assert state.clean_shards[filehash[:2]] != 0
+
+# State survives a round trip.
+assets._persist_gc_state(state)
+state = assets._load_gc_state()
+assert state.reachable == {fm_a: [data_a], fm_b: [data_b]}
+
+# Cached manifests aren't parsed again, and untouched clean shards are
+# skipped without listing them.
+live = assets._gc_reachable({fm_a, fm_b}, state)
+assert len(parses) == 2
+listed = []
+scandir = os.scandir
+
+def _scandir(path):
+    listed.append(os.path.basename(path))
+    return scandir(path)
+
+os.scandir = _scandir
+try:
+    stats = assets._gc_sweep(root, live, time.monotonic() + 60.0, state)
+finally:
+    os.scandir = scandir
+assert (stats.shards_done, stats.shards_skipped) == (0, asub._CAS_SHARD_COUNT)
+assert listed == []
+
+# Dropping fm_b un-cleans the shards of it and its blob, and the next
+# sweep visits just those and deletes them.
+live = assets._gc_reachable({fm_a}, state)
+assert live == {fm_a, data_a}
+assert len(parses) == 2
+assert fm_b[:2] not in state.clean_shards
+assert data_b[:2] not in state.clean_shards
+assert fm_a[:2] in state.clean_shards
+stats = assets._gc_sweep(root, live, time.monotonic() + 60.0, state)
+assert (stats.freed_files, stats.shards_done) == (2, 2)
+assert not _exists(fm_b) and not _exists(data_b)
+assert _exists(fm_a) and _exists(data_a)
+assert data_b[:2] not in state.clean_shards
+_age(fm_b, data_b)
+stats = assets._gc_sweep(root, live, time.monotonic() + 60.0, state)
+assert (stats.freed_files, stats.shards_done) == (0, 2)
+assert state.clean_shards[data_b[:2]] != 0
+'''
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+def test_gc_incremental() -> None:
+    """GC reuses cached manifest parses and skips clean shards."""
+    apprun.python_command(_GC_CODE, purpose='asset gc testing')
+
+
+_PRIORITY_CODE = '''
+import asyncio
+
+from babase import _assetsubsystem as asub
+
+async def _run():
+    limit = 1
+    slots = asub._PrioritySlots(lambda: limit)
+    order = []
+
+    async def _fetch(priority, name):
+        await slots.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0)
+        slots.release()
+
+    # With the only slot held, waiters queue; freed slots go to the
+    # lowest priority value first, first-come among equals.
+    await slots.acquire(0)
+    tasks = [
+        asyncio.create_task(_fetch(priority, name))
+        for priority, name in ((2, 'c'), (0, 'a1'), (1, 'b'), (0, 'a2'))
+    ]
+    await asyncio.sleep(0)
+    assert order == []
+    slots.release()
+    await asyncio.gather(*tasks)
+    assert order == ['a1', 'a2', 'b', 'c'], order
+
+    # A raised limit is honored on the next release.
+    await slots.acquire(0)
+    tasks = [asyncio.create_task(_fetch(0, str(i))) for i in range(3)]
+    await asyncio.sleep(0)
+    limit = 3
+    slots.release()
+    await asyncio.gather(*tasks)
+    assert slots._in_use == 0
+
+asyncio.run(_run())
+
+# Readiness is tracked per group; a group fires once its own blobs
+# have landed and nothing is left acquiring, independent of others.
+ready = []
+tracker = asub._PrefetchTracker(
+    [
+        asub.PrefetchGroup(
+            paths={'language'}, on_ready=lambda: ready.append('lang')
+        ),
+        asub.PrefetchGroup(
+            paths={'textures/a'},
+            apverid='pkg-b',
+            on_ready=lambda: ready.append('tex'),
+        ),
+        asub.PrefetchGroup(paths={'sounds/a'}),
+    ]
+)
+assert tracker.groups_for('pkg-a', 'language') == {0}
+assert tracker.groups_for('pkg-a', 'textures/a') == set()
+assert tracker.groups_for('pkg-b', 'textures/a') == {1}
+assert (tracker.rank({2, 1}), tracker.rank(set()), tracker.rank(None)) == (
+    1,
+    3,
+    3,
+)
+tracker.add_pending('h1', {0})
+tracker.add_pending('h2', {0, 1})
+tracker.add_pending('h3', {1})
+tracker.blob_done('h1')
+tracker.blob_done('h2')
+tracker.fire_ready(all_acquired=False)
+assert ready == []
+tracker.fire_ready(all_acquired=True)
+assert ready == ['lang']
+tracker.blob_done('h3')
+tracker.fire_ready(all_acquired=True)
+tracker.fire_ready(all_acquired=True, force=True)
+assert ready == ['lang', 'tex']
+
+# A finished resolve fires whatever is left.
+ready.clear()
+tracker = asub._PrefetchTracker(
+    [
+        asub.PrefetchGroup(
+            paths={'language'}, on_ready=lambda: ready.append('lang')
+        )
+    ]
+)
+tracker.add_pending('h1', {0})
+tracker.fire_ready(all_acquired=False, force=True)
+assert ready == ['lang']
+'''
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+def test_prefetch_ordering() -> None:
+    """Prefetch groups order fetches and report readiness."""
+    apprun.python_command(_PRIORITY_CODE, purpose='asset prefetch testing')
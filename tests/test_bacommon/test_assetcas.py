@@ -0,0 +1,675 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for bacommon.assetcas streamed/resumable blob downloads.
+
+A fake urllib3 pool stands in for a basn node so we can exercise the
+served-encoding handling, Range resume of partial downloads, and the
+integrity checks without any network.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import hashlib
+import threading
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from bacommon import assetcas
+from bacommon.cloudfilecodec import CompressionType, compress_for_type
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+FAST_MODE = os.environ.get('BA_TEST_FAST_MODE') == '1'
+
+
+class _FakeResponse:
+    def __init__(
+        self,
+        status: int,
+        body: bytes,
+        headers: dict[str, str],
+        fail_after: int | None = None,
+    ) -> None:
+        self.status = status
+        self.headers = headers
+        self._body = body
+        self._fail_after = fail_after
+
+    def __enter__(self) -> _FakeResponse:
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+    def stream(self, amt: int) -> Any:
+        """Yield the body in chunks, optionally dying partway."""
+        sent = 0
+        while sent < len(self._body):
+            if self._fail_after is not None and sent >= self._fail_after:
+                raise ConnectionResetError('simulated network blip')
+            chunk = self._body[sent : sent + min(amt, 7)]
+            sent += len(chunk)
+            yield chunk
+
+
+class _FakeNode:
+    """Serves one blob in one encoding; honors Range unless told not to."""
+
+    def __init__(
+        self,
+        canonical: bytes,
+        served: CompressionType,
+        *,
+        honor_range: bool = True,
+    ) -> None:
+        self.stored = compress_for_type(canonical, served, level=3)
+        self.served = served
+        self.honor_range = honor_range
+        self.fail_after: int | None = None
+        self.status: int | None = None
+        self.requests: list[dict[str, str]] = []
+
+    def request(
+        self, method: str, url: str, headers: dict[str, str], **_kw: Any
+    ) -> _FakeResponse:
+        """Handle a casblob GET."""
+        assert method == 'GET' and '/casblob/' in url
+        self.requests.append(dict(headers))
+        if self.status is not None:
+            return _FakeResponse(self.status, b'', {})
+        hdrs = {'X-Cas-Compression': self.served.value}
+        rng = headers.get('Range')
+        if rng is not None and self.honor_range:
+            start = int(rng.removeprefix('bytes=').rstrip('-'))
+            if start >= len(self.stored):
+                return _FakeResponse(416, b'', {})
+            hdrs['Content-Range'] = (
+                f'bytes {start}-{len(self.stored) - 1}/{len(self.stored)}'
+            )
+            return _FakeResponse(
+                206, self.stored[start:], hdrs, self.fail_after
+            )
+        return _FakeResponse(200, self.stored, hdrs, self.fail_after)
+
+
+def _download(node: _FakeNode, root: Path, canonical: bytes) -> str:
+    filehash = hashlib.sha256(canonical).hexdigest()
+    assetcas.download_cas_blob(
+        node,  # type: ignore[arg-type]
+        'https://node.test',
+        filehash,
+        len(canonical),
+        token_header='tok',
+        dest_root=str(root),
+        timeout_seconds=5.0,
+    )
+    return filehash
+
+
+def _canonical() -> bytes:
+    return b''.join(f'line {i}\n'.encode() for i in range(2000))
+
+
+@pytest.mark.parametrize('served', list(CompressionType))
+def test_download_all_encodings(
+    served: CompressionType, tmp_path: Path
+) -> None:
+    """Every served encoding lands as canonical bytes with no leftovers."""
+    canonical = _canonical()
+    filehash = _download(_FakeNode(canonical, served), tmp_path, canonical)
+    path = assetcas.cas_blob_path(str(tmp_path), filehash)
+    with open(path, 'rb') as infile:
+        assert infile.read() == canonical
+    assert os.listdir(os.path.dirname(path)) == [filehash[2:]]
+
+
+@pytest.mark.parametrize('served', list(CompressionType))
+def test_resume_after_interruption(
+    served: CompressionType, tmp_path: Path
+) -> None:
+    """A mid-body failure keeps the partial; the retry asks for the rest."""
+    canonical = _canonical()
+    filehash = hashlib.sha256(canonical).hexdigest()
+    node = _FakeNode(canonical, served)
+    node.fail_after = len(node.stored) // 2
+    with pytest.raises(ConnectionResetError):
+        _download(node, tmp_path, canonical)
+    partial = assetcas.cas_partial_path(str(tmp_path), filehash, served)
+    have = os.path.getsize(partial)
+    assert 0 < have < len(node.stored)
+
+    node.fail_after = None
+    _download(node, tmp_path, canonical)
+    assert node.requests[-1]['Range'] == f'bytes={have}-'
+    assert not os.path.exists(partial)
+    with open(assetcas.cas_blob_path(str(tmp_path), filehash), 'rb') as f:
+        assert f.read() == canonical
+
+
+def test_range_ignored_refetches(tmp_path: Path) -> None:
+    """A node answering a resume with a full 200 overwrites the partial."""
+    canonical = _canonical()
+    node = _FakeNode(canonical, CompressionType.ZSTD, honor_range=False)
+    node.fail_after = len(node.stored) // 2
+    with pytest.raises(ConnectionResetError):
+        _download(node, tmp_path, canonical)
+    node.fail_after = None
+    filehash = _download(node, tmp_path, canonical)
+    # The 200 answering the resume is used as-is; no second GET.
+    assert len(node.requests) == 2
+    assert 'Range' in node.requests[-1]
+    with open(assetcas.cas_blob_path(str(tmp_path), filehash), 'rb') as f:
+        assert f.read() == canonical
+
+
+def test_complete_compressed_partial_finishes(tmp_path: Path) -> None:
+    """A compressed partial holding the whole body needs no request."""
+    canonical = _canonical()
+    filehash = hashlib.sha256(canonical).hexdigest()
+    node = _FakeNode(canonical, CompressionType.ZSTD)
+    partial = assetcas.cas_partial_path(
+        str(tmp_path), filehash, CompressionType.ZSTD
+    )
+    os.makedirs(os.path.dirname(partial), exist_ok=True)
+    with open(partial, 'wb') as outfile:
+        outfile.write(node.stored)
+    _download(node, tmp_path, canonical)
+    assert not node.requests
+    assert not os.path.exists(partial)
+    with open(assetcas.cas_blob_path(str(tmp_path), filehash), 'rb') as f:
+        assert f.read() == canonical
+
+
+def test_wrong_size_blob_replaced(tmp_path: Path) -> None:
+    """A truncated blob at the CAS path is refetched, not trusted."""
+    canonical = _canonical()
+    filehash = hashlib.sha256(canonical).hexdigest()
+    path = assetcas.cas_blob_path(str(tmp_path), filehash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as outfile:
+        outfile.write(canonical[:10])
+    node = _FakeNode(canonical, CompressionType.ZSTD)
+    _download(node, tmp_path, canonical)
+    assert len(node.requests) == 1
+    with open(path, 'rb') as f:
+        assert f.read() == canonical
+
+
+def test_encoding_change_discards_partial(tmp_path: Path) -> None:
+    """A partial in one encoding is never spliced onto another's bytes."""
+    canonical = _canonical()
+    node = _FakeNode(canonical, CompressionType.UNCOMPRESSED)
+    node.fail_after = len(node.stored) // 2
+    with pytest.raises(ConnectionResetError):
+        _download(node, tmp_path, canonical)
+
+    node2 = _FakeNode(canonical, CompressionType.ZSTD)
+    filehash = _download(node2, tmp_path, canonical)
+    # Resume attempt (wrong encoding, dropped) then a fresh fetch.
+    assert len(node2.requests) == 2
+    assert 'Range' not in node2.requests[-1]
+    with open(assetcas.cas_blob_path(str(tmp_path), filehash), 'rb') as f:
+        assert f.read() == canonical
+    assert not os.path.exists(
+        assetcas.cas_partial_path(
+            str(tmp_path), filehash, CompressionType.UNCOMPRESSED
+        )
+    )
+
+
+@pytest.mark.parametrize('served', list(CompressionType))
+def test_hash_mismatch(served: CompressionType, tmp_path: Path) -> None:
+    """Bad bytes raise, write nothing, and leave no partial to resume."""
+    canonical = _canonical()
+    node = _FakeNode(canonical + b'x', served)
+    with pytest.raises(assetcas.CasDownloadError):
+        _download(node, tmp_path, canonical)
+    filehash = hashlib.sha256(canonical).hexdigest()
+    shard = os.path.join(str(tmp_path), filehash[:2])
+    assert os.listdir(shard) == []
+
+
+def test_http_errors(tmp_path: Path) -> None:
+    """Only 5xx refusals count as server-side (link/load) errors."""
+    canonical = _canonical()
+    node = _FakeNode(canonical, CompressionType.UNCOMPRESSED)
+    for status, server_error in ((503, True), (500, True), (403, False)):
+        node.status = status
+        with pytest.raises(assetcas.CasDownloadError) as excinfo:
+            _download(node, tmp_path, canonical)
+        assert excinfo.value.http_status == status
+        assert excinfo.value.server_error is server_error
+
+    # Failures that aren't HTTP refusals carry no status.
+    node = _FakeNode(canonical + b'x', CompressionType.UNCOMPRESSED)
+    with pytest.raises(assetcas.CasDownloadError) as excinfo:
+        _download(node, tmp_path, canonical)
+    assert excinfo.value.http_status is None
+    assert not excinfo.value.server_error
+
+
+def test_fsync_uses_writable_handles(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Every fsync gets a writable fd (Windows rejects read-only ones)."""
+    fcntl = pytest.importorskip('fcntl')
+    fsync = os.fsync
+    synced: list[int] = []
+
+    def _checked_fsync(fd: int) -> None:
+        assert fcntl.fcntl(fd, fcntl.F_GETFL) & os.O_ACCMODE != os.O_RDONLY
+        synced.append(fd)
+        fsync(fd)
+
+    monkeypatch.setattr(os, 'fsync', _checked_fsync)
+    canonical = _canonical()
+    for served in CompressionType:
+        synced.clear()
+        node = _FakeNode(canonical, served)
+        filehash = _download(node, tmp_path / served.value, canonical)
+        assert synced
+        path = assetcas.cas_blob_path(str(tmp_path / served.value), filehash)
+        with open(path, 'rb') as infile:
+            assert infile.read() == canonical
+
+
+def test_concurrent_downloads_share_one_fetch(tmp_path: Path) -> None:
+    """A second download of a blob waits for the first and reuses it."""
+    canonical = _canonical()
+    node = _FakeNode(canonical, CompressionType.ZSTD)
+    request = node.request
+
+    def _slow_request(*args: Any, **kwargs: Any) -> _FakeResponse:
+        time.sleep(0.2)
+        return request(*args, **kwargs)
+
+    node.request = _slow_request  # type: ignore[method-assign]
+    errors: list[Exception] = []
+
+    def _run() -> None:
+        try:
+            _download(node, tmp_path, canonical)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(node.requests) == 1
+    filehash = hashlib.sha256(canonical).hexdigest()
+    assert os.listdir(tmp_path / filehash[:2]) == [filehash[2:]]
+
+
+def test_download_lock_timeout(tmp_path: Path) -> None:
+    """A download gives up if another holds the blob for too long."""
+    canonical = _canonical()
+    filehash = hashlib.sha256(canonical).hexdigest()
+    node = _FakeNode(canonical, CompressionType.UNCOMPRESSED)
+    os.makedirs(tmp_path / filehash[:2])
+    lock = assetcas._lock_blob(str(tmp_path), filehash, wait=0.0)
+    assert lock is not None
+    try:
+        with pytest.raises(assetcas.CasDownloadError):
+            assetcas.download_cas_blob(
+                node,  # type: ignore[arg-type]
+                'https://node.test',
+                filehash,
+                len(canonical),
+                token_header='tok',
+                dest_root=str(tmp_path),
+                timeout_seconds=0.1,
+            )
+    finally:
+        assetcas._unlock_blob(str(tmp_path), filehash, lock)
+    assert node.requests == []
+    _download(node, tmp_path, canonical)
+    assert len(node.requests) == 1
+
+
+def test_discard_cas_temp(tmp_path: Path) -> None:
+    """Only old temp files of downloads not in progress get swept."""
+    root = str(tmp_path)
+    held = 'ab' + 'c' * 62
+    idle = 'ab' + 'd' * 62
+    shard = tmp_path / 'ab'
+    shard.mkdir()
+    old = time.time() - assetcas.CAS_TEMP_MIN_AGE_SECONDS - 10.0
+    names = {
+        'recent': f'.tmp_{idle[2:]}.zstd',
+        'idle': f'.tmp_{idle[2:]}.none',
+        'held': f'.tmp_{held[2:]}.zstd',
+        'scratch': '.tmp_k2j4h5',
+    }
+    for key, name in names.items():
+        (shard / name).write_bytes(b'12345')
+        if key != 'recent':
+            os.utime(shard / name, (old, old))
+
+    lock = assetcas._lock_blob(root, held, wait=0.0)
+    assert lock is not None
+    try:
+        results = {
+            key: assetcas.discard_cas_temp(root, 'ab', name)
+            for key, name in names.items()
+        }
+    finally:
+        assetcas._unlock_blob(root, held, lock)
+    assert results == {'recent': None, 'idle': 5, 'held': None, 'scratch': 5}
+    assert sorted(os.listdir(shard)) == sorted([names['recent'], names['held']])
+
+    # Released, the held one goes too (and no lock file lingers).
+    assert assetcas.discard_cas_temp(root, 'ab', names['held']) == 5
+    assert os.listdir(shard) == [names['recent']]
+
+
+def test_truncated_zstd(tmp_path: Path) -> None:
+    """A compressed body cut short is an integrity failure."""
+    canonical = _canonical()
+    node = _FakeNode(canonical, CompressionType.ZSTD)
+    node.stored = node.stored[: len(node.stored) // 2]
+    with pytest.raises(assetcas.CasDownloadError):
+        _download(node, tmp_path, canonical)
+
+
+def _write_blob(root: Path, filehash: str, data: bytes) -> None:
+    path = assetcas.cas_blob_path(str(root), filehash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as outfile:
+        outfile.write(data)
+
+
+def test_presence_index_tracks_writes(tmp_path: Path) -> None:
+    """record()/discard() keep the index in step with the root."""
+    root = tmp_path / 'cas'
+    indexpath = str(tmp_path / 'index.json')
+    index = assetcas.CasPresenceIndex(str(root), indexpath)
+    data = b'some blob data'
+    filehash = hashlib.sha256(data).hexdigest()
+    assert not index.present(filehash, len(data))
+
+    assetcas.cas_write(str(root), filehash, data, presence=index)
+    assert index.present(filehash, len(data))
+    assert not index.present(filehash, len(data) + 1)
+
+    os.unlink(assetcas.cas_blob_path(str(root), filehash))
+    index.discard(filehash)
+    assert not index.present(filehash, len(data))
+
+
+def test_presence_index_persists_and_validates(tmp_path: Path) -> None:
+    """A saved index reloads, and external changes are noticed."""
+    root = tmp_path / 'cas'
+    indexpath = str(tmp_path / 'index.json')
+    blobs = {f'{i:02x}' + 'ab' * 31: b'x' * (i + 1) for i in range(0, 40, 3)}
+    for filehash, data in blobs.items():
+        _write_blob(root, filehash, data)
+
+    index = assetcas.CasPresenceIndex(str(root), indexpath)
+    index.refresh()
+    index.save()
+    assert os.path.exists(indexpath)
+
+    # Change things behind the index's back.
+    gone, kept = list(blobs)[:2]
+    os.unlink(assetcas.cas_blob_path(str(root), gone))
+    added = 'ff' + 'cd' * 31
+    _write_blob(root, added, b'new')
+
+    reloaded = assetcas.CasPresenceIndex(str(root), indexpath)
+    assert not reloaded.present(gone, len(blobs[gone]))
+    assert reloaded.present(kept, len(blobs[kept]))
+    assert reloaded.present(added, 3)
+
+    # The old instance picks them up on refresh.
+    assert index.present(gone, len(blobs[gone]))
+    index.refresh()
+    assert not index.present(gone, len(blobs[gone]))
+    assert index.present(added, 3)
+
+
+def test_presence_index_record_keeps_external_changes(
+    tmp_path: Path,
+) -> None:
+    """Our own writes don't mask another process's changes to a shard."""
+    root = tmp_path / 'cas'
+    gone = 'ab' + '01' * 31
+    _write_blob(root, gone, b'doomed')
+    index = assetcas.CasPresenceIndex(str(root), None)
+    assert index.present(gone, 6)
+
+    # Another process (say, its GC) removes a blob, then we write and
+    # remove others in the same shard.
+    os.unlink(assetcas.cas_blob_path(str(root), gone))
+    data = b'ours'
+    ours = 'ab' + hashlib.sha256(data).hexdigest()[2:]
+    _write_blob(root, ours, data)
+    index.record(ours)
+    assert index.present(ours, len(data))
+    assert not index.present(gone, 6)
+
+    _write_blob(root, gone, b'doomed')
+    os.unlink(assetcas.cas_blob_path(str(root), ours))
+    index.discard(ours)
+    assert not index.present(ours, len(data))
+    assert index.present(gone, 6)
+
+
+def test_presence_index_record_skips_rescans(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Our own writes update just their entry, without a shard scan."""
+    root = tmp_path / 'cas'
+    _write_blob(root, 'ab' + '01' * 31, b'first')
+    index = assetcas.CasPresenceIndex(str(root), None)
+    index.refresh()
+
+    scans: list[str] = []
+    scandir = os.scandir
+
+    def _counting_scandir(path: str) -> Any:
+        scans.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', _counting_scandir)
+    written = []
+    for i in range(10):
+        data = b'blob %d' % i
+        filehash = 'ab' + hashlib.sha256(data).hexdigest()[2:]
+        before = index.dir_mtime(filehash)
+        _write_blob(root, filehash, data)
+        index.record(filehash, before)
+        written.append((filehash, len(data)))
+    assert scans == []
+    assert all(index.present(h, size) for h, size in written)
+
+    # Something else changing the shard between writes gets noticed.
+    os.unlink(assetcas.cas_blob_path(str(root), written[1][0]))
+    before = index.dir_mtime(written[0][0])
+    _write_blob(root, written[0][0], b'rewritten')
+    index.record(written[0][0], before)
+    assert len(scans) == 1
+    assert not index.present(*written[1])
+
+
+def test_presence_index_rescans_racy_shards(tmp_path: Path) -> None:
+    """Changes landing in the same mtime tick as our scan aren't lost."""
+    root = tmp_path / 'cas'
+    _write_blob(root, 'ab' + '01' * 31, b'first')
+    shard_dir = root / 'ab'
+    index = assetcas.CasPresenceIndex(str(root), None)
+    index.refresh()
+
+    # Like a coarse filesystem would, leave the dir mtime as it was.
+    mtime = os.stat(shard_dir).st_mtime_ns
+    added = 'ab' + '02' * 31
+    _write_blob(root, added, b'second')
+    os.utime(shard_dir, ns=(mtime, mtime))
+    index.refresh()
+    assert index.present(added, 6)
+
+    # Once the tick is well past, an unchanged shard is left alone.
+    old = mtime - 10 * assetcas._MTIME_RACY_NS
+    os.utime(shard_dir, ns=(old, old))
+    index.refresh()
+    os.unlink(assetcas.cas_blob_path(str(root), added))
+    os.utime(shard_dir, ns=(old, old))
+    index.refresh()
+    assert index.present(added, 6)
+
+
+def test_presence_index_ignores_partials(tmp_path: Path) -> None:
+    """Temp/partial files in shard dirs never count as blobs."""
+    canonical = _canonical()
+    filehash = hashlib.sha256(canonical).hexdigest()
+    node = _FakeNode(canonical, CompressionType.UNCOMPRESSED)
+    node.fail_after = len(node.stored) // 2
+    with pytest.raises(ConnectionResetError):
+        _download(node, tmp_path, canonical)
+    index = assetcas.CasPresenceIndex(str(tmp_path), None)
+    index.refresh()
+    assert not index.present(filehash, len(canonical))
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_presence_index_benchmark(tmp_path: Path) -> None:
+    """Presence-diff a 20k-blob package (run with -s for numbers)."""
+    root = tmp_path / 'cas'
+    indexpath = str(tmp_path / 'index.json')
+    count = 20000
+    needed = {
+        hashlib.sha256(str(i).encode()).hexdigest(): 1 + i % 7
+        for i in range(count)
+    }
+    # Most of the package is already present, as for an update.
+    for i, (filehash, size) in enumerate(needed.items()):
+        if i % 10:
+            _write_blob(root, filehash, b'x' * size)
+    # As if written in an earlier session; fresh shard dirs are too
+    # recent to trust an index for (see _MTIME_RACY_NS).
+    old = time.time() - 60.0
+    for shard_dir in root.iterdir():
+        os.utime(shard_dir, (old, old))
+
+    def _diff_stat() -> list[str]:
+        return [
+            h
+            for h, s in needed.items()
+            if not assetcas.blob_present([str(root)], h, s)
+        ]
+
+    index = assetcas.CasPresenceIndex(str(root), indexpath)
+
+    def _diff_index() -> list[str]:
+        # Fresh instance: what a new launch does (the cold run has no
+        # saved index yet so it scans; the warm one loads the index).
+        nonlocal index
+        index = assetcas.CasPresenceIndex(str(root), indexpath)
+        index.refresh()
+        missing = [h for h, s in needed.items() if not index.present(h, s)]
+        index.save()
+        return missing
+
+    def _diff_resident() -> list[str]:
+        # Same instance: a later resolve in the same process.
+        index.refresh()
+        return [h for h, s in needed.items() if not index.present(h, s)]
+
+    timings: dict[str, float] = {}
+    results: dict[str, list[str]] = {}
+    for name, call in (
+        ('stat', _diff_stat),
+        ('index cold', _diff_index),
+        ('index warm', _diff_index),
+        ('index resident', _diff_resident),
+    ):
+        start = time.perf_counter()
+        results[name] = call()
+        timings[name] = time.perf_counter() - start
+
+    assert all(result == results['stat'] for result in results.values())
+    assert len(results['stat']) == count // 10
+    print(
+        f'presence diff of {count} blobs: '
+        + ', '.join(f'{k} {v * 1000.0:.1f}ms' for k, v in timings.items())
+        + '.'
+    )
+    # Timing is noisy on shared machines so only check for gross
+    # regressions here; the printout is the real output.
+    assert timings['index warm'] < timings['stat']
+
+
+def test_concurrency_additive_increase(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Windows that keep getting faster raise the limit one at a time."""
+    # Drive the window clock by hand so throughput is deterministic.
+    now = [0.0]
+    monkeypatch.setattr(assetcas.time, 'monotonic', lambda: now[0])
+    ctrl = assetcas.CasFetchConcurrency(initial=2, maximum=5)
+    nbytes = 1000
+    for expected in (3, 4, 5, 5):
+        for _ in range(ctrl.limit):
+            now[0] += 1.0
+            ctrl.record(nbytes, 1.0, True)
+        assert ctrl.limit == expected
+        nbytes *= 2
+
+    # Flat throughput at much worse latency backs off by one.
+    for _ in range(ctrl.limit):
+        now[0] += 1.0
+        ctrl.record(nbytes // 2, 10.0, True)
+    assert ctrl.limit == 4
+
+
+def test_concurrency_decrease_on_failure() -> None:
+    """A failure halves the limit once per burst, never below minimum."""
+    ctrl = assetcas.CasFetchConcurrency(initial=8, minimum=1, maximum=8)
+    ctrl.record(0, 0.01, False)
+    assert ctrl.limit == 4
+    # The rest of the same burst doesn't compound the cut.
+    ctrl.record(0, 0.01, False)
+    ctrl.record(0, 0.01, False)
+    assert ctrl.limit == 4
+    # Once the hold has passed, a new failure cuts again.
+    for _ in range(3):
+        ctrl.record(0, 0.01, False)
+    assert ctrl.limit == 2
+    for _ in range(10):
+        ctrl.record(0, 0.01, False)
+    assert ctrl.limit == 1
+    state = ctrl.state()
+    assert state.error_rate > 0.5
+    assert state.in_flight == 0
+
+
+def test_concurrency_acquire_blocks_at_limit() -> None:
+    """acquire() waits for a release once the limit is reached."""
+    ctrl = assetcas.CasFetchConcurrency(initial=1, minimum=1, maximum=1)
+    ctrl.acquire()
+    entered = threading.Event()
+
+    def _second() -> None:
+        ctrl.acquire()
+        entered.set()
+        ctrl.release()
+
+    thread = threading.Thread(target=_second)
+    thread.start()
+    assert not entered.wait(0.1)
+    ctrl.release()
+    assert entered.wait(5.0)
+    thread.join()
+    assert ctrl.state().in_flight == 0
+
+
+def test_concurrency_bounds_checked() -> None:
+    """Inconsistent bounds are rejected up front."""
+    with pytest.raises(ValueError):
+        assetcas.CasFetchConcurrency(initial=5, minimum=1, maximum=4)
@@ -0,0 +1,155 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Benchmark compiled vs reflective dataclassio codecs on real types."""
+
+import os
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from efro.dataclassio import dataclass_to_dict, dataclass_from_dict
+from efro.dataclassio import _compiled
+from bacommon import cloud, bacloud
+from bacommon.locale import Locale
+from bacommon.securedata import Archive
+
+if TYPE_CHECKING:
+    from typing import Any
+
+FAST_MODE = os.environ.get('BA_TEST_FAST_MODE') == '1'
+
+
+def _sample_objects() -> list[Any]:
+    """Some representative message/response instances."""
+    archive = Archive(data=b'x' * 64, signature=b'y' * 64)
+    return [
+        cloud.ResolveAssetPackageMessage(
+            apverid='a-0.testpkg.260101',
+            language=Locale.ENGLISH,
+            texture_profile='fallback_v1',
+            texture_tier='regular',
+            build_number=22000,
+        ),
+        cloud.ResolveAssetPackageResponse(
+            error=None,
+            error_code=None,
+            buckets={
+                f'textures/fallback_v1.gamma{i}.regular': (
+                    cloud.ResolvedFlavorManifest(
+                        hash=f'{i:064x}', data=b'{"e":{}}' * 8
+                    )
+                )
+                for i in range(16)
+            },
+            token=archive,
+            build_progress=cloud.AssetPackageBuildProgress(
+                phase=cloud.AssetPackageBuildPhase.BUILDING,
+                units_done=3,
+                units_total=10,
+            ),
+        ),
+        cloud.PingMessage(),
+        bacloud.StandardRequestData(
+            command='assets',
+            payload={'args': ['resolve', 'a-0.testpkg.260101'], 'v': 25},
+            tzoffset=-7.0,
+            isatty=True,
+            build_number=22000,
+        ),
+        bacloud.StandardResponseData(
+            message='Downloading...',
+            deletes=[f'old/file{i}.txt' for i in range(32)],
+            downloads_signed=[
+                bacloud.StandardResponseData.SignedDownloadEntry(
+                    path=f'some/path/file{i}.bin',
+                    download_url=f'https://example.com/blob/{i}',
+                    sha256=f'{i:064x}',
+                    size=1000 + i,
+                )
+                for i in range(64)
+            ],
+        ),
+        bacloud.UploadPlanPrepareResponse(
+            items=[
+                bacloud.UploadPlanPrepareItem(
+                    name=f'file{i}.png',
+                    upload_url=f'https://example.com/up/{i}',
+                    upload_headers={'Content-MD5': 'abc', 'X-Foo': 'bar'},
+                    session_id=f'sess{i}',
+                )
+                for i in range(64)
+            ]
+        ),
+    ]
+
+
+def _time_roundtrips(
+    objs: list[Any], iterations: int
+) -> tuple[float, float, list[dict]]:
+    """Return total (encode, decode) seconds for some iterations.
+
+    Also returns the encoded objects, for checking against each other.
+    """
+    encoded = [dataclass_to_dict(obj) for obj in objs]
+    start = time.perf_counter()
+    for _i in range(iterations):
+        for obj in objs:
+            dataclass_to_dict(obj)
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _i in range(iterations):
+        for obj, data in zip(objs, encoded):
+            dataclass_from_dict(type(obj), data)
+    decode_time = time.perf_counter() - start
+    return encode_time, decode_time, encoded
+
+
+def test_compiled_codec_equivalence() -> None:
+    """Both codec paths must give identical results on real types."""
+    objs = _sample_objects()
+    compiled = [dataclass_to_dict(obj) for obj in objs]
+    _compiled.ENABLED = False
+    try:
+        reflective = [dataclass_to_dict(obj) for obj in objs]
+        reflective_back = [
+            dataclass_from_dict(type(obj), data)
+            for obj, data in zip(objs, reflective)
+        ]
+    finally:
+        _compiled.ENABLED = True
+    assert compiled == reflective
+    compiled_back = [
+        dataclass_from_dict(type(obj), data)
+        for obj, data in zip(objs, compiled)
+    ]
+    assert compiled_back == reflective_back == objs
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_compiled_codec_benchmark() -> None:
+    """Compare compiled and reflective codecs (run with -s for numbers)."""
+    objs = _sample_objects()
+    iterations = 200
+
+    # Warm up (builds plans) before timing anything.
+    _time_roundtrips(objs, 1)
+    compiled = _time_roundtrips(objs, iterations)
+    _compiled.ENABLED = False
+    try:
+        reflective = _time_roundtrips(objs, iterations)
+    finally:
+        _compiled.ENABLED = True
+
+    for name, ctime, rtime in (
+        ('encode', compiled[0], reflective[0]),
+        ('decode', compiled[1], reflective[1]),
+    ):
+        print(
+            f'dataclassio {name}: compiled {ctime:.3f}s,'
+            f' reflective {rtime:.3f}s ({rtime / ctime:.2f}x).'
+        )
+
+    # Timing is too noisy on shared machines to assert on; the printout
+    # is the real output. Just make sure we timed equivalent work.
+    assert compiled[2] == reflective[2]
@@ -0,0 +1,107 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for bacommon.loadtest."""
+
+import datetime
+
+from efro.dataclassio import dataclass_from_json, dataclass_to_json
+from bacommon.loadtest import (
+    LoadTestConfig,
+    LogicLagStats,
+    LoadTestReport,
+    LoadTestActivityReport,
+    percentile,
+    compare_reports,
+)
+
+
+def _activity(
+    activity_type: str, p99: float, leaked: bool | None = False
+) -> LoadTestActivityReport:
+    return LoadTestActivityReport(
+        activity_type=activity_type,
+        start_time=0.0,
+        duration=60.0,
+        logic_lag=LogicLagStats(samples=1200, p50=0.001, p99=p99, max=p99),
+        leaked=leaked,
+    )
+
+
+def _report(
+    p99: float,
+    rss_growth: int,
+    activities: list[LoadTestActivityReport],
+) -> LoadTestReport:
+    return LoadTestReport(
+        config=LoadTestConfig(bot_count=4, seed=123),
+        app_version='1.7.60',
+        build_number=22000,
+        start_time=datetime.datetime.now(datetime.UTC),
+        duration=300.0,
+        logic_lag=LogicLagStats(samples=6000, p50=0.001, p99=p99, max=p99),
+        rss_start=200_000_000,
+        rss_end=200_000_000 + rss_growth,
+        activities=activities,
+    )
+
+
+def test_percentiles() -> None:
+    """Nearest-rank percentiles should land on actual samples."""
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile(values, 0.0) == 1.0
+    assert percentile([3.0], 0.9) == 3.0
+
+    stats = LogicLagStats.from_samples([0.3, 0.1, 0.2])
+    assert stats == LogicLagStats(samples=3, p50=0.2, p90=0.3, p99=0.3, max=0.3)
+    assert LogicLagStats.from_samples([]) == LogicLagStats()
+
+
+def test_report_json() -> None:
+    """Reports should survive a json round trip."""
+    report = _report(0.02, 1000, [_activity('FooGame', 0.02, None)])
+    assert (
+        dataclass_from_json(LoadTestReport, dataclass_to_json(report)) == report
+    )
+
+
+def test_compare_reports() -> None:
+    """Only meaningful changes should count as regressions."""
+    baseline = _report(
+        0.02,
+        10_000_000,
+        [
+            _activity('FooGame', 0.02),
+            _activity('BarGame', 0.01, leaked=True),
+        ],
+    )
+
+    # Noise within tolerances is fine, as are leaks we already had.
+    current = _report(
+        0.024,
+        20_000_000,
+        [
+            _activity('FooGame', 0.025),
+            _activity('BarGame', 0.012, leaked=True),
+            _activity('NewGame', 0.5),
+        ],
+    )
+    assert not compare_reports(baseline, current)
+
+    current = _report(
+        0.05,
+        100_000_000,
+        [
+            _activity('FooGame', 0.1),
+            _activity('BarGame', 0.01, leaked=False),
+            _activity('FooGame', 0.02, leaked=True),
+        ],
+    )
+    regressions = compare_reports(baseline, current)
+    assert len(regressions) == 4
+    assert regressions[0].startswith('Overall p99')
+    assert regressions[1].startswith('FooGame p99')
+    assert regressions[2].startswith('Memory growth')
+    assert regressions[3] == 'FooGame now leaks.'
@@ -0,0 +1,139 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for the ba_meta directory scanner and its scan cache."""
+
+import os
+import threading
+from pathlib import Path
+
+from bacommon.metascan import DirectoryScan
+
+_PLUGIN = '''# ba_meta require api 9
+
+import babase
+
+# ba_meta export babase.Plugin
+class MyPlugin(babase.Plugin):
+    pass
+'''
+
+_PACKAGE_INIT = '''# ba_meta require api 9
+# ba_meta require asset-package a-0.test.260101
+'''
+
+_SUBMODULE = '''
+
+# ba_meta export babase.Plugin
+
+class SubPlugin(babase.Plugin):
+    pass
+'''
+
+
+def _make_tree(root: Path) -> None:
+    (root / 'myplugin.py').write_text(_PLUGIN, encoding='utf-8')
+    (root / 'plain.py').write_text('x = 1\n', encoding='utf-8')
+    (root / 'mypkg').mkdir()
+    (root / 'mypkg' / '__init__.py').write_text(_PACKAGE_INIT, encoding='utf-8')
+    (root / 'mypkg' / 'sub.py').write_text(_SUBMODULE, encoding='utf-8')
+
+
+def _scan(root: Path, cache: Path | None) -> DirectoryScan:
+    scan = DirectoryScan(
+        [str(root)],
+        expected_api_version=9,
+        cache_path=None if cache is None else str(cache),
+    )
+    scan.run()
+    return scan
+
+
+def test_cached_scan_matches_full_scan(tmp_path: Path) -> None:
+    """A scan served from the cache gives the same results as a read."""
+    # pylint: disable=protected-access
+    root = tmp_path / 'python'
+    root.mkdir()
+    _make_tree(root)
+    cache = tmp_path / 'cache' / 'metascan.json'
+
+    uncached = _scan(root, None)
+    first = _scan(root, cache)
+    assert cache.exists()
+    assert first.results == uncached.results
+    assert first.results.exports_by_name('babase.Plugin') == [
+        'mypkg.sub.SubPlugin',
+        'myplugin.MyPlugin',
+    ]
+    assert first.results.asset_packages == {'a-0.test.260101': ['mypkg']}
+
+    # Nothing changed; nothing gets read and the cache isn't rewritten.
+    mtime = cache.stat().st_mtime_ns
+    second = _scan(root, cache)
+    assert second._cache_misses == 0
+    assert second.results == uncached.results
+    assert cache.stat().st_mtime_ns == mtime
+
+
+def test_cache_picks_up_changes(tmp_path: Path) -> None:
+    """Changed, added, and removed files are all noticed."""
+    # pylint: disable=protected-access
+    root = tmp_path / 'python'
+    root.mkdir()
+    _make_tree(root)
+    cache = tmp_path / 'metascan.json'
+    _scan(root, cache)
+
+    # Same size but a new mtime still counts as changed.
+    subpath = root / 'mypkg' / 'sub.py'
+    subpath.write_text(
+        _SUBMODULE.replace('SubPlugin', 'SubPlugon'), encoding='utf-8'
+    )
+    stat = subpath.stat()
+    os.utime(subpath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    (root / 'other.py').write_text(
+        _PLUGIN.replace('MyPlugin', 'OtherPlugin'), encoding='utf-8'
+    )
+    (root / 'myplugin.py').unlink()
+
+    scan = _scan(root, cache)
+    assert scan._cache_misses == 2
+    assert scan.results.exports_by_name('babase.Plugin') == [
+        'mypkg.sub.SubPlugon',
+        'other.OtherPlugin',
+    ]
+    assert scan.results == _scan(root, None).results
+
+
+def test_corrupt_cache_is_ignored(tmp_path: Path) -> None:
+    """A garbage cache file just means a full read."""
+    root = tmp_path / 'python'
+    root.mkdir()
+    _make_tree(root)
+    cache = tmp_path / 'metascan.json'
+    cache.write_text('{not json', encoding='utf-8')
+    assert _scan(root, cache).results == _scan(root, None).results
+
+
+def test_waits_for_extras(tmp_path: Path) -> None:
+    """A scan expecting extras blocks until they are provided."""
+    base = tmp_path / 'base'
+    extra = tmp_path / 'extra'
+    base.mkdir()
+    extra.mkdir()
+    (extra / 'myplugin.py').write_text(_PLUGIN, encoding='utf-8')
+
+    scan = DirectoryScan(
+        [str(base)], expected_api_version=9, expects_extras=True
+    )
+    thread = threading.Thread(target=scan.run)
+    thread.start()
+    thread.join(timeout=0.1)
+    assert thread.is_alive()
+    assert not scan.extra_paths_set
+
+    scan.set_extras([str(extra)])
+    thread.join(timeout=5.0)
+    assert not thread.is_alive()
+    assert scan.results.exports_by_name('babase.Plugin') == [
+        'myplugin.MyPlugin'
+    ]
@@ -0,0 +1,95 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for bacommon.prometheus."""
+
+import asyncio
+
+from bacommon.prometheus import Histogram, render_metric, handle_scrape
+
+
+def test_histogram() -> None:
+    """Buckets are cumulative and inclusive of their upper bound."""
+    hist = Histogram((0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 0.5, 0.7, 2.0):
+        hist.observe(value)
+    assert hist.bucket_counts == [2, 2, 1]
+    assert hist.count == 6
+
+    out: list[str] = []
+    hist.render(out, 'lag_seconds', 'How late things run.')
+    assert out[:-2] == [
+        '# HELP lag_seconds How late things run.',
+        '# TYPE lag_seconds histogram',
+        'lag_seconds_bucket{le="0.1"} 2',
+        'lag_seconds_bucket{le="0.5"} 4',
+        'lag_seconds_bucket{le="1.0"} 5',
+        'lag_seconds_bucket{le="+Inf"} 6',
+    ]
+    name, total = out[-2].split()
+    assert name == 'lag_seconds_sum'
+    assert abs(float(total) - 3.65) < 1e-9
+    assert out[-1] == 'lag_seconds_count 6'
+
+
+def test_render_metric() -> None:
+    """Plain and labeled metrics render as Prometheus expects."""
+    out: list[str] = []
+    render_metric(out, 'clients', 'gauge', 'Connected clients.', 3)
+    render_metric(
+        out,
+        'calls_total',
+        'counter',
+        'Calls made.',
+        {'activity="A"': 7, 'activity="B"': 0},
+    )
+    assert out == [
+        '# HELP clients Connected clients.',
+        '# TYPE clients gauge',
+        'clients 3',
+        '# HELP calls_total Calls made.',
+        '# TYPE calls_total counter',
+        'calls_total{activity="A"} 7',
+        'calls_total{activity="B"} 0',
+    ]
+
+
+def test_handle_scrape() -> None:
+    """Only GET /metrics gets the metrics."""
+
+    async def _fetch(port: int, request: bytes) -> tuple[str, bytes]:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        await writer.wait_closed()
+        head, body = response.split(b'\r\n\r\n', 1)
+        lines = head.decode().split('\r\n')
+        assert f'Content-Length: {len(body)}' in lines
+        return lines[0], body
+
+    async def _run() -> None:
+        server = await asyncio.start_server(
+            lambda r, w: handle_scrape(r, w, lambda: 'up 1\n'),
+            '127.0.0.1',
+            0,
+        )
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            assert await _fetch(port, b'GET /metrics HTTP/1.1\r\n\r\n') == (
+                'HTTP/1.1 200 OK',
+                b'up 1\n',
+            )
+            assert await _fetch(
+                port, b'GET /metrics?x=1 HTTP/1.1\r\nHost: a\r\n\r\n'
+            ) == ('HTTP/1.1 200 OK', b'up 1\n')
+            assert await _fetch(port, b'GET / HTTP/1.1\r\n\r\n') == (
+                'HTTP/1.1 404 Not Found',
+                b'',
+            )
+            assert await _fetch(port, b'POST /metrics HTTP/1.1\r\n\r\n') == (
+                'HTTP/1.1 405 Method Not Allowed',
+                b'',
+            )
+
+    asyncio.run(_run())
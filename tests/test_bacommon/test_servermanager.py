@@ -0,0 +1,413 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for server manager control channel messaging and fleets."""
+
+import os
+import sys
+import time
+import functools
+import importlib.util
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from efro.message import MessageSender, BoolResponse
+from bacommon.servermanager import (
+    ServerStatus,
+    ServerEvent,
+    ServerEventType,
+    ServerEventMessage,
+    ServerClientInfo,
+    KickCommand,
+    StatusCommand,
+    ShutdownCommand,
+    ShutdownReason,
+    ClientListCommand,
+    ClientListResponse,
+    ServerStatusResponse,
+    ServerHelloMessage,
+    ControlChannelReceiver,
+    get_manager_to_server_protocol,
+    get_server_to_manager_protocol,
+)
+
+
+def _status() -> ServerStatus:
+    return ServerStatus(
+        time=time.time(),
+        party_name='Test',
+        client_count=1,
+        player_count=2,
+        max_party_size=8,
+        session_type='ffa',
+        logic_lag_avg=0.002,
+        logic_lag_max=0.05,
+    )
+
+
+class _Server:
+    """Server end of a channel (handles commands)."""
+
+    receiver = ControlChannelReceiver(get_manager_to_server_protocol())
+
+    def __init__(self) -> None:
+        self.shutdowns: list[ShutdownCommand] = []
+
+    @receiver.handler
+    def _handle_shutdown(self, msg: ShutdownCommand) -> None:
+        self.shutdowns.append(msg)
+
+    @receiver.handler
+    def _handle_client_list(self, msg: ClientListCommand) -> ClientListResponse:
+        del msg  # Unused.
+        return ClientListResponse(
+            clients=[
+                ServerClientInfo(
+                    client_id=3,
+                    name='Bob',
+                    account_id='a-123',
+                    players=['Bob', 'Bobby'],
+                )
+            ]
+        )
+
+    @receiver.handler
+    def _handle_kick(self, msg: KickCommand) -> BoolResponse:
+        return BoolResponse(value=msg.client_id == 3)
+
+    @receiver.handler
+    def _handle_status(self, msg: StatusCommand) -> ServerStatusResponse:
+        del msg  # Unused.
+        return ServerStatusResponse(status=_status())
+
+
+class _Manager:
+    """Manager end of a channel (sends commands to a _Server)."""
+
+    sender = MessageSender(get_manager_to_server_protocol())
+
+    def __init__(self, server: _Server) -> None:
+        self.server = server
+
+    @sender.send_method
+    def _send_raw_message(self, data: bytes) -> bytes:
+        # Should be binary on the wire.
+        assert isinstance(data, bytes)
+        return self.server.receiver.handle_raw_message(self.server, data)
+
+
+def test_commands() -> None:
+    """Commands should round trip with typed responses."""
+    server = _Server()
+    manager = _Manager(server)
+
+    response = manager.sender.send(manager, ClientListCommand())
+    assert isinstance(response, ClientListResponse)
+    assert response.clients[0].players == ['Bob', 'Bobby']
+
+    response = manager.sender.send(manager, KickCommand(3, None))
+    assert isinstance(response, BoolResponse) and response.value
+    response = manager.sender.send(manager, KickCommand(4, 60))
+    assert isinstance(response, BoolResponse) and not response.value
+
+    response = manager.sender.send(manager, StatusCommand())
+    assert isinstance(response, ServerStatusResponse)
+    assert response.status.logic_lag_max == 0.05
+
+    assert (
+        manager.sender.send(
+            manager, ShutdownCommand(ShutdownReason.RESTARTING, True)
+        )
+        is None
+    )
+    assert server.shutdowns == [
+        ShutdownCommand(ShutdownReason.RESTARTING, True)
+    ]
+
+
+def test_server_messages() -> None:
+    """Messages from servers should survive encoding."""
+    protocol = get_server_to_manager_protocol()
+    for msg in [
+        ServerHelloMessage(token='abc'),
+        ServerEventMessage(
+            events=[
+                ServerEvent(
+                    ServerEventType.CLIENT_JOINED, time.time(), 3, 'Bob'
+                ),
+                ServerEvent(
+                    ServerEventType.SESSION_CHANGED,
+                    time.time(),
+                    detail='FreeForAllSession',
+                ),
+            ]
+        ),
+    ]:
+        encoded = protocol.encode_raw(protocol.message_to_dict(msg))
+        assert isinstance(encoded, bytes)
+        assert protocol.message_from_dict(protocol.decode_raw(encoded)) == msg
+
+
+_SERVER_SCRIPT = Path(
+    Path(__file__).parents[2],
+    'src',
+    'assets',
+    'server_package',
+    'ballisticakit_server.py',
+)
+
+
+@functools.cache
+def _server_module() -> Any:
+    # A script rather than a package module, so load it by path.
+    spec = importlib.util.spec_from_file_location(
+        'ballisticakit_server', _SERVER_SCRIPT
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(name='fleet')
+def _fleet(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Any:
+    """A fleet app with default config that ignores argv and config files."""
+    app_type = _server_module().ServerFleetApp
+    monkeypatch.setattr(app_type, '_parse_command_line_args', lambda _s: None)
+    monkeypatch.setattr(app_type, 'load_config', lambda _s, **_kw: None)
+    app = app_type()
+    app._ba_root_path = str(tmp_path)
+    app._apply_config(None)
+    return app
+
+
+def _fleet_config(**kwargs: Any) -> dict[str, Any]:
+    server = {'party_name': 'Party', 'port': 43210}
+    server.update(kwargs.pop('server', {}))
+    return {'cpu_affinity': False, 'server': server, **kwargs}
+
+
+def test_fleet_instance_configs(fleet: Any) -> None:
+    """Each instance gets its own ports, name, and root."""
+    fleet._apply_config(
+        _fleet_config(
+            instance_count=3,
+            port_stride=10,
+            party_name_format='{party_name} #{instance}',
+            server={'metrics_port': 9100},
+        )
+    )
+    configs = [
+        (i.config.port, i.config.metrics_port, i.config.party_name)
+        for i in fleet._instances
+    ]
+    assert configs == [
+        (43210, 9100, 'Party #1'),
+        (43220, 9110, 'Party #2'),
+        (43230, 9120, 'Party #3'),
+    ]
+    assert [os.path.basename(i.root_path) for i in fleet._instances] == [
+        '1',
+        '2',
+        '3',
+    ]
+    # The template itself is left alone.
+    assert fleet.config.server.port == 43210
+
+    # Without metrics, no instance gets a metrics port.
+    fleet._apply_config(_fleet_config(instance_count=2))
+    assert [i.config.metrics_port for i in fleet._instances[:2]] == [
+        None,
+        None,
+    ]
+
+
+def test_fleet_resize(fleet: Any) -> None:
+    """Shrinking retires instances; growing brings them back."""
+    fleet._apply_config(_fleet_config(instance_count=3))
+    third = fleet._instances[2]
+    fleet._apply_config(_fleet_config(instance_count=2))
+    assert [i.retired for i in fleet._instances] == [False, False, True]
+    assert [i.number for i in fleet._get_instances(None)] == [1, 2]
+    with pytest.raises(ValueError):
+        fleet._get_instances(3)
+    fleet._apply_config(_fleet_config(instance_count=3, port_stride=2))
+    assert fleet._instances[2] is third
+    assert not third.retired
+    assert third.config.port == 43214
+
+
+@pytest.mark.parametrize(
+    'raw',
+    [
+        _fleet_config(instance_count=0),
+        _fleet_config(cores_per_instance=0),
+        _fleet_config(instance_count=3, server={'port': 65534}),
+        _fleet_config(
+            instance_count=2, port_stride=-43210, server={'port': 43210}
+        ),
+        _fleet_config(instance_count=3, server={'metrics_port': 65535}),
+        _fleet_config(party_name_format='{party_name} {number}'),
+    ],
+)
+def test_fleet_config_validation(fleet: Any, raw: dict[str, Any]) -> None:
+    """Bad configs are rejected and leave the current one in place."""
+    config = fleet.config
+    with pytest.raises((ValueError, KeyError)):
+        fleet._apply_config(raw)
+    assert fleet.config is config
+    assert len(fleet._instances) == config.instance_count
+
+
+def test_fleet_core_assignment(
+    fleet: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Cores go out round-robin and instances get pinned to them."""
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    monkeypatch.setattr(
+        os, 'sched_getaffinity', lambda _pid: {3, 0, 1, 2}, raising=False
+    )
+    fleet._apply_config(
+        _fleet_config(instance_count=3, cores_per_instance=2, cpu_affinity=True)
+    )
+    assert [i.cores for i in fleet._instances] == [[0, 1], [2, 3], [0, 1]]
+
+    # Never more cores per instance than there are.
+    fleet._apply_config(
+        _fleet_config(instance_count=2, cores_per_instance=9, cpu_affinity=True)
+    )
+    assert [i.cores for i in fleet._instances[:2]] == [[0, 1, 2, 3]] * 2
+
+    # Pinning covers the process's threads (just the process itself
+    # when they can't be listed).
+    pinned: list[tuple[int, list[int]]] = []
+    monkeypatch.setattr(
+        os,
+        'sched_setaffinity',
+        lambda tid, cores: pinned.append((tid, list(cores))),
+        raising=False,
+    )
+    inst = fleet._instances[0]
+    inst.process = _FakeProcess(pid=-12345)
+    fleet._pin_instance(inst)
+    assert pinned == [(-12345, [0, 1, 2, 3])]
+
+    # Off (or not on Linux), nobody gets pinned.
+    fleet._apply_config(_fleet_config(cores_per_instance=2))
+    assert [i.cores for i in fleet._instances] == [None, None, None]
+    monkeypatch.setattr(sys, 'platform', 'darwin')
+    fleet._apply_config(_fleet_config(cpu_affinity=True))
+    assert [i.cores for i in fleet._instances] == [None, None, None]
+    assert fleet._did_affinity_warning
+    pinned.clear()
+    fleet._pin_instance(inst)
+    assert not pinned
+
+
+class _FakeProcess:
+    """Stands in for a server binary's subprocess.Popen."""
+
+    def __init__(self, pid: int = 1) -> None:
+        self.pid = pid
+        self.returncode: int | None = None
+
+    def poll(self) -> int | None:
+        """Like Popen.poll()."""
+        return self.returncode
+
+
+def test_fleet_restart_backoff(fleet: Any) -> None:
+    """Crashes back off exponentially; requested exits don't."""
+    fleet._apply_config(
+        _fleet_config(
+            instance_count=1,
+            restart_backoff_min_seconds=2.0,
+            restart_backoff_max_seconds=10.0,
+            restart_backoff_reset_seconds=300.0,
+        )
+    )
+    inst = fleet._instances[0]
+    now = 1000.0
+
+    def _run(seconds: float, code: int | None) -> float:
+        nonlocal now
+        inst.launches += 1
+        inst.launch_time = now
+        now += seconds
+        fleet._handle_instance_exit(inst, code, now)
+        assert inst.process is None and inst.launch_time is None
+        assert inst.last_exit_code == code
+        assert inst.next_launch_time == now + inst.backoff
+        assert not fleet._should_launch(inst, now + inst.backoff - 0.1)
+        assert fleet._should_launch(inst, now + inst.backoff)
+        return inst.backoff
+
+    # Failing to launch at all counts as a crash.
+    assert [_run(1.0, code) for code in (1, None, -11, 1, 1)] == [
+        2.0,
+        4.0,
+        8.0,
+        10.0,
+        10.0,
+    ]
+    # A good long run starts the backoff over.
+    assert _run(300.0, 1) == 2.0
+    assert _run(1.0, 0) == 0.0
+    assert _run(1.0, 1) == 2.0
+    inst.restart_requested = True
+    assert _run(1.0, -15) == 0.0
+
+    # Without auto-restart, an exited instance stays down.
+    fleet._auto_restart = False
+    assert not fleet._should_launch(inst, now + 1000.0)
+
+
+def test_fleet_staggering(fleet: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Launches and fleet-wide restarts are spread out."""
+    module = _server_module()
+    sent: list[tuple[int, Any]] = []
+    monkeypatch.setattr(module, '_watch_process', lambda *_a: None)
+    monkeypatch.setattr(
+        module,
+        '_launch_server_binary',
+        lambda config, *_a, **_kw: _FakeProcess(pid=config.port),
+    )
+    monkeypatch.setattr(
+        module,
+        '_send_to_server',
+        lambda process, command, *_a: sent.append((process.pid, command)),
+    )
+    monkeypatch.setattr(
+        module.ServerFleetApp, '_write_fleet_status', lambda _s: None
+    )
+    fleet._bg_thread = module.current_thread()
+    fleet._apply_config(
+        _fleet_config(instance_count=3, restart_stagger_seconds=5.0)
+    )
+
+    # Restarts get scheduled against the real clock.
+    now = time.time()
+    fleet._update_fleet(now)
+    fleet._update_fleet(now + 4.9)
+    assert [i.launches for i in fleet._instances] == [1, 0, 0]
+    fleet._update_fleet(now + 5.0)
+    fleet._update_fleet(now + 10.0)
+    assert [i.launches for i in fleet._instances] == [1, 1, 1]
+    assert [pid for pid, _cmd in sent] == [43210, 43211, 43212]
+    assert all(
+        isinstance(cmd, module.StartServerModeCommand) for _pid, cmd in sent
+    )
+
+    # Restarting everything goes one instance at a time too.
+    sent.clear()
+    fleet.restart()
+    start = min(i.restart_time for i in fleet._instances)
+    assert [i.restart_time - start for i in fleet._instances] == [
+        0.0,
+        5.0,
+        10.0,
+    ]
+    fleet._update_fleet(start + 5.0)
+    assert [pid for pid, _cmd in sent] == [43210, 43211]
+    assert [i.stopping for i in fleet._instances] == [True, True, False]
@@ -0,0 +1,193 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for bacommontools.meshcompile."""
+
+import os
+import time
+import hashlib
+from typing import TYPE_CHECKING
+
+import pytest
+
+from bacommontools.meshcompile import (
+    compile_mesh,
+    compile_collision_mesh,
+    read_mesh,
+    read_collision_mesh,
+    MESH_FORMAT_UV16_N8_INDEX16,
+    MESH_FORMAT_UV16_N8_INDEX32,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+FAST_MODE = os.environ.get('BA_TEST_FAST_MODE') == '1'
+
+
+def _height(i: int, j: int) -> float:
+    return ((i * 7 + j * 13) % 17) * 0.1
+
+
+def _grid_obj(size: int) -> str:
+    """A terrain-ish grid exercising most of what the compilers do.
+
+    Has duplicate positions (welding), quads and tris, normal seams,
+    UVs and normals slightly outside their ranges (clamping), values
+    that aren't exact in float32, and a degenerate face.
+    """
+    lines = ['# grid', 'o grid', 's 1']
+    n = size + 1
+    for j in range(n):
+        for i in range(n):
+            lines.append(f'v {i * 0.3:.6f} {_height(i, j):.6f} {j * -0.7:.6f}')
+    for j in range(n):
+        for i in range(n):
+            lines.append(f'vt {i / size * 1.02:.6f} {j / size - 0.01:.6f}')
+    for j in range(n):
+        for i in range(n):
+            nx = (_height(i + 1, j) - _height(i - 1, j)) * 0.5
+            nz = (_height(i, j + 1) - _height(i, j - 1)) * 0.5
+            lines.append(f'vn {nx:.6f} 1.030000 {nz:.6f}')
+    # Every position again; some faces use these copies.
+    for j in range(n):
+        for i in range(n):
+            lines.append(f'v {i * 0.3:.6f} {_height(i, j):.6f} {j * -0.7:.6f}')
+    for j in range(size):
+        for i in range(size):
+            a = j * n + i + 1
+            b, c, d = a + 1, a + n + 1, a + n
+            va = a + n * n if (i + j) % 3 == 0 else a
+            na = b if i % 5 == 0 else a
+            if (i + j) % 2:
+                lines.append(
+                    f'f {va}/{a}/{na} {b}/{b}/{b} {c}/{c}/{c} {d}/{d}/{d}'
+                )
+            else:
+                lines.append(f'f {va}/{a}/{na} {b}/{b}/{b} {c}/{c}/{c}')
+                lines.append(f'f {va}/{a}/{na} {c}/{c}/{c} {d}/{d}/{d}')
+    lines.append(f'f 1/1/1 {n * n + 1}/1/1 2/2/2')
+    return '\n'.join(lines) + '\n'
+
+
+def _ribbon_obj(cols: int) -> str:
+    """A long two-row strip; cheap way to get lots of vertices."""
+    lines = []
+    for i in range(cols + 1):
+        lines.append(f'v {i * 0.25:.6f} 0.0 {(i % 7) * 0.01:.6f}')
+        lines.append(f'v {i * 0.25:.6f} 1.0 {(i % 5) * 0.01:.6f}')
+    lines.append('vt 0.0 0.0')
+    lines.append('vt 1.0 1.0')
+    lines.append('vn 0.0 0.0 1.0')
+    for i in range(cols):
+        a = i * 2 + 1
+        lines.append(f'f {a}/1/1 {a + 2}/2/1 {a + 1}/1/1')
+        lines.append(f'f {a + 1}/1/1 {a + 2}/2/1 {a + 3}/2/1')
+    return '\n'.join(lines) + '\n'
+
+
+def _collision_obj() -> str:
+    """Mixed corner forms, polygons, orphans, and degenerates."""
+    lines = _grid_obj(12).splitlines()
+    lines += [
+        'v 100.0 100.0 100.0',  # Orphan.
+        'v 0.1 0.2 0.3',
+        'v 0.1 0.2 0.3',
+        'v 1.1 -0.2 0.3',
+        'v 0.5 0.9 2.3',
+        'v 1.7 0.4 1.1',
+    ]
+    vbase = 2 * 13 * 13 + 1
+    lines += [
+        f'f {vbase + 1} {vbase + 3} {vbase + 4}',
+        f'f {vbase + 2}/1 {vbase + 4}/2 {vbase + 5}/3',
+        f'f {vbase + 1}//1 {vbase + 5}//1 {vbase + 3}//1 {vbase + 4}//2',
+        f'f {vbase + 1} {vbase + 2} {vbase + 3}',  # Welds degenerate.
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_compile_mesh_golden(tmp_path: Path) -> None:
+    """Output must stay byte-identical for the same input.
+
+    Compiled assets are content-addressed, so any change here means
+    every shipped mesh changes too. Only update these hashes for an
+    intentional format change.
+    """
+    src = tmp_path / 'grid.obj'
+    src.write_text(_grid_obj(24))
+    dst = tmp_path / 'grid.bob'
+    result = compile_mesh(src, dst)
+    assert (
+        result.corner_count,
+        result.vertex_count,
+        result.tri_count,
+        result.index_size,
+    ) == (3459, 722, 1152, 2)
+    assert (
+        _sha256(dst)
+        == 'e31c639297b3857f2d111bff772a356ec6dfc410bc319339ba0b9b658b4ad3b9'
+    )
+
+    data = read_mesh(dst)
+    assert data.mesh_format == MESH_FORMAT_UV16_N8_INDEX16
+    assert len(data.vertices) == result.vertex_count
+    assert len(data.indices) == result.tri_count * 3
+
+
+def test_compile_mesh_golden_index32(tmp_path: Path) -> None:
+    """Big meshes switch to 32 bit indices."""
+    src = tmp_path / 'ribbon.obj'
+    src.write_text(_ribbon_obj(33000))
+    dst = tmp_path / 'ribbon.bob'
+    result = compile_mesh(src, dst)
+    assert (result.vertex_count, result.index_size) == (132000, 4)
+    assert (
+        _sha256(dst)
+        == 'ab70d3f4b06b040df52ec3a9c3ab2a065b45ea6be3478b4cbff51a686fea2b07'
+    )
+    assert read_mesh(dst).mesh_format == MESH_FORMAT_UV16_N8_INDEX32
+
+
+def test_compile_collision_mesh_golden(tmp_path: Path) -> None:
+    """Collision output must stay byte-identical for the same input."""
+    src = tmp_path / 'mixed.obj'
+    src.write_text(_collision_obj())
+    dst = tmp_path / 'mixed.cob'
+    result = compile_collision_mesh(src, dst)
+    assert (
+        result.vertex_count_in,
+        result.vertex_count_out,
+        result.tri_count_in,
+        result.tri_count_out,
+    ) == (344, 173, 294, 292)
+    assert (
+        _sha256(dst)
+        == '6f705cfb50e4c34007c407d87f9ae93397d246a8d47e025a35b22c52296547cb'
+    )
+
+    data = read_collision_mesh(dst)
+    assert data.normals is None
+    assert len(data.positions) == result.vertex_count_out * 3
+    assert len(data.indices) == result.tri_count_out * 3
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_compile_benchmark(tmp_path: Path) -> None:
+    """Time both compilers on a big mesh (run with -s for numbers)."""
+    src = tmp_path / 'grid.obj'
+    src.write_text(_grid_obj(150))
+    for name, call, ext in (
+        ('compile_mesh', compile_mesh, 'bob'),
+        ('compile_collision_mesh', compile_collision_mesh, 'cob'),
+    ):
+        start = time.perf_counter()
+        call(src, tmp_path / f'grid.{ext}')
+        duration = time.perf_counter() - start
+        print(
+            f'{name}: 45000 tris in {duration:.3f}s'
+            f' ({45000 / duration:.0f} tris/s).'
+        )
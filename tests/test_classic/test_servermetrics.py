@@ -0,0 +1,65 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for baclassic's server metrics.
+
+The snippet swaps out the engine calls rendering uses, but still needs
+the engine binary to import baclassic.
+"""
+
+import pytest
+
+from batools import apprun
+
+_GC_CODE = '''
+import gc
+import types
+import faulthandler
+
+from baclassic import _servermetrics
+
+# A deadlock should fail the test, not hang it.
+faulthandler.dump_traceback_later(60.0, exit=True)
+
+_servermetrics.babase = types.SimpleNamespace(
+    apptime=lambda: 1.0,
+    app=types.SimpleNamespace(
+        create_async_task=lambda coro, name: coro.close(),
+        gc=types.SimpleNamespace(mode=types.SimpleNamespace(value='auto')),
+    ),
+)
+_servermetrics.bascenev1 = types.SimpleNamespace(
+    get_game_roster=lambda: [],
+    get_client_net_stats=lambda: dict.fromkeys(_servermetrics._NET_STATS, 0),
+    get_foreground_host_activity=lambda: None,
+)
+
+metrics = _servermetrics.ServerMetrics(port=0)
+try:
+    # A collection landing mid-render (as any allocation there can
+    # trigger) must not block on anything render is holding.
+    pauses = metrics._gc_pauses
+    render_pauses = pauses.render
+
+    def _render_with_gc(*args):
+        gc.collect()
+        render_pauses(*args)
+
+    pauses.render = _render_with_gc
+    metrics.render()
+    pauses.render = render_pauses
+
+    # It gets counted by the next render.
+    text = metrics.render()
+    assert 'ballistica_gc_pause_seconds_count 0' not in text, text
+finally:
+    gc.callbacks.remove(metrics._on_gc)
+faulthandler.cancel_dump_traceback_later()
+'''
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+def test_gc_during_render() -> None:
+    """A collection triggered while rendering doesn't deadlock."""
+    apprun.python_command(_GC_CODE, purpose='server metrics testing')
@@ -0,0 +1,250 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for the binary log file format."""
+
+import os
+import time
+import random
+import datetime
+from typing import TYPE_CHECKING
+
+import pytest
+
+from efro.logging import LogEntry, LogLevel, LogHandler
+from efro.binlog import BinaryLogWriter, BinaryLogReader
+from efro.dataclassio import dataclass_to_json, dataclass_from_json
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+FAST_MODE = os.environ.get('BA_TEST_FAST_MODE') == '1'
+
+_START = datetime.datetime(2026, 1, 1, tzinfo=datetime.UTC)
+_NAMES = ['ba.app', 'ba.net', 'ba.assets', 'root', 'stdout', 'stderr']
+
+
+def _make_entries(count: int, seed: int = 1) -> list[LogEntry]:
+    rng = random.Random(seed)
+    entries: list[LogEntry] = []
+    for i in range(count):
+        level = rng.choices(list(LogLevel), weights=[20, 60, 12, 7, 1])[0]
+        entries.append(
+            LogEntry(
+                name=rng.choice(_NAMES),
+                message=(
+                    f'Event {i} processed for client {rng.randrange(100)}'
+                    f' in {rng.random():.4f}s \N{SNOWMAN}'
+                ),
+                level=level,
+                time=_START + datetime.timedelta(microseconds=i * 12345),
+                labels=(
+                    {'session': f's{rng.randrange(8)}', 'zone': 'eu'}
+                    if rng.random() < 0.3
+                    else {}
+                ),
+            )
+        )
+    return entries
+
+
+def _write(path: Path, entries: list[LogEntry], block_size: int) -> None:
+    writer = BinaryLogWriter(path, block_size=block_size)
+    for entry in entries:
+        writer.append(entry)
+    writer.close()
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    """Everything written comes back exactly."""
+    path = tmp_path / 'log.bin'
+    entries = _make_entries(3000)
+    _write(path, entries, block_size=16 * 1024)
+    reader = BinaryLogReader(path)
+    assert len(reader.blocks()) > 5
+    assert sum(b.count for b in reader.blocks()) == len(entries)
+    assert list(reader.entries()) == entries
+
+
+def test_queries(tmp_path: Path) -> None:
+    """Filters match brute force, and skip blocks that can't match."""
+    path = tmp_path / 'log.bin'
+    entries = _make_entries(5000)
+    _write(path, entries, block_size=8 * 1024)
+    reader = BinaryLogReader(path)
+    blocks = reader.blocks()
+
+    start = _START + datetime.timedelta(seconds=20)
+    end = _START + datetime.timedelta(seconds=30)
+    got = list(reader.entries(start_time=start, end_time=end))
+    assert got == [e for e in entries if start <= e.time < end]
+
+    # Only blocks overlapping the range should get read.
+    # pylint: disable=protected-access
+    decoded: list[int] = []
+    block_entries = reader._block_entries
+
+    def _counting(*args: object) -> object:
+        decoded.append(1)
+        return block_entries(*args)  # type: ignore[arg-type]
+
+    reader._block_entries = _counting  # type: ignore[method-assign]
+    list(reader.entries(start_time=start, end_time=end))
+    overlapping = [
+        b for b in blocks if b.end_time >= start and b.start_time < end
+    ]
+    assert len(decoded) == len(overlapping) < len(blocks) / 2
+
+    got = list(reader.entries(min_level=LogLevel.ERROR))
+    assert got == [e for e in entries if e.level.value >= LogLevel.ERROR.value]
+
+    got = list(reader.entries(names=['ba']))
+    assert got == [e for e in entries if e.name.startswith('ba.')]
+    got = list(reader.entries(names=['stdout', 'root']))
+    assert got == [e for e in entries if e.name in ('stdout', 'root')]
+
+    got = list(
+        reader.entries(
+            start_time=start, min_level=LogLevel.WARNING, names=['ba.net']
+        )
+    )
+    assert got == [
+        e
+        for e in entries
+        if e.time >= start
+        and e.level.value >= LogLevel.WARNING.value
+        and e.name == 'ba.net'
+    ]
+
+
+def test_truncated_tail(tmp_path: Path) -> None:
+    """A partially written final block is ignored; earlier ones survive."""
+    path = tmp_path / 'log.bin'
+    entries = _make_entries(2000)
+    _write(path, entries, block_size=16 * 1024)
+    blocks = BinaryLogReader(path).blocks()
+    last = blocks[-1]
+    with open(path, 'r+b') as outfile:
+        outfile.truncate(last.offset + last.size // 2)
+    reader = BinaryLogReader(path)
+    assert reader.blocks() == blocks[:-1]
+    assert list(reader.entries()) == entries[: -last.count]
+
+
+def test_log_handler_binary(tmp_path: Path) -> None:
+    """LogHandler can write its log file in binary format."""
+    path = tmp_path / 'log.bin'
+    handler = LogHandler(
+        path=path,
+        echofile=None,
+        cache_size_limit=0,
+        cache_time_limit=None,
+        strict_threads=True,
+        file_format='binary',
+    )
+    handler.file_write('stdout', 'hello')
+    handler.file_write('stdout', '\n')
+    handler.file_write('stderr', 'uh oh')
+    handler.file_write('stderr', '\n')
+    handler.shutdown()
+
+    entries = list(BinaryLogReader(path).entries())
+    assert [(e.name, e.message) for e in entries] == [
+        ('stdout', 'hello'),
+        ('stderr', 'uh oh'),
+    ]
+
+
+def test_log_handler_binary_flush_errors(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Flush failures get reported on stderr, but only once."""
+    handler = LogHandler(
+        path=tmp_path / 'log.bin',
+        echofile=None,
+        cache_size_limit=0,
+        cache_time_limit=None,
+        file_format='binary',
+    )
+    binfile = handler._binfile
+    assert binfile is not None
+    flush = binfile.flush
+
+    def _fail() -> None:
+        raise OSError('disk full')
+
+    binfile.flush = _fail  # type: ignore[method-assign]
+    try:
+        handler._flush_binfile()
+        assert 'OSError: disk full' in capsys.readouterr().err
+        handler._flush_binfile()
+        assert capsys.readouterr().err == ''
+    finally:
+        binfile.flush = flush  # type: ignore[method-assign]
+        handler.shutdown()
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_binlog_benchmark(tmp_path: Path) -> None:
+    """Compare size and query time against json-lines logs.
+
+    Run with -s to see the numbers.
+    """
+    entries = _make_entries(100000)
+    jsonpath = tmp_path / 'log.json'
+    binpath = tmp_path / 'log.bin'
+    with open(jsonpath, 'w', encoding='utf-8') as outfile:
+        for entry in entries:
+            outfile.write(dataclass_to_json(entry) + '\n')
+    _write(binpath, entries, block_size=256 * 1024)
+
+    # A typical post-mortem: errors from one subsystem in a window.
+    start = _START + datetime.timedelta(seconds=600)
+    end = _START + datetime.timedelta(seconds=660)
+
+    def _json_query() -> list[LogEntry]:
+        out: list[LogEntry] = []
+        with open(jsonpath, encoding='utf-8') as infile:
+            for line in infile:
+                entry = dataclass_from_json(LogEntry, line)
+                if (
+                    start <= entry.time < end
+                    and entry.level.value >= LogLevel.WARNING.value
+                    and entry.name == 'ba.net'
+                ):
+                    out.append(entry)
+        return out
+
+    def _bin_query() -> list[LogEntry]:
+        return list(
+            BinaryLogReader(binpath).entries(
+                start_time=start,
+                end_time=end,
+                min_level=LogLevel.WARNING,
+                names=['ba.net'],
+            )
+        )
+
+    tstart = time.perf_counter()
+    expected = _json_query()
+    json_time = time.perf_counter() - tstart
+    tstart = time.perf_counter()
+    got = _bin_query()
+    bin_time = time.perf_counter() - tstart
+    assert got == expected and got
+
+    tstart = time.perf_counter()
+    full = list(BinaryLogReader(binpath).entries())
+    full_time = time.perf_counter() - tstart
+    assert len(full) == len(entries)
+
+    json_size = os.path.getsize(jsonpath)
+    bin_size = os.path.getsize(binpath)
+    print(
+        f'binlog: {len(entries)} entries;'
+        f' json {json_size:,} bytes, binary {bin_size:,} bytes'
+        f' ({json_size / bin_size:.1f}x smaller);'
+        f' window query json {json_time * 1e3:.0f}ms,'
+        f' binary {bin_time * 1e3:.1f}ms'
+        f' ({json_time / bin_time:.0f}x faster);'
+        f' full binary decode {full_time * 1e3:.0f}ms.'
+    )
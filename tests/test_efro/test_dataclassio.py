@@ -3105,3 +3105,164 @@ def test_type_disjoint_union_recursive() -> None:
         's': {'player': 'Bo', 'count': 5, 'how': {'n': 'salute', 's': {}}},
     }
     assert dataclass_from_dict(_DJUnionRecursive, wire) == obj
+
+
+class _CompiledEnum(Enum):
+    VAL1 = 'v1'
+    VAL2 = 'v2'
+
+
+@ioprepped
+@dataclass
+class _CompiledInner:
+    ival: Annotated[int, IOAttrs('i')] = 0
+    fval: Annotated[float, IOAttrs('f')] = 0.0
+
+
+@ioprepped
+@dataclass
+class _CompiledTestClass:
+    sval: Annotated[str, IOAttrs('s')] = ''
+    ival: int = 0
+    fval: float = 0.0
+    bval: bool = False
+    oval: Annotated[int | None, IOAttrs('o', store_default=False)] = None
+    sdval: Annotated[str, IOAttrs('sd', soft_default='hi')] = 'hi'
+    lval: list[str] = field(default_factory=list)
+    lfval: list[float] = field(default_factory=list)
+    setval: set[int] = field(default_factory=set)
+    dval: dict[str, int] = field(default_factory=dict)
+    dival: dict[int, str] = field(default_factory=dict)
+    enval: _CompiledEnum = _CompiledEnum.VAL1
+    oeval: Annotated[
+        _CompiledEnum | None,
+        IOAttrs('oe', enum_fallback=_CompiledEnum.VAL2),
+    ] = None
+    anyval: Any = None
+    inner: _CompiledInner = field(default_factory=_CompiledInner)
+    inners: list[_CompiledInner] = field(default_factory=list)
+    bytesval: bytes = b''
+    dtval: datetime.datetime | None = None
+
+
+def _codec_results(call: Any) -> Any:
+    """Return a call's result, or its error type and message."""
+    try:
+        return call()
+    except Exception as exc:
+        return (type(exc), str(exc))
+
+
+def test_compiled_codecs() -> None:
+    """Compiled codec plans must behave exactly like the reflective path."""
+    # pylint: disable=protected-access
+    from efro.dataclassio import _compiled
+
+    good = _CompiledTestClass(
+        sval='foo',
+        ival=3,
+        fval=1,  # Needs coercion.
+        bval=True,
+        oval=4,
+        lval=['a', 'b'],
+        lfval=[1.0, 2],  # Partly needs coercion.
+        setval={3, 1, 2},
+        dval={'a': 1},
+        dival={1: 'a'},
+        enval=_CompiledEnum.VAL2,
+        oeval=_CompiledEnum.VAL1,
+        anyval={'x': [1, 2]},
+        inner=_CompiledInner(ival=1, fval=2.0),
+        inners=[_CompiledInner(), _CompiledInner(ival=5)],
+        bytesval=b'abc',
+        dtval=utc_now(),
+    )
+    bad_outputs = [
+        _CompiledTestClass(sval=3),  # type: ignore[arg-type]
+        _CompiledTestClass(bval=1),  # type: ignore[arg-type]
+        _CompiledTestClass(oval='nope'),  # type: ignore[arg-type]
+        _CompiledTestClass(lval=['a', 1]),  # type: ignore[list-item]
+        _CompiledTestClass(dval={'a': 'b'}),  # type: ignore[dict-item]
+        _CompiledTestClass(enval='v1'),  # type: ignore[arg-type]
+        _CompiledTestClass(inner=_CompiledInner(ival=1.5)),  # type: ignore
+        _CompiledTestClass(anyval=(1, 2)),
+    ]
+    gooddict = dataclass_to_dict(good)
+    bad_inputs = [
+        {'s': 3},
+        {'ival': 1.0},
+        {'o': 'nope'},
+        {'lval': 'abc'},
+        {'lval': ['a', None]},
+        {'dval': {'a': 'b'}},
+        {'dival': {'x': 'a'}},
+        {'enval': 'nope'},
+        {'oe': 'nope'},
+        {'inner': {'i': 'nope'}},
+        {'unknownval': 1},
+        {'unknownval': b'x'},
+    ]
+
+    def _run_all() -> list:
+        results: list = []
+        for codec in (Codec.JSON, Codec.FIRESTORE, Codec.HUMAN):
+            results.append(
+                _codec_results(lambda: dataclass_to_dict(good, codec=codec))
+            )
+            for obj in bad_outputs:
+                results.append(
+                    _codec_results(lambda: dataclass_to_dict(obj, codec=codec))
+                )
+                results.append(_codec_results(lambda: dataclass_validate(obj)))
+        results.append(
+            _codec_results(
+                lambda: dataclass_to_dict(
+                    _CompiledTestClass(fval=1), coerce_to_float=False
+                )
+            )
+        )
+        for indict in [gooddict, {}] + bad_inputs:
+            for lossy in (False, True):
+                results.append(
+                    _codec_results(
+                        lambda: dataclass_from_dict(
+                            _CompiledTestClass, indict, lossy=lossy
+                        )
+                    )
+                )
+            results.append(
+                _codec_results(
+                    lambda: dataclass_from_dict(
+                        _CompiledTestClass,
+                        indict,
+                        allow_unknown_attrs=False,
+                    )
+                )
+            )
+        return results
+
+    assert _compiled.ENABLED
+    compiled_results = _run_all()
+    _compiled.ENABLED = False
+    try:
+        reflective_results = _run_all()
+    finally:
+        _compiled.ENABLED = True
+
+    assert compiled_results == reflective_results
+
+    # Make sure we actually went through plans and that opting a
+    # class out works.
+    assert _CompiledTestClass._DCIOPREP.output_plans  # type: ignore
+    assert _CompiledTestClass._DCIOPREP.input_plans  # type: ignore
+
+    @dataclass
+    class _Uncompiled:
+        ival: int = 0
+
+    ioprep(_Uncompiled, compiled=False)
+    assert dataclass_from_dict(
+        _Uncompiled, dataclass_to_dict(_Uncompiled(ival=3))
+    ) == _Uncompiled(ival=3)
+    assert not _Uncompiled._DCIOPREP.output_plans  # type: ignore
+    assert not _Uncompiled._DCIOPREP.input_plans  # type: ignore
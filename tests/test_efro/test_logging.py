@@ -0,0 +1,597 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests for efro.logging."""
+
+import os
+import time
+import asyncio
+import random
+import logging
+import threading
+import statistics
+from functools import partial
+from typing import TYPE_CHECKING
+
+import pytest
+
+from efro.util import utc_now
+from efro.logging import (
+    LogHandler,
+    LogEntry,
+    LogLevel,
+    LogBatchForwarder,
+    LOG_REPEATS_LABEL,
+    encode_log_batch,
+    decode_log_batch,
+    set_log_sampling,
+    _LogEntryRing,
+    _get_log_sampling_window,
+)
+from bacommon.loggercontrol import LoggerControlConfig
+
+if TYPE_CHECKING:
+    from typing import Any
+
+FAST_MODE = os.environ.get('BA_TEST_FAST_MODE') == '1'
+
+
+class _Collector:
+    """Gathers LogEntries delivered to a LogHandler callback."""
+
+    def __init__(self) -> None:
+        self.cond = threading.Condition()
+        self.entries: list[LogEntry] = []
+
+    def __call__(self, entry: LogEntry) -> None:
+        with self.cond:
+            self.entries.append(entry)
+            self.cond.notify_all()
+
+    def wait_for(self, count: int, timeout: float = 10.0) -> None:
+        """Wait until at least ``count`` entries have arrived."""
+        with self.cond:
+            assert self.cond.wait_for(
+                lambda: len(self.entries) >= count, timeout=timeout
+            ), f'Got {len(self.entries)} of {count} entries.'
+
+
+def _make_handler(
+    cache_size_limit: int = 0,
+) -> tuple[LogHandler, _Collector]:
+    handler = LogHandler(
+        path=None,
+        echofile=None,
+        cache_size_limit=cache_size_limit,
+        cache_time_limit=None,
+        strict_threads=True,
+    )
+    collector = _Collector()
+    handler.add_callback(collector)
+    return handler, collector
+
+
+def test_file_write_lines() -> None:
+    """Batched stdout writes still split into the same entries."""
+    handler, collector = _make_handler()
+    try:
+        for chunk in ('hello', ' ', 'world', '\n'):
+            handler.file_write('stdout', chunk)
+        for _ in range(40):
+            handler.file_write('stderr', '^')
+        handler.file_write('stderr', '\n')
+        handler.file_write('stdout', 'partial')
+        handler.file_flush('stdout')
+        collector.wait_for(3)
+    finally:
+        handler.shutdown()
+
+    assert [(e.name, e.message) for e in collector.entries] == [
+        ('stdout', 'hello world'),
+        ('stderr', '^' * 40),
+        ('stdout', 'partial'),
+    ]
+
+
+def test_file_write_ordering() -> None:
+    """Stdout writes never jump ahead of log records emitted after them."""
+    handler, collector = _make_handler()
+    try:
+        handler.file_write('stdout', 'a')
+        handler.file_write('stdout', '\n')
+        handler.emit(
+            logging.LogRecord('test', logging.INFO, __file__, 1, 'b', (), None)
+        )
+        handler.file_write('stdout', 'c')
+        handler.file_write('stdout', '\n')
+        collector.wait_for(3)
+    finally:
+        handler.shutdown()
+
+    assert [e.message for e in collector.entries] == ['a', 'b', 'c']
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_file_write_benchmark() -> None:
+    """Measure write throughput and latency to LogEntry delivery.
+
+    Compares batched LogHandler.file_write() against queuing one call
+    per write (the old behavior). Run with -s to see the numbers.
+    """
+    # pylint: disable=protected-access
+    line = ['^'] * 79 + ['\n']
+    lines = 2000
+
+    def _unbatched(handler: LogHandler, name: str, output: str) -> None:
+        handler._event_loop.call_soon_threadsafe(
+            partial(handler._file_write_in_thread, name, output)
+        )
+
+    results: dict[str, tuple[float, float]] = {}
+    for label in ('per-write', 'batched'):
+        handler, collector = _make_handler()
+        write = (
+            handler.file_write
+            if label == 'batched'
+            else partial(_unbatched, handler)
+        )
+        try:
+            # Throughput: a storm of single-character writes.
+            start = time.perf_counter()
+            for _ in range(lines):
+                for chunk in line:
+                    write('stderr', chunk)
+            collector.wait_for(lines)
+            rate = lines * len(line) / (time.perf_counter() - start)
+
+            # Latency: time from a line's final write to its entry.
+            latencies: list[float] = []
+            for i in range(200):
+                count = lines + i + 1
+                start = time.perf_counter()
+                write('stdout', 'x')
+                write('stdout', '\n')
+                collector.wait_for(count)
+                latencies.append(time.perf_counter() - start)
+        finally:
+            handler.shutdown()
+        assert all(e.message == '^' * 79 for e in collector.entries[:lines])
+        results[label] = (rate, statistics.median(latencies))
+
+    for label, (rate, latency) in results.items():
+        print(
+            f'LogHandler file_write {label}: {rate:,.0f} writes/s,'
+            f' median latency {latency * 1e6:.0f}us.'
+        )
+
+
+def _entry(index: int) -> LogEntry:
+    return LogEntry(
+        name='test', message=str(index), level=LogLevel.INFO, time=utc_now()
+    )
+
+
+def test_cache_ring_matches_model() -> None:
+    """Ring-buffer reads agree with a plain list through grows/shrinks."""
+    rng = random.Random(1)
+    ring = _LogEntryRing()
+    model: list[LogEntry] = []
+    first = 0
+    for _ in range(20000):
+        # Bias toward growth for a while, then toward shrinking, so we
+        # exercise resizes in both directions.
+        grow = rng.random() < (0.7 if len(model) < 3000 else 0.3)
+        if grow or not model:
+            entry = _entry(first + len(model))
+            ring.append(entry, 10)
+            model.append(entry)
+        else:
+            ring.popleft()
+            model.pop(0)
+            first += 1
+        assert ring.total_size == 10 * len(model)
+        assert ring.end == first + len(model)
+        if rng.random() < 0.05:
+            start = rng.randrange(0, ring.end + 5)
+            count = rng.choice([None, 0, 1, rng.randrange(0, 500)])
+            got_start, got, end = ring.read(start, count)
+            stop = end if count is None else min(start + count, end)
+            expected_start = max(first, min(start, end))
+            assert end == first + len(model)
+            assert got_start == expected_start
+            stop = max(stop, expected_start)
+            assert got == model[expected_start - first : stop - first]
+
+
+def test_cache_concurrent_reads() -> None:
+    """Readers on other threads only ever see correct entries."""
+    ring = _LogEntryRing()
+    done = threading.Event()
+    errors: list[str] = []
+
+    def _reader() -> None:
+        rng = random.Random()
+        while not done.is_set():
+            start, entries, _end = ring.read(
+                rng.randrange(0, ring.end + 1), rng.randrange(1, 300)
+            )
+            for i, entry in enumerate(entries):
+                if entry is None or entry.message != str(start + i):
+                    errors.append(f'index {start + i} gave {entry}')
+                    return
+
+    readers = [threading.Thread(target=_reader) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+    try:
+        for i in range(100000):
+            ring.append(_entry(i), 1)
+            # Churn the capacity up and down as we go.
+            limit = 200 if (i // 5000) % 2 else 2000
+            while ring.total_size > limit:
+                ring.popleft()
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert not errors, errors[0]
+
+
+def test_cache_read_during_shrink() -> None:
+    """Reads drop entries evicted mid-read, even if the ring shrank.
+
+    The GIL makes this interleaving too rare to hit with real threads,
+    so we force it by evicting from within the read's copy step.
+    """
+    # pylint: disable=protected-access
+    ring = _LogEntryRing()
+    for i in range(200):
+        ring.append(_entry(i), 1)
+    for _ in range(167):
+        ring.popleft()
+    assert ring.read(0, 1)[0] == 167
+    assert len(ring._view[0]) == 128
+
+    def _ordered_with_evictions(
+        slots: list[Any], start: int, stop: int
+    ) -> list[Any]:
+        # Evict enough to shrink the ring before copying anything.
+        del ring._ordered
+        for _ in range(3):
+            ring.popleft()
+        assert len(ring._view[0]) == 64
+        return _LogEntryRing._ordered(slots, start, stop)
+
+    ring._ordered = _ordered_with_evictions  # type: ignore[method-assign]
+    start, entries, end = ring.read(0, None)
+    assert (start, end) == (170, 200)
+    assert [e.message for e in entries] == [str(i) for i in range(170, 200)]
+
+
+def test_get_cached_eviction() -> None:
+    """get_cached honors size eviction and absolute indexes."""
+    # Entries are a few hundred bytes each by the handler's accounting.
+    handler, collector = _make_handler(cache_size_limit=20000)
+    try:
+        for i in range(500):
+            handler.file_write('stdout', f'line {i}')
+            handler.file_write('stdout', '\n')
+        collector.wait_for(500)
+
+        archive = handler.get_cached()
+        assert archive.log_size == handler.log_size == 500
+        assert 0 < len(archive.entries) < 500
+        assert archive.start_index + len(archive.entries) == 500
+        assert archive.entries[-1].message == 'line 499'
+
+        # Ranges are by absolute index, clamped to what's cached.
+        part = handler.get_cached(start_index=495, max_entries=3)
+        assert [e.message for e in part.entries] == [
+            'line 495',
+            'line 496',
+            'line 497',
+        ]
+        gone = handler.get_cached(start_index=0, max_entries=10)
+        assert gone.entries == [] and gone.start_index == archive.start_index
+        past = handler.get_cached(start_index=1000)
+        assert past.entries == [] and past.start_index == 500
+    finally:
+        handler.shutdown()
+
+
+def _record(
+    name: str, msg: str, args: tuple = (), exc: BaseException | None = None
+) -> logging.LogRecord:
+    return logging.LogRecord(
+        name,
+        logging.ERROR,
+        __file__,
+        1,
+        msg,
+        args,
+        None if exc is None else (type(exc), exc, exc.__traceback__),
+    )
+
+
+def test_sampling_windows() -> None:
+    """Loggers inherit sampling windows from their nearest ancestor."""
+    try:
+        set_log_sampling({'root': 1.0, 'ba': 5.0, 'ba.net': 0.0})
+        assert _get_log_sampling_window('root') == 1.0
+        assert _get_log_sampling_window('foo.bar') == 1.0
+        assert _get_log_sampling_window('ba') == 5.0
+        assert _get_log_sampling_window('ba.app.sub') == 5.0
+        assert _get_log_sampling_window('ba.net') == 0.0
+        assert _get_log_sampling_window('ba.netx') == 5.0
+        set_log_sampling({})
+        assert _get_log_sampling_window('ba.app.sub') == 0.0
+    finally:
+        set_log_sampling({})
+
+    # Sampling rides along with levels through config diffs.
+    base = LoggerControlConfig(levels={'root': 30}, sampling={'ba': 5.0})
+    config = LoggerControlConfig(
+        levels={'root': 30}, sampling={'ba': 5.0, 'ba.net': 0.0, 'x': 2.0}
+    )
+    diff = config.diff(base)
+    assert diff.levels == {}
+    assert diff.sampling == {'ba.net': 0.0, 'x': 2.0}
+    assert base.apply_diff(diff) == config
+
+
+def test_sampling_collapses_repeats() -> None:
+    """Repeats within a window come through as one labeled entry."""
+    handler, collector = _make_handler()
+    set_log_sampling({'test': 0.2})
+    try:
+        for i in range(100):
+            handler.emit(_record('test', 'Error on tick %d.', (i,)))
+        handler.emit(_record('test.sub', 'Something else.'))
+        handler.emit(_record('other', 'Error on tick %d.', (0,)))
+        collector.wait_for(4)
+
+        # With no more repeats, the next one goes straight through.
+        time.sleep(0.5)
+        handler.emit(_record('test', 'Error on tick %d.', (100,)))
+        collector.wait_for(5)
+    finally:
+        set_log_sampling({})
+        handler.shutdown()
+
+    assert [(e.name, e.message, e.labels) for e in collector.entries] == [
+        ('test', 'Error on tick 0.', {}),
+        ('test.sub', 'Something else.', {}),
+        ('other', 'Error on tick 0.', {}),
+        ('test', 'Error on tick 99.', {LOG_REPEATS_LABEL: '99'}),
+        ('test', 'Error on tick 100.', {}),
+    ]
+
+
+def test_sampling_exceptions() -> None:
+    """Exception types are sampled separately; repeats shrink to a line."""
+    handler, collector = _make_handler()
+    set_log_sampling({'test': 10.0})
+    try:
+        for i in range(5):
+            for exc in (ValueError(f'bad {i}'), KeyError(i)):
+                try:
+                    raise exc
+                except Exception as caught:
+                    handler.emit(
+                        _record('test', 'Error on update.', (), caught)
+                    )
+    finally:
+        set_log_sampling({})
+
+        # Whatever is still being collapsed goes out at shutdown.
+        handler.shutdown()
+
+    entries = collector.entries
+    assert len(entries) == 4
+    assert 'Traceback' in entries[0].message
+    assert entries[0].message.endswith('ValueError: bad 0')
+    assert entries[1].message.endswith('KeyError: 0')
+    assert sorted(e.message for e in entries[2:]) == [
+        'Error on update.\nKeyError: 4',
+        'Error on update.\nValueError: bad 4',
+    ]
+    assert all(e.labels == {LOG_REPEATS_LABEL: '4'} for e in entries[2:])
+
+
+def test_sampling_formats_first_once() -> None:
+    """A sampled record seen for the first time is formatted only once."""
+
+    class _Counted:
+        def __init__(self) -> None:
+            self.formats = 0
+
+        def __str__(self) -> str:
+            self.formats += 1
+            return 'counted'
+
+    handler, collector = _make_handler()
+    set_log_sampling({'test': 10.0})
+    arg = _Counted()
+    try:
+        handler.emit(_record('test', 'Value is %s.', (arg,)))
+        collector.wait_for(1)
+    finally:
+        set_log_sampling({})
+        handler.shutdown()
+
+    assert collector.entries[0].message == 'Value is counted.'
+    assert arg.formats == 1
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_sampling_benchmark() -> None:
+    """Measure the cost of logging an exception storm with sampling.
+
+    Times from the first record until the handler thread has delivered
+    everything it is going to. Run with -s to see the numbers.
+    """
+    count = 5000
+    results: dict[str, float] = {}
+    for label, window in (('unsampled', 0.0), ('sampled', 5.0)):
+        handler, collector = _make_handler()
+        set_log_sampling({'test': window})
+        try:
+            start = time.perf_counter()
+            for i in range(count):
+                try:
+                    raise RuntimeError(f'Bad thing {i}.')
+                except Exception as exc:
+                    handler.emit(_record('test', 'Error on update.', (), exc))
+            collector.wait_for(count if window == 0.0 else 1)
+            results[label] = (time.perf_counter() - start) / count
+        finally:
+            set_log_sampling({})
+            handler.shutdown()
+        assert len(collector.entries) == (count if window == 0.0 else 2)
+
+    for label, duration in results.items():
+        print(
+            f'LogHandler exception storm {label}:'
+            f' {duration * 1e6:.1f}us per record.'
+        )
+
+
+def test_log_batch_encoding() -> None:
+    """Encoded batches decode back to the same entries."""
+    entries = [_entry(i) for i in range(200)]
+    entries[3].labels = {'session': 'abc'}
+    packed = encode_log_batch(entries)
+    assert packed[:1] == b'z'
+    assert decode_log_batch(packed) == entries
+    plain = encode_log_batch(entries, compress=False)
+    assert plain[:1] == b'j' and len(plain) > len(packed)
+    assert decode_log_batch(plain) == entries
+
+    # Tiny batches don't bother compressing.
+    assert encode_log_batch(entries[:1])[:1] == b'j'
+    with pytest.raises(ValueError):
+        decode_log_batch(b'?' + plain[1:])
+
+
+async def _forward_burst(
+    count: int, **kwargs: Any
+) -> tuple[LogBatchForwarder, list[bytes], float]:
+    """Log a burst of lines through a forwarder with a slow transport.
+
+    Returns the forwarder, the batches it shipped, and how long it took
+    to ship the lot.
+    """
+    handler = LogHandler(
+        path=None,
+        echofile=None,
+        cache_size_limit=0,
+        cache_time_limit=None,
+        strict_threads=True,
+    )
+    batches: list[bytes] = []
+
+    async def _flush(data: bytes) -> None:
+        await asyncio.sleep(0.002)
+        batches.append(data)
+
+    forwarder = LogBatchForwarder(
+        log_handler=handler, flush_encoded=_flush, **kwargs
+    )
+    start = time.monotonic()
+    try:
+        # Log from another thread so the loop is free to ship as we go.
+        def _log() -> None:
+            for i in range(count):
+                handler.file_write('stdout', f'Player {i % 7} did thing {i}.')
+                handler.file_write('stdout', '\n')
+            handler.file_flush('stdout')
+
+        await asyncio.to_thread(_log)
+        while forwarder.stats.entries + forwarder.dropped_count < count:
+            await asyncio.sleep(0.001)
+        elapsed = time.monotonic() - start
+        await forwarder.shutdown()
+    finally:
+        handler.shutdown()
+    return forwarder, batches, elapsed
+
+
+def test_forwarder_batches() -> None:
+    """Batches are cut by size and everything arrives in order."""
+    forwarder, batches, _elapsed = asyncio.run(
+        _forward_burst(
+            5000,
+            max_batch_bytes=8 * 1024,
+            max_queue=100000,
+            flush_interval=0.05,
+        )
+    )
+    entries = [e for b in batches for e in decode_log_batch(b)]
+    assert [e.message for e in entries] == [
+        f'Player {i % 7} did thing {i}.' for i in range(5000)
+    ]
+    assert len(batches) > 10
+    assert all(len(decode_log_batch(b)) < 500 for b in batches)
+    stats = forwarder.stats
+    assert stats.entries == 5000 and stats.batches == len(batches)
+    assert stats.shipped_bytes == sum(len(b) for b in batches)
+    assert stats.compression_ratio > 3.0
+    assert stats.max_flush_seconds >= 0.002
+    assert forwarder.dropped_count == 0
+
+
+def test_forwarder_overflow() -> None:
+    """A burst past the queue cap drops entries unless set to block."""
+    dropper, _batches, _elapsed = asyncio.run(
+        _forward_burst(5000, max_queue=100, flush_interval=0.05)
+    )
+    assert dropper.dropped_count > 0
+    assert dropper.stats.entries + dropper.dropped_count == 5000
+
+    blocker, batches, _elapsed = asyncio.run(
+        _forward_burst(
+            5000, max_queue=100, flush_interval=0.05, overflow='block'
+        )
+    )
+    assert blocker.dropped_count == 0
+    assert blocker.stats.blocked_seconds > 0.0
+    entries = [e for b in batches for e in decode_log_batch(b)]
+    assert [e.message for e in entries] == [
+        f'Player {i % 7} did thing {i}.' for i in range(5000)
+    ]
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_forwarder_benchmark() -> None:
+    """Compare forwarding a log burst with and without batching smarts.
+
+    'baseline' approximates the old behavior: no early wakeups, one
+    uncompressed batch per interval, drops past the queue cap. Run with
+    -s to see the numbers.
+    """
+    count = 20000
+    configs: dict[str, dict[str, Any]] = {
+        'baseline': {
+            'compress': False,
+            'max_batch_bytes': 1 << 40,
+            'max_queue': 1000,
+            'flush_interval': 0.25,
+        },
+        'batched': {
+            'max_queue': 1000,
+            'flush_interval': 0.25,
+            'overflow': 'block',
+        },
+    }
+    for label, kwargs in configs.items():
+        forwarder, batches, elapsed = asyncio.run(
+            _forward_burst(count, **kwargs)
+        )
+        stats = forwarder.stats
+        print(
+            f'LogBatchForwarder {label}: shipped {stats.entries}'
+            f' (dropped {forwarder.dropped_count}) in {elapsed:.2f}s;'
+            f' {len(batches)} batches, max {max(map(len, batches)):,} bytes,'
+            f' {stats.shipped_bytes:,} bytes total'
+            f' ({stats.compression_ratio:.1f}x compression);'
+            f' mean flush {stats.total_flush_seconds / stats.batches * 1e3:.1f}ms.'
+        )
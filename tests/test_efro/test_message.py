@@ -7,6 +7,7 @@
 import os
 import logging
 import asyncio
+import datetime
 from typing import TYPE_CHECKING, overload, assert_type, override
 from dataclasses import dataclass
 
@@ -17,6 +18,7 @@ from efro.message import (
     Message,
     Response,
     MessageProtocol,
+    MessageEncoding,
     MessageSender,
     BoundMessageSender,
     MessageReceiver,
@@ -459,6 +461,38 @@ TEST_PROTOCOL_SINGLE = MessageProtocol(
 )
 
 
+@ioprepped
+@dataclass
+class _TMsgBin(Message):
+    """Just testing."""
+
+    data: bytes
+    time: datetime.datetime
+    names: list[str]
+
+    @override
+    @classmethod
+    def get_response_types(cls) -> list[type[Response] | None]:
+        return [_TRespBin]
+
+
+@ioprepped
+@dataclass
+class _TRespBin(Response):
+    """Just testing."""
+
+    data: bytes
+    time: datetime.datetime
+
+
+TEST_PROTOCOL_BINARY = MessageProtocol(
+    message_types={0: _TMsgBin, 1: _TMsg1},
+    response_types={0: _TRespBin, 1: _TResp1},
+    forward_clean_errors=True,
+    encoding=MessageEncoding.BINARY,
+)
+
+
 def test_protocol_creation() -> None:
     """Test protocol creation."""
 
@@ -1129,3 +1163,258 @@ def test_full_pipeline(caplog: pytest.LogCaptureFixture) -> None:
         response4 = asyncio.run(obj.msg.send_async(_TMsg1(ival=0)))
 
     obj.test_send_method_exceptions = False
+
+
+def test_binary_codec() -> None:
+    """Test our msgpack-style binary encoding."""
+    # pylint: disable=protected-access
+    from efro.message import _binary
+
+    now = datetime.datetime.now(datetime.UTC)
+    vals: list = [
+        None,
+        True,
+        False,
+        0,
+        127,
+        128,
+        -1,
+        -33,
+        2**63 - 1,
+        -(2**63),
+        2**64 - 1,
+        1.5,
+        '',
+        'hello',
+        'x' * 40,
+        'y' * 70000,
+        b'',
+        b'\x00\xff' * 200,
+        [1, [2, 3], {'a': None}],
+        {'k' * 10: list(range(20)), 'nested': {'x': b'123'}},
+        now,
+        datetime.datetime(1900, 1, 1, 1, 2, 3, 4, tzinfo=datetime.UTC),
+        datetime.datetime(2700, 1, 1, tzinfo=datetime.UTC),
+    ]
+    for val in vals:
+        assert _binary.unpack(_binary.pack(val)) == val
+
+    # Spot check a few encodings against the msgpack spec.
+    assert _binary.pack({'t': 1}) == b'\x81\xa1t\x01'
+    assert _binary.pack(-1) == b'\xff'
+    assert _binary.pack(b'ab') == b'\xc4\x02ab'
+    assert _binary.pack(
+        datetime.datetime(1970, 1, 1, 0, 0, 1, tzinfo=datetime.UTC)
+    ) == (b'\xd7\xff' + b'\x00' * 7 + b'\x01')
+
+    # Tuples come back as lists (as in json).
+    assert _binary.unpack(_binary.pack((1, 2))) == [1, 2]
+
+    with pytest.raises(ValueError):
+        _binary.pack(2**64)
+    with pytest.raises(ValueError):
+        _binary.pack(datetime.datetime.now())
+    with pytest.raises(TypeError):
+        _binary.pack({1, 2})
+    with pytest.raises(ValueError):
+        _binary.unpack(_binary.pack('hello')[:-1])
+    with pytest.raises(ValueError):
+        _binary.unpack(_binary.pack('hello') + b'\x00')
+
+
+def test_binary_pipeline() -> None:
+    """Test sending messages with binary encoding."""
+
+    class _TestClassR:
+        receiver = MessageReceiver(TEST_PROTOCOL_BINARY)
+
+        def handle_bin(self, msg: _TMsgBin) -> _TRespBin:
+            """Test."""
+            assert msg.names == ['a', 'b']
+            return _TRespBin(data=msg.data[::-1], time=msg.time)
+
+        def handle_1(self, msg: _TMsg1) -> _TResp1:
+            """Test."""
+            if msg.ival == 1:
+                raise CleanError('Testing Clean Error')
+            return _TResp1(bval=True)
+
+        receiver.register_handler(handle_bin)
+        receiver.register_handler(handle_1)
+
+    class _TestClassS:
+        msg = MessageSender(TEST_PROTOCOL_BINARY)
+
+        def __init__(self) -> None:
+            self.target = _TestClassR()
+            self.sent: list[bytes] = []
+
+        @msg.send_method
+        def _send_raw_message(self, data: bytes) -> bytes:
+            self.sent.append(data)
+            return _TestClassR.receiver.handle_raw_message(self.target, data)
+
+    obj = _TestClassS()
+    now = datetime.datetime.now(datetime.UTC)
+    payload = bytes(range(256))
+    response = _TestClassS.msg.send(
+        obj, _TMsgBin(data=payload, time=now, names=['a', 'b'])
+    )
+    assert isinstance(response, _TRespBin)
+    assert response.data == payload[::-1]
+    assert response.time == now
+
+    # Bytes should go across as-is; not base64 encoded.
+    assert isinstance(obj.sent[0], bytes)
+    assert payload in obj.sent[0]
+
+    # Errors should come back in binary form too.
+    with pytest.raises(CleanError):
+        _TestClassS.msg.send(obj, _TMsg1(ival=1))
+
+    # Binary receivers should still accept json messages (and respond
+    # in kind) so senders can be switched over gradually.
+    protocol = TEST_PROTOCOL_BINARY
+    rawmsg = protocol.encode_dict(
+        protocol.message_to_dict(_TMsg1(ival=0), MessageEncoding.JSON)
+    )
+    rawresponse = _TestClassR.receiver.handle_raw_message(obj.target, rawmsg)
+    assert isinstance(rawresponse, str)
+    assert protocol.response_from_dict(
+        protocol.decode_dict(rawresponse), MessageEncoding.JSON
+    ) == _TResp1(bval=True)
+
+    # Generated receivers for binary protocols should deal in bytes.
+    rmod = TEST_PROTOCOL_BINARY.do_create_receiver_module(
+        'TestBinaryMessageReceiver',
+        'protocol = TEST_PROTOCOL_BINARY',
+        is_async=False,
+        private=True,
+    )
+    assert 'self, message: bytes, raise_unregistered: bool = False' in rmod
+    assert '    ) -> bytes:' in rmod
+
+
+def test_batch_pipeline() -> None:
+    """Test sending batches of messages."""
+    # pylint: disable=too-many-locals
+
+    class _TestClassRAsync:
+        receiver = _TestAsyncMessageReceiver()
+
+        def __init__(self) -> None:
+            self.order: list[int] = []
+
+        @receiver.handler
+        async def handle_test_message_1(self, msg: _TMsg1) -> _TResp1:
+            """Test."""
+            self.order.append(msg.ival)
+            if msg.ival == 1:
+                raise CleanError('Testing Clean Error')
+            # Later messages finish first; responses should still come
+            # back in order.
+            await asyncio.sleep(0.01 * (10 - msg.ival))
+            return _TResp1(bval=msg.ival % 2 == 0)
+
+        @receiver.handler
+        async def handle_test_message_2(self, msg: _TMsg2) -> _TResp1 | _TResp2:
+            """Test."""
+            del msg  # Unused
+            return _TResp2(fval=1.2)
+
+        @receiver.handler
+        async def handle_test_message_3(self, msg: _TMsg3) -> None:
+            """Test."""
+            del msg  # Unused
+
+    class _TestClassRSync:
+        receiver = _TestSyncMessageReceiver()
+
+        @receiver.handler
+        def handle_test_message_1(self, msg: _TMsg1) -> _TResp1:
+            """Test."""
+            if msg.ival == 1:
+                raise CleanError('Testing Clean Error')
+            return _TResp1(bval=msg.ival % 2 == 0)
+
+        @receiver.handler
+        def handle_test_message_2(self, msg: _TMsg2) -> _TResp1 | _TResp2:
+            """Test."""
+            del msg  # Unused
+            return _TResp2(fval=1.2)
+
+        @receiver.handler
+        def handle_test_message_3(self, msg: _TMsg3) -> None:
+            """Test."""
+            del msg  # Unused
+
+    class _TestClassS:
+        msg = _TestMessageSenderBBoth()
+
+        def __init__(self, target: _TestClassRAsync | _TestClassRSync) -> None:
+            self.target = target
+            self.sends = 0
+
+        @msg.send_async_method
+        async def _send_raw_message_async(self, data: str) -> str:
+            self.sends += 1
+            if isinstance(self.target, _TestClassRSync):
+                return self.target.receiver.handle_raw_message(data)
+            return await self.target.receiver.handle_raw_message(data)
+
+    target_async = _TestClassRAsync()
+    for target in (target_async, _TestClassRSync()):
+        obj = _TestClassS(target)
+        msgs: list[Message] = [_TMsg1(ival=i) for i in (0, 2, 3, 5)]
+        msgs += [_TMsg2(sval='foo'), _TMsg3(sval='bar')]
+        results = asyncio.run(obj.msg.send_batch_async(msgs))
+        assert obj.sends == 1
+        assert results == [
+            _TResp1(bval=True),
+            _TResp1(bval=True),
+            _TResp1(bval=False),
+            _TResp1(bval=False),
+            _TResp2(fval=1.2),
+            None,
+        ]
+
+        # Errors for individual messages should only affect those.
+        msgs = [_TMsg1(ival=0), _TMsg1(ival=1), _TMsg4(sval2='nope')]
+        results2 = asyncio.run(
+            obj.msg.send_batch_async(msgs, return_exceptions=True)
+        )
+        assert results2[0] == _TResp1(bval=True)
+        assert isinstance(results2[1], CleanError)
+        assert isinstance(results2[2], RemoteError)
+
+        with pytest.raises(CleanError):
+            asyncio.run(obj.msg.send_batch_async(msgs))
+
+        assert asyncio.run(obj.msg.send_batch_async([])) == []
+
+    # Async handlers should have been called in order.
+    assert target_async.order == [0, 2, 3, 5, 0, 1, 0, 1]
+
+    # If the receiver can't handle the batch as a whole (say, an older
+    # version that doesn't know about batches) its error response
+    # should apply to all messages.
+    class _TestClassSOld:
+        msg = _TestMessageSenderBBoth()
+
+        @msg.send_async_method
+        async def _send_raw_message_async(self, data: str) -> str:
+            del data  # Unused.
+            protocol = self.msg.protocol
+            return protocol.encode_dict(
+                protocol.response_to_dict(
+                    protocol.error_to_response(RuntimeError())[0]
+                )
+            )
+
+    results3 = asyncio.run(
+        _TestClassSOld().msg.send_batch_async(
+            [_TMsg1(ival=0), _TMsg1(ival=2)], return_exceptions=True
+        )
+    )
+    assert len(results3) == 2
+    assert all(isinstance(r, RemoteError) for r in results3)
@@ -7,6 +7,7 @@ import time
 import random
 import asyncio
 import weakref
+import tracemalloc
 from enum import unique, Enum
 from typing import TYPE_CHECKING
 from dataclasses import dataclass
@@ -18,7 +19,7 @@ from efro.error import CommunicationError
 from efro.dataclassio import ioprepped, dataclass_from_json, dataclass_to_json
 
 if TYPE_CHECKING:
-    from typing import Awaitable
+    from typing import Any, Awaitable
 
 FAST_MODE = os.environ.get('BA_TEST_FAST_MODE') == '1'
 
@@ -41,6 +42,8 @@ class _MessageType(Enum):
     RESPONSE_SLOW = 'rs'
     TEST_BIG = 'tb'
     RESPONSE_BIG = 'rb'
+    TEST_ECHO = 'te'
+    RESPONSE_ECHO = 're'
 
 
 @ioprepped
@@ -56,11 +59,15 @@ class _ServerClientCommon:
         keepalive_interval: float,
         keepalive_timeout: float,
         debug_print: bool,
+        endpoint_kwargs: dict[str, Any] | None = None,
     ) -> None:
         self._endpoint: RPCEndpoint | None = None
         self._keepalive_interval = keepalive_interval
         self._keepalive_timeout = keepalive_timeout
         self._debug_print = debug_print
+        self._endpoint_kwargs = (
+            {} if endpoint_kwargs is None else endpoint_kwargs
+        )
 
     def has_endpoint(self) -> bool:
         """Is our endpoint up yet?"""
@@ -108,6 +115,9 @@ class _ServerClientCommon:
                 extradata=bytes(bytearray(1024 * 1024 * 5)),
             )
 
+        if msg.messagetype is _MessageType.TEST_ECHO:
+            return _Message(_MessageType.RESPONSE_ECHO, extradata=msg.extradata)
+
         raise RuntimeError(f'Got unexpected message type: {msg.messagetype}')
 
     async def _handle_raw_message(self, message: bytes) -> bytes:
@@ -122,11 +132,13 @@ class _Server(_ServerClientCommon):
         keepalive_interval: float,
         keepalive_timeout: float,
         debug_print: bool,
+        endpoint_kwargs: dict[str, Any] | None = None,
     ) -> None:
         super().__init__(
             keepalive_interval=keepalive_interval,
             keepalive_timeout=keepalive_timeout,
             debug_print=debug_print,
+            endpoint_kwargs=endpoint_kwargs,
         )
         self.listener: asyncio.base_events.Server | None = None
 
@@ -163,6 +175,7 @@ class _Server(_ServerClientCommon):
             keepalive_timeout=self._keepalive_timeout,
             debug_print=self._debug_print,
             label='test_rpc_server',
+            **self._endpoint_kwargs,
         )
 
         await self._endpoint.run()
@@ -174,11 +187,13 @@ class _Client(_ServerClientCommon):
         keepalive_interval: float,
         keepalive_timeout: float,
         debug_print: bool,
+        endpoint_kwargs: dict[str, Any] | None = None,
     ) -> None:
         super().__init__(
             keepalive_interval=keepalive_interval,
             keepalive_timeout=keepalive_timeout,
             debug_print=debug_print,
+            endpoint_kwargs=endpoint_kwargs,
         )
 
     async def run(self) -> None:
@@ -195,6 +210,7 @@ class _Client(_ServerClientCommon):
             keepalive_timeout=self._keepalive_timeout,
             debug_print=self._debug_print,
             label='test_rpc_client',
+            **self._endpoint_kwargs,
         )
         await self._endpoint.run()
 
@@ -206,22 +222,27 @@ class _Tester:
         keepalive_timeout: float = RPCEndpoint.DEFAULT_KEEPALIVE_TIMEOUT,
         server_debug_print: bool = True,
         client_debug_print: bool = True,
+        server_endpoint_kwargs: dict[str, Any] | None = None,
+        client_endpoint_kwargs: dict[str, Any] | None = None,
     ) -> None:
+        # pylint: disable=too-many-positional-arguments
         self.client = _Client(
             keepalive_interval=keepalive_interval,
             keepalive_timeout=keepalive_timeout,
             debug_print=client_debug_print,
+            endpoint_kwargs=client_endpoint_kwargs,
         )
         self.server = _Server(
             keepalive_interval=keepalive_interval,
             keepalive_timeout=keepalive_timeout,
             debug_print=server_debug_print,
+            endpoint_kwargs=server_endpoint_kwargs,
         )
 
-    def run(self, testcall: Awaitable[None]) -> None:
+    def run(self, testcall: Awaitable[None], debug: bool = True) -> None:
         """Run our test."""
 
-        asyncio.run(self._run(testcall), debug=True)
+        asyncio.run(self._run(testcall), debug=debug)
 
         # Disabling this for now; need to get to the bottom of why it is
         # failing in some cases or make it more lenient.
@@ -454,3 +475,208 @@ def test_client_interrupt() -> None:
             await tester.server.send_message(_Message(_MessageType.TEST_SLOW))
 
     tester.run(_do_it())
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_compression() -> None:
+    """Test compressed messages and responses."""
+    zdict = b'some shared dictionary content ' * 64
+    tester = _Tester(
+        server_endpoint_kwargs={'compression_dict': zdict},
+        client_endpoint_kwargs={
+            'compression_dict': zdict,
+            'compression_threshold': 100,
+        },
+    )
+
+    async def _do_it() -> None:
+        server = tester.server.endpoint
+        client = tester.client.endpoint
+
+        # Small stuff should not get compressed.
+        resp = await tester.client.send_message(_Message(_MessageType.TEST1))
+        assert resp.messagetype is _MessageType.RESPONSE1
+        assert client.compressed_bytes_written == 0
+        assert server.compressed_bytes_written == 0
+
+        # Big compressible stuff should (in both directions).
+        payload = b'some shared dictionary content ' * 1000
+        resp = await tester.client.send_message(
+            _Message(_MessageType.TEST_ECHO, extradata=payload)
+        )
+        assert resp.extradata == payload
+        assert 0 < client.compressed_bytes_written < len(payload)
+        assert client.uncompressed_bytes_written > len(payload)
+        assert server.compressed_bytes_read == client.compressed_bytes_written
+        assert (
+            server.uncompressed_bytes_read == client.uncompressed_bytes_written
+        )
+        assert 0 < server.compressed_bytes_written < len(payload)
+        assert client.compressed_bytes_read == server.compressed_bytes_written
+
+        # Our big 5mb zero-filled response should shrink drastically.
+        resp = await tester.client.send_message(_Message(_MessageType.TEST_BIG))
+        assert resp.messagetype is _MessageType.RESPONSE_BIG
+        assert server.uncompressed_bytes_written > 5 * 1024 * 1024
+        assert server.compressed_bytes_written < 1024 * 1024
+
+    tester.run(_do_it())
+
+
+def test_compression_limits() -> None:
+    """Compressed payloads can't inflate past max_message_size."""
+    tester = _Tester(
+        client_endpoint_kwargs={'max_message_size': 1024 * 1024},
+    )
+
+    async def _do_it() -> None:
+        # pylint: disable=protected-access
+        from compression import zstd
+
+        client = tester.client.endpoint
+        payload = b'x' * 2000
+        compressed = bytes([0]) + zstd.compress(payload)
+        assert client._decompress(compressed) == payload
+
+        # A frame cut short (or with junk after it) is rejected.
+        for bad in (compressed[:-4], compressed + b'junk'):
+            with pytest.raises(RuntimeError):
+                client._decompress(bad)
+
+        # Our big 5mb zero-filled response compresses to almost
+        # nothing but is too big for the client once inflated, so the
+        # connection goes down.
+        with pytest.raises(CommunicationError):
+            await tester.client.send_message(_Message(_MessageType.TEST_BIG))
+        assert client.compressed_bytes_read == len(compressed)
+
+    tester.run(_do_it())
+
+
+def test_uncompressed_not_size_limited() -> None:
+    """max_message_size only applies to inflated payloads."""
+    tester = _Tester(
+        server_endpoint_kwargs={'compression_threshold': None},
+        client_endpoint_kwargs={'max_message_size': 1024 * 1024},
+    )
+
+    async def _do_it() -> None:
+        # Our big 5mb response arrives uncompressed, so the client takes
+        # it despite its 1mb limit.
+        resp = await tester.client.send_message(_Message(_MessageType.TEST_BIG))
+        assert len(resp.extradata) > 1024 * 1024
+        assert tester.client.endpoint.compressed_bytes_read == 0
+
+    tester.run(_do_it())
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_compression_mismatched() -> None:
+    """Test compression with differing settings on each end."""
+    tester = _Tester(
+        server_endpoint_kwargs={'compression_dict': b'foo' * 100},
+        client_endpoint_kwargs={'compression_threshold': None},
+    )
+
+    async def _do_it() -> None:
+        server = tester.server.endpoint
+        client = tester.client.endpoint
+
+        payload = b'abcdefg' * 10000
+        for sender in (tester.client, tester.server):
+            resp = await sender.send_message(
+                _Message(_MessageType.TEST_ECHO, extradata=payload)
+            )
+            assert resp.extradata == payload
+
+        # Client has compression disabled but should still be able to
+        # read the server's (non-dict) compressed data.
+        assert client.compressed_bytes_written == 0
+        assert server.compressed_bytes_written > 0
+        assert client.compressed_bytes_read == server.compressed_bytes_written
+
+    tester.run(_do_it())
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_message_ids() -> None:
+    """Test message id looping and collision handling."""
+    tester = _Tester()
+
+    async def _do_it() -> None:
+        # pylint: disable=protected-access
+        client = tester.client.endpoint
+
+        # Start a slow message and then point our next id back at it;
+        # our next message should skip past it instead of colliding.
+        slowtask = asyncio.create_task(
+            tester.client.send_message(_Message(_MessageType.TEST_SLOW))
+        )
+        await asyncio.sleep(0.1)
+        assert len(client._in_flight_messages) == 1
+        slowid = next(iter(client._in_flight_messages))
+        client._next_message_id = slowid
+        resp = await tester.client.send_message(_Message(_MessageType.TEST1))
+        assert resp.messagetype is _MessageType.RESPONSE1
+        assert client._next_message_id == slowid + 2
+        resp = await slowtask
+        assert resp.messagetype is _MessageType.RESPONSE_SLOW
+
+        # Both ends speak protocol 4 so we should be using (and looping)
+        # 32 bit ids.
+        client._next_message_id = (1 << 32) - 3
+        results = await asyncio.gather(
+            *(
+                tester.client.send_message(_Message(_MessageType.TEST2))
+                for _i in range(6)
+            )
+        )
+        assert all(r.messagetype is _MessageType.RESPONSE2 for r in results)
+        assert client._next_message_id == 3
+        assert not client._in_flight_messages
+
+    tester.run(_do_it())
+
+
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_in_flight_benchmark() -> None:
+    """Measure throughput/memory with lots of messages in flight.
+
+    Run with -s to see numbers.
+    """
+    tester = _Tester(server_debug_print=False, client_debug_print=False)
+    message = dataclass_to_json(_Message(_MessageType.TEST1)).encode()
+    response = dataclass_to_json(_Message(_MessageType.RESPONSE1)).encode()
+
+    async def _do_it() -> None:
+        endpoint = tester.client.endpoint
+        for count in (1000, 10000, 50000):
+            # Round trips per second.
+            starttime = time.perf_counter()
+            results = await asyncio.gather(
+                *(endpoint.send_message(message) for _i in range(count))
+            )
+            duration = time.perf_counter() - starttime
+            assert results == [response] * count
+
+            # Memory per in-flight message (including the coroutine we
+            # return and the packet we enqueue).
+            tracemalloc.start()
+            try:
+                basemem = tracemalloc.get_traced_memory()[0]
+                awaitables = [
+                    endpoint.send_message(message) for _i in range(count)
+                ]
+                inflightmem = tracemalloc.get_traced_memory()[0] - basemem
+            finally:
+                tracemalloc.stop()
+            results = await asyncio.gather(*awaitables)
+            assert results == [response] * count
+
+            print(
+                f'rpc {count} concurrent:'
+                f' {count / duration:.0f} round-trips/sec,'
+                f' {inflightmem / count:.0f} bytes per in-flight message.'
+            )
+
+    tester.run(_do_it(), debug=False)
@@ -0,0 +1,123 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Testing bascenev1.SpatialIndex and the map queries built on it."""
+
+import os
+
+import pytest
+
+from batools import apprun
+
+FAST_MODE = os.environ.get('BA_TEST_FAST_MODE') == '1'
+
+_CHECK_CODE = '''
+import math
+import random
+import bascenev1 as bs
+
+rng = random.Random(3)
+for trial in range(500):
+    index = bs.SpatialIndex(cell_size=rng.choice([1.0, 4.0, 7.5]))
+    items = [
+        (
+            i,
+            (rng.uniform(-20, 20), rng.uniform(-3, 5), rng.uniform(-20, 20)),
+            rng.randrange(3),
+        )
+        for i in range(rng.randrange(0, 40))
+    ]
+    for i, pos, team in items:
+        index.insert(i, pos, team)
+    assert len(index) == len(items)
+    pt = (rng.uniform(-30, 30), rng.uniform(-3, 5), rng.uniform(-30, 30))
+    dists = {i: math.dist(pos, pt) for i, pos, _team in items}
+    by_dist = sorted(dists.values())
+
+    k = rng.randrange(1, 6)
+    got = index.nearest(pt, k)
+    assert [dists[i] for i in got] == by_dist[:k], trial
+
+    maxdist = rng.uniform(1, 15)
+    got = index.nearest(pt, k, max_distance=maxdist)
+    assert [dists[i] for i in got] == [
+        d for d in by_dist if d <= maxdist
+    ][:k], trial
+
+    radius = rng.uniform(0, 15)
+    got = index.within_radius(pt, radius)
+    assert sorted(got) == sorted(i for i, d in dists.items() if d <= radius)
+    assert [dists[i] for i in got] == sorted(dists[i] for i in got)
+
+    team = rng.randrange(3)
+    member = index.nearest_team_member(pt, team)
+    onteam = [dists[i] for i, _pos, t in items if t == team]
+    if onteam:
+        assert member is not None and dists[member] == min(onteam), trial
+    else:
+        assert member is None, trial
+'''
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_spatial_index() -> None:
+    """Grid queries agree with brute force on random layouts."""
+    apprun.python_command(_CHECK_CODE, purpose='spatial index testing')
+
+
+_FFA_CODE = '''
+import math
+import types
+import bascenev1 as bs
+from bascenev1 import _map
+
+# Two spawn areas far apart; no jitter beyond the default half unit.
+spawns = [(-10.0, 1.0, 0.0, 0.0, 0.0, 0.0), (10.0, 1.0, 0.0, 0.0, 0.0, 0.0)]
+bsmap = bs.Map.__new__(bs.Map)
+bsmap.ffa_spawn_points = spawns
+bsmap._next_ffa_start_index = 0
+
+# Players spawning one after another in the same scene step (as at game
+# start). The activity's per-step index was built before any of them
+# existed; the map must not rely on it.
+players = []
+activity = types.SimpleNamespace(
+    players=players, spatial_index=bs.SpatialIndex()
+)
+_map._bascenev1 = types.SimpleNamespace(
+    getactivity=lambda doraise=True: activity
+)
+
+def _spawn():
+    pos = bsmap.get_ffa_start_position(players)
+    player = types.SimpleNamespace(
+        is_alive=lambda: True, node=types.SimpleNamespace(position=pos)
+    )
+    players.append(player)
+    return pos
+
+first = _spawn()
+assert math.dist(first, spawns[0][:3]) < 1.0
+
+# Point the round-robin cursor back at the occupied area; the next
+# player should still land in the free one.
+bsmap._next_ffa_start_index = 0
+second = _spawn()
+assert math.dist(second, spawns[1][:3]) < 1.0, second
+
+# Dead players no longer count.
+players[1].is_alive = lambda: False
+bsmap._next_ffa_start_index = 1
+third = _spawn()
+assert math.dist(third, spawns[1][:3]) < 1.0, third
+'''
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+def test_ffa_start_position_same_step() -> None:
+    """FFA spawns avoid players spawned earlier in the same step."""
+    apprun.python_command(_FFA_CODE, purpose='ffa spawn testing')
@@ -0,0 +1,160 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Tests and a benchmark for the batched SpazBotSet AI tick.
+
+The benchmark ticks N synthetic bots against a full 8-player game both
+the old way (each bot scanning for its own target with Vec3 math) and
+through bascenev1lib.actor.spazbot.batch_bot_aims(), checks they agree,
+and prints timings (run with -s to see them).
+"""
+
+import os
+
+import pytest
+
+from batools import apprun
+
+FAST_MODE = os.environ.get('BA_TEST_FAST_MODE') == '1'
+
+_BENCH_CODE = '''
+import math
+import random
+import time
+import bascenev1 as bs
+from bascenev1lib.actor.spazbot import batch_bot_aims
+
+rng = random.Random(1)
+players = [
+    (
+        bs.Vec3(rng.uniform(-10, 10), rng.uniform(0, 3), rng.uniform(-10, 10)),
+        bs.Vec3(rng.uniform(-3, 3), 0.0, rng.uniform(-3, 3)),
+    )
+    for _ in range(8)
+]
+flat_players = []
+for pt, vel in players:
+    flat_players += (pt[0], pt[1], pt[2], vel[0], vel[2])
+
+def per_bot(botpt, lead):
+    closest_dist = None
+    closest = closest_vel = None
+    for plpt, plvel in players:
+        dist = (plpt - botpt).length()
+        if (closest_dist is None or dist < closest_dist) and (
+            plpt[1] > botpt[1] - 5.0
+        ):
+            closest_dist, closest, closest_vel = dist, plpt, plvel
+    if closest is None:
+        return None
+    our_pos = bs.Vec3(botpt[0], 0, botpt[2])
+    tpt = bs.Vec3(closest[0], 0.0, closest[2])
+    tvel = bs.Vec3(closest_vel[0], 0.0, closest_vel[2])
+    dist_raw = (tpt - our_pos).length()
+    diff = tpt + tvel * dist_raw * 0.3 * lead - our_pos
+    to_target = diff.normalized()
+    return dist_raw, diff.length(), to_target.x, to_target.z, True
+
+for count in (10, 100, 1000):
+    bots = [
+        (
+            bs.Vec3(rng.uniform(-12, 12), rng.uniform(-8, 4),
+                    rng.uniform(-12, 12)),
+            rng.uniform(0.01, 0.5),
+        )
+        for _ in range(count)
+    ]
+    ticks = max(1, 20000 // count)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        expected = [per_bot(pt, lead) for pt, lead in bots]
+    t_per_bot = (time.perf_counter() - start) / ticks
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        flat_bots = []
+        for pt, lead in bots:
+            flat_bots += (pt[0], pt[1], pt[2], lead)
+        got = batch_bot_aims(flat_bots, flat_players)
+    t_batched = (time.perf_counter() - start) / ticks
+
+    assert len(got) == len(expected)
+    for exp, aim in zip(expected, got):
+        assert (exp is None) == (aim is None), (exp, aim)
+        if exp is not None:
+            assert all(
+                math.isclose(a, b, abs_tol=1e-4) for a, b in zip(exp, aim)
+            ), (exp, aim)
+    print(
+        f'SpazBot AI tick, {count} bots x 8 players:'
+        f' per-bot {t_per_bot * 1000.0:.3f}ms,'
+        f' batched {t_batched * 1000.0:.3f}ms'
+        f' ({t_per_bot / t_batched:.1f}x).'
+    )
+'''
+
+_DISPATCH_CODE = '''
+import types
+import bascenev1 as bs
+from bascenev1lib.actor.spazbot import SpazBot, SpazBotSet
+
+
+class _CustomUpdateBot(SpazBot):
+    def update_ai(self):
+        calls.append((self.name, 'update_ai'))
+
+
+class _CustomTargetBot(SpazBot):
+    def _get_target_player_pt(self):
+        return None, None
+
+
+calls = []
+
+
+def _bot(bottype, name):
+    # Just enough of a bot for the set's tick; no node or activity
+    # (so it counts as expired when it goes away).
+    bot = bottype.__new__(bottype)
+    bot._activity = lambda: None
+    bot.name = name
+    bot.node = types.SimpleNamespace(position=(1.0, 0.0, 1.0))
+    bot._lead_amount = 0.3
+    bot.set_player_points = lambda pts: None
+    if bottype is not _CustomUpdateBot:
+        bot.update_ai = lambda: calls.append((name, 'update_ai'))
+    bot.update_ai_batched = lambda aim: calls.append((name, 'batched'))
+    return bot
+
+
+botset = SpazBotSet.__new__(SpazBotSet)
+bots = [
+    _bot(SpazBot, 'plain'),
+    _bot(_CustomUpdateBot, 'custom_update'),
+    _bot(_CustomTargetBot, 'custom_target'),
+]
+players = [(bs.Vec3(0.0, 0.0, 0.0), bs.Vec3(0.0, 0.0, 0.0))]
+botset._update_bots(bots, players)
+assert calls == [
+    ('plain', 'batched'),
+    ('custom_update', 'update_ai'),
+    ('custom_target', 'update_ai'),
+], calls
+'''
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+def test_spazbot_batch_ai_overrides() -> None:
+    """Bots with custom AI or targeting skip the batched path."""
+    apprun.python_command(_DISPATCH_CODE, purpose='spazbot batch ai testing')
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+@pytest.mark.skipif(FAST_MODE, reason='fast mode')
+def test_spazbot_batch_ai_benchmark() -> None:
+    """Batched bot aims match per-bot ones and come out faster."""
+    apprun.python_command(_BENCH_CODE, purpose='spazbot batch ai benchmark')
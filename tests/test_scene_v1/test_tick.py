@@ -0,0 +1,161 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Testing bascenev1.TickTimer coalescing."""
+
+import pytest
+
+from batools import apprun
+
+_TICK_CODE = '''
+import gc
+import weakref
+
+from bascenev1 import _tick
+
+
+class _NativeTimer:
+    def __init__(self, due, period, call):
+        self.due = due
+        self.period = period
+        self.call = call
+
+
+class _Clock:
+    """Stands in for scene time and native timers.
+
+    Like the real ones, a timer stops once nothing references it.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+        self.activity = None
+
+    def time(self):
+        return self.now
+
+    def getactivity(self, doraise=True):
+        return self.activity
+
+    def Timer(self, period, call, repeat=False):
+        assert repeat
+        timer = _NativeTimer(self.now + period, period, call)
+        self.timers.append(weakref.ref(timer))
+        return timer
+
+    def live_timers(self):
+        return [t for t in (ref() for ref in self.timers) if t is not None]
+
+    def advance(self, seconds):
+        end = self.now + seconds
+        while True:
+            due = [t for t in self.live_timers() if t.due <= end]
+            if not due:
+                break
+            timer = min(due, key=lambda t: t.due)
+            del due
+            self.now = timer.due
+            timer.due += timer.period
+            call = timer.call
+            del timer
+            call()
+        self.now = end
+
+
+class _Activity:
+    def __init__(self):
+        self.tick_scheduler = _tick.TickScheduler()
+
+
+class _Owner:
+    def __init__(self):
+        self.alive = True
+
+    def exists(self):
+        return self.alive
+
+
+clock = _Clock()
+_tick._bascenev1 = clock
+clock.activity = activity = _Activity()
+sched = activity.tick_scheduler
+calls = []
+
+
+def _call(name):
+    return lambda: calls.append((name, round(clock.now, 2)))
+
+
+# Same period and phase slot share a native timer; another slot or
+# period gets its own.
+a = _tick.TickTimer(1.0, _call('a'))
+clock.now = 0.1
+b = _tick.TickTimer(1.0, _call('b'))
+clock.now = 0.3
+c = _tick.TickTimer(1.0, _call('c'))
+d = _tick.TickTimer(2.0, _call('d'))
+assert (sched.native_timer_count, sched.timer_count) == (3, 4)
+assert len(clock.live_timers()) == 3
+
+# Members run together on their bucket's native timer (b a bit early)
+# and then exactly a period apart.
+clock.advance(2.05)
+assert calls == [
+    ('a', 1.0),
+    ('b', 1.0),
+    ('c', 1.3),
+    ('a', 2.0),
+    ('b', 2.0),
+    ('c', 2.3),
+    ('d', 2.3),
+], calls
+assert sched.call_count == 7
+
+# Cancelled timers stop, and a bucket left empty drops its native
+# timer.
+calls.clear()
+c.cancel()
+assert c.is_dead()
+clock.advance(1.0)
+assert calls == [('a', 3.0), ('b', 3.0)], calls
+assert sched.native_timer_count == 2
+gc.collect()
+assert len(clock.live_timers()) == 2
+
+# Unreferenced timers and those whose owner is gone get pruned,
+# including fire-and-forget ones the scheduler holds on to.
+calls.clear()
+owner = _Owner()
+_tick.ticktimer(1.0, _call('e'), owner=owner)
+assert len(sched._retained) == 1
+del b
+gc.collect()
+clock.advance(1.0)
+assert calls == [('a', 4.0), ('d', 4.3), ('e', 4.35)], calls
+owner.alive = False
+clock.advance(1.0)
+assert calls[3:] == [('a', 5.0)], calls
+assert sched.timer_count == 2
+assert not sched._retained
+
+# The activity expiring stops everything and lets calls go.
+calls.clear()
+_tick.ticktimer(1.0, _call('f'))
+sched.clear()
+assert a.is_dead() and d.is_dead()
+assert a.call is _tick._noop
+assert (sched.native_timer_count, sched.timer_count) == (0, 0)
+assert not sched._retained
+gc.collect()
+assert not clock.live_timers()
+clock.advance(5.0)
+assert calls == []
+'''
+
+
+@pytest.mark.skipif(
+    apprun.test_runs_disabled(), reason=apprun.test_runs_disabled_reason()
+)
+def test_tick_timers() -> None:
+    """Tick-timers coalesce, prune, cancel, and clear as expected."""
+    apprun.python_command(_TICK_CODE, purpose='tick timer testing')
@@ -11,10 +11,13 @@ root, and owns concurrency, retry, and progress reporting itself.
 
 import os
 import json
+import time
 import base64
 import hashlib
 import logging
 import tempfile
+import threading
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 import urllib3
@@ -23,7 +26,7 @@ import urllib3.util
 from efro.dataclassio import dataclass_to_json
 from bacommon.cloudfilecodec import (
     CompressionType,
-    decompress_for_type,
+    decompressor_for_type,
     all_compression_types,
     format_compression_accept,
     CAS_ACCEPT_COMPRESSION_HEADER,
@@ -45,9 +48,48 @@ logger = logging.getLogger(__name__)
 #: there's evidence; see docs/followups.md (2026-08-07).
 CAS_INTEGRITY_MARKER = 'CAS-INTEGRITY'
 
+#: Layout version of :class:`CasPresenceIndex` files; a mismatch on load
+#: discards the file and rebuilds from a scan.
+_PRESENCE_INDEX_VERSION = 1
+
+#: A shard dir mtime this close to the current time may share its clock
+#: tick with changes still to come, which then wouldn't move it (FAT's 2
+#: seconds is the coarsest resolution we expect).
+_MTIME_RACY_NS = 2_000_000_000
+
+#: Read/write granularity for streamed blob downloads. Peak memory per
+#: in-flight download is a small multiple of this regardless of blob
+#: size.
+_STREAM_CHUNK_SIZE = 256 * 1024
+
+#: How often to retry a blob's download lock while another download of
+#: the same blob holds it.
+_LOCK_POLL_SECONDS = 0.05
+
+#: Leftover ``.tmp_`` files younger than this are never swept by
+#: :func:`discard_cas_temp`; anything still being written is far newer.
+CAS_TEMP_MIN_AGE_SECONDS = 3600.0
+
 
 class CasDownloadError(Exception):
-    """A CAS-blob fetch, hash-verify, or write failed."""
+    """A CAS-blob fetch, hash-verify, or write failed.
+
+    ``http_status`` is the node's response status when the failure was
+    a non-success HTTP response, otherwise None.
+    """
+
+    def __init__(self, message: str, *, http_status: int | None = None):
+        super().__init__(message)
+        self.http_status = http_status
+
+    @property
+    def server_error(self) -> bool:
+        """Whether the node answered with a server-side (5xx) error.
+
+        Unlike other failures here, these say something about node load
+        and are worth retrying.
+        """
+        return self.http_status is not None and self.http_status >= 500
 
 
 def encode_asset_token(token: securedata.Archive) -> str:
@@ -111,14 +153,472 @@ def blob_present(roots: list[str], filehash: str, size: int) -> bool:
     return False
 
 
-def cas_write(dest_root: str, filehash: str, data: bytes) -> None:
+def cas_mtime_racy(mtime_ns: int) -> bool:
+    """Could more changes land in a shard dir without moving this mtime?
+
+    True for a dir mtime so recent that it may share its clock tick with
+    writes still to come. Anything caching a shard's state against its
+    mtime should not trust such a stamp, and look again later. (0, for a
+    missing dir, is never racy.)
+    """
+    return mtime_ns != 0 and time.time_ns() - mtime_ns < _MTIME_RACY_NS
+
+
+class CasPresenceIndex:
+    """Which blobs a CAS root holds, without a ``stat`` per lookup.
+
+    Maps each blob's hash to its ``(size, mtime_ns)`` in memory so that
+    presence checks for a whole package are dict lookups rather than one
+    ``os.stat`` each. The index is persisted to ``index_path`` (if given)
+    and validated on load by comparing each shard directory's mtime
+    against the one recorded: adding, removing or renaming an entry bumps
+    its directory's mtime, so only shards that changed behind our back get
+    rescanned. That makes a warm load cost 256 ``stat`` calls however
+    many blobs the root holds.
+
+    Writers in this process keep it current via :meth:`record` (see
+    :func:`cas_write` and :func:`download_cas_blob`) and :meth:`discard`.
+    Unlike :func:`blob_present`, an in-place rewrite that keeps the
+    directory entry (say, external truncation) is not noticed; the CAS
+    write path never does that, and content is hash-verified on the way
+    in regardless. Thread-safe; loads lazily on first use.
+    """
+
+    def __init__(self, root: str, index_path: str | None) -> None:
+        self._root = root
+        self._index_path = index_path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        # Shard hex -> shard dir mtime_ns as of our last look (0 if the
+        # dir didn't exist).
+        self._dir_mtimes: dict[str, int] = {}
+        # Shards whose recorded mtime was too recent to trust when we
+        # took it; see _MTIME_RACY_NS. Rescanned on the next refresh.
+        self._racy: set[str] = set()
+        # Shard hex -> rest-of-hash -> [size, mtime_ns]. Lists rather
+        # than tuples so a loaded index can be used exactly as json hands
+        # it to us, with no per-entry conversion pass.
+        self._shards: dict[str, dict[str, list[int]]] = {}
+
+    def present(self, filehash: str, size: int) -> bool:
+        """Is this blob in the root at the expected size?
+
+        Same contract as :func:`blob_present` for a single root.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._shards.get(filehash[:2], {}).get(filehash[2:])
+        return entry is not None and entry[0] == size
+
+    def refresh(self) -> None:
+        """Load if needed, then rescan any shard changed since last look.
+
+        Call at the start of a batch of lookups (e.g. a resolve) to pick
+        up changes made outside this index. Blocking.
+        """
+        with self._lock:
+            if not self._ensure_loaded():
+                self._revalidate()
+
+    def dir_mtime(self, filehash: str) -> int:
+        """The current mtime_ns of a blob's shard dir (0 if none).
+
+        Take this before changing the shard and pass it to
+        :meth:`record` or :meth:`discard` afterwards.
+        """
+        return self._dir_mtime(filehash[:2])
+
+    def record(
+        self, filehash: str, dir_mtime_before: int | None = None
+    ) -> None:
+        """Note that a blob was just written into the root.
+
+        Call after the blob's final ``os.replace`` and after any other
+        entries the write created or removed in its shard directory.
+        ``dir_mtime_before`` is :meth:`dir_mtime` from before the write
+        started; if it matches what we last saw, the shard changed only
+        through us and just this entry is updated. Otherwise (or without
+        it) the shard is rescanned if it changed at all, so that changes
+        made by other processes aren't masked. Those made while our
+        write is in progress can still slip through until the shard
+        next changes unexpectedly.
+        """
+        shard = filehash[:2]
+        path = cas_blob_path(self._root, filehash)
+        with self._lock:
+            self._ensure_loaded()
+            if self._rescan_unless_ours(shard, dir_mtime_before):
+                return
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._shards.get(shard, {}).pop(filehash[2:], None)
+            else:
+                self._shards.setdefault(shard, {})[filehash[2:]] = [
+                    st.st_size,
+                    st.st_mtime_ns,
+                ]
+            self._dirty = True
+
+    def discard(
+        self, filehash: str, dir_mtime_before: int | None = None
+    ) -> None:
+        """Note that a blob was just removed from the root.
+
+        Rescans the shard if it changed other than through us, as with
+        :meth:`record`.
+        """
+        shard = filehash[:2]
+        with self._lock:
+            self._ensure_loaded()
+            if self._rescan_unless_ours(shard, dir_mtime_before):
+                return
+            self._shards.get(shard, {}).pop(filehash[2:], None)
+            self._dirty = True
+
+    def save(self) -> None:
+        """Persist the index if it changed since load or the last save.
+
+        Atomic (temp + ``os.replace``) but not ``fsync``-ed: the index is
+        advisory, and a lost or stale one is caught by the shard mtime
+        check and rebuilt. Failures are logged and swallowed. Blocking.
+        """
+        if self._index_path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(
+                {
+                    'v': _PRESENCE_INDEX_VERSION,
+                    'r': self._root,
+                    # Racy shards get rescanned on the next load.
+                    'd': {
+                        shard: -1 if shard in self._racy else mtime
+                        for shard, mtime in self._dir_mtimes.items()
+                    },
+                    'b': self._shards,
+                },
+                separators=(',', ':'),
+            )
+            self._dirty = False
+        destdir = os.path.dirname(self._index_path)
+        try:
+            os.makedirs(destdir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=destdir, prefix='.tmp_index_')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as outfile:
+                    outfile.write(data)
+                os.replace(tmp, self._index_path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        except OSError:
+            logger.exception(
+                'Error saving CAS presence index %s.', self._index_path
+            )
+            with self._lock:
+                self._dirty = True
+
+    def _ensure_loaded(self) -> bool:
+        """Load (and validate) on first use; returns True if it just did.
+
+        Must be called with the lock held.
+        """
+        if self._loaded:
+            return False
+        self._loaded = True
+        if self._index_path is not None:
+            try:
+                with open(self._index_path, encoding='utf-8') as infile:
+                    raw = json.load(infile)
+                if (
+                    raw['v'] == _PRESENCE_INDEX_VERSION
+                    and raw['r'] == self._root
+                ):
+                    self._dir_mtimes = raw['d']
+                    self._shards = raw['b']
+            except FileNotFoundError:
+                pass
+            except Exception:
+                # Advisory data; anything off just means a full scan.
+                logger.warning(
+                    'Discarding unreadable CAS presence index %s.',
+                    self._index_path,
+                    exc_info=True,
+                )
+                self._dir_mtimes = {}
+                self._shards = {}
+        self._revalidate()
+        return True
+
+    def _revalidate(self) -> None:
+        """Rescan every shard whose directory mtime moved. Lock held."""
+        for i in range(256):
+            self._rescan_if_changed(f'{i:02x}')
+
+    def _rescan_unless_ours(
+        self, shard: str, dir_mtime_before: int | None
+    ) -> bool:
+        """Rescan a shard for record/discard unless only we changed it.
+
+        Returns True if it rescanned. Must be called with the lock held.
+        """
+        if (
+            dir_mtime_before is None
+            or self._dir_mtimes.get(shard) != dir_mtime_before
+        ):
+            return self._rescan_if_changed(shard)
+        mtime = self._dir_mtime(shard)
+        self._dir_mtimes[shard] = mtime
+        # Racy stays racy until a rescan clears it; our write doesn't
+        # vouch for anything else that landed in the old tick.
+        if cas_mtime_racy(mtime):
+            self._racy.add(shard)
+        return False
+
+    def _rescan_if_changed(self, shard: str) -> bool:
+        """Rescan a shard if its dir mtime moved; returns True if so.
+
+        Racy shards get rescanned regardless. Must be called with the
+        lock held.
+        """
+        mtime = self._dir_mtime(shard)
+        if self._dir_mtimes.get(shard) == mtime and shard not in self._racy:
+            return False
+        # Mtime is taken before listing, so anything that lands
+        # mid-scan shows up as a change next time rather than being
+        # missed for good.
+        entries: dict[str, list[int]] = {}
+        if mtime:
+            try:
+                with os.scandir(os.path.join(self._root, shard)) as it:
+                    for entry in it:
+                        # Skip temp/partial files (see cas_partial_path).
+                        if entry.name.startswith('.'):
+                            continue
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        entries[entry.name] = [st.st_size, st.st_mtime_ns]
+            except OSError:
+                pass
+        if entries:
+            self._shards[shard] = entries
+        else:
+            self._shards.pop(shard, None)
+        self._dir_mtimes[shard] = mtime
+        if cas_mtime_racy(mtime):
+            self._racy.add(shard)
+        else:
+            self._racy.discard(shard)
+        self._dirty = True
+        return True
+
+    def _dir_mtime(self, shard: str) -> int:
+        """A shard dir's mtime_ns, or 0 if it doesn't exist."""
+        try:
+            return os.stat(os.path.join(self._root, shard)).st_mtime_ns
+        except OSError:
+            return 0
+
+
+@dataclass
+class CasConcurrencyState:
+    """A snapshot of a :class:`CasFetchConcurrency` controller."""
+
+    #: Fetches currently allowed in flight at once.
+    limit: int
+    #: Fetches in flight right now.
+    in_flight: int
+    #: Throughput over the last completed measurement window (0 until
+    #: one completes).
+    bytes_per_second: float
+    #: Smoothed per-fetch duration in seconds.
+    latency_seconds: float
+    #: Smoothed fraction of fetch attempts that failed.
+    error_rate: float
+
+
+class CasFetchConcurrency:
+    """AIMD controller for how many CAS blob fetches run at once.
+
+    Shared by every client of :func:`download_cas_blob` so fetch
+    parallelism adapts to the link instead of being a fixed worker count
+    that underuses fast links and swamps slow ones. Use one per node.
+
+    Callers bracket each fetch with :meth:`acquire`/:meth:`release`
+    (which block while the limit is reached) -- or, if they gate on
+    :attr:`limit` themselves, :meth:`started`/:meth:`finished` -- and
+    report every attempt's outcome to :meth:`record`. Each time a
+    *window* of ``limit`` attempts completes, the limit is adjusted:
+
+    - A failed attempt halves it right away (multiplicative decrease),
+      then decreases are held off for a window so a burst of concurrent
+      failures from one event counts once.
+    - A window whose throughput beats the previous one by 10% adds one
+      (additive increase): more parallelism paid off, so probe further.
+    - A window with no throughput gain but per-fetch latency 3x the best
+      seen drops one: the extra requests are just queueing somewhere.
+    - Otherwise it holds, re-probing upward every few windows so a link
+      that got faster is noticed.
+
+    Thread-safe.
+    """
+
+    #: Windows to hold at a plateau before probing one higher anyway.
+    _PLATEAU_PROBE_WINDOWS = 4
+
+    def __init__(
+        self, *, initial: int = 4, minimum: int = 1, maximum: int = 16
+    ) -> None:
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(
+                f'Invalid concurrency bounds'
+                f' {minimum} <= {initial} <= {maximum}.'
+            )
+        self.minimum = minimum
+        self.maximum = maximum
+        self._cond = threading.Condition()
+        self._limit = initial
+        self._in_flight = 0
+        self._latency = 0.0
+        self._error_rate = 0.0
+        self._prev_throughput: float | None = None
+        self._best_latency: float | None = None
+        self._plateau_windows = 0
+        self._decrease_hold = 0
+        # Current measurement window (see _reset_window).
+        self._win_start = time.monotonic()
+        self._win_count = 0
+        self._win_bytes = 0
+        self._win_latency = 0.0
+        self._win_failed = False
+
+    @property
+    def limit(self) -> int:
+        """Fetches currently allowed in flight at once."""
+        return self._limit
+
+    def acquire(self) -> None:
+        """Block until a fetch may start, then count it as started."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+
+    def release(self) -> None:
+        """Count a fetch started by :meth:`acquire` as finished."""
+        self.finished()
+
+    def started(self) -> None:
+        """Count a fetch as started without waiting on the limit."""
+        with self._cond:
+            self._in_flight += 1
+
+    def finished(self) -> None:
+        """Count a fetch as finished."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def record(self, nbytes: int, seconds: float, ok: bool) -> None:
+        """Report one fetch attempt and adjust the limit if due.
+
+        ``nbytes`` is what was transferred (canonical size is fine);
+        ``ok`` should be False only for failures that say something about
+        the link or node load (timeouts, resets, 5xx) -- not for, say, a
+        refused token.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self._latency += 0.2 * (seconds - self._latency)
+            self._error_rate += 0.2 * ((0.0 if ok else 1.0) - self._error_rate)
+            self._win_count += 1
+            self._win_latency += seconds
+            if ok:
+                self._win_bytes += nbytes
+            else:
+                self._win_failed = True
+            if not ok and self._decrease_hold <= 0:
+                self._set_limit(self._limit // 2)
+                self._decrease_hold = self._limit
+                self._prev_throughput = None
+                self._reset_window(now)
+                return
+            self._decrease_hold -= 1
+            if self._win_count >= self._limit:
+                self._end_window(now)
+
+    def state(self) -> CasConcurrencyState:
+        """Return a snapshot of the controller's live state."""
+        with self._cond:
+            return CasConcurrencyState(
+                limit=self._limit,
+                in_flight=self._in_flight,
+                bytes_per_second=self._prev_throughput or 0.0,
+                latency_seconds=self._latency,
+                error_rate=self._error_rate,
+            )
+
+    def _end_window(self, now: float) -> None:
+        """Evaluate a finished window and adjust the limit. Lock held."""
+        elapsed = max(now - self._win_start, 1e-6)
+        throughput = self._win_bytes / elapsed
+        latency = self._win_latency / self._win_count
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+        prev = self._prev_throughput
+        if self._win_failed:
+            # Already cut for this; just don't reward it.
+            self._plateau_windows = 0
+        elif prev is None or throughput > prev * 1.1:
+            self._plateau_windows = 0
+            self._set_limit(self._limit + 1)
+        elif latency > self._best_latency * 3.0:
+            self._plateau_windows = 0
+            self._set_limit(self._limit - 1)
+        else:
+            self._plateau_windows += 1
+            if self._plateau_windows >= self._PLATEAU_PROBE_WINDOWS:
+                self._plateau_windows = 0
+                self._set_limit(self._limit + 1)
+        self._prev_throughput = throughput
+        self._reset_window(now)
+
+    def _set_limit(self, value: int) -> None:
+        """Clamp and apply a new limit, waking waiters. Lock held."""
+        self._limit = max(self.minimum, min(self.maximum, value))
+        self._cond.notify_all()
+
+    def _reset_window(self, now: float) -> None:
+        """Start a fresh measurement window. Lock held."""
+        self._win_start = now
+        self._win_count = 0
+        self._win_bytes = 0
+        self._win_latency = 0.0
+        self._win_failed = False
+
+
+def cas_write(
+    dest_root: str,
+    filehash: str,
+    data: bytes,
+    *,
+    presence: CasPresenceIndex | None = None,
+) -> None:
     """sha256-verify ``data`` then atomically write it into ``dest_root``.
 
     Verify, write to a temp file in the destination directory, ``fsync``,
     then ``os.replace`` (atomic on the same filesystem). A file at its CAS
     path is therefore always whole-and-correct: a crash mid-write leaves
-    only a temp file, never a partial blob at the final path. Raises
-    :class:`CasDownloadError` on a hash mismatch.
+    only a temp file, never a partial blob at the final path. If given,
+    ``presence`` (the index for ``dest_root``) records the new blob.
+    Raises :class:`CasDownloadError` on a hash mismatch.
     """
     actual = hashlib.sha256(data).hexdigest()
     if actual != filehash:
@@ -139,6 +639,7 @@ def cas_write(dest_root: str, filehash: str, data: bytes) -> None:
     dest = cas_blob_path(dest_root, filehash)
     destdir = os.path.dirname(dest)
     os.makedirs(destdir, exist_ok=True)
+    before = None if presence is None else presence.dir_mtime(filehash)
     fd, tmp = tempfile.mkstemp(dir=destdir, prefix='.tmp_')
     try:
         with os.fdopen(fd, 'wb') as outfile:
@@ -152,6 +653,333 @@ def cas_write(dest_root: str, filehash: str, data: bytes) -> None:
         except OSError:
             pass
         raise
+    if presence is not None:
+        presence.record(filehash, before)
+
+
+def cas_partial_path(
+    dest_root: str, filehash: str, served: CompressionType
+) -> str:
+    """Return the resumable partial-download path for a CAS blob.
+
+    Holds the bytes received so far *as served* (i.e. still in the
+    ``served`` encoding), next to where the finished blob will land. The
+    name is deterministic so an interrupted download can be found and
+    resumed with an HTTP ``Range`` request; the encoding is part of the
+    name because a byte offset only means something within one encoding.
+    The ``.tmp_`` prefix keeps these out of any hash lookups (and lets
+    cache GC sweep up abandoned ones; see :func:`discard_cas_temp`).
+
+    Since the name is shared, only the holder of the blob's download
+    lock may touch the file; :func:`download_cas_blob` takes it for the
+    whole download.
+    """
+    return os.path.join(
+        dest_root, filehash[:2], f'.tmp_{filehash[2:]}.{served.value}'
+    )
+
+
+def _blob_lock_path(dest_root: str, filehash: str) -> str:
+    return os.path.join(dest_root, filehash[:2], f'.tmp_{filehash[2:]}.lock')
+
+
+def _try_lock(fd: int) -> bool:
+    """Try to take an exclusive lock on an open file without blocking.
+
+    Locks are per open file (not per process), so they exclude other
+    threads as well as other processes, and the OS drops them if the
+    holder dies.
+    """
+    try:
+        if os.name == 'nt':
+            import msvcrt
+
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _lock_blob(dest_root: str, filehash: str, *, wait: float) -> int | None:
+    """Take a blob's download lock, waiting up to ``wait`` seconds.
+
+    Returns the lock file's descriptor (pass it to :func:`_unlock_blob`),
+    or None if someone else held it throughout.
+    """
+    path = _blob_lock_path(dest_root, filehash)
+    deadline = time.monotonic() + wait
+    while True:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if _try_lock(fd):
+            # The previous holder unlinks the file on release, so we may
+            # have locked one that's no longer at the path.
+            try:
+                current = os.path.samestat(os.fstat(fd), os.stat(path))
+            except OSError:
+                current = False
+            if current:
+                return fd
+        os.close(fd)
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(_LOCK_POLL_SECONDS)
+
+
+def _unlock_blob(dest_root: str, filehash: str, fd: int) -> None:
+    """Release a lock from :func:`_lock_blob`, removing its file."""
+    path = _blob_lock_path(dest_root, filehash)
+    if os.name == 'nt':
+        # Windows can't remove a file anyone has open; that same rule
+        # makes it safe to try once we've let go.
+        os.close(fd)
+        _discard(path)
+    else:
+        # Unlink while still holding it, so nobody can lock the file
+        # after we're done with it and believe they own the path.
+        _discard(path)
+        os.close(fd)
+
+
+def _temp_blob_hash(shard_hex: str, name: str) -> str | None:
+    """The blob a partial or lock file belongs to, if ``name`` is one."""
+    stem, _, _suffix = name.removeprefix('.tmp_').partition('.')
+    if len(stem) != 62:
+        return None
+    try:
+        int(stem, 16)
+    except ValueError:
+        return None
+    return shard_hex + stem
+
+
+def discard_cas_temp(
+    dest_root: str,
+    shard_hex: str,
+    name: str,
+    *,
+    min_age: float = CAS_TEMP_MIN_AGE_SECONDS,
+) -> int | None:
+    """Remove a leftover ``.tmp_`` file from a CAS shard, if it's safe.
+
+    For cache GC. Files modified within ``min_age`` seconds are kept, as
+    are partials (and locks) of a blob some download currently holds
+    the lock for. Returns the bytes freed, or None if the file was
+    kept or couldn't be removed.
+    """
+    path = os.path.join(dest_root, shard_hex, name)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if time.time() - stat.st_mtime < min_age:
+        return None
+    filehash = _temp_blob_hash(shard_hex, name)
+    if filehash is None:
+        # An abandoned cas_write/decompress temp file.
+        try:
+            os.unlink(path)
+        except OSError:
+            return None
+        return stat.st_size
+    lock = _lock_blob(dest_root, filehash, wait=0.0)
+    if lock is None:
+        return None
+    try:
+        if path != _blob_lock_path(dest_root, filehash):
+            try:
+                os.unlink(path)
+            except OSError:
+                return None
+    finally:
+        # (This also removes the lock file itself.)
+        _unlock_blob(dest_root, filehash, lock)
+    return stat.st_size
+
+
+def _find_partial(
+    dest_root: str, filehash: str
+) -> tuple[CompressionType, str, int] | None:
+    """Locate a resumable partial download for a blob.
+
+    Returns ``(served-encoding, path, bytes-so-far)`` for the first
+    non-empty partial found, or None.
+    """
+    for ctype in CompressionType:
+        path = cas_partial_path(dest_root, filehash, ctype)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        if size > 0:
+            return ctype, path, size
+    return None
+
+
+def _discard(path: str) -> None:
+    """Remove a file if it exists; best-effort."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _served_encoding(
+    response: urllib3.BaseHTTPResponse, filehash: str
+) -> CompressionType:
+    """Pull the authoritative served encoding from a casblob response."""
+    # The node's response header is authoritative for how the bytes are
+    # encoded. A node always sends it; its absence means a node too old to
+    # negotiate, which this build doesn't support (clean break).
+    served_header = response.headers.get(CAS_COMPRESSION_HEADER)
+    if served_header is None:
+        raise CasDownloadError(
+            f'casblob for {filehash} missing {CAS_COMPRESSION_HEADER}'
+            f' header (node too old).'
+        )
+    try:
+        return CompressionType(served_header)
+    except ValueError as exc:
+        raise CasDownloadError(
+            f'casblob for {filehash} served unknown encoding'
+            f' {served_header!r}.'
+        ) from exc
+
+
+def _resumes_at(response: urllib3.BaseHTTPResponse, offset: int) -> bool:
+    """Is this a 206 continuing exactly at ``offset``?"""
+    if response.status != 206:
+        return False
+    content_range = response.headers.get('Content-Range', '')
+    # Expected form: 'bytes <start>-<end>/<total-or-*>'.
+    unit, _, rest = content_range.partition(' ')
+    start, _, _ = rest.partition('-')
+    return unit == 'bytes' and start.strip() == str(offset)
+
+
+def _integrity_failure(
+    filehash: str, served: CompressionType, msg: str
+) -> CasDownloadError:
+    """Log a received-bad-bytes failure and return the error to raise.
+
+    Loud on purpose: this means either the bytes were corrupted reaching
+    us or a node served content that doesn't match its own hash. The
+    second would be a serious server-side bug, so this should never be
+    quiet.
+    """
+    logger.error(
+        '%s: %s for blob %s (%s).',
+        CAS_INTEGRITY_MARKER,
+        msg,
+        filehash,
+        served.value,
+    )
+    return CasDownloadError(f'casblob {msg} for {filehash} ({served.value}).')
+
+
+def _partial_decodes_to(
+    partial: str, filehash: str, served: CompressionType
+) -> bool:
+    """Does this compressed partial already decode to the whole blob?
+
+    A dry run of :func:`_decompress_partial` that writes nothing and
+    never discards: a truncated or undecodable partial just returns
+    False and is left for the caller to resume (or fail on) as usual.
+    """
+    hasher = hashlib.sha256()
+    decomp = decompressor_for_type(served)
+    assert decomp is not None
+    try:
+        with open(partial, 'rb') as infile:
+            while chunk := infile.read(_STREAM_CHUNK_SIZE):
+                while chunk:
+                    if decomp.eof:
+                        decomp = decompressor_for_type(served)
+                        assert decomp is not None
+                    hasher.update(decomp.decompress(chunk))
+                    chunk = decomp.unused_data if decomp.eof else b''
+    except Exception:
+        return False
+    return decomp.eof and hasher.hexdigest() == filehash
+
+
+def _decompress_partial(
+    partial: str, dest: str, filehash: str, served: CompressionType
+) -> None:
+    """Stream-decode a finished compressed partial into its CAS path.
+
+    Decodes in bounded chunks into a temp file alongside ``dest`` while
+    sha256-hashing the canonical output, then ``fsync`` +
+    ``os.replace``. Handles concatenated zstd frames. The partial is
+    removed on success and on integrity failure (its bytes are bad;
+    resuming it would only reproduce the failure).
+    """
+    hasher = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), prefix='.tmp_')
+    try:
+        with open(partial, 'rb') as infile, os.fdopen(fd, 'wb') as outfile:
+            decomp = decompressor_for_type(served)
+            assert decomp is not None
+            while chunk := infile.read(_STREAM_CHUNK_SIZE):
+                while chunk:
+                    if decomp.eof:
+                        decomp = decompressor_for_type(served)
+                        assert decomp is not None
+                    try:
+                        out = decomp.decompress(chunk)
+                    except Exception as exc:
+                        # Same class as a hash mismatch: bytes arrived
+                        # and were not what they claimed.
+                        _discard(partial)
+                        raise _integrity_failure(
+                            filehash, served, f'decompress failed ({exc})'
+                        ) from exc
+                    hasher.update(out)
+                    outfile.write(out)
+                    chunk = decomp.unused_data if decomp.eof else b''
+            if not decomp.eof:
+                # Most likely truncation in transit.
+                _discard(partial)
+                raise _integrity_failure(
+                    filehash, served, 'decompress failed (truncated)'
+                )
+            actual = hasher.hexdigest()
+            if actual != filehash:
+                _discard(partial)
+                raise _integrity_failure(
+                    filehash, served, f'hash mismatch (got {actual})'
+                )
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tmp, dest)
+    except BaseException:
+        _discard(tmp)
+        raise
+    _discard(partial)
+
+
+def _finish_uncompressed(partial: str, dest: str, filehash: str) -> None:
+    """Verify a finished uncompressed partial and move it into place."""
+    hasher = hashlib.sha256()
+    # Opened writable only for the fsync; Windows refuses to flush a
+    # read-only handle. (The bytes may have landed in an earlier
+    # attempt, so there's no write handle of ours to flush instead.)
+    with open(partial, 'r+b') as infile:
+        while chunk := infile.read(_STREAM_CHUNK_SIZE):
+            hasher.update(chunk)
+        os.fsync(infile.fileno())
+    actual = hasher.hexdigest()
+    if actual != filehash:
+        _discard(partial)
+        raise _integrity_failure(
+            filehash,
+            CompressionType.UNCOMPRESSED,
+            f'hash mismatch (got {actual})',
+        )
+    os.replace(partial, dest)
 
 
 def download_cas_blob(
@@ -163,6 +991,7 @@ def download_cas_blob(
     token_header: str,
     dest_root: str,
     timeout_seconds: float,
+    presence: CasPresenceIndex | None = None,
 ) -> None:
     """Fetch one CAS blob from a node and atomically write it.
 
@@ -176,68 +1005,179 @@ def download_cas_blob(
     response header -- it is authoritative, so whatever the node actually
     served is decoded correctly regardless of how it was cached. (The
     flavor-manifest no longer carries compression; encoding is purely a
-    transfer-layer concern negotiated here.) The bytes are decompressed
-    back to canonical before :func:`cas_write` sha256-verifies them
-    against ``filehash`` and writes them -- so the local cache always
-    holds uncompressed blobs and the hash check still validates content.
+    transfer-layer concern negotiated here.)
+
+    The body is streamed to disk in bounded chunks rather than buffered,
+    so peak memory no longer scales with blob size. Bytes land as-served
+    in a :func:`cas_partial_path` file; compressed blobs are then
+    stream-decoded to canonical, and either way the canonical bytes are
+    sha256-verified against ``filehash`` before an atomic ``os.replace``
+    into the CAS path -- so the local cache always holds uncompressed
+    blobs and the hash check still validates content. If an earlier
+    attempt left a partial behind (network failure mid-body), this
+    resumes it with an HTTP ``Range`` request in the same encoding (or,
+    for a partial that already holds the whole blob, just finishes it); a
+    node that ignores the range has its full response used instead, and
+    one that can't satisfy it (or now serves a different encoding) gets
+    a from-scratch fetch. If given, ``presence`` (the index for
+    ``dest_root``) records the new blob.
+
     One attempt only; the caller owns concurrency and retry. Callers do
     retry -- the client's asset subsystem loops on transient network
-    failures -- so do not add a loop here as well, or attempts (and the
-    per-attempt timeout budget) multiply. Raises
-    :class:`CasDownloadError` on a non-200 response, a missing/unknown
-    served-encoding header, a decompress failure, or a verify failure.
+    failures, and each retry picks up where the last left off -- so do
+    not add a loop here as well, or attempts (and the per-attempt timeout
+    budget) multiply. Raises :class:`CasDownloadError` on a non-200/206
+    response, a missing/unknown served-encoding header, a decompress
+    failure, or a verify failure.
+
+    Downloads of the same blob into the same root (from other threads or
+    processes) are serialized; this waits up to ``timeout_seconds`` for
+    one already running, and skips the fetch if it lands the blob.
     """
-    url = f'{base_url}/casblob/{filehash}?size={size}'
-    response = pool.request(
-        'GET',
-        url,
-        headers={
-            'X-Asset-Token': token_header,
-            CAS_ACCEPT_COMPRESSION_HEADER: format_compression_accept(
-                all_compression_types()
-            ),
-        },
-        timeout=urllib3.util.Timeout(total=timeout_seconds),
-    )
-    if response.status != 200:
-        raise CasDownloadError(
-            f'casblob GET for {filehash} failed: HTTP {response.status}.'
-        )
-    data = response.data
+    dest = cas_blob_path(dest_root, filehash)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
 
-    # The node's response header is authoritative for how the bytes are
-    # encoded. A node always sends it; its absence means a node too old to
-    # negotiate, which this build doesn't support (clean break).
-    served_header = response.headers.get(CAS_COMPRESSION_HEADER)
-    if served_header is None:
+    # Partials are shared by name, so only one download of a blob may
+    # run at a time (across threads and processes sharing the cache).
+    # One elsewhere shouldn't take longer than our own would.
+    before = None if presence is None else presence.dir_mtime(filehash)
+    lock = _lock_blob(dest_root, filehash, wait=timeout_seconds)
+    if lock is None:
         raise CasDownloadError(
-            f'casblob for {filehash} missing {CAS_COMPRESSION_HEADER}'
-            f' header (node too old).'
+            f'casblob {filehash} is still being downloaded elsewhere'
+            f' after {timeout_seconds:.0f}s.'
         )
     try:
-        served = CompressionType(served_header)
-    except ValueError as exc:
-        raise CasDownloadError(
-            f'casblob for {filehash} served unknown encoding'
-            f' {served_header!r}.'
-        ) from exc
-
-    if served is not CompressionType.UNCOMPRESSED:
-        try:
-            data = decompress_for_type(data, served)
-        except Exception as exc:
-            # Same class as a hash mismatch: bytes arrived and were not
-            # what they claimed. Most likely truncation in transit.
-            logger.error(
-                '%s: decompress failed for blob %s (%s, %d bytes): %s.',
-                CAS_INTEGRITY_MARKER,
+        # If we waited on another download, it may have just finished
+        # the job for us. (A blob of the wrong size is as good as
+        # missing; refetch and replace it.)
+        if not blob_present([dest_root], filehash, size):
+            _download_locked(
+                pool,
+                base_url,
                 filehash,
-                served.value,
-                len(data),
-                exc,
+                size,
+                token_header=token_header,
+                dest_root=dest_root,
+                timeout_seconds=timeout_seconds,
             )
+    finally:
+        _unlock_blob(dest_root, filehash, lock)
+    if presence is not None:
+        presence.record(filehash, before)
+
+
+def _download_locked(
+    pool: urllib3.PoolManager,
+    base_url: str,
+    filehash: str,
+    size: int,
+    *,
+    token_header: str,
+    dest_root: str,
+    timeout_seconds: float,
+) -> None:
+    """The body of :func:`download_cas_blob`, run holding the blob lock."""
+    url = f'{base_url}/casblob/{filehash}?size={size}'
+    dest = cas_blob_path(dest_root, filehash)
+    partial = _find_partial(dest_root, filehash)
+    if (
+        partial is not None
+        and partial[0] is CompressionType.UNCOMPRESSED
+        and partial[2] >= size
+    ):
+        # Everything arrived last time; only the verify/rename didn't
+        # happen. (Oversized partials fail the hash and get discarded.)
+        _finish_uncompressed(partial[1], dest, filehash)
+        return
+    if (
+        partial is not None
+        and partial[0] is not CompressionType.UNCOMPRESSED
+        and _partial_decodes_to(partial[1], filehash, partial[0])
+    ):
+        # Same, compressed. We can't tell from the size alone, and a
+        # range request past the end would only get a 416 and a refetch.
+        _decompress_partial(partial[1], dest, filehash, partial[0])
+        return
+
+    headers = {
+        'X-Asset-Token': token_header,
+        CAS_ACCEPT_COMPRESSION_HEADER: format_compression_accept(
+            all_compression_types()
+        ),
+    }
+    served = None
+    if partial is not None:
+        served = _fetch_to_partial(
+            pool, url, headers, filehash, dest_root, timeout_seconds, partial
+        )
+    if served is None:
+        served = _fetch_to_partial(
+            pool, url, headers, filehash, dest_root, timeout_seconds, None
+        )
+        assert served is not None
+
+    partial_path = cas_partial_path(dest_root, filehash, served)
+    if served is CompressionType.UNCOMPRESSED:
+        _finish_uncompressed(partial_path, dest, filehash)
+    else:
+        _decompress_partial(partial_path, dest, filehash, served)
+
+
+def _fetch_to_partial(
+    pool: urllib3.PoolManager,
+    url: str,
+    headers: dict[str, str],
+    filehash: str,
+    dest_root: str,
+    timeout_seconds: float,
+    resume: tuple[CompressionType, str, int] | None,
+) -> CompressionType | None:
+    """Stream a casblob body into its partial file; return its encoding.
+
+    With ``resume``, asks for the remainder of that partial. A node that
+    ignores the range answers 200 with the whole body, which replaces the
+    partial. Returns None (having discarded the partial) if the node
+    can't continue it -- range unsatisfiable, or a 206 in a different
+    encoding or from the wrong offset -- in which case the caller fetches
+    from scratch. Network errors mid-body propagate raw with the partial
+    kept, so the caller's retry resumes from wherever this got to.
+    """
+    if resume is not None:
+        headers = headers | {'Range': f'bytes={resume[2]}-'}
+    with pool.request(
+        'GET',
+        url,
+        headers=headers,
+        timeout=urllib3.util.Timeout(total=timeout_seconds),
+        preload_content=False,
+    ) as response:
+        if resume is not None and response.status == 416:
+            _discard(resume[1])
+            return None
+        if response.status not in (200, 206):
             raise CasDownloadError(
-                f'casblob decompress for {filehash} ({served.value})'
-                f' failed: {exc}'
-            ) from exc
-    cas_write(dest_root, filehash, data)
+                f'casblob GET for {filehash} failed: HTTP {response.status}.',
+                http_status=response.status,
+            )
+        served = _served_encoding(response, filehash)
+        mode = 'wb'
+        if resume is not None and response.status == 200:
+            # Range ignored; take the full body it sent instead.
+            _discard(resume[1])
+        elif resume is not None:
+            if resume[0] is not served or not _resumes_at(response, resume[2]):
+                _discard(resume[1])
+                return None
+            mode = 'ab'
+        elif response.status != 200:
+            raise CasDownloadError(
+                f'casblob GET for {filehash} returned unrequested'
+                f' HTTP {response.status}.'
+            )
+        with open(
+            cas_partial_path(dest_root, filehash, served), mode
+        ) as outfile:
+            for chunk in response.stream(_STREAM_CHUNK_SIZE):
+                outfile.write(chunk)
+    return served
@@ -22,7 +22,7 @@ from typing import TYPE_CHECKING, assert_never
 if TYPE_CHECKING:
     from typing import Iterable
 
-    from compression.zstd import ZstdDict
+    from compression.zstd import ZstdDict, ZstdDecompressor
 
 
 class CompressionType(Enum):
@@ -191,3 +191,27 @@ def decompress_for_type(stored: bytes, ctype: CompressionType) -> bytes:
 
         return zstd_decompress_with_dict(stored, display_mesh_dict_v1())
     assert_never(ctype)
+
+
+def decompressor_for_type(ctype: CompressionType) -> ZstdDecompressor | None:
+    """Return a streaming decoder for ``ctype`` stored bytes.
+
+    The incremental counterpart of :func:`decompress_for_type`, for
+    decoding large blobs without holding them in memory. Returns None
+    for ``UNCOMPRESSED`` (the stored bytes are already canonical). A
+    decompressor handles a single zstd frame; once its ``eof`` is set,
+    any ``unused_data`` must go to a fresh one.
+    """
+    from compression import zstd
+
+    if ctype is CompressionType.UNCOMPRESSED:
+        return None
+    if ctype is CompressionType.ZSTD:
+        return zstd.ZstdDecompressor()
+    if ctype is CompressionType.ZSTD_DICT_BOB_V1:
+        from bacommon.meshzstddict import display_mesh_dict_v1
+
+        return zstd.ZstdDecompressor(
+            zstd_dict=_shared_zstd_dict(display_mesh_dict_v1())
+        )
+    assert_never(ctype)
@@ -0,0 +1,235 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Shared bits for headless load testing.
+
+A load test (see ``baclassic.ClassicAppSubsystem.run_load_test()``)
+runs game sessions with synthetic players and bots for a set duration
+and writes a :class:`LoadTestReport` as json: how well the logic thread
+kept up, how memory grew, and which activities failed to die when
+done. :func:`compare_reports` checks a report against one from a known
+good build so regressions in game modes can be caught before rollout.
+
+Nothing engine-specific belongs in this module.
+"""
+
+import math
+import datetime
+from dataclasses import dataclass, field
+
+from efro.dataclassio import ioprepped
+
+
+@ioprepped
+@dataclass
+class LoadTestConfig:
+    """What a load test should run."""
+
+    # Playlist type to run ('Free-For-All' or 'Teams').
+    playlist_type: str = 'Free-For-All'
+
+    # Name of the playlist to run.
+    playlist_name: str = '__default__'
+
+    # Synthetic input devices joining as players.
+    player_count: int = 8
+
+    # Bots kept alive in each game activity (in addition to players).
+    bot_count: int = 0
+
+    # How long to run sessions for (seconds).
+    duration: float = 300.0
+
+    # Seeds both Python's random module and synthetic input. Runs with
+    # the same seed and build play out as similarly as the engine's
+    # real-time nature allows.
+    seed: int = 0
+
+    # Where to write the json report.
+    report_path: str = 'loadtest_report.json'
+
+    # Whether to quit the app once the report is written.
+    quit_when_done: bool = True
+
+
+@ioprepped
+@dataclass
+class LogicLagStats:
+    """How late logic-thread timers fired during some period (seconds).
+
+    Python can't time individual engine ticks, but a long tick delays
+    everything scheduled behind it by about its length, so these track
+    tick times wherever they are long enough to matter.
+    """
+
+    samples: int = 0
+    p50: float = 0.0
+    p90: float = 0.0
+    p99: float = 0.0
+    max: float = 0.0
+
+    @classmethod
+    def from_samples(cls, samples: list[float]) -> LogicLagStats:
+        """Calculate stats for a set of lag samples."""
+        if not samples:
+            return cls()
+        ordered = sorted(samples)
+        return cls(
+            samples=len(ordered),
+            p50=percentile(ordered, 0.5),
+            p90=percentile(ordered, 0.9),
+            p99=percentile(ordered, 0.99),
+            max=ordered[-1],
+        )
+
+
+@ioprepped
+@dataclass
+class LoadTestActivityReport:
+    """Results for one activity that ran during a load test."""
+
+    # Activity class name.
+    activity_type: str
+
+    # When the activity came to the foreground (seconds since the test
+    # started) and how long it stayed there.
+    start_time: float
+    duration: float
+
+    logic_lag: LogicLagStats
+
+    # Most players in the activity at once, and bots spawned into it.
+    max_players: int = 0
+    bots_spawned: int = 0
+
+    # Process resident set size (bytes) and Python gc-tracked object
+    # counts when the activity came to and left the foreground. RSS is
+    # None where unsupported.
+    rss_start: int | None = None
+    rss_end: int | None = None
+    python_objects_start: int = 0
+    python_objects_end: int = 0
+
+    # Whether the activity failed to die after expiring (see
+    # babase.verify_object_death()). None if the test ended before it
+    # could be checked.
+    leaked: bool | None = None
+
+
+@ioprepped
+@dataclass
+class LoadTestReport:
+    """Results of a load test."""
+
+    config: LoadTestConfig
+
+    # Build that ran the test.
+    app_version: str
+    build_number: int
+
+    start_time: datetime.datetime
+    duration: float
+
+    # Logic lag over the whole test.
+    logic_lag: LogicLagStats
+
+    # Process resident set size (bytes) at the start and end of the test
+    # and the most seen while it ran. None where unsupported.
+    rss_start: int | None = None
+    rss_end: int | None = None
+    rss_max: int | None = None
+
+    # Python gc-tracked object counts at the start and end of the test.
+    python_objects_start: int = 0
+    python_objects_end: int = 0
+
+    activities: list[LoadTestActivityReport] = field(default_factory=list)
+
+    @property
+    def leaked_activity_types(self) -> set[str]:
+        """Types of activities that leaked at least once."""
+        return {a.activity_type for a in self.activities if a.leaked}
+
+    @property
+    def rss_growth(self) -> int | None:
+        """How much resident set size grew over the test (bytes)."""
+        if self.rss_start is None or self.rss_end is None:
+            return None
+        return self.rss_end - self.rss_start
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of sorted values.
+
+    ``fraction`` is 0-1 (0.99 for the 99th percentile).
+    """
+    if not ordered:
+        raise ValueError('No values given.')
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def compare_reports(
+    baseline: LoadTestReport,
+    current: LoadTestReport,
+    *,
+    lag_tolerance: float = 0.25,
+    lag_floor: float = 0.005,
+    memory_tolerance: float = 0.25,
+    memory_floor: int = 16 * 1024 * 1024,
+) -> list[str]:
+    """Return descriptions of ways a report is worse than a baseline.
+
+    Lag values (p99 overall and per activity type) regress when they
+    exceed the baseline's by more than ``lag_tolerance`` (a fraction)
+    plus ``lag_floor`` seconds; memory growth is checked the same way
+    with ``memory_tolerance`` and ``memory_floor`` bytes. Any activity
+    type that leaks now but didn't in the baseline is also a
+    regression. An empty list means no regressions.
+    """
+    regressions: list[str] = []
+
+    def _check_lag(what: str, base: float, cur: float) -> None:
+        if cur > base * (1.0 + lag_tolerance) + lag_floor:
+            regressions.append(
+                f'{what} p99 logic lag went from'
+                f' {base * 1000.0:.1f}ms to {cur * 1000.0:.1f}ms.'
+            )
+
+    _check_lag('Overall', baseline.logic_lag.p99, current.logic_lag.p99)
+
+    base_by_type = _p99_by_activity_type(baseline)
+    for activity_type, cur in sorted(_p99_by_activity_type(current).items()):
+        base = base_by_type.get(activity_type)
+        if base is not None:
+            _check_lag(activity_type, base, cur)
+
+    base_growth = baseline.rss_growth
+    cur_growth = current.rss_growth
+    if base_growth is not None and cur_growth is not None:
+        if (
+            cur_growth
+            > max(base_growth, 0) * (1.0 + memory_tolerance) + memory_floor
+        ):
+            regressions.append(
+                f'Memory growth went from {base_growth / 1048576.0:.1f}MB'
+                f' to {cur_growth / 1048576.0:.1f}MB.'
+            )
+
+    for activity_type in sorted(
+        current.leaked_activity_types - baseline.leaked_activity_types
+    ):
+        regressions.append(f'{activity_type} now leaks.')
+
+    return regressions
+
+
+def _p99_by_activity_type(report: LoadTestReport) -> dict[str, float]:
+    """Worst p99 lag seen for each activity type in a report."""
+    out: dict[str, float] = {}
+    for activity in report.activities:
+        if activity.logic_lag.samples:
+            out[activity.activity_type] = max(
+                out.get(activity.activity_type, 0.0),
+                activity.logic_lag.p99,
+            )
+    return out
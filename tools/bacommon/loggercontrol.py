@@ -6,6 +6,7 @@ import logging
 from typing import TYPE_CHECKING, Annotated
 from dataclasses import dataclass, field
 
+from efro.logging import set_log_sampling, get_log_sampling
 from efro.dataclassio import ioprepped, IOAttrs
 
 if TYPE_CHECKING:
@@ -19,6 +20,10 @@ class LoggerControlConfig:
 
     Any loggers not explicitly contained in the configuration will be
     set to NOTSET.
+
+    Loggers can also be set to have repeated records collapsed (see
+    :func:`efro.logging.set_log_sampling()`), which keeps things like
+    errors in per-frame game code from flooding logs on a bad day.
     """
 
     # Logger names mapped to log-level values (from system logging
@@ -27,6 +32,12 @@ class LoggerControlConfig:
         field(default_factory=dict)
     )
 
+    # Logger names mapped to sampling windows in seconds. Loggers
+    # inherit their nearest ancestor's window; 0 means no sampling.
+    sampling: Annotated[dict[str, float], IOAttrs('s', store_default=False)] = (
+        field(default_factory=dict)
+    )
+
     def apply(
         self,
         *,
@@ -36,6 +47,8 @@ class LoggerControlConfig:
     ) -> None:
         """Apply the config to all Python loggers.
 
+        Sampling windows are applied too, replacing any existing ones.
+
         If 'warn_unexpected_loggers' is True, warnings will be issues for
         any loggers not explicitly covered by the config. This is useful
         to help ensure controls for all possible loggers are present in
@@ -92,6 +105,8 @@ class LoggerControlConfig:
             if logname not in existinglognames:
                 logging.getLogger(logname).setLevel(level)
 
+        set_log_sampling(self.sampling)
+
     def sanity_check_effective_levels(self) -> None:
         """Checks existing loggers to make sure they line up with us.
 
@@ -164,7 +179,7 @@ class LoggerControlConfig:
             if logger.level != level:
                 return True
 
-        return False
+        return self.sampling != get_log_sampling()
 
     def diff(self, baseconfig: LoggerControlConfig) -> LoggerControlConfig:
         """Return a config containing only changes compared to a base config.
@@ -181,6 +196,11 @@ class LoggerControlConfig:
             baselevel = baseconfig.levels.get(loggername, logging.NOTSET)
             if level != baselevel:
                 config.levels[loggername] = level
+        # Unlike NOTSET levels, zero windows always matter; they turn
+        # off sampling a logger would otherwise inherit.
+        for loggername, window in self.sampling.items():
+            if window != baseconfig.sampling.get(loggername):
+                config.sampling[loggername] = window
         return config
 
     def apply_diff(
@@ -194,11 +214,12 @@ class LoggerControlConfig:
         """
         cls = type(self)
 
-        # Create a new config (with an indepenent levels dict copy).
-        config = cls(levels=dict(self.levels))
+        # Create a new config (with indepenent dict copies).
+        config = cls(levels=dict(self.levels), sampling=dict(self.sampling))
 
-        # Overlay the diff levels dict onto our new one.
+        # Overlay the diff dicts onto our new ones.
         config.levels.update(diffconfig.levels)
+        config.sampling.update(diffconfig.sampling)
 
         # Note: we do NOT prune NOTSET values here. This is so all
         # loggers mentioned in the base config get created if we are
@@ -209,7 +230,7 @@ class LoggerControlConfig:
     def from_current_loggers(cls) -> Self:
         """Build a config from the current set of loggers."""
         lognames = ['root'] + sorted(logging.root.manager.loggerDict)
-        config = cls()
+        config = cls(sampling=get_log_sampling())
         for logname in lognames:
             config.levels[logname] = logging.getLogger(logname).level
         return config
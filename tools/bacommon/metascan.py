@@ -27,10 +27,35 @@ live in the consumer.
 """
 
 import os
-import time
+import json
 import logging
+import threading
 from pathlib import Path
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+#: Bump when the scan-cache file layout changes; caches written with a
+#: different version are ignored.
+SCAN_CACHE_VERSION = 1
+
+
+@dataclass
+class _ModuleMeta:
+    """Everything a scan needs from one source file.
+
+    Only the ``# ba_meta`` lines and the few lines below export tags
+    that the class-name lookup reads; this is what gets cached so
+    unchanged files never need to be read again.
+    """
+
+    #: Line index -> whitespace-split tokens (sans leading '#').
+    meta_lines: dict[int, list[str]]
+
+    #: Line index -> raw line, for lines following export tags.
+    lines: dict[int, str]
 
 
 @dataclass
@@ -74,6 +99,12 @@ class DirectoryScan:
     (workspace dirs, etc.) once they are known. Synchronous
     tooling callers should leave it at the default ``False``;
     :meth:`run` will then finish after the base paths.
+
+    If ``cache_path`` is given, the directives found in each file are
+    saved there along with the file's size and mtime, and later scans
+    only read files whose size or mtime have changed. Results are
+    identical either way; a missing or unreadable cache just means a
+    full read.
     """
 
     def __init__(
@@ -83,6 +114,7 @@ class DirectoryScan:
         deprecated_export_shortcuts: dict[str, str] | None = None,
         *,
         expects_extras: bool = False,
+        cache_path: str | None = None,
     ) -> None:
         """Given one or more paths, parses available meta information.
 
@@ -100,24 +132,40 @@ class DirectoryScan:
         )
         self.extra_paths: list[Path] = []
         # When extras are expected, run() blocks until set_extras()
-        # flips this to True. Synchronous callers skip the wait
-        # entirely by leaving expects_extras=False.
-        self.extra_paths_set = not expects_extras
+        # sets this. Synchronous callers skip the wait entirely by
+        # leaving expects_extras=False.
+        self._extras_ready = threading.Event()
+        if not expects_extras:
+            self._extras_ready.set()
+        self.cache_path = cache_path
+
+        # Fingerprint-validated per-file entries loaded from the cache,
+        # and the entries for files seen this run (what gets saved).
+        self._cache_in: dict[str, list[Any]] = {}
+        self._cache_out: dict[str, list[Any]] = {}
+        self._cache_misses = 0
         self.results = ScanResults()
 
+    @property
+    def extra_paths_set(self) -> bool:
+        """Whether extra paths have been provided (or aren't expected)."""
+        return self._extras_ready.is_set()
+
     def set_extras(self, paths: list[str]) -> None:
         """Set extra portion."""
         # Skip non-existent paths completely.
         self.extra_paths += [Path(p) for p in paths if os.path.isdir(p)]
-        self.extra_paths_set = True
+        self._extras_ready.set()
 
     def run(self) -> None:
         """Do the thing."""
+        if self.cache_path is not None:
+            self._load_cache(self.cache_path)
+
         for pathlist in [self.base_paths, self.extra_paths]:
-            # Spin and wait until extra paths are provided before doing them.
+            # Wait until extra paths are provided before doing them.
             if pathlist is self.extra_paths:
-                while not self.extra_paths_set:
-                    time.sleep(0.001)
+                self._extras_ready.wait()
 
             modules: list[tuple[Path, Path]] = []
             for path in pathlist:
@@ -134,18 +182,106 @@ class DirectoryScan:
         for modlist in self.results.asset_packages.values():
             modlist.sort()
 
+        if self.cache_path is not None and (
+            self._cache_misses or len(self._cache_out) != len(self._cache_in)
+        ):
+            self._save_cache(self.cache_path)
+
+    def _load_cache(self, path: str) -> None:
+        try:
+            with open(path, encoding='utf-8') as infile:
+                data = json.load(infile)
+            if data.get('v') == SCAN_CACHE_VERSION:
+                self._cache_in = data['files']
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Just costs us a full read; not worth bothering the user.
+            logging.debug("metascan: Error loading cache '%s'.", path)
+
+    def _save_cache(self, path: str) -> None:
+        tmppath = f'{path}.tmp{os.getpid()}'
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(tmppath, 'w', encoding='utf-8') as outfile:
+                json.dump(
+                    {'v': SCAN_CACHE_VERSION, 'files': self._cache_out},
+                    outfile,
+                    separators=(',', ':'),
+                )
+            os.replace(tmppath, path)
+        except Exception:
+            logging.warning(
+                "metascan: Error saving cache '%s'.", path, exc_info=True
+            )
+
+    def _module_meta(self, fpath: Path) -> _ModuleMeta:
+        """Return a file's directives, from the cache if still valid."""
+        key = str(fpath)
+        stat = fpath.stat()
+        entry = self._cache_in.get(key)
+        if (
+            entry is not None
+            and entry[0] == stat.st_size
+            and entry[1] == stat.st_mtime_ns
+        ):
+            self._cache_out[key] = entry
+            if len(entry) == 2:
+                return _ModuleMeta(meta_lines={}, lines={})
+            return _ModuleMeta(
+                meta_lines={lnum: bits for lnum, bits in entry[2]},
+                lines={lnum: line for lnum, line in entry[3]},
+            )
+
+        self._cache_misses += 1
+        with fpath.open(encoding='utf-8') as infile:
+            flines = infile.readlines()
+        meta_lines = {
+            lnum: l[1:].split()
+            for lnum, l in enumerate(flines)
+            # Do a simple 'in' check for speed but then make sure its
+            # also at the beginning of the line. This allows disabling
+            # meta-lines and avoids false positives from code that
+            # wrangles them.
+            if ('# ba_meta' in l and l.strip().startswith('# ba_meta '))
+        }
+
+        # Keep just the lines the export class-name lookup will read.
+        lines: dict[int, str] = {}
+        numlines = len(flines)
+        for lnum in meta_lines:
+            _, last = _find_export_class(
+                lambda i: flines[i] if i < numlines else None, lnum
+            )
+            for i in range(lnum + 1, min(last + 1, numlines)):
+                lines[i] = flines[i]
+
+        self._cache_out[key] = (
+            [stat.st_size, stat.st_mtime_ns]
+            if not meta_lines
+            else [
+                stat.st_size,
+                stat.st_mtime_ns,
+                sorted(meta_lines.items()),
+                sorted(lines.items()),
+            ]
+        )
+        return _ModuleMeta(meta_lines=meta_lines, lines=lines)
+
     def _get_path_module_entries(
         self, path: Path, subpath: str | Path, modules: list[tuple[Path, Path]]
     ) -> None:
         """Scan provided path and add module entries to provided list."""
         try:
             fullpath = Path(path, subpath)
-            # Note: skipping hidden dirs (starting with '.').
-            entries = [
-                (path, Path(subpath, name))
-                for name in os.listdir(fullpath)
-                if not name.startswith('.')
-            ]
+            # Note: skipping hidden dirs (starting with '.'). Using
+            # scandir here saves a stat per entry on the is-dir check.
+            with os.scandir(fullpath) as dirents:
+                entries = [
+                    (path, Path(subpath, dirent.name), dirent.is_dir())
+                    for dirent in dirents
+                    if not dirent.name.startswith('.')
+                ]
         except PermissionError:
             # Expected sometimes.
             entries = []
@@ -156,14 +292,13 @@ class DirectoryScan:
             entries = []
 
         # Now identify python packages/modules out of what we found.
-        for entry in entries:
-            if entry[1].name.endswith('.py'):
-                modules.append(entry)
+        for entrypath, entrysubpath, isdir in entries:
+            if entrysubpath.name.endswith('.py'):
+                modules.append((entrypath, entrysubpath))
             elif (
-                Path(entry[0], entry[1]).is_dir()
-                and Path(entry[0], entry[1], '__init__.py').is_file()
+                isdir and Path(entrypath, entrysubpath, '__init__.py').is_file()
             ):
-                modules.append(entry)
+                modules.append((entrypath, entrysubpath))
 
     def _scan_module(self, moduledir: Path, subpath: Path) -> None:
         """Scan an individual module and add the findings to results."""
@@ -173,17 +308,8 @@ class DirectoryScan:
         else:
             fpath = Path(moduledir, subpath, '__init__.py')
             ispackage = True
-        with fpath.open(encoding='utf-8') as infile:
-            flines = infile.readlines()
-        meta_lines = {
-            lnum: l[1:].split()
-            for lnum, l in enumerate(flines)
-            # Do a simple 'in' check for speed but then make sure its
-            # also at the beginning of the line. This allows disabling
-            # meta-lines and avoids false positives from code that
-            # wrangles them.
-            if ('# ba_meta' in l and l.strip().startswith('# ba_meta '))
-        }
+        modulemeta = self._module_meta(fpath)
+        meta_lines = modulemeta.meta_lines
         is_top_level = len(subpath.parts) <= 1
         required_api = self._get_api_requirement(
             subpath, meta_lines, is_top_level
@@ -214,7 +340,7 @@ class DirectoryScan:
             return
 
         # Ok; can proceed with a full scan of this module.
-        self._process_module_meta_tags(subpath, flines, meta_lines)
+        self._process_module_meta_tags(subpath, modulemeta.lines, meta_lines)
 
         # If its a package, recurse into its subpackages.
         if ispackage:
@@ -236,7 +362,7 @@ class DirectoryScan:
     def _process_module_meta_tags(
         self,
         subpath: Path,
-        flines: list[str],
+        lines: dict[int, str],
         meta_lines: dict[int, list[str]],
     ) -> None:
         """Pull data from a module based on its ba_meta tags."""
@@ -280,7 +406,7 @@ class DirectoryScan:
                 modulename = self._module_name_for_subpath(subpath)
                 exporttypestr = mline[2]
                 export_class_name = self._get_export_class_name(
-                    subpath, flines, lindex
+                    subpath, lines, lindex
                 )
                 if export_class_name is not None:
                     classname = modulename + '.' + export_class_name
@@ -309,25 +435,11 @@ class DirectoryScan:
                     )
 
     def _get_export_class_name(
-        self, subpath: Path, lines: list[str], lindex: int
+        self, subpath: Path, lines: dict[int, str], lindex: int
     ) -> str | None:
         """Given line num of an export tag, returns its operand class name."""
         lindexorig = lindex
-        classname = None
-        while True:
-            lindex += 1
-            if lindex >= len(lines):
-                break
-            lbits = lines[lindex].split()
-            if not lbits:
-                continue  # Skip empty lines.
-            if lbits[0] != 'class':
-                break
-            if len(lbits) > 1:
-                cbits = lbits[1].split('(')
-                if len(cbits) > 1 and cbits[0].isidentifier():
-                    classname = cbits[0]
-                    break  # Success!
+        classname, _ = _find_export_class(lines.get, lindex)
         if classname is None:
             logging.warning(
                 'metascan: %s:%d: class definition not found below'
@@ -381,3 +493,27 @@ class DirectoryScan:
             )
             self.results.announce_errors_occurred = True
         return None
+
+
+def _find_export_class(
+    line_at: Callable[[int], str | None], lindex: int
+) -> tuple[str | None, int]:
+    """Find the class an export tag at a line index refers to.
+
+    Returns the class name (or None) and the index of the last line
+    looked at. ``line_at`` returns None past the end of the file.
+    """
+    while True:
+        lindex += 1
+        line = line_at(lindex)
+        if line is None:
+            return None, lindex
+        lbits = line.split()
+        if not lbits:
+            continue  # Skip empty lines.
+        if lbits[0] != 'class':
+            return None, lindex
+        if len(lbits) > 1:
+            cbits = lbits[1].split('(')
+            if len(cbits) > 1 and cbits[0].isidentifier():
+                return cbits[0], lindex  # Success!
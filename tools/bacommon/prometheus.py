@@ -0,0 +1,112 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Minimal Prometheus text-format exposition.
+
+Just enough of the format (and of HTTP) to serve metrics to a
+Prometheus scraper without extra dependencies; servers use this via
+``baclassic``'s server metrics. Nothing engine-specific belongs in this
+module.
+"""
+
+import bisect
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+
+class Histogram:
+    """A Prometheus-style histogram.
+
+    ``bounds`` are the bucket upper bounds, ascending; values above the
+    last one only count toward the implicit ``+Inf`` bucket.
+    """
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.bucket_counts = [0] * len(bounds)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add a value."""
+        self.count += 1
+        self.total += value
+        index = bisect.bisect_left(self.bounds, value)
+        if index < len(self.bucket_counts):
+            self.bucket_counts[index] += 1
+
+    def render(self, out: list[str], name: str, helptext: str) -> None:
+        """Add our exposition lines to a list."""
+        out.append(f'# HELP {name} {helptext}')
+        out.append(f'# TYPE {name} histogram')
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.bucket_counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+        out.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        out.append(f'{name}_sum {self.total}')
+        out.append(f'{name}_count {self.count}')
+
+
+def render_metric(
+    out: list[str],
+    name: str,
+    kind: str,
+    helptext: str,
+    values: dict[str, float] | float,
+) -> None:
+    """Add lines for a simple metric; dict values map labels to values."""
+    out.append(f'# HELP {name} {helptext}')
+    out.append(f'# TYPE {name} {kind}')
+    if isinstance(values, dict):
+        for labels, value in values.items():
+            out.append(f'{name}{{{labels}}} {value}')
+    else:
+        out.append(f'{name} {values}')
+
+
+async def handle_scrape(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    render: Callable[[], str],
+) -> None:
+    """Answer one HTTP connection; use with :func:`asyncio.start_server`.
+
+    ``GET /metrics`` gets ``render()``; anything else gets an empty
+    error response. The connection is closed afterwards either way.
+    """
+    try:
+        request = await asyncio.wait_for(
+            reader.readuntil(b'\r\n\r\n'), timeout=10.0
+        )
+        parts = request.split(b'\r\n', 1)[0].split()
+        if len(parts) < 2 or parts[0] != b'GET':
+            status, body = '405 Method Not Allowed', b''
+        elif parts[1].split(b'?', 1)[0] != b'/metrics':
+            status, body = '404 Not Found', b''
+        else:
+            status, body = '200 OK', render().encode()
+        writer.write(
+            (
+                f'HTTP/1.1 {status}\r\n'
+                'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                'Connection: close\r\n\r\n'
+            ).encode()
+            + body
+        )
+        await writer.drain()
+    except (
+        TimeoutError,
+        ConnectionError,
+        asyncio.IncompleteReadError,
+        asyncio.LimitOverrunError,
+    ):
+        pass
+    except Exception:
+        logging.exception('Error serving metrics.')
+    finally:
+        writer.close()
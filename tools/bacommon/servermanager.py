@@ -4,12 +4,20 @@
 
 from enum import Enum
 from dataclasses import field, dataclass
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, override
 
 from efro.dataclassio import ioprepped
+from efro.message import (
+    Message,
+    Response,
+    BoolResponse,
+    MessageProtocol,
+    MessageEncoding,
+    MessageReceiver,
+)
 
 if TYPE_CHECKING:
-    pass
+    from typing import Callable
 
 
 @ioprepped
@@ -212,6 +220,14 @@ class ServerConfig:
     # CRITICAL.
     log_levels: dict[str, str] | None = None
 
+    # If set, the server serves performance metrics (logic thread lag,
+    # garbage collection pauses, timers, clients, network traffic) in
+    # Prometheus text format at http://127.0.0.1:<metrics_port>/metrics.
+    # Only local connections are accepted; have a local Prometheus agent
+    # or proxy scrape it. In fleet mode, instance N serves on this port
+    # plus N times port_stride.
+    metrics_port: int | None = None
+
     # Flip this on to disable writing of Python bytecode (pyc) files. By
     # default, pyc files are written to the cache directory under the
     # game's config directory, and if you are iterating through lots of
@@ -222,19 +238,171 @@ class ServerConfig:
     dont_write_bytecode: bool = False
 
 
+@ioprepped
+@dataclass
+class ServerFleetConfig:
+    """Configuration for running a fleet of servers (<appname>_server --fleet).
+
+    All instances are based on the same template config; each gets its
+    own port, party name, and config directory derived from it.
+    """
+
+    # How many server instances to run.
+    instance_count: int = 2
+
+    # Config all instances are based on. Instance N (counting from 0)
+    # hosts on this config's port plus N times port_stride.
+    server: ServerConfig = field(default_factory=ServerConfig)
+
+    # Spacing between instance ports.
+    port_stride: int = 1
+
+    # Party names for instances. '{party_name}' is replaced with the
+    # template's party name and '{instance}' with the instance number
+    # (counting from 1).
+    party_name_format: str = '{party_name} {instance}'
+
+    # If True, pins each instance to its own CPU core(s), handed out
+    # round-robin from those available to the server manager. Only
+    # supported on Linux.
+    cpu_affinity: bool = True
+
+    # How many cores each instance gets when cpu_affinity is on.
+    cores_per_instance: int = 1
+
+    # Minimum time between launching any two instances. This staggers
+    # startup and keeps restarts (config changes, clean-exit timers,
+    # crashes) from all hitting at once.
+    restart_stagger_seconds: float = 5.0
+
+    # After an unclean exit, an instance waits this long before
+    # restarting. The wait doubles with each unclean exit in a row, up
+    # to restart_backoff_max_seconds.
+    restart_backoff_min_seconds: float = 2.0
+
+    # Longest an instance will wait to restart after unclean exits.
+    restart_backoff_max_seconds: float = 300.0
+
+    # An instance that ran at least this long before exiting starts
+    # its backoff over.
+    restart_backoff_reset_seconds: float = 300.0
+
+    # How often instances report their client counts and such over
+    # their control channels. The server manager also writes a
+    # combined fleet_status.json this often.
+    status_interval_seconds: float = 5.0
+
+
+@ioprepped
+@dataclass
+class ServerStatus:
+    """A running server's status, as reported to its server manager."""
+
+    # When this status was written (seconds since the unix epoch).
+    time: float
+
+    # Party name the server is hosting as.
+    party_name: str
+
+    # Connected clients (not counting the server itself).
+    client_count: int
+
+    # Players in the game across all clients.
+    player_count: int
+
+    # Max devices in the party (including the server).
+    max_party_size: int
+
+    # Type of the current host session ('ffa', 'teams', 'coop'), or
+    # None if one is not running.
+    session_type: str | None = None
+
+    # How late the server's logic thread has been running its timers
+    # (in seconds) since the previous status; a measure of how
+    # overloaded it is.
+    logic_lag_avg: float = 0.0
+    logic_lag_max: float = 0.0
+
+
+@ioprepped
+@dataclass
+class ServerFleetInstanceStatus:
+    """Status of one instance in a server fleet."""
+
+    # Instance number (counting from 1).
+    instance: int
+
+    port: int
+
+    # Process id, or None if not currently running.
+    pid: int | None
+
+    # 'starting', 'running', 'unresponsive', 'stopping', 'waiting', or
+    # 'stopped'.
+    state: str
+
+    # Seconds since the current process launched.
+    uptime: float | None
+
+    # How many times this instance has been relaunched.
+    restarts: int
+
+    # Exit code of the previous process, if any.
+    last_exit_code: int | None
+
+    # The instance's most recent status report, if it is running and
+    # has sent one recently.
+    status: ServerStatus | None
+
+
+@ioprepped
+@dataclass
+class ServerFleetStatus:
+    """Combined status of a server fleet.
+
+    The server manager writes this as fleet_status.json in the fleet's
+    root directory.
+    """
+
+    # When this status was written (seconds since the unix epoch).
+    time: float
+
+    instances: list[ServerFleetInstanceStatus]
+
+    # Totals across all instances that have reported status.
+    client_count: int
+    player_count: int
+
+
 # NOTE: as much as possible, communication from the server-manager to
 # the child-process should go through these and not ad-hoc Python string
 # commands since this way is type safe.
-class ServerCommand:
-    """Base class for commands that can be sent to the server."""
+class ServerCommand(Message):
+    """Base class for commands that can be sent to the server.
+
+    StartServerModeCommand is always fed to the server through its
+    stdin. Once the server has connected back to its server manager,
+    the rest go over that control channel (see
+    get_manager_to_server_protocol()), but can still be fed through
+    stdin before then.
+    """
 
 
+@ioprepped
 @dataclass
 class StartServerModeCommand(ServerCommand):
     """Tells the app to switch into 'server' mode."""
 
     config: ServerConfig
 
+    # If set, the server connects back to its server manager at this
+    # (localhost) address and introduces itself with control_token.
+    control_address: tuple[str, int] | None = None
+    control_token: str | None = None
+
+    # How often the server sends telemetry over the control channel.
+    telemetry_interval: float = 1.0
+
 
 class ShutdownReason(Enum):
     """Reason a server is shutting down."""
@@ -243,6 +411,7 @@ class ShutdownReason(Enum):
     RESTARTING = 'restarting'
 
 
+@ioprepped
 @dataclass
 class ShutdownCommand(ServerCommand):
     """Tells the server to shut down."""
@@ -251,6 +420,7 @@ class ShutdownCommand(ServerCommand):
     immediate: bool
 
 
+@ioprepped
 @dataclass
 class ChatMessageCommand(ServerCommand):
     """Chat message from the server."""
@@ -259,6 +429,7 @@ class ChatMessageCommand(ServerCommand):
     clients: list[int] | None
 
 
+@ioprepped
 @dataclass
 class ScreenMessageCommand(ServerCommand):
     """Screen-message from the server."""
@@ -268,14 +439,173 @@ class ScreenMessageCommand(ServerCommand):
     clients: list[int] | None
 
 
+@ioprepped
+@dataclass
+class ServerClientInfo:
+    """Info about a client connected to a server."""
+
+    client_id: int
+
+    # Account name.
+    name: str
+
+    account_id: str | None
+
+    # Names of the client's players in the game.
+    players: list[str]
+
+
+@ioprepped
+@dataclass
+class ClientListResponse(Response):
+    """Clients connected to a server."""
+
+    clients: list[ServerClientInfo]
+
+
+@ioprepped
 @dataclass
 class ClientListCommand(ServerCommand):
-    """Print a list of clients."""
+    """Ask for the list of connected clients.
+
+    When sent through stdin, the server prints the list instead.
+    """
 
+    @override
+    @classmethod
+    def get_response_types(cls) -> list[type[Response] | None]:
+        return [ClientListResponse]
 
+
+@ioprepped
 @dataclass
 class KickCommand(ServerCommand):
-    """Kick a client."""
+    """Kick a client.
+
+    Responds with whether the client could be kicked.
+    """
 
     client_id: int
     ban_time: int | None
+
+    @override
+    @classmethod
+    def get_response_types(cls) -> list[type[Response] | None]:
+        return [BoolResponse]
+
+
+@ioprepped
+@dataclass
+class ServerStatusResponse(Response):
+    """A server's current status."""
+
+    status: ServerStatus
+
+
+@ioprepped
+@dataclass
+class StatusCommand(ServerCommand):
+    """Ask for a server's current status."""
+
+    @override
+    @classmethod
+    def get_response_types(cls) -> list[type[Response] | None]:
+        return [ServerStatusResponse]
+
+
+@ioprepped
+@dataclass
+class ServerHelloMessage(Message):
+    """First message a server sends over its control channel."""
+
+    # The control_token it was given in its StartServerModeCommand.
+    token: str
+
+
+@ioprepped
+@dataclass
+class ServerTelemetryMessage(Message):
+    """Regular status update from a server to its server manager."""
+
+    status: ServerStatus
+
+
+class ServerEventType(Enum):
+    """Things a server tells its server manager about as they happen."""
+
+    CLIENT_JOINED = 'client_joined'
+    CLIENT_LEFT = 'client_left'
+    SESSION_CHANGED = 'session_changed'
+    ACTIVITY_CHANGED = 'activity_changed'
+
+
+@ioprepped
+@dataclass
+class ServerEvent:
+    """Something that happened on a server."""
+
+    eventtype: ServerEventType
+
+    # When it happened (seconds since the unix epoch).
+    time: float
+
+    # The client involved, for client events.
+    client_id: int | None = None
+
+    # Client account name for client events and session/activity class
+    # name for others.
+    detail: str | None = None
+
+
+@ioprepped
+@dataclass
+class ServerEventMessage(Message):
+    """Events from a server to its server manager."""
+
+    events: list[ServerEvent]
+
+
+class ControlChannelReceiver(MessageReceiver):
+    """Receives messages on one end of a server control channel.
+
+    Handlers are registered with the handler() decorator; pass one of
+    the protocols below.
+    """
+
+    def handler[T: Callable[..., Any]](self, call: T) -> T:
+        """Decorator to register message handlers."""
+        self.register_handler(call)
+        return call
+
+
+def get_manager_to_server_protocol() -> MessageProtocol:
+    """Protocol for commands sent over a server's control channel."""
+    return MessageProtocol(
+        message_types={
+            0: ShutdownCommand,
+            1: ChatMessageCommand,
+            2: ScreenMessageCommand,
+            3: ClientListCommand,
+            4: KickCommand,
+            5: StatusCommand,
+        },
+        response_types={
+            0: BoolResponse,
+            1: ClientListResponse,
+            2: ServerStatusResponse,
+        },
+        encoding=MessageEncoding.BINARY,
+    )
+
+
+def get_server_to_manager_protocol() -> MessageProtocol:
+    """Protocol for messages a server sends to its server manager."""
+    return MessageProtocol(
+        message_types={
+            0: ServerHelloMessage,
+            1: ServerTelemetryMessage,
+            2: ServerEventMessage,
+        },
+        response_types={},
+        encoding=MessageEncoding.BINARY,
+    )
@@ -780,11 +780,14 @@ class App:
         the shared :mod:`bacommon.assetcas` primitive -- the exact same
         fetch path the client uses -- and written into ``.cache/assetdata``
         at the same CAS shard paths the assemble's inline bundle manifest
-        references. Fetches run in parallel; already-present blobs skip.
+        references. Fetches run in parallel, with how many at once adapted
+        to the link by a shared :class:`bacommon.assetcas.CasFetchConcurrency`
+        (bounded by :func:`_download_workers`); already-present blobs skip.
         """
         from concurrent.futures import ThreadPoolExecutor, as_completed
 
         from efro.util import data_size_str
+        from efro.error import is_urllib3_communication_error
         from bacommon import assetcas
 
         if cas.token is None:
@@ -807,25 +810,45 @@ class App:
             return
 
         starttime = time.monotonic()
+        max_workers = _download_workers()
+        concurrency = assetcas.CasFetchConcurrency(
+            initial=min(4, max_workers), maximum=max_workers
+        )
 
         def _fetch(item: tuple[str, int]) -> int:
             fhash, size = item
-            assetcas.download_cas_blob(
-                _g_pool,
-                base_url,
-                fhash,
-                size,
-                token_header=token_header,
-                dest_root=dest_root,
-                timeout_seconds=TIMEOUT_SECONDS,
-            )
+            concurrency.acquire()
+            try:
+                fetchstart = time.monotonic()
+                try:
+                    assetcas.download_cas_blob(
+                        _g_pool,
+                        base_url,
+                        fhash,
+                        size,
+                        token_header=token_header,
+                        dest_root=dest_root,
+                        timeout_seconds=TIMEOUT_SECONDS,
+                    )
+                except Exception as exc:
+                    # Network failures and 5xx responses both say the
+                    # node or link is struggling; back off for them.
+                    if is_urllib3_communication_error(exc, url=base_url) or (
+                        isinstance(exc, assetcas.CasDownloadError)
+                        and exc.server_error
+                    ):
+                        concurrency.record(
+                            0, time.monotonic() - fetchstart, ok=False
+                        )
+                    raise
+                concurrency.record(size, time.monotonic() - fetchstart, ok=True)
+            finally:
+                concurrency.release()
             return size
 
         total_bytes = 0
         try:
-            with ThreadPoolExecutor(
-                max_workers=_download_workers()
-            ) as executor:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
                 futures = [executor.submit(_fetch, item) for item in to_fetch]
                 for future in as_completed(futures):
                     total_bytes += future.result()
@@ -836,7 +859,8 @@ class App:
         print(
             f'{Clr.BLU}Downloaded {len(to_fetch)} blob(s)'
             f' ({data_size_str(total_bytes)} total) from node CAS in'
-            f' {duration:.2f}s.{Clr.RST}'
+            f' {duration:.2f}s'
+            f' (settled at {concurrency.limit} concurrent).{Clr.RST}'
         )
 
     def _handle_dir_manifest_response(self, dirmanifest: str) -> None:
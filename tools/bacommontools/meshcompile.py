@@ -9,8 +9,11 @@ can run anywhere it gets efrosynced to (game repo asset builds now,
 master-server cloud-build recipes later).
 """
 
+import sys
 import math
+import heapq
 import struct
+from array import array
 from pathlib import Path
 from dataclasses import dataclass
 
@@ -104,8 +107,8 @@ def compile_collision_mesh(
     """
     positions, faces = _parse_obj(Path(src))
 
-    vertex_count_in = len(positions)
-    tri_count_in = len(faces)
+    vertex_count_in = len(positions) // 3
+    tri_count_in = len(faces) // 3
 
     if not faces:
         raise ValueError(f"No triangles found in '{src}'.")
@@ -113,24 +116,20 @@ def compile_collision_mesh(
     # Weld exact-duplicate positions. Compare at float32 precision
     # (the precision we write) so weld results don't depend on
     # higher-precision parse artifacts.
-    posbits = [struct.pack('<fff', p[0], p[1], p[2]) for p in positions]
+    allbits = _le_bytes(_to_f32(positions))
     weldmap: dict[bytes, int] = {}
-    remap: list[int] = []
-    for bits in posbits:
-        existing = weldmap.get(bits)
-        if existing is None:
-            weldmap[bits] = len(weldmap)
-            remap.append(len(weldmap) - 1)
-        else:
-            remap.append(existing)
+    remap = [
+        weldmap.setdefault(allbits[i : i + 12], len(weldmap))
+        for i in range(0, len(allbits), 12)
+    ]
     welded_posbits = list(weldmap.keys())
 
     # Rewrite faces against welded verts; drop degenerates. Corner
     # order within each face is preserved (winding determines ODE's
     # contact normals).
     tris: list[tuple[int, int, int]] = []
-    for face in faces:
-        tri = (remap[face[0]], remap[face[1]], remap[face[2]])
+    corners = iter([remap[i] for i in faces])
+    for tri in zip(corners, corners, corners):
         if tri[0] == tri[1] or tri[1] == tri[2] or tri[0] == tri[2]:
             continue
         tris.append(tri)
@@ -140,35 +139,20 @@ def compile_collision_mesh(
 
     # Sort triangles along a Morton curve of their centroids. Sort is
     # stable, so equal codes keep input order (determinism).
-    positions_f32: list[tuple[float, ...]] = [
-        struct.unpack('<fff', bits) for bits in welded_posbits
-    ]
-    mins = [min(p[axis] for p in positions_f32) for axis in range(3)]
-    maxs = [max(p[axis] for p in positions_f32) for axis in range(3)]
-    spans = [
-        (maxs[axis] - mins[axis]) if maxs[axis] > mins[axis] else 1.0
-        for axis in range(3)
-    ]
-    tris.sort(key=lambda t: _morton_code_for_tri(t, positions_f32, mins, spans))
+    codes = _morton_codes_for_tris(
+        tris, array('f', b''.join(welded_posbits)).tolist()
+    )
+    tris = [tris[i] for i in sorted(range(len(tris)), key=codes.__getitem__)]
 
     # Re-number vertices by first use; this also prunes orphans.
     order: dict[int, int] = {}
-    for tri in tris:
-        for vert in tri:
-            if vert not in order:
-                order[vert] = len(order)
-    out_posbits = [b''] * len(order)
-    for old_index, new_index in order.items():
-        out_posbits[new_index] = welded_posbits[old_index]
+    indices = [order.setdefault(v, len(order)) for tri in tris for v in tri]
 
     # Write it out.
     out = bytearray()
     out += struct.pack('<III', COB_FILE_ID, len(order), len(tris))
-    out += b''.join(out_posbits)
-    out += b''.join(
-        struct.pack('<III', order[tri[0]], order[tri[1]], order[tri[2]])
-        for tri in tris
-    )
+    out += b''.join([welded_posbits[i] for i in order])
+    out += _le_bytes(array('I', indices))
     Path(dst).write_bytes(out)
 
     return CobCompileResult(
@@ -214,24 +198,24 @@ def read_collision_mesh(path: str | Path) -> CobData:
     )
 
 
-def _parse_obj(
-    path: Path,
-) -> tuple[list[tuple[float, float, float]], list[tuple[int, int, int]]]:
-    """Parse the obj subset we support: positions and triangulated faces."""
-    positions: list[tuple[float, float, float]] = []
-    faces: list[tuple[int, int, int]] = []
+def _parse_obj(path: Path) -> tuple[list[float], list[int]]:
+    """Parse the obj subset we support: positions and triangulated faces.
+
+    Returns flat [x, y, z, ...] positions and flat [a, b, c, ...]
+    zero-based triangle indices.
+    """
+    positions: list[float] = []
+    faces: list[int] = []
     for lineno, line in enumerate(_read_obj_lines(path), start=1):
         parts = line.split()
         if not parts or parts[0].startswith('#'):
             continue
         try:
             if parts[0] == 'v':
-                positions.append(
-                    (float(parts[1]), float(parts[2]), float(parts[3]))
-                )
+                positions += (float(parts[1]), float(parts[2]), float(parts[3]))
             elif parts[0] == 'f':
                 _parse_face_corners_v(
-                    parts, len(positions), path, lineno, faces
+                    parts, len(positions) // 3, path, lineno, faces
                 )
             # Ignore everything else (vt, vn, o, g, s, usemtl, ...).
         except _ObjError:
@@ -246,7 +230,7 @@ def _parse_face_corners_v(
     position_count: int,
     path: Path,
     lineno: int,
-    faces: list[tuple[int, int, int]],
+    faces: list[int],
 ) -> None:
     """Parse one collision-mesh ``f`` record (position indices only).
 
@@ -273,31 +257,39 @@ def _parse_face_corners_v(
         raise _ObjError(f'{path}:{lineno}: face has fewer than 3 corners.')
     # Fan-triangulate (no-op for plain tris).
     for i in range(1, len(corners) - 1):
-        faces.append((corners[0], corners[i], corners[i + 1]))
+        faces += (corners[0], corners[i], corners[i + 1])
 
 
-def _morton_code_for_tri(
-    tri: tuple[int, int, int],
-    positions: list[tuple[float, ...]],
-    mins: list[float],
-    spans: list[float],
-) -> int:
-    """30-bit Morton code for a triangle's centroid.
+def _morton_codes_for_tris(
+    tris: list[tuple[int, int, int]], positions: list[float]
+) -> list[int]:
+    """30-bit Morton codes for triangles' centroids.
 
-    Centroids are normalized against the mesh AABB described by
-    ``mins``/``spans``.
+    ``positions`` is flat [x, y, z, ...]. Centroids are normalized
+    against the AABB of all positions.
     """
-    code = 0
-    for axis in range(3):
-        centroid = (
-            positions[tri[0]][axis]
-            + positions[tri[1]][axis]
-            + positions[tri[2]][axis]
-        ) / 3.0
-        normalized = (centroid - mins[axis]) / spans[axis]
-        quantized = min(1023, max(0, int(normalized * 1024.0)))
-        code |= _part1by2(quantized) << axis
-    return code
+    mins = [min(positions[axis::3]) for axis in range(3)]
+    maxs = [max(positions[axis::3]) for axis in range(3)]
+    spans = [
+        (maxs[axis] - mins[axis]) if maxs[axis] > mins[axis] else 1.0
+        for axis in range(3)
+    ]
+    minx, miny, minz = mins
+    spanx, spany, spanz = spans
+    part = _PART1BY2
+    codes: list[int] = []
+    pos = positions
+    for tri in tris:
+        a, b, c = tri[0] * 3, tri[1] * 3, tri[2] * 3
+        x = ((pos[a] + pos[b] + pos[c]) / 3.0 - minx) / spanx
+        y = ((pos[a + 1] + pos[b + 1] + pos[c + 1]) / 3.0 - miny) / spany
+        z = ((pos[a + 2] + pos[b + 2] + pos[c + 2]) / 3.0 - minz) / spanz
+        codes.append(
+            part[min(1023, max(0, int(x * 1024.0)))]
+            | part[min(1023, max(0, int(y * 1024.0)))] << 1
+            | part[min(1023, max(0, int(z * 1024.0)))] << 2
+        )
+    return codes
 
 
 def _part1by2(val: int) -> int:
@@ -310,6 +302,9 @@ def _part1by2(val: int) -> int:
     return val
 
 
+_PART1BY2 = [_part1by2(val) for val in range(1024)]
+
+
 @dataclass
 class BobCompileResult:
     """Stats from a display-mesh compile."""
@@ -377,13 +372,8 @@ def compile_mesh(src: str | Path, dst: str | Path) -> BobCompileResult:
 
     # Renumber vertices by first use (fetch locality); prunes orphans.
     order: dict[int, int] = {}
-    for index in indices:
-        if index not in order:
-            order[index] = len(order)
-    out_vertices = [b''] * len(order)
-    for old_index, new_index in order.items():
-        out_vertices[new_index] = vertices[old_index]
-    indices = [order[i] for i in indices]
+    indices = [order.setdefault(i, len(order)) for i in indices]
+    out_vertices = [vertices[i] for i in order]
 
     # Pick the narrowest index encoding the engine supports that fits.
     # (Engine handles INDEX8 too but its u8 win is negligible; the old
@@ -403,11 +393,11 @@ def compile_mesh(src: str | Path, dst: str | Path) -> BobCompileResult:
         '<IIII', BOB_FILE_ID, mesh_format, len(out_vertices), tri_count
     )
     out += b''.join(out_vertices)
-    out += struct.pack(f'<{len(indices)}{index_char}', *indices)
+    out += _le_bytes(array(index_char, indices))
     Path(dst).write_bytes(out)
 
     return BobCompileResult(
-        corner_count=len(faces) * 3,
+        corner_count=len(faces),
         vertex_count=len(out_vertices),
         tri_count=tri_count,
         index_size=index_size,
@@ -457,42 +447,67 @@ def read_mesh(path: str | Path) -> BobData:
 
 
 def _weld_corners(
-    positions: list[tuple[float, float, float]],
-    tex_coords: list[tuple[float, float]],
-    normals: list[tuple[float, float, float]],
-    faces: list[list[tuple[int, int, int]]],
+    positions: array[float],
+    tex_coords: array[float],
+    normals: array[float],
+    faces: list[tuple[int, int, int]],
 ) -> tuple[list[bytes], list[int]]:
     """Quantize face-corners to final encoding and weld duplicates.
 
-    Returns (vertices-as-packed-bytes, flat-tri-indices). Degenerate
-    tris (corners welding together) are dropped.
+    Takes the flat outputs of _parse_obj_mesh(). Returns
+    (vertices-as-packed-bytes, flat-tri-indices). Degenerate tris
+    (corners welding together) are dropped.
     """
-    weldmap: dict[bytes, int] = {}
+    # Encode each attribute once rather than once per corner. Vertices
+    # are these encodings back to back (see _BOB_VERTEX_PACK), so two
+    # corners weld exactly when all three attribute encodings match.
+    posbits = _le_bytes(positions)
+    pos_ids, pos_encs = _dedupe(
+        [posbits[i : i + 12] for i in range(0, len(posbits), 12)]
+    )
+    uvs = [_ftou16(val) for val in tex_coords]
+    uv_ids, uv_encs = _dedupe(
+        [struct.pack('<2H', uvs[i], uvs[i + 1]) for i in range(0, len(uvs), 2)]
+    )
+    nrms = [_ftos16(val) for val in normals]
+    nrm_ids, nrm_encs = _dedupe(
+        [
+            struct.pack('<3h2x', nrms[i], nrms[i + 1], nrms[i + 2])
+            for i in range(0, len(nrms), 3)
+        ]
+    )
+
+    uv_count = len(uv_encs)
+    nrm_count = len(nrm_encs)
+    weldmap: dict[int, int] = {}
+    welded = [
+        weldmap.setdefault(
+            (pos_ids[v_i] * uv_count + uv_ids[t_i]) * nrm_count + nrm_ids[n_i],
+            len(weldmap),
+        )
+        for v_i, t_i, n_i in faces
+    ]
+
+    vertices: list[bytes] = []
+    for key in weldmap:
+        pos_id, rest = divmod(key, uv_count * nrm_count)
+        uv_id, nrm_id = divmod(rest, nrm_count)
+        vertices.append(pos_encs[pos_id] + uv_encs[uv_id] + nrm_encs[nrm_id])
+
+    # Drop degenerates (zero area in all attributes).
     indices: list[int] = []
-    for face in faces:
-        tri: list[int] = []
-        for v_i, t_i, n_i in face:
-            vbits = struct.pack(
-                _BOB_VERTEX_PACK,
-                positions[v_i][0],
-                positions[v_i][1],
-                positions[v_i][2],
-                _ftou16(tex_coords[t_i][0]),
-                _ftou16(tex_coords[t_i][1]),
-                _ftos16(normals[n_i][0]),
-                _ftos16(normals[n_i][1]),
-                _ftos16(normals[n_i][2]),
-            )
-            index = weldmap.get(vbits)
-            if index is None:
-                index = len(weldmap)
-                weldmap[vbits] = index
-            tri.append(index)
-        # Drop degenerates (zero area in all attributes).
+    corners = iter(welded)
+    for tri in zip(corners, corners, corners):
         if tri[0] == tri[1] or tri[1] == tri[2] or tri[0] == tri[2]:
             continue
-        indices.extend(tri)
-    return list(weldmap.keys()), indices
+        indices += tri
+    return vertices, indices
+
+
+def _dedupe(values: list[bytes]) -> tuple[list[int], list[bytes]]:
+    """Return (per-value ids, unique values in first-seen order)."""
+    ids: dict[bytes, int] = {}
+    return [ids.setdefault(val, len(ids)) for val in values], list(ids)
 
 
 class _ObjError(ValueError):
@@ -533,81 +548,81 @@ def _obj_record_error(
 
 
 def _parse_obj_mesh(path: Path) -> tuple[
-    list[tuple[float, float, float]],
-    list[tuple[float, float]],
-    list[tuple[float, float, float]],
-    list[list[tuple[int, int, int]]],
+    array[float],
+    array[float],
+    array[float],
+    list[tuple[int, int, int]],
 ]:
     """Parse the obj subset display meshes use.
 
-    Returns (positions, tex_coords, normals, faces); faces are lists of
-    (v, t, n) zero-based index triples, fan-triangulated. All float
-    values are rounded to float32 precision (matching what a float-based
-    C parser would hold, which keeps quantization results stable).
+    Returns (positions, tex_coords, normals, faces). Attributes are flat
+    [x, y, z, ...] / [u, v, ...] float32 arrays (matching what a
+    float-based C parser would hold, which keeps quantization results
+    stable). Faces are flat (v, t, n) zero-based index triples, three
+    per triangle, fan-triangulated.
     """
-    positions: list[tuple[float, float, float]] = []
-    tex_coords: list[tuple[float, float]] = []
-    normals: list[tuple[float, float, float]] = []
-    faces: list[list[tuple[int, int, int]]] = []
+    positions: list[float] = []
+    tex_coords: list[float] = []
+    normals: list[float] = []
+    faces: list[tuple[int, int, int]] = []
     for lineno, line in enumerate(_read_obj_lines(path), start=1):
         parts = line.split()
         if not parts or parts[0].startswith('#'):
             continue
         try:
-            if parts[0] == 'v':
-                positions.append(
+            if parts[0] == 'f':
+                _parse_face_corners_vtn(
+                    parts,
                     (
-                        _f32(float(parts[1])),
-                        _f32(float(parts[2])),
-                        _f32(float(parts[3])),
-                    )
+                        len(positions) // 3,
+                        len(tex_coords) // 2,
+                        len(normals) // 3,
+                    ),
+                    path,
+                    lineno,
+                    faces,
                 )
+            elif parts[0] == 'v':
+                positions += (float(parts[1]), float(parts[2]), float(parts[3]))
             elif parts[0] == 'vt':
                 uvs = (float(parts[1]), float(parts[2]))
                 # The u16 encoding can only represent [0, 1]; treat
                 # anything meaningfully outside that as an error.
                 # (Within tolerance counts as authoring noise and gets
                 # clamped silently by the quantization.)
-                if any(not -0.05 <= val <= 1.05 for val in uvs):
+                if not (-0.05 <= uvs[0] <= 1.05 and -0.05 <= uvs[1] <= 1.05):
                     raise _ObjError(
                         f'{path}:{lineno}: texture coordinate'
                         f' {line.strip()[:80]!r} is outside the supported'
                         ' [0, 1] range. Tiling/wrapping UVs are not'
                         ' supported; keep UVs within the texture.'
                     )
-                # Flip V per GL convention (in float32, as the old
-                # C tool did).
-                tex_coords.append(
-                    (
-                        _f32(uvs[0]),
-                        _f32(1.0 - _f32(uvs[1])),
-                    )
-                )
+                tex_coords += uvs
             elif parts[0] == 'vn':
                 nrm = (float(parts[1]), float(parts[2]), float(parts[3]))
                 # The s16 encoding can only represent [-1, 1]; same
                 # tolerance policy as UVs above.
-                if any(not -1.05 <= val <= 1.05 for val in nrm):
+                if not (
+                    -1.05 <= nrm[0] <= 1.05
+                    and -1.05 <= nrm[1] <= 1.05
+                    and -1.05 <= nrm[2] <= 1.05
+                ):
                     raise _ObjError(
                         f'{path}:{lineno}: normal {line.strip()[:80]!r}'
                         ' has components outside [-1, 1]; normals must'
                         ' be normalized.'
                     )
-                normals.append((_f32(nrm[0]), _f32(nrm[1]), _f32(nrm[2])))
-            elif parts[0] == 'f':
-                _parse_face_corners_vtn(
-                    parts,
-                    (len(positions), len(tex_coords), len(normals)),
-                    path,
-                    lineno,
-                    faces,
-                )
+                normals += nrm
             # Ignore everything else (o, g, s, usemtl, mtllib, ...).
         except _ObjError:
             raise
         except (ValueError, IndexError) as exc:
             raise _obj_record_error(path, lineno, line, exc) from exc
-    return positions, tex_coords, normals, faces
+
+    # Flip V per GL convention (in float32, as the old C tool did).
+    uvs_f32 = _to_f32(tex_coords)
+    uvs_f32[1::2] = array('f', [1.0 - val for val in uvs_f32[1::2]])
+    return _to_f32(positions), uvs_f32, _to_f32(normals), faces
 
 
 def _parse_face_corners_vtn(
@@ -615,10 +630,41 @@ def _parse_face_corners_vtn(
     counts: tuple[int, int, int],
     path: Path,
     lineno: int,
-    faces: list[list[tuple[int, int, int]]],
+    faces: list[tuple[int, int, int]],
 ) -> None:
     """Parse one display-mesh ``f`` record (strict v/t/n corners)."""
+    vcount, tcount, ncount = counts
     corners: list[tuple[int, int, int]] = []
+    try:
+        for corner in parts[1:]:
+            vref, tref, nref = corner.split('/')
+            vrefs = (int(vref) - 1, int(tref) - 1, int(nref) - 1)
+            if not (
+                0 <= vrefs[0] < vcount
+                and 0 <= vrefs[1] < tcount
+                and 0 <= vrefs[2] < ncount
+            ):
+                break
+            corners.append(vrefs)
+        else:
+            if len(corners) >= 3:
+                # Fan-triangulate (no-op for plain tris).
+                for i in range(1, len(corners) - 1):
+                    faces += (corners[0], corners[i], corners[i + 1])
+                return
+    except ValueError:
+        pass
+    # Something's off; work out what to tell the user.
+    _raise_face_corners_vtn_error(parts, counts, path, lineno)
+
+
+def _raise_face_corners_vtn_error(
+    parts: list[str],
+    counts: tuple[int, int, int],
+    path: Path,
+    lineno: int,
+) -> None:
+    """Raise a helpful error for a bad display-mesh ``f`` record."""
     for corner in parts[1:]:
         fields = corner.split('/')
         if len(fields) != 3 or not all(fields):
@@ -640,12 +686,7 @@ def _parse_face_corners_vtn(
                 f'{path}:{lineno}: face index out of range in corner'
                 f' {corner!r}.'
             )
-        corners.append((vrefs[0] - 1, vrefs[1] - 1, vrefs[2] - 1))
-    if len(corners) < 3:
-        raise _ObjError(f'{path}:{lineno}: face has fewer than 3 corners.')
-    # Fan-triangulate (no-op for plain tris).
-    for i in range(1, len(corners) - 1):
-        faces.append([corners[0], corners[i], corners[i + 1]])
+    raise _ObjError(f'{path}:{lineno}: face has fewer than 3 corners.')
 
 
 # Forsyth linear-speed vertex cache optimization
@@ -668,35 +709,34 @@ _VCACHE_POS_SCORES = [
 ]
 
 
-def _vcache_vertex_score(cache_pos: int, active_tris: int) -> float:
-    if active_tris == 0:
-        return -1.0
-    score = (
-        _VCACHE_POS_SCORES[cache_pos] if 0 <= cache_pos < _VCACHE_SIZE else 0.0
-    )
-    return score + _VCACHE_VALENCE_SCALE * math.pow(
-        active_tris, _VCACHE_VALENCE_POWER
-    )
-
-
 def _optimize_vcache(indices: list[int], vertex_count: int) -> list[int]:
     """Reorder triangles to maximize post-transform vertex cache hits.
 
     ``indices`` is a flat triangle list; returns a reordered flat list
     containing the same triangles (winding untouched). Deterministic.
     """
+    # pylint: disable=too-many-locals
+    # pylint: disable=too-many-branches
     tri_count = len(indices) // 3
 
-    # Per-vertex adjacency + active (not-yet-emitted) tri counts.
+    # Per-vertex lists of not-yet-emitted tris (in tri order); their
+    # lengths are the vertices' active tri counts.
     vert_tris: list[list[int]] = [[] for _ in range(vertex_count)]
     for tri in range(tri_count):
         for corner in indices[tri * 3 : tri * 3 + 3]:
             vert_tris[corner].append(tri)
-    active = [len(t) for t in vert_tris]
 
-    vert_score = [
-        _vcache_vertex_score(-1, active[v]) for v in range(vertex_count)
+    # Valence part of vertex scores, by active tri count.
+    valence_scores = [-1.0] + [
+        _VCACHE_VALENCE_SCALE * math.pow(active, _VCACHE_VALENCE_POWER)
+        for active in range(1, max(len(t) for t in vert_tris) + 1)
     ]
+    pos_scores = _VCACHE_POS_SCORES
+
+    # Note: scores are updated incrementally and compared exactly, so
+    # the order of every float operation below matters; changing it
+    # can change output.
+    vert_score = [valence_scores[len(t)] for t in vert_tris]
     tri_score = [
         vert_score[indices[t * 3]]
         + vert_score[indices[t * 3 + 1]]
@@ -704,30 +744,45 @@ def _optimize_vcache(indices: list[int], vertex_count: int) -> list[int]:
         for t in range(tri_count)
     ]
 
+    # When nothing in the cache has tris left we need the best-scoring
+    # tri overall. That's a (lazy) heap of (-score, tri) entries; stale
+    # entries get skipped, and tris of vertices rescored since the last
+    # lookup get fresh entries just before each lookup.
+    heap = [(-score, tri) for tri, score in enumerate(tri_score)]
+    heapq.heapify(heap)
+    rescored: set[int] = set()
+
     emitted = [False] * tri_count
     cache: list[int] = []  # Most-recently-used first.
     out: list[int] = []
-    scan_pos = 0  # Resume point for fallback scans.
-
-    def _rescore(vert: int, cache_pos: int) -> None:
-        # Rescore one vertex and its not-yet-emitted tris.
-        new_score = _vcache_vertex_score(cache_pos, active[vert])
-        delta = new_score - vert_score[vert]
-        if delta:
-            vert_score[vert] = new_score
-            for tri in vert_tris[vert]:
-                if not emitted[tri]:
-                    tri_score[tri] += delta
+    scan_pos = 0  # First tri not yet emitted.
 
     for _ in range(tri_count):
-        best_tri, scan_pos = _vcache_pick_tri(
-            cache, vert_tris, emitted, tri_score, scan_pos
-        )
+        # Best candidate among triangles touching the cache (first one
+        # wins ties).
+        best_tri = -1
+        best_score = -1e30
+        for vert in cache:
+            for tri in vert_tris[vert]:
+                if tri_score[tri] > best_score:
+                    best_score = tri_score[tri]
+                    best_tri = tri
+
+        # Cache exhausted (start, or isolated component): take the
+        # best-scoring remaining triangle.
+        if best_tri < 0:
+            while emitted[scan_pos]:
+                scan_pos += 1
+            best_tri = _vcache_best_remaining(
+                heap, rescored, vert_tris, tri_score, emitted, scan_pos
+            )
 
         # Emit it.
         emitted[best_tri] = True
         corners = indices[best_tri * 3 : best_tri * 3 + 3]
-        out.extend(corners)
+        out += corners
+        for corner in corners:
+            vert_tris[corner].remove(best_tri)
 
         # Update the simulated LRU cache.
         for corner in reversed(corners):
@@ -738,46 +793,83 @@ def _optimize_vcache(indices: list[int], vertex_count: int) -> list[int]:
         del cache[_VCACHE_SIZE:]
 
         # Rescore affected vertices and their not-yet-emitted tris.
-        for corner in corners:
-            active[corner] -= 1
         for pos, vert in enumerate(cache):
-            _rescore(vert, pos)
+            tris = vert_tris[vert]
+            new_score = (
+                pos_scores[pos] + valence_scores[len(tris)] if tris else -1.0
+            )
+            delta = new_score - vert_score[vert]
+            if delta:
+                vert_score[vert] = new_score
+                for tri in tris:
+                    tri_score[tri] += delta
+                rescored.add(vert)
         for vert in evicted:
-            _rescore(vert, -1)
+            # (Uncached vertices get no position score.)
+            tris = vert_tris[vert]
+            new_score = valence_scores[len(tris)] if tris else -1.0
+            delta = new_score - vert_score[vert]
+            if delta:
+                vert_score[vert] = new_score
+                for tri in tris:
+                    tri_score[tri] += delta
+                rescored.add(vert)
 
     return out
 
 
-def _vcache_pick_tri(
-    cache: list[int],
+def _vcache_best_remaining(
+    heap: list[tuple[float, int]],
+    rescored: set[int],
     vert_tris: list[list[int]],
-    emitted: list[bool],
     tri_score: list[float],
+    emitted: list[bool],
     scan_pos: int,
-) -> tuple[int, int]:
-    """Pick the best next triangle to emit; returns (tri, scan_pos)."""
-    best_tri = -1
-    best_score = -1e30
+) -> int:
+    """Best-scoring tri not yet emitted, lowest index winning ties.
 
-    # Best candidate among triangles touching the cache.
-    for vert in cache:
+    The first remaining tri (``scan_pos``) only counts if it is the
+    only one left; this mirrors the linear scan this replaced, which
+    started from that tri without weighing its score, and keeps output
+    identical to what it produced.
+    """
+    for vert in rescored:
         for tri in vert_tris[vert]:
-            if not emitted[tri] and tri_score[tri] > best_score:
-                best_score = tri_score[tri]
-                best_tri = tri
-    if best_tri >= 0:
-        return best_tri, scan_pos
-
-    # Cache exhausted (start, or isolated component): take the
-    # best-scoring remaining triangle.
-    while emitted[scan_pos]:
-        scan_pos += 1
-    best_tri = scan_pos
-    for tri in range(scan_pos + 1, len(emitted)):
-        if not emitted[tri] and tri_score[tri] > best_score:
-            best_score = tri_score[tri]
-            best_tri = tri
-    return best_tri, scan_pos
+            heapq.heappush(heap, (-tri_score[tri], tri))
+    rescored.clear()
+
+    skipped: tuple[float, int] | None = None
+    while heap:
+        neg_score, tri = heap[0]
+        if emitted[tri] or -neg_score != tri_score[tri]:
+            heapq.heappop(heap)
+        elif tri == scan_pos:
+            skipped = heapq.heappop(heap)
+        else:
+            break
+    best_tri = heap[0][1] if heap else scan_pos
+    if skipped is not None:
+        heapq.heappush(heap, skipped)
+    return best_tri
+
+
+def _to_f32(values: list[float]) -> array[float]:
+    """Round python floats to float32 precision in bulk (see _f32())."""
+    out = array('f', values)
+    # Unlike struct, array silently overflows to infinity; fall back to
+    # struct to raise the same error for out of range values.
+    if math.inf in out or -math.inf in out:
+        for val in values:
+            _f32(val)
+    return out
+
+
+def _le_bytes(values: array[int] | array[float]) -> bytes:
+    """Return an array's contents as little-endian bytes."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
 
 
 def _f32(val: float) -> float:
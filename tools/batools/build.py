@@ -600,6 +600,7 @@ def _get_server_config_template_toml(projroot: str) -> str:
     cfg.public_ipv6_address = '123A::A123:23A1:A312:12A3:A213:2A13'
     cfg.password = 'changeme'
     cfg.log_levels = {'ba.lifecycle': 'INFO', 'ba.assets': 'INFO'}
+    cfg.metrics_port = 9464
 
     lines_in = _get_server_config_raw_contents(projroot).splitlines()
 
@@ -63,6 +63,7 @@ from efrotools.pcommands2 import (
     build_pcommandbatch,
     batchserver,
     pcommandbatch_speed_test,
+    logquery,
     null,
 )
 from bacommontools.pcommands import (
@@ -0,0 +1,397 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Compact binary storage for log entries.
+
+An alternative to the json-lines files :class:`efro.logging.LogHandler`
+writes by default, for big long-running logs. Entries are grouped into
+zstd-compressed blocks. Each block starts with a small uncompressed
+header giving its time range, the levels present, and the logger names
+used. Queries can therefore skip whole blocks without decompressing
+them.
+
+File layout (all integers little-endian)::
+
+    file    := FILE_MAGIC block*
+    block   := header names payload
+    header  := BLOCK_MAGIC complen:u32 rawlen:u32 count:u32
+               tmin:i64 tmax:i64 levelmask:u8 namecount:u16
+               nameslen:u32
+    names   := (len:u16 utf8)*                 # interned logger names
+    payload := zstd(keycount:u16 (len:u16 utf8)* record*)
+    record  := reclen:u32 time:i64 level:u8 name:u16 labelcount:u16
+               msglen:u32 msg (key:u16 vallen:u32 val)*
+
+Times are integer microseconds since the unix epoch (UTC). Logger
+names and label keys are interned per block, so every block decodes
+on its own. A truncated final block (say from a crash mid-write) is
+ignored by readers.
+"""
+
+import os
+import struct
+import datetime
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from efro.logging import LogEntry, LogLevel
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Iterator, BinaryIO
+
+FILE_MAGIC = b'EFROLOG\x01'
+BLOCK_MAGIC = b'ELBK'
+
+_BLOCK_HEADER = struct.Struct('<4sIIIqqBHI')
+_RECORD_HEADER = struct.Struct('<IqBHHI')
+_LABEL_HEADER = struct.Struct('<HI')
+_STR_LEN = struct.Struct('<H')
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+_LEVELS = {level.value: level for level in LogLevel}
+
+# Record fields following the u32 record length.
+_RECORD_FIELDS_SIZE = _RECORD_HEADER.size - 4
+
+
+def _time_to_us(time: datetime.datetime) -> int:
+    return (time - _EPOCH) // _MICROSECOND
+
+
+def _us_to_time(micros: int) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(microseconds=micros)
+
+
+def _pack_strings(strings: list[str]) -> bytes:
+    out = bytearray()
+    for string in strings:
+        encoded = string.encode()
+        out += _STR_LEN.pack(len(encoded))
+        out += encoded
+    return bytes(out)
+
+
+def _unpack_strings(
+    data: bytes | memoryview, offset: int, count: int
+) -> tuple[list[str], int]:
+    strings: list[str] = []
+    for _ in range(count):
+        (length,) = _STR_LEN.unpack_from(data, offset)
+        offset += _STR_LEN.size
+        strings.append(bytes(data[offset : offset + length]).decode())
+        offset += length
+    return strings, offset
+
+
+class BinaryLogWriter:
+    """Writes log entries to a binary log file.
+
+    Entries accumulate in memory until ``block_size`` bytes (before
+    compression) have built up, then go to disk as one compressed block.
+    Call :meth:`flush` to write whatever is pending as a (possibly
+    small) block; :class:`efro.logging.LogHandler` does this on a short
+    timer so a crash loses at most a moment's worth of entries.
+
+    Not thread-safe; use from one thread at a time.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        block_size: int = 256 * 1024,
+        compression_level: int = 3,
+    ) -> None:
+        # pylint: disable=consider-using-with
+        self._file: BinaryIO | None = open(path, 'wb')
+        self._file.write(FILE_MAGIC)
+        self._file.flush()
+        self._block_size = block_size
+        self._compression_level = compression_level
+        self._reset_block()
+
+    def _reset_block(self) -> None:
+        self._records = bytearray()
+        self._count = 0
+        self._tmin = self._tmax = 0
+        self._levelmask = 0
+        self._names: dict[str, int] = {}
+        self._keys: dict[str, int] = {}
+
+    @property
+    def pending(self) -> int:
+        """Number of entries not yet written to disk."""
+        return self._count
+
+    def append(self, entry: LogEntry) -> None:
+        """Add an entry."""
+        # Interned ids are u16; start a fresh block before overflowing.
+        if (
+            len(self._names) >= 0xFFFF
+            or len(self._keys) + len(entry.labels) > 0xFFFF
+        ):
+            self.flush()
+
+        micros = _time_to_us(entry.time)
+        nameid = self._names.setdefault(entry.name, len(self._names))
+        msg = entry.message.encode()
+        labels = bytearray()
+        for key, val in entry.labels.items():
+            encoded = val.encode()
+            keyid = self._keys.setdefault(key, len(self._keys))
+            labels += _LABEL_HEADER.pack(keyid, len(encoded))
+            labels += encoded
+
+        self._records += _RECORD_HEADER.pack(
+            _RECORD_FIELDS_SIZE + len(msg) + len(labels),
+            micros,
+            entry.level.value,
+            nameid,
+            len(entry.labels),
+            len(msg),
+        )
+        self._records += msg
+        self._records += labels
+
+        if self._count == 0:
+            self._tmin = self._tmax = micros
+        else:
+            self._tmin = min(self._tmin, micros)
+            self._tmax = max(self._tmax, micros)
+        self._levelmask |= 1 << entry.level.value
+        self._count += 1
+
+        if len(self._records) >= self._block_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write any pending entries to disk as a block."""
+        from compression import zstd
+
+        if self._file is None:
+            raise RuntimeError('BinaryLogWriter is closed.')
+        if not self._count:
+            return
+        raw = (
+            _STR_LEN.pack(len(self._keys))
+            + _pack_strings(list(self._keys))
+            + self._records
+        )
+        payload = zstd.compress(raw, level=self._compression_level)
+        names = _pack_strings(list(self._names))
+        self._file.write(
+            _BLOCK_HEADER.pack(
+                BLOCK_MAGIC,
+                len(payload),
+                len(raw),
+                self._count,
+                self._tmin,
+                self._tmax,
+                self._levelmask,
+                len(self._names),
+                len(names),
+            )
+            + names
+            + payload
+        )
+        self._file.flush()
+        self._reset_block()
+
+    def close(self) -> None:
+        """Flush pending entries and close the file."""
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+
+@dataclass(frozen=True)
+class LogBlockInfo:
+    """What a binary log block's header says about it."""
+
+    #: File offset of the block's compressed payload.
+    offset: int
+
+    #: Size of the compressed payload in bytes.
+    size: int
+
+    #: Size of the payload once decompressed.
+    raw_size: int
+
+    #: Number of entries in the block.
+    count: int
+
+    #: Earliest and latest entry times in the block.
+    start_time: datetime.datetime
+    end_time: datetime.datetime
+
+    #: Levels of the entries in the block.
+    levels: frozenset[LogLevel]
+
+    #: Logger names used by entries in the block.
+    names: tuple[str, ...]
+
+
+class BinaryLogReader:
+    """Reads and queries a binary log file.
+
+    Works on files written by :class:`BinaryLogWriter`. The block index
+    is built lazily by walking block headers (a few small reads per
+    block; payloads are seeked past) and is refreshed when the file has
+    grown, so a reader can follow a live log.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = path
+        self._blocks: list[LogBlockInfo] = []
+        self._scanned_to = len(FILE_MAGIC)
+        with open(path, 'rb') as infile:
+            if infile.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                raise ValueError(f'{path} is not a binary log file.')
+
+    def blocks(self) -> list[LogBlockInfo]:
+        """Return info on all complete blocks in the file."""
+        size = os.path.getsize(self._path)
+        if size > self._scanned_to:
+            with open(self._path, 'rb') as infile:
+                self._scan_blocks(infile, size)
+        return list(self._blocks)
+
+    def _scan_blocks(self, infile: BinaryIO, size: int) -> None:
+        offset = self._scanned_to
+        while offset + _BLOCK_HEADER.size <= size:
+            infile.seek(offset)
+            header = infile.read(_BLOCK_HEADER.size)
+            (
+                magic,
+                complen,
+                rawlen,
+                count,
+                tmin,
+                tmax,
+                levelmask,
+                namecount,
+                nameslen,
+            ) = _BLOCK_HEADER.unpack(header)
+            if magic != BLOCK_MAGIC:
+                raise ValueError(
+                    f'Corrupt binary log {self._path}: bad block at {offset}.'
+                )
+            payload_offset = offset + _BLOCK_HEADER.size + nameslen
+            if payload_offset + complen > size:
+                return  # Block not fully written yet.
+            names, _ = _unpack_strings(infile.read(nameslen), 0, namecount)
+            self._blocks.append(
+                LogBlockInfo(
+                    offset=payload_offset,
+                    size=complen,
+                    raw_size=rawlen,
+                    count=count,
+                    start_time=_us_to_time(tmin),
+                    end_time=_us_to_time(tmax),
+                    levels=frozenset(
+                        level
+                        for value, level in _LEVELS.items()
+                        if levelmask & (1 << value)
+                    ),
+                    names=tuple(names),
+                )
+            )
+            offset = payload_offset + complen
+            self._scanned_to = offset
+
+    def entries(
+        self,
+        *,
+        start_time: datetime.datetime | None = None,
+        end_time: datetime.datetime | None = None,
+        min_level: LogLevel | None = None,
+        names: list[str] | None = None,
+    ) -> Iterator[LogEntry]:
+        """Iterate over entries matching all of the given filters.
+
+        ``start_time`` is inclusive and ``end_time`` exclusive.
+        ``names`` matches loggers by name or by ancestor name (passing
+        'ba' matches 'ba.app' too), like Python logging's hierarchy.
+        Blocks that cannot contain a match are never read; within a
+        block, entries are filtered before their text is decoded.
+        Entries come back in file order.
+        """
+        tmin = None if start_time is None else _time_to_us(start_time)
+        tmax = None if end_time is None else _time_to_us(end_time)
+        minlevel = 0 if min_level is None else min_level.value
+        prefixes = None if names is None else tuple(f'{n}.' for n in names)
+
+        def _name_matches(name: str) -> bool:
+            assert names is not None and prefixes is not None
+            return name in names or name.startswith(prefixes)
+
+        with open(self._path, 'rb') as infile:
+            for block in self.blocks():
+                if (
+                    (start_time is not None and block.end_time < start_time)
+                    or (end_time is not None and block.start_time >= end_time)
+                    or not any(l.value >= minlevel for l in block.levels)
+                ):
+                    continue
+                nameids: set[int] | None = None
+                if names is not None:
+                    nameids = {
+                        i
+                        for i, name in enumerate(block.names)
+                        if _name_matches(name)
+                    }
+                    if not nameids:
+                        continue
+                yield from self._block_entries(
+                    infile, block, tmin, tmax, minlevel, nameids
+                )
+
+    def _block_entries(
+        self,
+        infile: BinaryIO,
+        block: LogBlockInfo,
+        tmin: int | None,
+        tmax: int | None,
+        minlevel: int,
+        nameids: set[int] | None,
+    ) -> Iterator[LogEntry]:
+        # pylint: disable=too-many-positional-arguments
+        # pylint: disable=too-many-locals
+        from compression import zstd
+
+        infile.seek(block.offset)
+        raw = memoryview(zstd.decompress(infile.read(block.size)))
+        (keycount,) = _STR_LEN.unpack_from(raw, 0)
+        keys, offset = _unpack_strings(raw, _STR_LEN.size, keycount)
+        unpack_record = _RECORD_HEADER.unpack_from
+        end = len(raw)
+        while offset < end:
+            reclen, micros, level, nameid, labelcount, msglen = unpack_record(
+                raw, offset
+            )
+            recstart = offset + _RECORD_HEADER.size
+            offset += 4 + reclen
+            if (
+                level < minlevel
+                or (tmin is not None and micros < tmin)
+                or (tmax is not None and micros >= tmax)
+                or (nameids is not None and nameid not in nameids)
+            ):
+                continue
+            message = bytes(raw[recstart : recstart + msglen]).decode()
+            labels: dict[str, str] = {}
+            pos = recstart + msglen
+            for _ in range(labelcount):
+                keyid, vallen = _LABEL_HEADER.unpack_from(raw, pos)
+                pos += _LABEL_HEADER.size
+                labels[keys[keyid]] = bytes(raw[pos : pos + vallen]).decode()
+                pos += vallen
+            yield LogEntry(
+                name=block.names[nameid],
+                message=message,
+                level=_LEVELS[level],
+                time=_us_to_time(micros),
+                labels=labels,
+            )
@@ -0,0 +1,379 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Compiled per-class codec plans for dataclassio.
+
+The generic outputter/inputter walk prep data for every field of every
+object on every call: parsing ``Annotated[]`` constructs, resolving
+storage-names, building field paths and dispatching on type. The plans
+here do all of that once per class (and codec) and cache the results on
+the class' prep data, along with small specialized closures for the
+most common leaf types (plain str/int/float/bool values, optionals,
+lists/sets/dicts of those, enums, and so on).
+
+Plans never change behavior: a specialized closure only handles values
+it can prove are valid as-is, and anything else (wrong types, values
+needing coercion, datetimes, 'Any' data, nested dataclasses, etc.)
+falls back to the regular reflective code path, which produces exactly
+the same output and errors it always has.
+"""
+
+# Note: We do lots of comparing of exact types here which is normally
+# frowned upon (stuff like isinstance() is usually encouraged).
+# pylint: disable=unidiomatic-typecheck
+
+from enum import Enum
+import dataclasses
+import typing
+import types
+from typing import TYPE_CHECKING, override
+
+from efro.dataclassio._base import (
+    Codec,
+    parse_annotated,
+    _get_origin,
+    SIMPLE_TYPES,
+)
+
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+    from efro.dataclassio._base import IOAttrs
+    from efro.dataclassio._prep import PrepData
+
+#: Process-wide switch for compiled codec plans. When False, all
+#: encoding/decoding uses the reflective path. Mostly useful for
+#: benchmarking and for ruling plans out when debugging.
+ENABLED = True
+
+
+class _Slow:
+    """Sentinel type returned by fast converters that can't handle a value.
+
+    Use a class to give it a better repr.
+    """
+
+    @override
+    def __repr__(self) -> str:
+        return '<SLOW>'
+
+
+#: Returned by fast converters to request the reflective fallback.
+SLOW: Any = _Slow()
+
+# A fast converter takes a value and returns either its converted form
+# or SLOW.
+type FastConverter = Callable[[Any], Any]
+
+
+class OutputField:
+    """Precomputed output data for a single dataclass field."""
+
+    __slots__ = (
+        'name',
+        'storagename',
+        'anntype',
+        'ioattrs',
+        'is_default',
+        'convert',
+    )
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        storagename: str,
+        anntype: Any,
+        ioattrs: IOAttrs | None,
+        is_default: Callable[[Any], bool] | None,
+        convert: FastConverter | None,
+    ) -> None:
+        # pylint: disable=too-many-positional-arguments
+        self.name = name
+        self.storagename = storagename
+        self.anntype = anntype
+        self.ioattrs = ioattrs
+        self.is_default = is_default
+        self.convert = convert
+
+
+class InputField:
+    """Precomputed input data for a single dataclass field."""
+
+    __slots__ = ('name', 'anntype', 'ioattrs', 'convert')
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        anntype: Any,
+        ioattrs: IOAttrs | None,
+        convert: FastConverter | None,
+    ) -> None:
+        self.name = name
+        self.anntype = anntype
+        self.ioattrs = ioattrs
+        self.convert = convert
+
+
+class OutputPlan:
+    """Precomputed data for outputting a dataclass with a given codec."""
+
+    __slots__ = ('fields',)
+
+    def __init__(self, fields: list[OutputField]) -> None:
+        self.fields = fields
+
+
+class InputPlan:
+    """Precomputed data for inputting a dataclass with a given codec."""
+
+    __slots__ = ('fields_by_key', 'soft_default_fields')
+
+    def __init__(
+        self,
+        fields_by_key: dict[str, InputField],
+        soft_default_fields: list[InputField],
+    ) -> None:
+        # Maps raw input keys (storage-names AND attr-names) to fields.
+        self.fields_by_key = fields_by_key
+
+        # Fields having soft-default values or factories, in field
+        # order.
+        self.soft_default_fields = soft_default_fields
+
+
+def get_output_plan(cls: type, prep: PrepData, codec: Codec) -> OutputPlan:
+    """Return a (cached) output plan for a prepped dataclass."""
+    plan = prep.output_plans.get(codec)
+    if plan is None:
+        plan = prep.output_plans[codec] = _build_output_plan(cls, prep, codec)
+    return plan
+
+
+def get_input_plan(cls: type, prep: PrepData, codec: Codec) -> InputPlan:
+    """Return a (cached) input plan for a prepped dataclass."""
+    plan = prep.input_plans.get(codec)
+    if plan is None:
+        plan = prep.input_plans[codec] = _build_input_plan(cls, prep, codec)
+    return plan
+
+
+def _build_output_plan(cls: type, prep: PrepData, codec: Codec) -> OutputPlan:
+    fields: list[OutputField] = []
+    for field in dataclasses.fields(cls):
+        anntype, ioattrs = parse_annotated(prep.annotations[field.name])
+        if codec is Codec.HUMAN:
+            storagename = field.name.replace('_', ' ')
+        elif ioattrs is None or ioattrs.storagename is None:
+            storagename = field.name
+        else:
+            storagename = ioattrs.storagename
+        fields.append(
+            OutputField(
+                name=field.name,
+                storagename=storagename,
+                anntype=anntype,
+                ioattrs=ioattrs,
+                is_default=(
+                    None
+                    if ioattrs is None or ioattrs.store_default
+                    else _default_checker(cls, field, ioattrs)
+                ),
+                convert=_fast_converter(anntype, codec, output=True),
+            )
+        )
+    return OutputPlan(fields)
+
+
+def _build_input_plan(cls: type, prep: PrepData, codec: Codec) -> InputPlan:
+    fields_by_name: dict[str, InputField] = {}
+    soft_default_fields: list[InputField] = []
+    for field in dataclasses.fields(cls):
+        anntype, ioattrs = parse_annotated(prep.annotations[field.name])
+        infield = InputField(
+            name=field.name,
+            anntype=anntype,
+            ioattrs=ioattrs,
+            convert=_fast_converter(anntype, codec, output=False),
+        )
+        fields_by_name[field.name] = infield
+        if ioattrs is not None and (
+            ioattrs.soft_default is not ioattrs.MISSING
+            or ioattrs.soft_default_factory is not ioattrs.MISSING
+        ):
+            soft_default_fields.append(infield)
+
+    # Input keys are looked up as storage-names first and then as
+    # attr-names, so storage-names need to win any overlap here.
+    fields_by_key = dict(fields_by_name)
+    for storagename, attrname in prep.storage_names_to_attr_names.items():
+        fields_by_key[storagename] = fields_by_name[attrname]
+
+    return InputPlan(fields_by_key, soft_default_fields)
+
+
+def _default_checker(
+    cls: type, field: dataclasses.Field, ioattrs: IOAttrs
+) -> Callable[[Any], bool]:
+    """Return a call telling whether a value matches a field's default.
+
+    Mirrors the store_default=False logic in the reflective outputter.
+    """
+
+    # If both soft_defaults and regular field defaults are present we
+    # want to go with soft_defaults since those same values would be
+    # re-injected when reading the same data back in if we've omitted
+    # the field.
+    default_factory: Any = field.default_factory
+    if ioattrs.soft_default is not ioattrs.MISSING:
+        soft_default = ioattrs.soft_default
+        return lambda value: bool(soft_default == value)
+    if ioattrs.soft_default_factory is not ioattrs.MISSING:
+        soft_default_factory = ioattrs.soft_default_factory
+        assert callable(soft_default_factory)
+        return lambda value: bool(soft_default_factory() == value)
+    if field.default is not dataclasses.MISSING:
+        default = field.default
+        return lambda value: bool(default == value)
+    if default_factory is not dataclasses.MISSING:
+        return lambda value: bool(default_factory() == value)
+
+    def _fail(value: Any) -> bool:
+        del value  # Unused.
+        raise RuntimeError(
+            f'Field {field.name} of {cls.__name__} has'
+            f' no source of default values; store_default=False'
+            f' cannot be set for it. (AND THIS SHOULD HAVE BEEN'
+            f' CAUGHT IN PREP!)'
+        )
+
+    return _fail
+
+
+def _fast_converter(
+    anntype: Any, codec: Codec, output: bool
+) -> FastConverter | None:
+    """Return a fast converter for a field type, or None if there is none.
+
+    Converters only ever accept values that the reflective path would
+    pass through unchanged (other than copying containers); anything
+    else gets SLOW so the reflective path can coerce it, apply
+    fallbacks, or raise its usual errors.
+    """
+    # pylint: disable=too-many-return-statements
+    # pylint: disable=too-many-branches
+    origin = _get_origin(anntype)
+
+    # Simple Optional case; wrap the non-None member.
+    if origin is typing.Union or origin is types.UnionType:
+        childanntypes = typing.get_args(anntype)
+        if len(childanntypes) != 2 or type(None) not in childanntypes:
+            return None
+        child = [c for c in childanntypes if c is not type(None)][0]
+        childconv = _fast_converter(child, codec, output)
+        if childconv is None:
+            return None
+        return lambda value: None if value is None else childconv(value)
+
+    leaftype = _fast_leaf_type(origin, codec)
+    if leaftype is not None:
+        return lambda value: value if type(value) is leaftype else SLOW
+
+    if origin is list or origin is set:
+        childanntypes = typing.get_args(anntype)
+        if len(childanntypes) != 1:
+            return None
+        childtype = _fast_leaf_type(childanntypes[0], codec)
+        if childtype is None:
+            return None
+        if output:
+            # Sets come out as sorted lists, which is only cheap to do
+            # for our sortable leaf types.
+            if origin is set:
+                if childtype not in (str, int, float):
+                    return None
+
+                def _set_out(value: Any) -> Any:
+                    if type(value) is not set or any(
+                        type(x) is not childtype for x in value
+                    ):
+                        return SLOW
+                    return sorted(value)
+
+                return _set_out
+
+            def _list_out(value: Any) -> Any:
+                if type(value) is not list or any(
+                    type(x) is not childtype for x in value
+                ):
+                    return SLOW
+                return list(value)
+
+            return _list_out
+
+        # Input data always arrives as lists (we are json-centric).
+        seqtype = origin
+
+        def _seq_in(value: Any) -> Any:
+            if type(value) is not list or any(
+                type(x) is not childtype for x in value
+            ):
+                return SLOW
+            return seqtype(value)
+
+        return _seq_in
+
+    if origin is dict:
+        childanntypes = typing.get_args(anntype)
+        if len(childanntypes) != 2 or childanntypes[0] is not str:
+            return None
+        valtype = _fast_leaf_type(childanntypes[1], codec)
+        if valtype is None:
+            return None
+
+        def _dict_conv(value: Any) -> Any:
+            if type(value) is not dict:
+                return SLOW
+            for key, val in value.items():
+                if type(key) is not str or type(val) is not valtype:
+                    return SLOW
+            return dict(value)
+
+        return _dict_conv
+
+    if isinstance(origin, type) and issubclass(origin, Enum):
+        enumtype = origin
+        if output:
+            # The human codec uses names instead of values; leave that
+            # to the reflective path.
+            if codec is Codec.HUMAN:
+                return None
+            return lambda value: (
+                value.value if type(value) is enumtype else SLOW
+            )
+
+        def _enum_in(value: Any) -> Any:
+            # Let the reflective path handle fallbacks and errors.
+            try:
+                return enumtype(value)
+            except ValueError:
+                return SLOW
+
+        return _enum_in
+
+    return None
+
+
+def _fast_leaf_type(anntype: Any, codec: Codec) -> type | None:
+    """Return the type for a leaf annotation passed through as-is.
+
+    Returns None if values of the annotated type need translating.
+    """
+    origin = _get_origin(anntype)
+    if origin in SIMPLE_TYPES:
+        return origin
+
+    # Firestore stores bytes natively.
+    if origin is bytes and codec is Codec.FIRESTORE:
+        return bytes
+    return None
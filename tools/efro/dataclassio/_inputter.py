@@ -30,12 +30,14 @@ from efro.dataclassio._base import (
     TypeNotPresentError,
 )
 from efro.dataclassio._prep import PrepSession
+from efro.dataclassio import _compiled
 
 if TYPE_CHECKING:
 
     from typing import Any
 
     from efro.dataclassio._base import IOAttrs
+    from efro.dataclassio._prep import PrepData
     from efro.dataclassio._outputter import _Outputter
 
 
@@ -392,17 +394,6 @@ class _Inputter:
         )
         assert prep is not None
 
-        extra_attrs = {}
-
-        fields = dataclasses.fields(cls)
-        fields_by_name = {f.name: f for f in fields}
-
-        # Preprocess all fields to convert Annotated[] to contained
-        # types and IOAttrs.
-        parsed_field_annotations = {
-            f.name: parse_annotated(prep.annotations[f.name]) for f in fields
-        }
-
         # Special case: if this is a multi-type class it probably has a
         # type attr. Ignore that while parsing since we already have a
         # definite type and it will just pollute extra-attrs otherwise.
@@ -426,6 +417,55 @@ class _Inputter:
         else:
             type_id_store_name = None
 
+        if prep.compiled and _compiled.ENABLED:
+            args, extra_attrs = self._args_from_input_compiled(
+                cls, fieldpath, values, prep, type_id_store_name
+            )
+        else:
+            args, extra_attrs = self._args_from_input(
+                cls, fieldpath, values, prep, type_id_store_name
+            )
+
+        try:
+            out = cls(**args)
+        except Exception as exc:
+            raise ValueError(
+                f'Error instantiating class {cls.__name__}'
+                f' at {fieldpath}: {exc}'
+            ) from exc
+        if extra_attrs:
+            io_set_extra_attrs(out, extra_attrs)
+        if is_ext:
+            assert isinstance(out, IOExtendedData)
+            out.did_input()
+        return out
+
+    def _args_from_input(
+        self,
+        cls: type,
+        fieldpath: str,
+        values: dict,
+        prep: PrepData,
+        type_id_store_name: str | None,
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Build dataclass args via the fully reflective path.
+
+        Returns args for the dataclass constructor and any unknown
+        attrs to be preserved.
+        """
+        # pylint: disable=too-many-positional-arguments
+        # pylint: disable=too-many-locals
+        extra_attrs = {}
+
+        fields = dataclasses.fields(cls)
+        fields_by_name = {f.name: f for f in fields}
+
+        # Preprocess all fields to convert Annotated[] to contained
+        # types and IOAttrs.
+        parsed_field_annotations = {
+            f.name: parse_annotated(prep.annotations[f.name]) for f in fields
+        }
+
         # Go through all data in the input, converting it to either
         # dataclass args or extra data.
         args: dict[str, Any] = {}
@@ -495,19 +535,95 @@ class _Inputter:
                     fieldpath=(f'{fieldpath}.{key}' if fieldpath else key),
                 )
 
-        try:
-            out = cls(**args)
-        except Exception as exc:
-            raise ValueError(
-                f'Error instantiating class {cls.__name__}'
-                f' at {fieldpath}: {exc}'
-            ) from exc
-        if extra_attrs:
-            io_set_extra_attrs(out, extra_attrs)
-        if is_ext:
-            assert isinstance(out, IOExtendedData)
-            out.did_input()
-        return out
+        return args, extra_attrs
+
+    def _args_from_input_compiled(
+        self,
+        cls: type,
+        fieldpath: str,
+        values: dict,
+        prep: PrepData,
+        type_id_store_name: str | None,
+    ) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Build dataclass args via a compiled plan.
+
+        Values the plan can't convert directly go through the regular
+        reflective path, so results and errors are identical to
+        :meth:`_args_from_input`.
+        """
+        # pylint: disable=too-many-positional-arguments
+        plan = _compiled.get_input_plan(cls, prep, self._codec)
+        fields_by_key = plan.fields_by_key
+        slow = _compiled.SLOW
+        extra_attrs: dict[str, Any] = {}
+        args: dict[str, Any] = {}
+        for rawkey, value in values.items():
+
+            # Ignore the type-id storage key (_t or whatnot).
+            if type_id_store_name is not None and rawkey == type_id_store_name:
+                continue
+
+            field = fields_by_key.get(rawkey)
+
+            # Store unknown attrs off to the side (or error if desired).
+            if field is None:
+                if self._allow_unknown_attrs:
+                    if self._discard_unknown_attrs:
+                        continue
+
+                    # Treat this like 'Any' data; ensure that it is
+                    # valid raw json.
+                    if not _is_valid_for_codec(value, self._codec):
+                        raise TypeError(
+                            f'Unknown attr \'{rawkey}\''
+                            f' on {fieldpath} contains data type(s)'
+                            f' not supported by the specified codec'
+                            f' ({self._codec.name}).'
+                        )
+                    extra_attrs[rawkey] = value
+                else:
+                    raise AttributeError(
+                        f"'{cls.__name__}' has no '{rawkey}' field."
+                    )
+                continue
+
+            convert = field.convert
+            invalue = slow if convert is None else convert(value)
+            if invalue is slow:
+                fieldname = field.name
+                invalue = self._value_from_input(
+                    cls,
+                    f'{fieldpath}.{fieldname}' if fieldpath else fieldname,
+                    field.anntype,
+                    value,
+                    field.ioattrs,
+                )
+            args[field.name] = invalue
+
+        # Inject soft-default values for any fields not present in our
+        # data.
+        for field in plan.soft_default_fields:
+            key = field.name
+            if key in args:
+                continue
+            ioattrs = field.ioattrs
+            assert ioattrs is not None
+            if ioattrs.soft_default is not ioattrs.MISSING:
+                soft_default = ioattrs.soft_default
+            else:
+                assert callable(ioattrs.soft_default_factory)
+                soft_default = ioattrs.soft_default_factory()
+            args[key] = soft_default
+
+            # Make sure these values are valid since we didn't run
+            # them through our normal input type checking.
+            self._type_check_soft_default(
+                value=soft_default,
+                anntype=field.anntype,
+                fieldpath=(f'{fieldpath}.{key}' if fieldpath else key),
+            )
+
+        return args, extra_attrs
 
     def _type_check_soft_default(
         self, value: Any, anntype: Any, fieldpath: str
@@ -29,9 +29,11 @@ from efro.dataclassio._base import (
     IOMultiType,
 )
 from efro.dataclassio._prep import PrepSession
+from efro.dataclassio import _compiled
 
 if TYPE_CHECKING:
     from efro.dataclassio._base import IOAttrs
+    from efro.dataclassio._prep import PrepData
 
 
 class _Outputter:
@@ -96,9 +98,74 @@ class _Outputter:
             type(obj), recursion_level=0
         )
         assert prep is not None
-        fields = dataclasses.fields(obj)
+        if prep.compiled and _compiled.ENABLED:
+            out = self._process_dataclass_fields_compiled(
+                cls, obj, fieldpath, prep
+            )
+        else:
+            out = self._process_dataclass_fields(cls, obj, fieldpath, prep)
+
+        # If there's extra-attrs stored on us, check/include them.
+        if not self._discard_extra_attrs:
+            extra_attrs = io_extra_attrs(obj)
+            if isinstance(extra_attrs, dict):
+                if not _is_valid_for_codec(extra_attrs, self._codec):
+                    raise TypeError(
+                        f'Extra attrs on \'{fieldpath}\' contains data type(s)'
+                        f' not supported by \'{self._codec.value}\' codec:'
+                        f' {extra_attrs}.'
+                    )
+                if self._create:
+                    assert out is not None
+                    out.update(extra_attrs)
+
+        # If this obj inherits from multi-type, store its type id.
+        if isinstance(obj, IOMultiType):
+            type_id = obj.get_type_id()
+
+            # Sanity checks; make sure looking up this id gets us this
+            # type.
+            assert isinstance(type_id.value, str)
+            if obj.get_type_cached(type_id) is not type(obj):
+                raise RuntimeError(
+                    f'dataclassio: object of type {type(obj)}'
+                    f' gives type-id {type_id} but that id gives type'
+                    f' {obj.get_type_cached(type_id)}.'
+                    f' Something is out of sync.'
+                )
+            if self._create:
+                assert out is not None
+                storagename = obj.get_type_id_storage_name()
+                # Compare against storage-names (not attr-names) so we
+                # also catch fields that *rename* to the clashing name
+                # via IOAttrs.
+                if storagename in prep.storage_names:
+                    raise RuntimeError(
+                        f'dataclassio: {type(obj)} contains a'
+                        f" '{storagename}' storage-name which clashes with"
+                        f' the type-id-storage-name of the IOMulticlass'
+                        f' it inherits from.'
+                    )
+                # If this is the multitype's default type, we skip
+                # writing the type id; its absence implies the default.
+                if type_id is not obj.get_default_type_id():
+                    if self._codec is Codec.HUMAN:
+                        storagename = storagename.replace('_', ' ')
+                    out[storagename] = (
+                        type_id.name.lower().replace('_', ' ')
+                        if self._codec is Codec.HUMAN
+                        else type_id.value
+                    )
+
+        return out
+
+    def _process_dataclass_fields(
+        self, cls: type, obj: Any, fieldpath: str, prep: PrepData
+    ) -> dict[str, Any] | None:
+        """Process dataclass fields via the fully reflective path."""
+        # pylint: disable=too-many-branches
         out: dict[str, Any] | None = {} if self._create else None
-        for field in fields:
+        for field in dataclasses.fields(obj):
             fieldname = field.name
             if fieldpath:
                 subfieldpath = f'{fieldpath}.{fieldname}'
@@ -150,59 +217,40 @@ class _Outputter:
                 else:
                     storagename = ioattrs.storagename
                 out[storagename] = outvalue
+        return out
 
-        # If there's extra-attrs stored on us, check/include them.
-        if not self._discard_extra_attrs:
-            extra_attrs = io_extra_attrs(obj)
-            if isinstance(extra_attrs, dict):
-                if not _is_valid_for_codec(extra_attrs, self._codec):
-                    raise TypeError(
-                        f'Extra attrs on \'{fieldpath}\' contains data type(s)'
-                        f' not supported by \'{self._codec.value}\' codec:'
-                        f' {extra_attrs}.'
-                    )
-                if self._create:
-                    assert out is not None
-                    out.update(extra_attrs)
+    def _process_dataclass_fields_compiled(
+        self, cls: type, obj: Any, fieldpath: str, prep: PrepData
+    ) -> dict[str, Any] | None:
+        """Process dataclass fields via a compiled plan.
 
-        # If this obj inherits from multi-type, store its type id.
-        if isinstance(obj, IOMultiType):
-            type_id = obj.get_type_id()
+        Values the plan can't convert directly go through the regular
+        reflective path, so output and errors are identical to
+        :meth:`_process_dataclass_fields`.
+        """
+        plan = _compiled.get_output_plan(type(obj), prep, self._codec)
+        out: dict[str, Any] | None = {} if self._create else None
+        slow = _compiled.SLOW
+        for field in plan.fields:
+            value = getattr(obj, field.name)
 
-            # Sanity checks; make sure looking up this id gets us this
-            # type.
-            assert isinstance(type_id.value, str)
-            if obj.get_type_cached(type_id) is not type(obj):
-                raise RuntimeError(
-                    f'dataclassio: object of type {type(obj)}'
-                    f' gives type-id {type_id} but that id gives type'
-                    f' {obj.get_type_cached(type_id)}.'
-                    f' Something is out of sync.'
+            # If we're not storing default values for this fella,
+            # we can skip all output processing if we've got a default value.
+            if field.is_default is not None and field.is_default(value):
+                continue
+
+            convert = field.convert
+            outvalue = slow if convert is None else convert(value)
+            if outvalue is slow:
+                outvalue = self._process_value(
+                    cls,
+                    (f'{fieldpath}.{field.name}' if fieldpath else field.name),
+                    field.anntype,
+                    value,
+                    field.ioattrs,
                 )
-            if self._create:
-                assert out is not None
-                storagename = obj.get_type_id_storage_name()
-                # Compare against storage-names (not attr-names) so we
-                # also catch fields that *rename* to the clashing name
-                # via IOAttrs.
-                if storagename in prep.storage_names:
-                    raise RuntimeError(
-                        f'dataclassio: {type(obj)} contains a'
-                        f" '{storagename}' storage-name which clashes with"
-                        f' the type-id-storage-name of the IOMulticlass'
-                        f' it inherits from.'
-                    )
-                # If this is the multitype's default type, we skip
-                # writing the type id; its absence implies the default.
-                if type_id is not obj.get_default_type_id():
-                    if self._codec is Codec.HUMAN:
-                        storagename = storagename.replace('_', ' ')
-                    out[storagename] = (
-                        type_id.name.lower().replace('_', ' ')
-                        if self._codec is Codec.HUMAN
-                        else type_id.value
-                    )
-
+            if out is not None:
+                out[field.storagename] = outvalue
         return out
 
     def _process_value(
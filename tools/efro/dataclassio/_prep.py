@@ -25,7 +25,8 @@ from efro.dataclassio._base import (
 
 if TYPE_CHECKING:
     from typing import Any
-    from efro.dataclassio._base import IOAttrs
+    from efro.dataclassio._base import IOAttrs, Codec
+    from efro.dataclassio._compiled import OutputPlan, InputPlan
 
 # Use a single logger for all dataclassio stuff.
 logger = logging.getLogger('efro.dataclassio')
@@ -75,7 +76,9 @@ PREP_ATTR = '_DCIOPREP'
 PREP_SESSION_ATTR = '_DCIOPREPSESSION'
 
 
-def ioprep(cls: type, globalns: dict | None = None) -> None:
+def ioprep(
+    cls: type, globalns: dict | None = None, *, compiled: bool = True
+) -> None:
     """Prep a dataclass type for use with this module's functionality.
 
     Prepping ensures that all types contained in a data class as well as
@@ -95,10 +98,17 @@ def ioprep(cls: type, globalns: dict | None = None) -> None:
     containing module's dict. It is possible to override globalns for
     special cases such as when prepping happens as part of an execed
     string instead of within a module.
+
+    By default, prepped classes also get compiled codec plans: per-field
+    storage-names, defaults and specialized converters for common types
+    are worked out once (lazily, on first use) instead of on every
+    encode/decode. Output and validation are identical either way. Pass
+    ``compiled=False`` to always use the fully reflective path for a
+    class.
     """
-    PrepSession(explicit=True, globalns=globalns).prep_dataclass(
-        cls, recursion_level=0
-    )
+    PrepSession(
+        explicit=True, globalns=globalns, compiled=compiled
+    ).prep_dataclass(cls, recursion_level=0)
 
 
 def ioprepped[T](cls: type[T]) -> type[T]:
@@ -156,13 +166,30 @@ class PrepData:
     # like IOMultiType type-id-storage-names.
     storage_names: set[str]
 
+    # Whether to use compiled codec plans for this class.
+    compiled: bool = True
+
+    # Lazily-built compiled codec plans, per codec.
+    output_plans: dict[Codec, OutputPlan] = dataclasses.field(
+        default_factory=dict
+    )
+    input_plans: dict[Codec, InputPlan] = dataclasses.field(
+        default_factory=dict
+    )
+
 
 class PrepSession:
     """Context for a prep."""
 
-    def __init__(self, explicit: bool, globalns: dict | None = None):
+    def __init__(
+        self,
+        explicit: bool,
+        globalns: dict | None = None,
+        compiled: bool = True,
+    ):
         self.explicit = explicit
         self.globalns = globalns
+        self.compiled = compiled
 
     def prep_dataclass(
         self, cls: type, recursion_level: int
@@ -289,6 +316,7 @@ class PrepSession:
             annotations=resolved_annotations,
             storage_names_to_attr_names=storage_names_to_attr_names,
             storage_names=all_storage_names,
+            compiled=self.compiled,
         )
         setattr(cls, PREP_ATTR, prepdata)
 
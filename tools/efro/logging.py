@@ -5,17 +5,16 @@
 # pylint: disable=too-many-lines
 
 import sys
+import copy
 import time
 import asyncio
 import logging
 import datetime
-import itertools
 from enum import Enum
 from functools import partial
-from collections import deque
 from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Annotated, override
-from threading import Thread, current_thread, Lock
+from threading import Thread, current_thread, Lock, Condition
 
 from efro.util import utc_now, strip_exception_tracebacks
 from efro.terminal import Clr, color_enabled
@@ -25,6 +24,8 @@ if TYPE_CHECKING:
     from pathlib import Path
     from typing import Any, Awaitable, Callable, TextIO, Literal
 
+    from efro.binlog import BinaryLogWriter
+
 
 class LogLevel(Enum):
     """Severity level for a log entry.
@@ -77,6 +78,65 @@ LEVELNO_COLOR_CODES: dict[int, tuple[str, str]] = {
     logging.CRITICAL: (Clr.SMAG + Clr.BLD + Clr.BBLK, Clr.RST),
 }
 
+#: Max characters of stdout/stderr output LogHandler accumulates before
+#: queuing another batch to its thread.
+_FILE_WRITE_BATCH_MAX_CHARS = 65536
+
+#: How long LogHandler lets entries sit before writing them out as a
+#: block when using the binary file format.
+_BINARY_LOG_FLUSH_SECONDS = 1.0
+
+#: Label LogHandler puts on entries standing in for sampled-away repeats.
+LOG_REPEATS_LABEL = 'repeats'
+
+# Logger names mapped to sampling windows (see set_log_sampling()),
+# along with windows resolved for individual loggers as they come up.
+# Replaced as a unit so readers never see one without the other.
+_log_sampling: tuple[dict[str, float], dict[str, float]] = ({}, {})
+
+
+def set_log_sampling(windows: dict[str, float]) -> None:
+    """Set which loggers have repeated records collapsed by LogHandler.
+
+    Maps logger names to window lengths in seconds. Loggers use the
+    window of their nearest configured ancestor ('root' covering
+    everything) and a window of 0 turns sampling off again.
+
+    When a sampled logger repeats a record (same logger, message
+    template, and exception type) within its window, the repeat is
+    dropped before any formatting happens. Once the window ends, a
+    single entry for the latest repeat goes out with a 'repeats' label
+    giving how many were collapsed into it. The first record of a run
+    always goes out immediately; while repeats keep coming, one entry
+    per window follows.
+
+    Usually set through :class:`bacommon.loggercontrol.LoggerControlConfig`.
+    """
+    global _log_sampling  # pylint: disable=global-statement
+    _log_sampling = (dict(windows), {})
+
+
+def get_log_sampling() -> dict[str, float]:
+    """Return the current sampling windows (see set_log_sampling())."""
+    return dict(_log_sampling[0])
+
+
+def _get_log_sampling_window(name: str) -> float:
+    windows, resolved = _log_sampling
+    window = resolved.get(name)
+    if window is None:
+        window = 0.0
+        splits = name.split('.')
+        for i in range(len(splits), 0, -1):
+            thisval = windows.get('.'.join(splits[:i]))
+            if thisval is not None:
+                window = thisval
+                break
+        else:
+            window = windows.get('root', 0.0)
+        resolved[name] = window
+    return window
+
 
 @ioprepped
 @dataclass
@@ -117,6 +177,11 @@ class LogHandler(logging.Handler):
 
     Writes logs to disk in structured json format and echoes them
     to stdout/stderr with pretty colors.
+
+    Pass ``file_format='binary'`` to write the log file in the compact
+    block format of :mod:`efro.binlog` instead of json lines. Much
+    smaller and faster to query for big logs; entries are written out
+    in blocks at least every second or so rather than line by line.
     """
 
     _event_loop: asyncio.AbstractEventLoop
@@ -135,10 +200,20 @@ class LogHandler(logging.Handler):
         echofile_timestamp_format: Literal['default', 'relative'] = 'default',
         launch_time: float | None = None,
         strict_threads: bool = False,
+        file_format: Literal['json', 'binary'] = 'json',
     ):
         super().__init__()
-        # pylint: disable=consider-using-with
-        self._file = None if path is None else open(path, 'w', encoding='utf-8')
+        self._file: TextIO | None = None
+        self._binfile: BinaryLogWriter | None = None
+        self._binfile_flush_timer: asyncio.TimerHandle | None = None
+        if path is not None:
+            if file_format == 'binary':
+                from efro.binlog import BinaryLogWriter
+
+                self._binfile = BinaryLogWriter(path)
+            else:
+                # pylint: disable=consider-using-with
+                self._file = open(path, 'w', encoding='utf-8')
         self._echofile = echofile
         self._echofile_timestamp_format = echofile_timestamp_format
         self._callbacks: list[Callable[[LogEntry], None]] = []
@@ -148,14 +223,25 @@ class LogHandler(logging.Handler):
             'stderr': None,
         }
         self._launch_time = time.time() if launch_time is None else launch_time
-        self._cache_size = 0
         assert cache_size_limit >= 0
         self._cache_size_limit = cache_size_limit
         self._cache_time_limit = cache_time_limit
-        self._cache = deque[tuple[int, LogEntry]]()
-        self._cache_index_offset = 0
-        self._cache_lock = Lock()
+        self._cache = _LogEntryRing()
+
+        # Stdout/stderr writes accumulate in the open batch for as long
+        # as its drain call is still waiting in our thread's queue.
+        # Queuing anything else closes the batch (see _push_call()), so
+        # writes never jump ahead of other log activity.
+        self._file_write_lock = Lock()
+        self._file_write_batch: list[tuple[str, str]] | None = None
+        self._file_write_batch_size = 0
+
+        # Open sampling windows for repeating records (see
+        # set_log_sampling()).
+        self._sample_lock = Lock()
+        self._samples: dict[_SampleKey, _SampleWindow] = {}
         self._printed_callback_error = False
+        self._printed_binfile_error = False
         self._aux_handler: logging.Handler | None = None
         if __debug__:
             self._last_slow_emit_warning_time: float | None = None
@@ -189,7 +275,7 @@ class LogHandler(logging.Handler):
         # Kick this over to our bg thread to add the callback and
         # process cached entries at the same time to ensure there are no
         # race conditions that could cause entries to be skipped/etc.
-        self._event_loop.call_soon_threadsafe(
+        self._push_call(
             partial(self._add_callback_in_thread, call, feed_existing_logs)
         )
 
@@ -207,14 +293,10 @@ class LogHandler(logging.Handler):
         self._callbacks.append(call)
 
         # Run all of our cached entries through the new callback if
-        # desired. Snapshot the cache under its lock but run the
-        # callback outside it - callbacks are arbitrary code and may
-        # themselves query the cache (get_cached), which would
-        # deadlock under the (non-reentrant) lock. Emits happen on
-        # this same thread, so the snapshot cannot miss entries.
+        # desired. Emits happen on this same thread, so the snapshot
+        # cannot miss entries.
         if feed_existing_logs and self._cache_size_limit > 0:
-            with self._cache_lock:
-                entries = [entry for _id, entry in self._cache]
+            _start, entries, _size = self._cache.read(0, None)
             for entry in entries:
                 self._run_callback_on_entry(call, entry)
 
@@ -266,16 +348,21 @@ class LogHandler(logging.Handler):
         while bool(True):
             await asyncio.sleep(61.27)
             now = utc_now()
-            with self._cache_lock:
-                # Prune the oldest entry as long as there is a first one
-                # that is too old.
-                while (
-                    self._cache
-                    and (now - self._cache[0][1].time) >= self._cache_time_limit
-                ):
-                    popped = self._cache.popleft()
-                    self._cache_size -= popped[0]
-                    self._cache_index_offset += 1
+            # Prune the oldest entry as long as there is a first one
+            # that is too old.
+            while (oldest := self._cache.peek_first()) is not None and (
+                now - oldest.time
+            ) >= self._cache_time_limit:
+                self._cache.popleft()
+
+    @property
+    def log_size(self) -> int:
+        """Total number of entries submitted to the log so far.
+
+        This is also the index the next entry will get. Cheap to call
+        from any thread.
+        """
+        return self._cache.end
 
     def get_cached(
         self, start_index: int = 0, max_entries: int | None = None
@@ -287,45 +374,20 @@ class LogHandler(logging.Handler):
         entries for partially written stdout/stderr lines. Entries from
         the range [start_index:start_index+max_entries] which are still
         present in the cache will be returned.
+
+        This never blocks logging and costs only as much as the number
+        of entries returned, so it is fine to call often.
         """
 
         assert start_index >= 0
         if max_entries is not None:
             assert max_entries >= 0
-        with self._cache_lock:
-            # Transform start_index to our present cache space.
-            start_index -= self._cache_index_offset
-            # Calc end-index in our present cache space.
-            end_index = (
-                len(self._cache)
-                if max_entries is None
-                else start_index + max_entries
-            )
-
-            # Clamp both indexes to both ends of our present space.
-            start_index = max(0, min(start_index, len(self._cache)))
-            end_index = max(0, min(end_index, len(self._cache)))
-
-            return LogArchive(
-                log_size=self._cache_index_offset + len(self._cache),
-                start_index=start_index + self._cache_index_offset,
-                entries=self._cache_slice(start_index, end_index),
-            )
-
-    def _cache_slice(
-        self, start: int, end: int, step: int = 1
-    ) -> list[LogEntry]:
-        # Deque doesn't natively support slicing but we can do it
-        # manually. It sounds like rotating the deque and pulling from
-        # the beginning is the most efficient way to do this. The
-        # downside is the deque gets temporarily modified in the process
-        # so we need to make sure we're holding the lock.
-        assert self._cache_lock.locked()
-        cache = self._cache
-        cache.rotate(-start)
-        slc = [e[1] for e in itertools.islice(cache, 0, end - start, step)]
-        cache.rotate(start)
-        return slc
+        start_index, entries, log_size = self._cache.read(
+            start_index, max_entries
+        )
+        return LogArchive(
+            log_size=log_size, start_index=start_index, entries=entries
+        )
 
     @classmethod
     def _is_immutable_log_data(cls, data: Any) -> bool:
@@ -337,6 +399,12 @@ class LogHandler(logging.Handler):
 
     def call_in_thread(self, call: Callable[[], Any]) -> None:
         """Submit a call to be run in the logging background thread."""
+        self._push_call(call)
+
+    def _push_call(self, call: Callable[[], Any]) -> None:
+        # Anything queued after pending stdout/stderr writes must run
+        # after them, so close the open write batch first.
+        self._file_write_batch = None
         self._event_loop.call_soon_threadsafe(call)
 
     @override
@@ -347,6 +415,10 @@ class LogHandler(logging.Handler):
 
         # Called by logging to send us records.
 
+        # Repeats of recent records from sampled loggers stop here.
+        if _log_sampling[0] and self._sample_record(record):
+            return
+
         # Forward to aux handler if present (does its own formatting).
         if self._aux_handler is not None:
             self._aux_handler.emit(record)
@@ -370,7 +442,7 @@ class LogHandler(logging.Handler):
         if fast_path:
             if __debug__:
                 formattime = echotime = time.monotonic()
-            self._event_loop.call_soon_threadsafe(
+            self._push_call(
                 partial(
                     self._emit_in_thread,
                     record.name,
@@ -393,39 +465,12 @@ class LogHandler(logging.Handler):
             # in our bg thread because the delay can throw off command
             # line prompts or make tight debugging harder.
             if self._echofile is not None:
-                if self._echofile_timestamp_format == 'relative':
-                    timestamp = f'{record.created - self._launch_time:.3f}'
-                else:
-                    timestamp = (
-                        datetime.datetime.fromtimestamp(
-                            record.created, tz=datetime.UTC
-                        ).strftime('%H:%M:%S')
-                        + f'.{int(record.msecs):03d}'
-                    )
-
-                # If color printing is disabled, show level through text
-                # instead of color.
-                lvlnameex = (
-                    ''
-                    if color_enabled
-                    else f' {logging.getLevelName(record.levelno)}'
-                )
-
-                preinfo = (
-                    f'{Clr.WHT}{timestamp}{lvlnameex} {record.name}:'
-                    f'{Clr.RST} '
-                )
-                ends = LEVELNO_COLOR_CODES.get(record.levelno)
-                if ends is not None:
-                    self._echofile.write(f'{preinfo}{ends[0]}{msg}{ends[1]}\n')
-                else:
-                    self._echofile.write(f'{preinfo}{msg}\n')
-                self._echofile.flush()
+                self._echo(record, msg)
 
             if __debug__:
                 echotime = time.monotonic()
 
-            self._event_loop.call_soon_threadsafe(
+            self._push_call(
                 partial(
                     self._emit_in_thread,
                     record.name,
@@ -456,7 +501,7 @@ class LogHandler(logging.Handler):
                 # sketchy, so let's just kick this over to the bg event
                 # loop thread we've already got.
                 self._last_slow_emit_warning_time = now
-                self._event_loop.call_soon_threadsafe(
+                self._push_call(
                     partial(
                         logging.warning,
                         'efro.logging.LogHandler emit took too long'
@@ -469,6 +514,129 @@ class LogHandler(logging.Handler):
                     )
                 )
 
+    def _echo(self, record: logging.LogRecord, msg: str) -> None:
+        assert self._echofile is not None
+        if self._echofile_timestamp_format == 'relative':
+            timestamp = f'{record.created - self._launch_time:.3f}'
+        else:
+            timestamp = (
+                datetime.datetime.fromtimestamp(
+                    record.created, tz=datetime.UTC
+                ).strftime('%H:%M:%S')
+                + f'.{int(record.msecs):03d}'
+            )
+
+        # If color printing is disabled, show level through text
+        # instead of color.
+        lvlnameex = (
+            '' if color_enabled else f' {logging.getLevelName(record.levelno)}'
+        )
+
+        preinfo = f'{Clr.WHT}{timestamp}{lvlnameex} {record.name}:{Clr.RST} '
+        ends = LEVELNO_COLOR_CODES.get(record.levelno)
+        if ends is not None:
+            self._echofile.write(f'{preinfo}{ends[0]}{msg}{ends[1]}\n')
+        else:
+            self._echofile.write(f'{preinfo}{msg}\n')
+        self._echofile.flush()
+
+    def _sample_record(self, record: logging.LogRecord) -> bool:
+        """Return whether a record is a repeat to be collapsed."""
+        window = _get_log_sampling_window(record.name)
+        if window <= 0.0 or not isinstance(record.msg, str):
+            return False
+        exc_type = record.exc_info[0] if record.exc_info else None
+        key = (record.name, record.msg, exc_type)
+
+        # Only repeats get held, so don't pay to prepare first
+        # occurrences. (Peeking without the lock is fine; we check
+        # again under it.)
+        held: logging.LogRecord | None = None
+        if key in self._samples:
+            held = self._held_record(record, exc_type)
+        with self._sample_lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                self._samples[key] = _SampleWindow(window)
+            elif held is not None:
+                sample.repeats += 1
+                sample.record = held
+                return True
+        if sample is not None:
+            # A window opened since we peeked; go again, preparing the
+            # record this time.
+            return self._sample_record(record)
+        self._push_call(partial(self._start_sample_window, key))
+        return False
+
+    def _held_record(
+        self, record: logging.LogRecord, exc_type: type | None
+    ) -> logging.LogRecord:
+        """Return a record safe to hold until its sample window ends.
+
+        We format it only then (if it is still the latest), so make sure
+        it can't change or keep things alive until that point.
+        Exceptions get boiled down to a line; the first record of the
+        run carried the full traceback.
+        """
+        if exc_type is None and self._is_immutable_log_data(record.args):
+            return record
+        held = copy.copy(record)
+        held.msg = held.getMessage()
+        held.args = None
+        if record.exc_info and exc_type is not None:
+            exc = record.exc_info[1]
+            held.msg += f'\n{type(exc).__name__}: {exc}'
+            held.exc_info = None
+            held.exc_text = None
+        return held
+
+    def _start_sample_window(self, key: _SampleKey) -> None:
+        sample = self._samples.get(key)
+        if sample is not None:
+            self._event_loop.call_later(
+                sample.window, self._end_sample_window, key
+            )
+
+    def _end_sample_window(self, key: _SampleKey) -> None:
+        with self._sample_lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                return
+            if not sample.repeats:
+                del self._samples[key]
+                return
+            record, repeats = sample.record, sample.repeats
+            sample.record, sample.repeats = None, 0
+
+        # Repeats are still coming; keep collapsing them.
+        self._event_loop.call_later(sample.window, self._end_sample_window, key)
+        assert record is not None
+        self._emit_repeats(record, repeats)
+
+    def _emit_repeats(self, record: logging.LogRecord, repeats: int) -> None:
+        try:
+            msg = self.format(record)
+            if self._echofile is not None:
+                self._echo(record, f'{msg} (x{repeats})')
+            labels: dict[str, str] = dict(getattr(record, 'labels', None) or {})
+            labels[LOG_REPEATS_LABEL] = str(repeats)
+            self._emit_in_thread(
+                record.name, record.levelno, record.created, msg, labels
+            )
+        except Exception:
+            import traceback
+
+            traceback.print_exc(file=self._echofile)
+
+    def _end_all_sample_windows(self) -> None:
+        with self._sample_lock:
+            samples = self._samples
+            self._samples = {}
+        for sample in samples.values():
+            if sample.record is not None:
+                self._emit_repeats(sample.record, sample.repeats)
+
     def _emit_in_thread(
         self,
         name: str,
@@ -501,14 +669,36 @@ class LogHandler(logging.Handler):
     def file_write(self, name: str, output: str) -> None:
         """Send raw stdout/stderr output to the logger to be collated."""
 
-        # Note to self: it turns out that things like '^^^^^^^^^^^^^^'
-        # lines in stack traces get written as lots of individual '^'
-        # writes. It feels a bit dirty to be pushing a deferred call to
-        # another thread for each character. Perhaps should do some sort
-        # of basic accumulation here?
-        self._event_loop.call_soon_threadsafe(
-            partial(self._file_write_in_thread, name, output)
-        )
+        # Things like '^^^^^^^^^^^^^^' lines in stack traces get written
+        # as lots of individual '^' writes, and a log storm can mean
+        # thousands of writes per second. So rather than queuing a call
+        # to our thread per write, we add to a batch that a single
+        # queued call will drain. The batch is capped in size so one
+        # drain never has an unbounded amount of work.
+        with self._file_write_lock:
+            batch = self._file_write_batch
+            if (
+                batch is not None
+                and self._file_write_batch_size < _FILE_WRITE_BATCH_MAX_CHARS
+            ):
+                batch.append((name, output))
+                self._file_write_batch_size += len(output)
+                return
+            batch = self._file_write_batch = [(name, output)]
+            self._file_write_batch_size = len(output)
+
+            # (Queued under the lock so batches stay in order.)
+            self._event_loop.call_soon_threadsafe(
+                partial(self._file_writes_in_thread, batch)
+            )
+
+    def _file_writes_in_thread(self, batch: list[tuple[str, str]]) -> None:
+        # Close the batch (if still open) so no more writes land in it.
+        with self._file_write_lock:
+            if self._file_write_batch is batch:
+                self._file_write_batch = None
+        for name, output in batch:
+            self._file_write_in_thread(name, output)
 
     def _file_write_in_thread(self, name: str, output: str) -> None:
         try:
@@ -551,15 +741,20 @@ class LogHandler(logging.Handler):
         # done = False
         self.file_flush('stdout')
         self.file_flush('stderr')
+        self._push_call(self._end_all_sample_windows)
 
         # Push a message to our thread to break out of its loop, and
         # then wait for the thread to exit. This will effectively flush
         # all pending messages up to this point but will leave the loop
         # intact so if anyone pushes a message at this point it won't
         # error (though it will never get processed either).
-        self._event_loop.call_soon_threadsafe(self._event_loop.stop)
+        self._push_call(self._event_loop.stop)
         self._thread.join()
 
+        # Our thread is done with it now.
+        if self._binfile is not None:
+            self._binfile.close()
+
         # def _set_done() -> None:
         #     nonlocal done
         #     done = True
@@ -576,9 +771,7 @@ class LogHandler(logging.Handler):
     def file_flush(self, name: str) -> None:
         """Send raw stdout/stderr flush to the logger to be collated."""
 
-        self._event_loop.call_soon_threadsafe(
-            partial(self._file_flush_in_thread, name)
-        )
+        self._push_call(partial(self._file_flush_in_thread, name))
 
     def _file_flush_in_thread(self, name: str) -> None:
         try:
@@ -624,26 +817,24 @@ class LogHandler(logging.Handler):
 
         # Store to our cache.
         if self._cache_size_limit > 0:
-            with self._cache_lock:
-                # Do a rough calc of how many bytes this entry consumes.
-                entry_size = sum(
-                    sys.getsizeof(x)
-                    for x in (
-                        entry,
-                        entry.name,
-                        entry.message,
-                        entry.level,
-                        entry.time,
-                    )
+            cache = self._cache
+
+            # Do a rough calc of how many bytes this entry consumes.
+            entry_size = sum(
+                sys.getsizeof(x)
+                for x in (
+                    entry,
+                    entry.name,
+                    entry.message,
+                    entry.level,
+                    entry.time,
                 )
-                self._cache.append((entry_size, entry))
-                self._cache_size += entry_size
+            )
+            cache.append(entry, entry_size)
 
-                # Prune old until we are back at or under our limit.
-                while self._cache_size > self._cache_size_limit:
-                    popped = self._cache.popleft()
-                    self._cache_size -= popped[0]
-                    self._cache_index_offset += 1
+            # Prune old until we are back at or under our limit.
+            while cache.total_size > self._cache_size_limit:
+                cache.popleft()
 
         # Pass to callbacks.
         for call in self._callbacks:
@@ -656,6 +847,27 @@ class LogHandler(logging.Handler):
             entry_s = dataclass_to_json(entry)
             assert '\n' not in entry_s  # Make sure its a single line.
             print(entry_s, file=self._file, flush=True)
+        elif self._binfile is not None:
+            self._binfile.append(entry)
+            if self._binfile.pending and self._binfile_flush_timer is None:
+                self._binfile_flush_timer = self._event_loop.call_later(
+                    _BINARY_LOG_FLUSH_SECONDS, self._flush_binfile
+                )
+
+    def _flush_binfile(self) -> None:
+        assert self._binfile is not None
+        self._binfile_flush_timer = None
+        try:
+            self._binfile.flush()
+        except Exception:
+            # Only print the first error (a full disk would fail every
+            # flush), and not through logging since that leads back
+            # here.
+            if not self._printed_binfile_error:
+                import traceback
+
+                traceback.print_exc(file=self._echofile or sys.stderr)
+                self._printed_binfile_error = True
 
     def _run_callback_on_entry(
         self, callback: Callable[[LogEntry], None], entry: LogEntry
@@ -672,6 +884,132 @@ class LogHandler(logging.Handler):
                 self._printed_callback_error = True
 
 
+#: Logger name, message template, and exception type.
+type _SampleKey = tuple[str, str, type[BaseException] | None]
+
+
+class _SampleWindow:
+    """Repeats of a record collected by a LogHandler sampling window."""
+
+    __slots__ = ('window', 'repeats', 'record')
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self.repeats = 0
+        self.record: logging.LogRecord | None = None
+
+
+class _LogEntryRing:
+    """Ring buffer of cached log entries, indexed by absolute log index.
+
+    An entry's absolute index is the number of entries appended before
+    it. Appends and evictions must all happen on one thread (the
+    LogHandler's); any thread can read without locking.
+
+    The writer publishes its (slots, first, end) state as a single
+    tuple. A reader copies a range out of whatever state it grabbed
+    and then re-checks: the writer always publishes an advanced first
+    index *before* clearing or reusing an evicted slot, so anything
+    the reader copied from below the current first index gets dropped.
+    This holds even if a resize swapped in a new slot list meanwhile;
+    the old list's evicted slots may have been cleared before the swap.
+    Other than that, resizing never touches the old list again.
+    """
+
+    _MIN_CAPACITY = 64
+
+    def __init__(self) -> None:
+        cap = self._MIN_CAPACITY
+        self._view: tuple[list[Any], int, int] = ([None] * cap, 0, 0)
+        self._sizes = [0] * cap
+
+        #: Sum of the sizes of all cached entries.
+        self.total_size = 0
+
+    @property
+    def end(self) -> int:
+        """Absolute index the next appended entry will get."""
+        return self._view[2]
+
+    def peek_first(self) -> LogEntry | None:
+        """Return the oldest cached entry, if any. Writer thread only."""
+        slots, first, end = self._view
+        return slots[first % len(slots)] if end > first else None
+
+    def append(self, entry: LogEntry, size: int) -> None:
+        """Add an entry to the end. Writer thread only."""
+        slots, first, end = self._view
+        if end - first == len(slots):
+            slots = self._resize(len(slots) * 2)
+        slot = end % len(slots)
+        slots[slot] = entry
+        self._sizes[slot] = size
+        self._view = (slots, first, end + 1)
+        self.total_size += size
+
+    def popleft(self) -> None:
+        """Evict the oldest entry. Writer thread only."""
+        slots, first, end = self._view
+        assert end > first
+        cap = len(slots)
+        slot = first % cap
+
+        # Publish first; see class docs.
+        self._view = (slots, first + 1, end)
+        slots[slot] = None
+        self.total_size -= self._sizes[slot]
+        if cap > self._MIN_CAPACITY and end - first - 1 < cap // 4:
+            self._resize(cap // 2)
+
+    def read(
+        self, start: int, count: int | None
+    ) -> tuple[int, list[LogEntry], int]:
+        """Copy out up to ``count`` entries starting at index ``start``.
+
+        Both ends are clamped to what is currently cached, with the end
+        computed from the requested start. Returns the actual start
+        index, the entries, and the end index at the time of the read.
+        """
+        slots, first, end = self._view
+        stop = end if count is None else min(start + count, end)
+        start = max(first, min(start, end))
+        if stop <= start:
+            return start, [], end
+        out = self._ordered(slots, start, stop)
+
+        first_now = self._view[1]
+        if first_now > start:
+            drop = min(first_now, stop) - start
+            del out[:drop]
+            start += drop
+        return start, out, end
+
+    @staticmethod
+    def _ordered(slots: list[Any], start: int, stop: int) -> list[Any]:
+        cap = len(slots)
+        lo = start % cap
+        hi = lo + stop - start
+        if hi <= cap:
+            return slots[lo:hi]
+        return slots[lo:] + slots[: hi - cap]
+
+    def _resize(self, cap: int) -> list[Any]:
+        slots, first, end = self._view
+        count = end - first
+        assert count <= cap
+        newslots: list[Any] = [None] * cap
+        newsizes = [0] * cap
+        for src, dst in ((slots, newslots), (self._sizes, newsizes)):
+            ordered = self._ordered(src, first, end) if count else []
+            lo = first % cap
+            split = min(count, cap - lo)
+            dst[lo : lo + split] = ordered[:split]
+            dst[: count - split] = ordered[split:]
+        self._sizes = newsizes
+        self._view = (newslots, first, end)
+        return newslots
+
+
 class FileLogEcho:
     """A file-like object for forwarding stdout/stderr to a LogHandler."""
 
@@ -730,6 +1068,7 @@ def setup_logging(
     launch_time: float | None = None,
     strict_threads: bool = False,
     standard_filters: bool = True,
+    log_file_format: Literal['json', 'binary'] = 'json',
 ) -> LogHandler:
     """Set up our logging environment.
 
@@ -765,6 +1104,7 @@ def setup_logging(
         cache_time_limit=cache_time_limit,
         launch_time=launch_time,
         strict_threads=strict_threads,
+        file_format=log_file_format,
     )
 
     if standard_filters:
@@ -828,6 +1168,118 @@ def setup_logging(
     return loghandler
 
 
+@ioprepped
+@dataclass
+class _LogBatch:
+    """Encoded form of a batch of log entries."""
+
+    entries: Annotated[list[LogEntry], IOAttrs('e')]
+
+
+# Leading byte of encoded batches, giving how the rest is stored.
+_LOG_BATCH_JSON = b'j'
+_LOG_BATCH_ZSTD = b'z'
+
+#: Encoded batches smaller than this aren't worth compressing.
+_LOG_BATCH_MIN_COMPRESS_BYTES = 512
+
+
+def encode_log_batch(
+    entries: list[LogEntry], *, compress: bool = True
+) -> bytes:
+    """Encode log entries into bytes for shipping elsewhere.
+
+    This is what :class:`LogBatchForwarder` passes to ``flush_encoded``.
+    Use :func:`decode_log_batch` on the other end.
+    """
+    return _pack_log_batch(_serialize_log_batch(entries), compress)
+
+
+def decode_log_batch(data: bytes) -> list[LogEntry]:
+    """Decode log entries encoded by :func:`encode_log_batch`."""
+    from efro.dataclassio import dataclass_from_json
+
+    kind, payload = data[:1], data[1:]
+    if kind == _LOG_BATCH_ZSTD:
+        from compression import zstd
+
+        payload = zstd.decompress(payload)
+    elif kind != _LOG_BATCH_JSON:
+        raise ValueError(f'Unrecognized log batch type {kind!r}.')
+    return dataclass_from_json(_LogBatch, payload.decode()).entries
+
+
+def _serialize_log_batch(entries: list[LogEntry]) -> bytes:
+    return dataclass_to_json(_LogBatch(entries=entries)).encode()
+
+
+def _pack_log_batch(raw: bytes, compress: bool) -> bytes:
+    if compress and len(raw) >= _LOG_BATCH_MIN_COMPRESS_BYTES:
+        from compression import zstd
+
+        return _LOG_BATCH_ZSTD + zstd.compress(raw)
+    return _LOG_BATCH_JSON + raw
+
+
+def _estimate_entry_size(entry: LogEntry) -> int:
+    # Roughly what an entry takes up once encoded; cheap enough to run
+    # for every entry we queue. The constant covers keys, punctuation
+    # and the timestamp.
+    size = len(entry.name) + len(entry.message) + 48
+    for key, val in entry.labels.items():
+        size += len(key) + len(val) + 6
+    return size
+
+
+@dataclass
+class LogForwarderStats:
+    """Running totals for a :class:`LogBatchForwarder`.
+
+    Fetch via :attr:`LogBatchForwarder.stats`.
+    """
+
+    #: Batches passed to the flush call.
+    batches: int = 0
+
+    #: Entries passed to the flush call.
+    entries: int = 0
+
+    #: Flush calls that raised an exception.
+    errors: int = 0
+
+    #: Entries dropped because the queue was full.
+    dropped: int = 0
+
+    #: Total time log-handler threads spent blocked waiting for queue
+    #: space (with ``overflow='block'``), in seconds.
+    blocked_seconds: float = 0.0
+
+    #: Serialized size of encoded batches before compression.
+    #: Only tracked when shipping encoded batches.
+    raw_bytes: int = 0
+
+    #: Size of encoded batches as passed to the flush call.
+    #: Only tracked when shipping encoded batches.
+    shipped_bytes: int = 0
+
+    #: How long the most recent batch took to ship (including any
+    #: encoding), in seconds.
+    last_flush_seconds: float = 0.0
+
+    #: Longest time a batch took to ship, in seconds.
+    max_flush_seconds: float = 0.0
+
+    #: Total time spent shipping batches, in seconds.
+    total_flush_seconds: float = 0.0
+
+    @property
+    def compression_ratio(self) -> float:
+        """Raw bytes per shipped byte (1.0 until anything is shipped)."""
+        if not self.shipped_bytes:
+            return 1.0
+        return self.raw_bytes / self.shipped_bytes
+
+
 class LogBatchForwarder:
     """Forwards :class:`LogEntry` batches to a user-supplied async flush.
 
@@ -852,6 +1304,22 @@ class LogBatchForwarder:
       ``shipping_window`` seconds elapse without another trigger.
       For cases like a client uploading logs on error.
 
+    Pass ``flush_encoded`` instead of ``flush`` to get batches as
+    bytes from :func:`encode_log_batch` (zstd-compressed unless
+    ``compress`` is False), ready to go over a wire.
+
+    Batches are cut at ``max_batch_bytes`` (estimated encoded size).
+    Entries normally sit for ``flush_interval`` to coalesce, but under
+    load the forwarder ships as fast as flushes complete: it wakes
+    early once a full batch or half the queue has built up, and ships
+    back to back while a backlog remains.
+
+    When ``max_queue`` entries are waiting, new entries are dropped
+    by default. With ``overflow='block'``, the LogHandler's thread
+    instead waits up to ``max_block_time`` for space, holding up log
+    processing (but not the code doing the logging) until flushes
+    catch up.
+
     Always call :meth:`shutdown` from the consumer's shutdown path
     before tearing down the transport — otherwise queued entries
     are stranded (the :class:`LogHandler`'s own shutdown machinery
@@ -864,25 +1332,39 @@ class LogBatchForwarder:
         self,
         *,
         log_handler: LogHandler,
-        flush: Callable[[list[LogEntry]], Awaitable[None]],
+        flush: Callable[[list[LogEntry]], Awaitable[None]] | None = None,
+        flush_encoded: Callable[[bytes], Awaitable[None]] | None = None,
+        compress: bool = True,
         loop: asyncio.AbstractEventLoop | None = None,
         min_level: int = logging.NOTSET,
         max_queue: int = 1000,
+        max_batch_bytes: int = 256 * 1024,
         flush_interval: float = 1.0,
+        overflow: Literal['drop', 'block'] = 'drop',
+        max_block_time: float = 5.0,
         trigger: Callable[[LogEntry], bool] | None = None,
         backfill_count: int = 0,
         shipping_window: float = 0.0,
     ) -> None:
         # pylint: disable=too-many-arguments
+        # pylint: disable=too-many-locals
+        if (flush is None) == (flush_encoded is None):
+            raise ValueError('Pass exactly one of flush or flush_encoded.')
         self._log_handler = log_handler
         self._flush = flush
+        self._flush_encoded = flush_encoded
+        self._compress = compress
         self._loop = loop if loop is not None else asyncio.get_running_loop()
         self._min_level = min_level
         self._max_queue = max_queue
+        self._max_batch_bytes = max_batch_bytes
         self._flush_interval = flush_interval
+        self._overflow = overflow
+        self._max_block_time = max_block_time
         self._trigger = trigger
         self._backfill_count = backfill_count
         self._shipping_window = shipping_window
+        self._stats = LogForwarderStats()
 
         # Shared state. The queue + counters are touched from both
         # the bg thread (callback) and the main loop (flush task);
@@ -890,14 +1372,24 @@ class LogBatchForwarder:
         # ``_shipping_until`` are single-word reads/writes whose
         # races are benign — see notes inline.
         self._lock = Lock()
+        self._space = Condition(self._lock)
         self._queue: list[LogEntry] = []
-        self._dropped = 0
+        self._queue_sizes: list[int] = []
+        self._queue_bytes = 0
         self._stopping = False
         # Triggered-mode state. Continuous mode starts active and
         # never deactivates; triggered mode starts idle and toggles.
         self._active = trigger is None
         self._shipping_until: float | None = None
 
+        # Whether the main loop has been asked to start a flush task
+        # or to cut its coalescing short. Guarded by the lock, so the
+        # bg thread pokes the main loop only when it needs to rather
+        # than once per entry.
+        self._flush_requested = False
+        self._wake_requested = False
+        self._wake = asyncio.Event()
+
         # Main-loop flush task (created on demand, terminated when
         # queue is empty).
         self._flush_task: asyncio.Task[None] | None = None
@@ -907,7 +1399,15 @@ class LogBatchForwarder:
     @property
     def dropped_count(self) -> int:
         """How many entries have been dropped due to max-queue cap."""
-        return self._dropped
+        return self._stats.dropped
+
+    @property
+    def stats(self) -> LogForwarderStats:
+        """Running totals of what has been shipped and how long it took.
+
+        Updated in place; copy it to get a snapshot.
+        """
+        return self._stats
 
     # ---- bg-thread callback ----
 
@@ -937,36 +1437,86 @@ class LogBatchForwarder:
             return
 
         with self._lock:
-            if len(self._queue) >= self._max_queue:
-                self._dropped += 1
+            if (
+                len(self._queue) >= self._max_queue
+                and not self._wait_for_space()
+            ):
+                self._stats.dropped += 1
                 return
-            self._queue.append(entry)
+            self._enqueue(entry)
+            poke = self._poke_needed()
+        if poke:
+            self._poke()
+
+    def _enqueue(self, entry: LogEntry) -> None:
+        size = _estimate_entry_size(entry)
+        self._queue.append(entry)
+        self._queue_sizes.append(size)
+        self._queue_bytes += size
+
+    def _poke_needed(self) -> bool:
+        """Note whether the main loop needs a nudge (lock held)."""
+        if not self._flush_requested:
+            self._flush_requested = True
+            return True
+        if not self._wake_requested and (
+            self._queue_bytes >= self._max_batch_bytes
+            or len(self._queue) * 2 >= self._max_queue
+        ):
+            self._wake_requested = True
+            return True
+        return False
 
-        # Wake the main loop to schedule a flush.
+    def _poke(self) -> None:
         try:
             self._loop.call_soon_threadsafe(self._schedule_flush)
         except RuntimeError:
             # Loop is closed (shutdown race). Nothing to do.
             pass
 
+    def _wait_for_space(self) -> bool:
+        """Wait for queue space if we're set to (lock held).
+
+        Returns whether there is space now.
+        """
+        if self._overflow != 'block' or self._loop.is_closed():
+            return False
+        start = time.monotonic()
+        deadline = start + self._max_block_time
+        try:
+            while len(self._queue) >= self._max_queue and not self._stopping:
+                # Make sure the main loop knows we're waiting on it.
+                if self._poke_needed():
+                    self._poke()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0.0:
+                    return False
+                self._space.wait(remaining)
+        finally:
+            self._stats.blocked_seconds += time.monotonic() - start
+        return len(self._queue) < self._max_queue
+
     def _do_backfill(self) -> None:
         """On trigger transition, pull recent cached entries for context."""
         if self._backfill_count <= 0:
             return
         try:
-            archive = self._log_handler.get_cached()
-            entries = archive.entries[-self._backfill_count :]
+            handler = self._log_handler
+            entries = handler.get_cached(
+                start_index=max(0, handler.log_size - self._backfill_count)
+            ).entries[-self._backfill_count :]
         except Exception:  # pylint: disable=broad-exception-caught
             return
         if not entries:
             return
         with self._lock:
-            # Subject to the same queue cap.
+            # Subject to the same queue cap (but never blocks; these
+            # are just context).
             for entry in entries:
                 if len(self._queue) >= self._max_queue:
-                    self._dropped += 1
+                    self._stats.dropped += 1
                     continue
-                self._queue.append(entry)
+                self._enqueue(entry)
 
     # ---- main-loop side ----
 
@@ -976,47 +1526,103 @@ class LogBatchForwarder:
             self._flush_task = self._loop.create_task(
                 self._flush_loop(), name='LogBatchForwarder.flush_loop'
             )
+        else:
+            self._wake.set()
 
     async def _flush_loop(self) -> None:
-        # Initial coalescing sleep — bursts of nearby entries merge
-        # into a single flush call.
-        await asyncio.sleep(self._flush_interval)
         while True:
-            entries = self._take_queue()
-            if not entries:
-                return  # nothing left; terminate
-            try:
-                await self._flush(entries)
-            except Exception:  # pylint: disable=broad-exception-caught
-                # Logs are best-effort. Don't log here (recursion).
-                pass
-            # Triggered mode: check whether shipping window expired.
-            if (
-                self._trigger is not None
-                and self._shipping_until is not None
-                and time.monotonic() >= self._shipping_until
-            ):
-                self._active = False
-                self._shipping_until = None
-                return
-            # Wait for more entries to accumulate, then loop.
-            await asyncio.sleep(self._flush_interval)
+            # Coalescing sleep — bursts of nearby entries merge into a
+            # single flush call. Cut short if a full batch builds up.
+            await self._coalesce()
+            while True:
+                entries, backlog = self._take_batch()
+                if not entries:
+                    return  # nothing left; terminate
+                await self._ship(entries)
+                # Triggered mode: check whether shipping window expired.
+                if (
+                    self._trigger is not None
+                    and self._shipping_until is not None
+                    and time.monotonic() >= self._shipping_until
+                ):
+                    self._active = False
+                    self._shipping_until = None
+                    with self._lock:
+                        self._flush_requested = False
+                    return
+                # Under load, keep shipping without waiting around.
+                if not backlog:
+                    break
+
+    async def _coalesce(self) -> None:
+        with self._lock:
+            woken = self._wake_requested
+        if woken:
+            return
+        self._wake.clear()
+        try:
+            await asyncio.wait_for(self._wake.wait(), self._flush_interval)
+        except TimeoutError:
+            pass
+
+    def _take_batch(self) -> tuple[list[LogEntry], bool]:
+        """Take the next batch off the queue.
 
-    def _take_queue(self) -> list[LogEntry]:
-        """Atomically drain the queue."""
+        Also returns whether a full batch or more remains.
+        """
         with self._lock:
-            entries = self._queue
-            self._queue = []
-        return entries
+            count = 0
+            size = 0
+            for entrysize in self._queue_sizes:
+                if count and size + entrysize > self._max_batch_bytes:
+                    break
+                size += entrysize
+                count += 1
+            entries = self._queue[:count]
+            del self._queue[:count]
+            del self._queue_sizes[:count]
+            self._queue_bytes -= size
+            self._wake_requested = False
+            backlog = (
+                self._queue_bytes >= self._max_batch_bytes
+                or len(self._queue) * 2 >= self._max_queue
+            )
+            if not entries:
+                self._flush_requested = False
+            if count:
+                self._space.notify_all()
+        return entries, backlog
+
+    async def _ship(self, entries: list[LogEntry]) -> None:
+        stats = self._stats
+        start = time.monotonic()
+        try:
+            if self._flush_encoded is not None:
+                raw = _serialize_log_batch(entries)
+                data = _pack_log_batch(raw, self._compress)
+                stats.raw_bytes += len(raw)
+                stats.shipped_bytes += len(data)
+                await self._flush_encoded(data)
+            else:
+                assert self._flush is not None
+                await self._flush(entries)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # Logs are best-effort. Don't log here (recursion).
+            stats.errors += 1
+        duration = time.monotonic() - start
+        stats.batches += 1
+        stats.entries += len(entries)
+        stats.last_flush_seconds = duration
+        stats.max_flush_seconds = max(stats.max_flush_seconds, duration)
+        stats.total_flush_seconds += duration
 
     async def flush_now(self) -> None:
         """Drain and flush immediately, bypassing coalescing."""
-        entries = self._take_queue()
-        if entries:
-            try:
-                await self._flush(entries)
-            except Exception:  # pylint: disable=broad-exception-caught
-                pass
+        while True:
+            entries, _backlog = self._take_batch()
+            if not entries:
+                return
+            await self._ship(entries)
 
     async def shutdown(self) -> None:
         """Stop accepting new entries and drain remaining ones.
@@ -1026,6 +1632,8 @@ class LogBatchForwarder:
         machinery doesn't know about this forwarder's queue.
         """
         self._stopping = True
+        with self._lock:
+            self._space.notify_all()
         if self._flush_task is not None:
             self._flush_task.cancel()
             try:
@@ -4,7 +4,7 @@
 Supports static typing for message types and possible return types.
 """
 
-from efro.message._protocol import MessageProtocol
+from efro.message._protocol import MessageProtocol, MessageEncoding
 from efro.message._sender import MessageSender, BoundMessageSender
 from efro.message._receiver import MessageReceiver, BoundMessageReceiver
 from efro.message._module import create_sender_module, create_receiver_module
@@ -28,6 +28,7 @@ __all__ = [
     'StringResponse',
     'BoolResponse',
     'MessageProtocol',
+    'MessageEncoding',
     'MessageSender',
     'BoundMessageSender',
     'MessageReceiver',
@@ -0,0 +1,309 @@
+# Released under the MIT License. See LICENSE for details.
+#
+"""Compact binary encoding for message dicts.
+
+This is a pure-Python implementation of the subset of msgpack needed
+to carry dataclassio output: None, bools, ints (up to 64 bits), floats,
+strs, bytes, lists/tuples, dicts, and UTC datetimes (using the standard
+msgpack timestamp extension type). Data produced here can be read by
+any msgpack implementation and vice versa, as long as only those types
+are used.
+"""
+
+# We compare exact types for speed here; dataclassio output only ever
+# contains plain builtin types.
+# pylint: disable=unidiomatic-typecheck
+
+import struct
+import datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.UTC)
+_ONE_SECOND = datetime.timedelta(seconds=1)
+
+# Msgpack extension type id for timestamps.
+_EXT_TIMESTAMP = -1
+
+_I8 = struct.Struct('>b')
+_TAG_U8 = struct.Struct('>BB')
+_TAG_U16 = struct.Struct('>BH')
+_TAG_U32 = struct.Struct('>BI')
+_TAG_U64 = struct.Struct('>BQ')
+_TAG_I8 = struct.Struct('>Bb')
+_TAG_I16 = struct.Struct('>Bh')
+_TAG_I32 = struct.Struct('>Bi')
+_TAG_I64 = struct.Struct('>Bq')
+_TAG_F64 = struct.Struct('>Bd')
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>I')
+_U64 = struct.Struct('>Q')
+_I16 = struct.Struct('>h')
+_I32 = struct.Struct('>i')
+_I64 = struct.Struct('>q')
+_F32 = struct.Struct('>f')
+_F64 = struct.Struct('>d')
+_TIMESTAMP96 = struct.Struct('>Iq')
+
+
+def pack(obj: Any) -> bytes:
+    """Encode a value to bytes.
+
+    Raises TypeError for unsupported types and ValueError for
+    unsupported values (such as ints beyond 64 bits or non-UTC
+    datetimes).
+    """
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+def unpack(data: bytes) -> Any:
+    """Decode a value from bytes.
+
+    Raises ValueError if the data is invalid or contains unsupported
+    types.
+    """
+    if type(data) is not bytes:
+        data = bytes(data)
+    try:
+        obj, pos = _unpack(data, 0)
+    except (struct.error, IndexError, UnicodeDecodeError) as exc:
+        raise ValueError('Invalid or truncated binary data.') from exc
+    if pos != len(data):
+        raise ValueError(
+            f'Got {len(data) - pos} unexpected trailing bytes'
+            f' in binary data.'
+        )
+    return obj
+
+
+def _pack(obj: Any, out: bytearray) -> None:
+    # pylint: disable=too-many-branches
+    # pylint: disable=too-many-statements
+    objtype = type(obj)
+    if objtype is str:
+        encoded = obj.encode()
+        size = len(encoded)
+        if size < 32:
+            out.append(0xA0 | size)
+        elif size < 0x100:
+            out += _TAG_U8.pack(0xD9, size)
+        elif size < 0x10000:
+            out += _TAG_U16.pack(0xDA, size)
+        else:
+            out += _TAG_U32.pack(0xDB, size)
+        out += encoded
+    elif objtype is int:
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out += _I8.pack(obj)
+        elif obj >= 0:
+            if obj < 0x100:
+                out += _TAG_U8.pack(0xCC, obj)
+            elif obj < 0x10000:
+                out += _TAG_U16.pack(0xCD, obj)
+            elif obj < 0x100000000:
+                out += _TAG_U32.pack(0xCE, obj)
+            elif obj < 0x10000000000000000:
+                out += _TAG_U64.pack(0xCF, obj)
+            else:
+                raise ValueError(f'Int too large to encode: {obj}.')
+        elif obj >= -0x80:
+            out += _TAG_I8.pack(0xD0, obj)
+        elif obj >= -0x8000:
+            out += _TAG_I16.pack(0xD1, obj)
+        elif obj >= -0x80000000:
+            out += _TAG_I32.pack(0xD2, obj)
+        elif obj >= -0x8000000000000000:
+            out += _TAG_I64.pack(0xD3, obj)
+        else:
+            raise ValueError(f'Int too small to encode: {obj}.')
+    elif obj is None:
+        out.append(0xC0)
+    elif obj is False:
+        out.append(0xC2)
+    elif obj is True:
+        out.append(0xC3)
+    elif objtype is float:
+        out += _TAG_F64.pack(0xCB, obj)
+    elif objtype is dict:
+        size = len(obj)
+        if size < 16:
+            out.append(0x80 | size)
+        elif size < 0x10000:
+            out += _TAG_U16.pack(0xDE, size)
+        else:
+            out += _TAG_U32.pack(0xDF, size)
+        for key, val in obj.items():
+            _pack(key, out)
+            _pack(val, out)
+    elif objtype is list or objtype is tuple:
+        size = len(obj)
+        if size < 16:
+            out.append(0x90 | size)
+        elif size < 0x10000:
+            out += _TAG_U16.pack(0xDC, size)
+        else:
+            out += _TAG_U32.pack(0xDD, size)
+        for val in obj:
+            _pack(val, out)
+    elif objtype is bytes:
+        size = len(obj)
+        if size < 0x100:
+            out += _TAG_U8.pack(0xC4, size)
+        elif size < 0x10000:
+            out += _TAG_U16.pack(0xC5, size)
+        else:
+            out += _TAG_U32.pack(0xC6, size)
+        out += obj
+    elif isinstance(obj, datetime.datetime):
+        _pack_datetime(obj, out)
+    else:
+        raise TypeError(f'Unsupported type for binary encoding: {objtype}.')
+
+
+def _pack_datetime(obj: datetime.datetime, out: bytearray) -> None:
+    if obj.utcoffset() != datetime.timedelta(0):
+        raise ValueError(f'Datetime must be UTC for binary encoding: {obj}.')
+    delta = obj.replace(tzinfo=datetime.UTC) - _EPOCH
+    seconds = delta // _ONE_SECOND
+    nanoseconds = (delta - seconds * _ONE_SECOND).microseconds * 1000
+    if 0 <= seconds < (1 << 34):
+        # timestamp 64: 30 bits of nanoseconds and 34 of seconds.
+        out += b'\xd7\xff'
+        out += _U64.pack((nanoseconds << 34) | seconds)
+    else:
+        # timestamp 96: uint32 nanoseconds and int64 seconds.
+        out += b'\xc7\x0c\xff'
+        out += _TIMESTAMP96.pack(nanoseconds, seconds)
+
+
+def _unpack(data: bytes, pos: int) -> tuple[Any, int]:
+    # pylint: disable=too-many-return-statements
+    # pylint: disable=too-many-branches
+    # pylint: disable=too-many-statements
+    code = data[pos]
+    pos += 1
+
+    # Fixed-size forms first since they are by far the most common.
+    if code < 0x80:
+        return code, pos
+    if code >= 0xE0:
+        return code - 0x100, pos
+    if 0xA0 <= code < 0xC0:
+        end = pos + (code & 0x1F)
+        if end > len(data):
+            raise IndexError()
+        return data[pos:end].decode(), end
+    if code < 0x90:
+        return _unpack_map(data, pos, code & 0x0F)
+    if code < 0xA0:
+        return _unpack_array(data, pos, code & 0x0F)
+
+    if code == 0xC0:
+        return None, pos
+    if code == 0xC2:
+        return False, pos
+    if code == 0xC3:
+        return True, pos
+    if code == 0xCB:
+        return _F64.unpack_from(data, pos)[0], pos + 8
+    if code == 0xCA:
+        return _F32.unpack_from(data, pos)[0], pos + 4
+    if code == 0xCC:
+        return data[pos], pos + 1
+    if code == 0xCD:
+        return _U16.unpack_from(data, pos)[0], pos + 2
+    if code == 0xCE:
+        return _U32.unpack_from(data, pos)[0], pos + 4
+    if code == 0xCF:
+        return _U64.unpack_from(data, pos)[0], pos + 8
+    if code == 0xD0:
+        return _I8.unpack_from(data, pos)[0], pos + 1
+    if code == 0xD1:
+        return _I16.unpack_from(data, pos)[0], pos + 2
+    if code == 0xD2:
+        return _I32.unpack_from(data, pos)[0], pos + 4
+    if code == 0xD3:
+        return _I64.unpack_from(data, pos)[0], pos + 8
+    if code in (0xD9, 0xDA, 0xDB):
+        size, pos = _unpack_size(data, pos, code - 0xD9)
+        end = pos + size
+        if end > len(data):
+            raise IndexError()
+        return data[pos:end].decode(), end
+    if code in (0xC4, 0xC5, 0xC6):
+        size, pos = _unpack_size(data, pos, code - 0xC4)
+        end = pos + size
+        if end > len(data):
+            raise IndexError()
+        return data[pos:end], end
+    if code in (0xDC, 0xDD):
+        size, pos = _unpack_size(data, pos, code - 0xDC + 1)
+        return _unpack_array(data, pos, size)
+    if code in (0xDE, 0xDF):
+        size, pos = _unpack_size(data, pos, code - 0xDE + 1)
+        return _unpack_map(data, pos, size)
+    if code in (0xD6, 0xD7):
+        size = 4 if code == 0xD6 else 8
+        return _unpack_ext(data, pos + 1, _I8.unpack_from(data, pos)[0], size)
+    if code == 0xC7:
+        size = data[pos]
+        return _unpack_ext(
+            data, pos + 2, _I8.unpack_from(data, pos + 1)[0], size
+        )
+    raise ValueError(f'Unsupported binary type code 0x{code:02x}.')
+
+
+def _unpack_size(data: bytes, pos: int, width: int) -> tuple[int, int]:
+    """Read an 8, 16, or 32 bit size (width 0, 1, or 2)."""
+    if width == 0:
+        return data[pos], pos + 1
+    if width == 1:
+        return _U16.unpack_from(data, pos)[0], pos + 2
+    return _U32.unpack_from(data, pos)[0], pos + 4
+
+
+def _unpack_array(data: bytes, pos: int, size: int) -> tuple[list, int]:
+    out = []
+    for _i in range(size):
+        val, pos = _unpack(data, pos)
+        out.append(val)
+    return out, pos
+
+
+def _unpack_map(data: bytes, pos: int, size: int) -> tuple[dict, int]:
+    out = {}
+    for _i in range(size):
+        key, pos = _unpack(data, pos)
+        if type(key) is not str and type(key) is not int:
+            raise ValueError(f'Unsupported map key type: {type(key)}.')
+        out[key], pos = _unpack(data, pos)
+    return out, pos
+
+
+def _unpack_ext(
+    data: bytes, pos: int, exttype: int, size: int
+) -> tuple[Any, int]:
+    if exttype != _EXT_TIMESTAMP:
+        raise ValueError(f'Unsupported binary ext type {exttype}.')
+    if size == 4:
+        seconds = _U32.unpack_from(data, pos)[0]
+        nanoseconds = 0
+    elif size == 8:
+        val = _U64.unpack_from(data, pos)[0]
+        seconds = val & 0x3FFFFFFFF
+        nanoseconds = val >> 34
+    elif size == 12:
+        nanoseconds, seconds = _TIMESTAMP96.unpack_from(data, pos)
+    else:
+        raise ValueError(f'Invalid timestamp size {size}.')
+    return (
+        _EPOCH
+        + datetime.timedelta(seconds=seconds, microseconds=nanoseconds // 1000),
+        pos + size,
+    )
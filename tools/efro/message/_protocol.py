@@ -4,16 +4,19 @@
 Supports static typing for message types and possible return types.
 """
 
+from enum import Enum
 from typing import TYPE_CHECKING
 import traceback
 import json
 
 from efro.error import CleanError, CommunicationError
 from efro.dataclassio import (
+    Codec,
     is_ioprepped_dataclass,
     dataclass_to_dict,
     dataclass_from_dict,
 )
+from efro.message import _binary
 from efro.message._message import (
     Message,
     Response,
@@ -27,6 +30,17 @@ if TYPE_CHECKING:
     from typing import Any, Literal
 
 
+class MessageEncoding(Enum):
+    """Wire encoding used for raw messages and responses."""
+
+    #: Messages are json strs. Bytes values are base64 encoded.
+    JSON = 'json'
+
+    #: Messages are compact msgpack-style bytes. Bytes and datetime
+    #: values are passed through natively.
+    BINARY = 'binary'
+
+
 class MessageProtocol:
     """Wrangles a set of message types, formats, and response types.
     Both endpoints must be using a compatible Protocol for communication
@@ -46,6 +60,7 @@ class MessageProtocol:
         remote_errors_include_stack_traces: bool = False,
         log_errors_on_receiver: bool = True,
         log_response_decode_errors: bool = True,
+        encoding: MessageEncoding = MessageEncoding.JSON,
     ) -> None:
         """Create a protocol with a given configuration.
 
@@ -93,6 +108,14 @@ class MessageProtocol:
         meaning serious protocol breakage could go unnoticed. To avoid
         this, a log message is also printed in such cases. Pass
         'log_response_decode_errors' as False to disable this logging.
+
+        The 'encoding' value determines what senders send; raw messages
+        will be strs for MessageEncoding.JSON and bytes for
+        MessageEncoding.BINARY. Receivers always accept both and reply
+        in the same encoding they are sent, so protocols can be switched
+        to binary by upgrading receivers before senders. Note that
+        switching encodings changes the raw types generated receiver
+        modules deal in, so those should be regenerated.
         """
         self.message_types_by_id: dict[int, type[Message]] = {}
         self.message_ids_by_type: dict[type[Message], int] = {}
@@ -177,6 +200,7 @@ class MessageProtocol:
         )
         self.log_errors_on_receiver = log_errors_on_receiver
         self.log_response_decode_errors = log_response_decode_errors
+        self.encoding = encoding
 
     @staticmethod
     def encode_dict(obj: dict) -> str:
@@ -187,13 +211,46 @@ class MessageProtocol:
             allow_nan=False,
         )
 
-    def message_to_dict(self, message: Message) -> dict:
-        """Encode a message to a json ready dict."""
-        return self._to_dict(message, self.message_ids_by_type, 'message')
+    @staticmethod
+    def encode_dict_binary(obj: dict) -> bytes:
+        """Binary-encode a provided dict."""
+        return _binary.pack(obj)
+
+    def encode_raw(
+        self, obj: dict, encoding: MessageEncoding | None = None
+    ) -> str | bytes:
+        """Encode a dict using an encoding (protocol default if None)."""
+        if encoding is None:
+            encoding = self.encoding
+        if encoding is MessageEncoding.BINARY:
+            return self.encode_dict_binary(obj)
+        return self.encode_dict(obj)
+
+    def message_to_dict(
+        self, message: Message, encoding: MessageEncoding | None = None
+    ) -> dict:
+        """Encode a message to a dict ready for an encoding.
+
+        Dicts for MessageEncoding.JSON (or the protocol default if
+        encoding is None) are json-ready.
+        """
+        return self._to_dict(
+            message, self.message_ids_by_type, 'message', encoding
+        )
+
+    def response_to_dict(
+        self,
+        response: Response | SysResponse,
+        encoding: MessageEncoding | None = None,
+    ) -> dict:
+        """Encode a response to a dict ready for an encoding.
 
-    def response_to_dict(self, response: Response | SysResponse) -> dict:
-        """Encode a response to a json ready dict."""
-        return self._to_dict(response, self.response_ids_by_type, 'response')
+        Dicts for MessageEncoding.JSON (or the protocol default if
+        encoding is None) are json-ready.
+        """
+        return self._to_dict(
+            response, self.response_ids_by_type, 'response', encoding
+        )
 
     def error_to_response(self, exc: Exception) -> tuple[SysResponse, bool]:
         """Translate an Exception to a SysResponse.
@@ -241,10 +298,24 @@ class MessageProtocol:
             self.log_errors_on_receiver,
         )
 
+    def _codec(self, encoding: MessageEncoding | None) -> Codec:
+        if encoding is None:
+            encoding = self.encoding
+        # Firestore codec output is json-like but with bytes and
+        # datetimes passed through as-is, which our binary encoding
+        # supports natively.
+        if encoding is MessageEncoding.BINARY:
+            return Codec.FIRESTORE
+        return Codec.JSON
+
     def _to_dict(
-        self, message: Any, ids_by_type: dict[type, int], opname: str
+        self,
+        message: Any,
+        ids_by_type: dict[type, int],
+        opname: str,
+        encoding: MessageEncoding | None,
     ) -> dict:
-        """Encode a message to a json string for transport."""
+        """Encode a message to a dict for transport."""
 
         m_id: int | None = ids_by_type.get(type(message))
         if m_id is None:
@@ -252,7 +323,10 @@ class MessageProtocol:
                 f'{opname} type is not registered in protocol:'
                 f' {type(message)}'
             )
-        out = {'t': m_id, 'm': dataclass_to_dict(message)}
+        out = {
+            't': m_id,
+            'm': dataclass_to_dict(message, codec=self._codec(encoding)),
+        }
         return out
 
     @staticmethod
@@ -262,24 +336,76 @@ class MessageProtocol:
         assert isinstance(out, dict)
         return out
 
-    def message_from_dict(self, data: dict) -> Message:
+    @staticmethod
+    def decode_dict_binary(data: bytes) -> dict:
+        """Decode binary data to a dict."""
+        out = _binary.unpack(data)
+        if not isinstance(out, dict):
+            raise ValueError(f'Expected a dict; got a {type(out)}.')
+        return out
+
+    @staticmethod
+    def get_raw_encoding(data: str | bytes) -> MessageEncoding:
+        """Return the encoding of some raw message data."""
+        return (
+            MessageEncoding.JSON
+            if isinstance(data, str)
+            else MessageEncoding.BINARY
+        )
+
+    def decode_raw(self, data: str | bytes) -> dict:
+        """Decode raw message data of either encoding to a dict."""
+        if isinstance(data, str):
+            return self.decode_dict(data)
+        return self.decode_dict_binary(data)
+
+    @staticmethod
+    def batch_to_dict(dicts: list[dict]) -> dict:
+        """Wrap a list of message or response dicts as a batch dict."""
+        return {'b': dicts}
+
+    @staticmethod
+    def batch_from_dict(data: dict) -> list[dict] | None:
+        """Return the dicts in a batch dict, or None if not a batch."""
+        dicts = data.get('b')
+        if dicts is None:
+            return None
+        if not isinstance(dicts, list) or not all(
+            isinstance(d, dict) for d in dicts
+        ):
+            raise ValueError('Invalid batch data.')
+        return dicts
+
+    def message_from_dict(
+        self, data: dict, encoding: MessageEncoding | None = None
+    ) -> Message:
         """Decode a message from a dict."""
-        out = self._from_dict(data, self.message_types_by_id, 'message')
+        out = self._from_dict(
+            data, self.message_types_by_id, 'message', encoding
+        )
         assert isinstance(out, Message)
         return out
 
-    def response_from_dict(self, data: dict) -> Response | SysResponse:
-        """Decode a response from a json string."""
-        out = self._from_dict(data, self.response_types_by_id, 'response')
+    def response_from_dict(
+        self, data: dict, encoding: MessageEncoding | None = None
+    ) -> Response | SysResponse:
+        """Decode a response from a dict."""
+        out = self._from_dict(
+            data, self.response_types_by_id, 'response', encoding
+        )
         assert isinstance(out, Response | SysResponse)
         return out
 
     # Weeeird; we get mypy errors returning dict[int, type] but
     # dict[int, typing.Type] or dict[int, type[Any]] works..
     def _from_dict(
-        self, data: dict, types_by_id: dict[int, type[Any]], opname: str
+        self,
+        data: dict,
+        types_by_id: dict[int, type[Any]],
+        opname: str,
+        encoding: MessageEncoding | None,
     ) -> Any:
-        """Decode a message from a json string."""
+        """Decode a message from a dict."""
         msgdict: dict | None
 
         m_id = data.get('t')
@@ -302,7 +428,9 @@ class MessageProtocol:
         # enums/multitype data. Be aware that this flags the object as
         # 'lossy' however which prevents it from being reserialized by
         # default.
-        return dataclass_from_dict(msgtype, msgdict, lossy=True)
+        return dataclass_from_dict(
+            msgtype, msgdict, lossy=True, codec=self._codec(encoding)
+        )
 
     def _get_module_header(
         self,
@@ -641,12 +769,14 @@ class MessageProtocol:
             f'class {ppre}Bound{basename}(BoundMessageReceiver):\n'
             f'    """Protocol-specific bound receiver."""\n'
         )
+        rawtp = 'bytes' if self.encoding is MessageEncoding.BINARY else 'str'
         if is_async:
             out += (
-                '\n'
-                '    def handle_raw_message(\n'
-                '        self, message: str, raise_unregistered: bool = False\n'
-                '    ) -> Awaitable[str]:\n'
+                f'\n'
+                f'    def handle_raw_message(\n'
+                f'        self, message: {rawtp},'
+                f' raise_unregistered: bool = False\n'
+                f'    ) -> Awaitable[{rawtp}]:\n'
                 '        """Asynchronously handle a raw incoming message."""\n'
                 '        return self._receiver.'
                 'handle_raw_message_async(\n'
@@ -656,10 +786,11 @@ class MessageProtocol:
 
         else:
             out += (
-                '\n'
-                '    def handle_raw_message(\n'
-                '        self, message: str, raise_unregistered: bool = False\n'
-                '    ) -> str:\n'
+                f'\n'
+                f'    def handle_raw_message(\n'
+                f'        self, message: {rawtp},'
+                f' raise_unregistered: bool = False\n'
+                f'    ) -> {rawtp}:\n'
                 '        """Synchronously handle a raw incoming message."""\n'
                 '        return self._receiver.handle_raw_message(\n'
                 '            self._obj, message, raise_unregistered\n'
@@ -5,9 +5,10 @@ Supports static typing for message types and possible return types.
 """
 
 import types
+import asyncio
 import inspect
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, overload
 
 from efro.util import strip_exception_tracebacks
 from efro.message._message import (
@@ -20,7 +21,7 @@ from efro.message._message import (
 if TYPE_CHECKING:
     from typing import Any, Callable, Awaitable
 
-    from efro.message._protocol import MessageProtocol
+    from efro.message._protocol import MessageProtocol, MessageEncoding
     from efro.message._message import SysResponse
 
 # Use a single logger for all message stuff.
@@ -212,27 +213,54 @@ class MessageReceiver:
                     raise TypeError(msg)
 
     def _decode_incoming_message_base(
-        self, bound_obj: Any, msg: str
+        self, bound_obj: Any, msg: str | bytes
     ) -> tuple[Any, dict, Message]:
         # Decode the incoming message.
-        msg_dict = self.protocol.decode_dict(msg)
-        msg_decoded = self.protocol.message_from_dict(msg_dict)
+        msg_dict = self.protocol.decode_raw(msg)
+        msg_decoded = self._message_from_dict(
+            bound_obj, msg_dict, self.protocol.get_raw_encoding(msg)
+        )
+        return bound_obj, msg_dict, msg_decoded
+
+    def _message_from_dict(
+        self, bound_obj: Any, msg_dict: dict, encoding: MessageEncoding
+    ) -> Message:
+        msg_decoded = self.protocol.message_from_dict(msg_dict, encoding)
         assert isinstance(msg_decoded, Message)
         if self._decode_filter_call is not None:
             self._decode_filter_call(bound_obj, msg_dict, msg_decoded)
-        return bound_obj, msg_dict, msg_decoded
-
-    def _decode_incoming_message(self, bound_obj: Any, msg: str) -> Message:
-        bound_obj, _msg_dict, msg_decoded = self._decode_incoming_message_base(
-            bound_obj=bound_obj, msg=msg
-        )
         return msg_decoded
 
+    def _get_handler(self, msg_decoded: Message) -> Callable:
+        msgtype = type(msg_decoded)
+        handler = self._handlers.get(msgtype)
+        if handler is None:
+            raise RuntimeError(f'Got unhandled message type: {msgtype}.')
+        return handler
+
     def encode_user_response(
-        self, bound_obj: Any, message: Message, response: Response | None
-    ) -> str:
-        """Encode a response provided by the user for sending."""
+        self,
+        bound_obj: Any,
+        message: Message,
+        response: Response | None,
+        encoding: MessageEncoding | None = None,
+    ) -> str | bytes:
+        """Encode a response provided by the user for sending.
+
+        If encoding is None, the protocol's encoding is used.
+        """
+        return self.protocol.encode_raw(
+            self._user_response_dict(bound_obj, message, response, encoding),
+            encoding,
+        )
 
+    def _user_response_dict(
+        self,
+        bound_obj: Any,
+        message: Message,
+        response: Response | None,
+        encoding: MessageEncoding | None,
+    ) -> dict:
         assert isinstance(response, Response | None)
         # (user should never explicitly return error-responses)
         assert (
@@ -246,46 +274,97 @@ class MessageReceiver:
         else:
             out_response = response
 
-        response_dict = self.protocol.response_to_dict(out_response)
+        response_dict = self.protocol.response_to_dict(out_response, encoding)
         if self._encode_filter_call is not None:
             self._encode_filter_call(
                 bound_obj, message, out_response, response_dict
             )
-        return self.protocol.encode_dict(response_dict)
+        return response_dict
 
     def encode_error_response(
-        self, bound_obj: Any, message: Message | None, exc: Exception
-    ) -> tuple[str, bool]:
-        """Given an error, return sysresponse str and whether to log."""
+        self,
+        bound_obj: Any,
+        message: Message | None,
+        exc: Exception,
+        encoding: MessageEncoding | None = None,
+    ) -> tuple[str | bytes, bool]:
+        """Given an error, return encoded sysresponse and whether to log.
+
+        If encoding is None, the protocol's encoding is used.
+        """
+        response_dict, dolog = self._error_response_dict(
+            bound_obj, message, exc, encoding
+        )
+        return self.protocol.encode_raw(response_dict, encoding), dolog
+
+    def _error_response_dict(
+        self,
+        bound_obj: Any,
+        message: Message | None,
+        exc: Exception,
+        encoding: MessageEncoding | None,
+    ) -> tuple[dict, bool]:
         response, dolog = self.protocol.error_to_response(exc)
-        response_dict = self.protocol.response_to_dict(response)
+        response_dict = self.protocol.response_to_dict(response, encoding)
         if self._encode_filter_call is not None:
             self._encode_filter_call(
                 bound_obj, message, response, response_dict
             )
-        return self.protocol.encode_dict(response_dict), dolog
+        return response_dict, dolog
 
+    @overload
     def handle_raw_message(
         self, bound_obj: Any, msg: str, raise_unregistered: bool = False
-    ) -> str:
+    ) -> str: ...
+
+    @overload
+    def handle_raw_message(
+        self, bound_obj: Any, msg: bytes, raise_unregistered: bool = False
+    ) -> bytes: ...
+
+    def handle_raw_message(
+        self,
+        bound_obj: Any,
+        msg: str | bytes,
+        raise_unregistered: bool = False,
+    ) -> str | bytes:
         """Decode, handle, and return an response for a message.
 
         if 'raise_unregistered' is True, will raise an
         efro.message.UnregisteredMessageIDError for messages not handled by
         the protocol. In all other cases local errors will translate to
         error responses returned to the sender.
+
+        Responses are encoded the same way as the message: strs for
+        json messages and bytes for binary ones.
+
+        Batches of messages (see MessageSender.send_batch_async()) are
+        handled in order and answered with a single batch response.
+        Errors for individual messages in a batch always translate to
+        error responses regardless of 'raise_unregistered'.
         """
         assert not self.is_async, "can't call sync handler on async receiver"
+        encoding = self.protocol.get_raw_encoding(msg)
         msg_decoded: Message | None = None
         try:
-            msg_decoded = self._decode_incoming_message(bound_obj, msg)
-            msgtype = type(msg_decoded)
-            handler = self._handlers.get(msgtype)
-            if handler is None:
-                raise RuntimeError(f'Got unhandled message type: {msgtype}.')
-            response = handler(bound_obj, msg_decoded)
+            msg_dict = self.protocol.decode_raw(msg)
+            batch = self.protocol.batch_from_dict(msg_dict)
+            if batch is not None:
+                return self.protocol.encode_raw(
+                    self.protocol.batch_to_dict(
+                        [
+                            self._handle_batch_item(bound_obj, item, encoding)
+                            for item in batch
+                        ]
+                    ),
+                    encoding,
+                )
+            msg_decoded = self._message_from_dict(bound_obj, msg_dict, encoding)
+            response = self._get_handler(msg_decoded)(bound_obj, msg_decoded)
             assert isinstance(response, Response | None)
-            return self.encode_user_response(bound_obj, msg_decoded, response)
+            return self.encode_user_response(
+                bound_obj, msg_decoded, response, encoding
+            )
 
         except Exception as exc:
             if raise_unregistered and isinstance(
@@ -293,7 +372,7 @@ class MessageReceiver:
             ):
                 raise
             rstr, dolog = self.encode_error_response(
-                bound_obj, msg_decoded, exc
+                bound_obj, msg_decoded, exc, encoding
             )
             if dolog:
                 if msg_decoded is not None:
@@ -315,12 +394,32 @@ class MessageReceiver:
 
             return rstr
 
+    @overload
     def handle_raw_message_async(
         self, bound_obj: Any, msg: str, raise_unregistered: bool = False
-    ) -> Awaitable[str]:
+    ) -> Awaitable[str]: ...
+
+    @overload
+    def handle_raw_message_async(
+        self, bound_obj: Any, msg: bytes, raise_unregistered: bool = False
+    ) -> Awaitable[bytes]: ...
+
+    def handle_raw_message_async(
+        self,
+        bound_obj: Any,
+        msg: str | bytes,
+        raise_unregistered: bool = False,
+    ) -> Awaitable[str | bytes]:
         """Should be called when the receiver gets a message.
 
-        The return value is the raw response to the message.
+        The return value is the raw response to the message (encoded
+        the same way as the message).
+
+        Handlers for all messages in a batch are called in order
+        and then run concurrently, with all responses returned together
+        in a single batch response. Errors for individual messages in a
+        batch always translate to error responses regardless of
+        'raise_unregistered'.
         """
 
         # Note: This call is synchronous so that the first part of it
@@ -329,14 +428,17 @@ class MessageReceiver:
         # called in the order the messages were received.
 
         assert self.is_async, "Can't call async handler on sync receiver."
+        encoding = self.protocol.get_raw_encoding(msg)
         msg_decoded: Message | None = None
         try:
-            msg_decoded = self._decode_incoming_message(bound_obj, msg)
-            msgtype = type(msg_decoded)
-            handler = self._handlers.get(msgtype)
-            if handler is None:
-                raise RuntimeError(f'Got unhandled message type: {msgtype}.')
-            handler_awaitable = handler(bound_obj, msg_decoded)
+            msg_dict = self.protocol.decode_raw(msg)
+            batch = self.protocol.batch_from_dict(msg_dict)
+            if batch is not None:
+                return self._handle_batch_async(bound_obj, batch, encoding)
+            msg_decoded = self._message_from_dict(bound_obj, msg_dict, encoding)
+            handler_awaitable = self._get_handler(msg_decoded)(
+                bound_obj, msg_decoded
+            )
 
         except Exception as exc:
             if raise_unregistered and isinstance(
@@ -344,22 +446,26 @@ class MessageReceiver:
             ):
                 raise
             return self._handle_raw_message_async_error(
-                bound_obj, msg, msg_decoded, exc
+                bound_obj, msg, msg_decoded, exc, encoding
             )
 
         # Return an awaitable to handle the rest asynchronously.
         return self._handle_raw_message_async(
-            bound_obj, msg, msg_decoded, handler_awaitable
+            bound_obj, msg, msg_decoded, handler_awaitable, encoding
         )
 
     async def _handle_raw_message_async_error(
         self,
         bound_obj: Any,
-        msg_raw: str,
+        msg_raw: str | bytes,
         msg_decoded: Message | None,
         exc: Exception,
-    ) -> str:
-        rstr, dolog = self.encode_error_response(bound_obj, msg_decoded, exc)
+        encoding: MessageEncoding,
+    ) -> str | bytes:
+        # pylint: disable=too-many-positional-arguments
+        rstr, dolog = self.encode_error_response(
+            bound_obj, msg_decoded, exc, encoding
+        )
         if dolog:
             if msg_decoded is not None:
                 msgtype = type(msg_decoded)
@@ -387,24 +493,145 @@ class MessageReceiver:
     async def _handle_raw_message_async(
         self,
         bound_obj: Any,
-        msg_raw: str,
+        msg_raw: str | bytes,
         msg_decoded: Message,
         handler_awaitable: Awaitable[Response | None],
-    ) -> str:
+        encoding: MessageEncoding,
+    ) -> str | bytes:
         """Should be called when the receiver gets a message.
 
         The return value is the raw response to the message.
         """
+        # pylint: disable=too-many-positional-arguments
         try:
             response = await handler_awaitable
             assert isinstance(response, Response | None)
-            return self.encode_user_response(bound_obj, msg_decoded, response)
+            return self.encode_user_response(
+                bound_obj, msg_decoded, response, encoding
+            )
 
         except Exception as exc:
             return await self._handle_raw_message_async_error(
-                bound_obj, msg_raw, msg_decoded, exc
+                bound_obj, msg_raw, msg_decoded, exc, encoding
             )
 
+    def _handle_batch_item(
+        self, bound_obj: Any, msg_dict: dict, encoding: MessageEncoding
+    ) -> dict:
+        """Synchronously handle a message in a batch; return response dict."""
+        msg_decoded: Message | None = None
+        try:
+            msg_decoded = self._message_from_dict(bound_obj, msg_dict, encoding)
+            response = self._get_handler(msg_decoded)(bound_obj, msg_decoded)
+            assert isinstance(response, Response | None)
+            return self._user_response_dict(
+                bound_obj, msg_decoded, response, encoding
+            )
+        except Exception as exc:
+            return self._batch_item_error_dict(
+                bound_obj, msg_dict, msg_decoded, exc, encoding
+            )
+
+    def _handle_batch_async(
+        self, bound_obj: Any, batch: list[dict], encoding: MessageEncoding
+    ) -> Awaitable[str | bytes]:
+        # Kick off all handlers synchronously so they get called in the
+        # order the messages were sent (same as with individual
+        # messages); the rest happens concurrently.
+        items: list[
+            tuple[dict, Message | None, Awaitable | None, Exception | None]
+        ] = []
+        for msg_dict in batch:
+            msg_decoded: Message | None = None
+            try:
+                msg_decoded = self._message_from_dict(
+                    bound_obj, msg_dict, encoding
+                )
+                items.append(
+                    (
+                        msg_dict,
+                        msg_decoded,
+                        self._get_handler(msg_decoded)(bound_obj, msg_decoded),
+                        None,
+                    )
+                )
+            except Exception as exc:
+                items.append((msg_dict, msg_decoded, None, exc))
+        return self._finish_batch_async(bound_obj, items, encoding)
+
+    async def _finish_batch_async(
+        self,
+        bound_obj: Any,
+        items: list[
+            tuple[dict, Message | None, Awaitable | None, Exception | None]
+        ],
+        encoding: MessageEncoding,
+    ) -> str | bytes:
+        response_dicts = await asyncio.gather(
+            *(
+                self._finish_batch_item_async(bound_obj, item, encoding)
+                for item in items
+            )
+        )
+        return self.protocol.encode_raw(
+            self.protocol.batch_to_dict(list(response_dicts)), encoding
+        )
+
+    async def _finish_batch_item_async(
+        self,
+        bound_obj: Any,
+        item: tuple[dict, Message | None, Awaitable | None, Exception | None],
+        encoding: MessageEncoding,
+    ) -> dict:
+        msg_dict, msg_decoded, handler_awaitable, exc = item
+        if handler_awaitable is not None:
+            assert msg_decoded is not None
+            try:
+                response = await handler_awaitable
+                assert isinstance(response, Response | None)
+                return self._user_response_dict(
+                    bound_obj, msg_decoded, response, encoding
+                )
+            except Exception as handler_exc:
+                exc = handler_exc
+        assert exc is not None
+        return self._batch_item_error_dict(
+            bound_obj, msg_dict, msg_decoded, exc, encoding
+        )
+
+    def _batch_item_error_dict(
+        self,
+        bound_obj: Any,
+        msg_dict: dict,
+        msg_decoded: Message | None,
+        exc: Exception,
+        encoding: MessageEncoding,
+    ) -> dict:
+        # pylint: disable=too-many-positional-arguments
+        response_dict, dolog = self._error_response_dict(
+            bound_obj, msg_decoded, exc, encoding
+        )
+        if dolog:
+            if msg_decoded is not None:
+                msgtype = type(msg_decoded)
+                logger.error(
+                    'Error handling %s.%s message in batch.',
+                    msgtype.__module__,
+                    msgtype.__qualname__,
+                    exc_info=exc,
+                )
+            else:
+                logger.error(
+                    'Error handling batched efro.message'
+                    ' (likely a message format incompatibility): %s.',
+                    msg_dict,
+                    exc_info=exc,
+                )
+        # We're done with the exception, so strip its tracebacks to
+        # avoid reference cycles.
+        strip_exception_tracebacks(exc)
+        return response_dict
+
 
 class BoundMessageReceiver:
     """Base bound receiver class."""
@@ -423,12 +650,14 @@ class BoundMessageReceiver:
         """Protocol associated with this receiver."""
         return self._receiver.protocol
 
-    def encode_error_response(self, exc: Exception) -> str:
+    def encode_error_response(self, exc: Exception) -> str | bytes:
         """Given an error, return a response ready to send.
 
         This should be used for any errors that happen outside of
         standard handle_raw_message calls. Any errors within those
         calls will be automatically returned as encoded strings.
+
+        The response uses the protocol's encoding.
         """
         # Passing None for Message here; we would only have that
         # available for things going wrong in the handler (which this is
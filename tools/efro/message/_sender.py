@@ -5,16 +5,16 @@ Supports static typing for message types and possible return types.
 """
 
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, overload
 
 from efro.error import CleanError, RemoteError, CommunicationError
 from efro.message._message import EmptySysResponse, ErrorSysResponse, Response
 
 if TYPE_CHECKING:
-    from typing import Any, Callable, Awaitable
+    from typing import Any, Callable, Awaitable, Literal
 
     from efro.message._message import Message, SysResponse
-    from efro.message._protocol import MessageProtocol
+    from efro.message._protocol import MessageProtocol, MessageEncoding
 
 # Use a single logger for all message stuff.
 logger = logging.getLogger('efro.message')
@@ -51,15 +51,18 @@ class MessageSender:
 
     def __init__(self, protocol: MessageProtocol) -> None:
         self.protocol = protocol
-        self._send_raw_message_call: Callable[[Any, str], str] | None = None
+        # Raw messages are strs or bytes depending on protocol encoding.
+        self._send_raw_message_call: (
+            Callable[[Any, str | bytes], str | bytes] | None
+        ) = None
         self._send_raw_message_ex_call: (
-            Callable[[Any, str, Message], str] | None
+            Callable[[Any, str | bytes, Message], str | bytes] | None
         ) = None
         self._send_async_raw_message_call: (
-            Callable[[Any, str], Awaitable[str]] | None
+            Callable[[Any, str | bytes], Awaitable[str | bytes]] | None
         ) = None
         self._send_async_raw_message_ex_call: (
-            Callable[[Any, str, Message], Awaitable[str]] | None
+            Callable[[Any, str | bytes, Message], Awaitable[str | bytes]] | None
         ) = None
         self._encode_filter_call: (
             Callable[[Any, Message, dict], None] | None
@@ -69,12 +72,21 @@ class MessageSender:
         ) = None
         self._peer_desc_call: Callable[[Any], str] | None = None
 
+    @overload
     def send_method(
         self, call: Callable[[Any, str], str]
-    ) -> Callable[[Any, str], str]:
+    ) -> Callable[[Any, str], str]: ...
+
+    @overload
+    def send_method(
+        self, call: Callable[[Any, bytes], bytes]
+    ) -> Callable[[Any, bytes], bytes]: ...
+
+    def send_method(self, call: Callable) -> Callable:
         """Function decorator for setting raw send method.
 
-        Send methods take strings and should return strings.
+        Send methods take strings and should return strings (or bytes
+        for protocols using MessageEncoding.BINARY).
         CommunicationErrors raised here will be returned to the sender
         as such; all other exceptions will result in a RuntimeError for
         the sender.
@@ -83,9 +95,17 @@ class MessageSender:
         self._send_raw_message_call = call
         return call
 
+    @overload
     def send_ex_method(
         self, call: Callable[[Any, str, Message], str]
-    ) -> Callable[[Any, str, Message], str]:
+    ) -> Callable[[Any, str, Message], str]: ...
+
+    @overload
+    def send_ex_method(
+        self, call: Callable[[Any, bytes, Message], bytes]
+    ) -> Callable[[Any, bytes, Message], bytes]: ...
+
+    def send_ex_method(self, call: Callable) -> Callable:
         """Function decorator for extended send method.
 
         Version of send_method which is also is passed the original
@@ -96,12 +116,21 @@ class MessageSender:
         self._send_raw_message_ex_call = call
         return call
 
+    @overload
     def send_async_method(
         self, call: Callable[[Any, str], Awaitable[str]]
-    ) -> Callable[[Any, str], Awaitable[str]]:
+    ) -> Callable[[Any, str], Awaitable[str]]: ...
+
+    @overload
+    def send_async_method(
+        self, call: Callable[[Any, bytes], Awaitable[bytes]]
+    ) -> Callable[[Any, bytes], Awaitable[bytes]]: ...
+
+    def send_async_method(self, call: Callable) -> Callable:
         """Function decorator for setting raw send-async method.
 
-        Send methods take strings and should return strings.
+        Send methods take strings and should return strings (or bytes
+        for protocols using MessageEncoding.BINARY).
         CommunicationErrors raised here will be returned to the sender
         as such; all other exceptions will result in a RuntimeError for
         the sender.
@@ -118,9 +147,17 @@ class MessageSender:
         self._send_async_raw_message_call = call
         return call
 
+    @overload
     def send_async_ex_method(
         self, call: Callable[[Any, str, Message], Awaitable[str]]
-    ) -> Callable[[Any, str, Message], Awaitable[str]]:
+    ) -> Callable[[Any, str, Message], Awaitable[str]]: ...
+
+    @overload
+    def send_async_ex_method(
+        self, call: Callable[[Any, bytes, Message], Awaitable[bytes]]
+    ) -> Callable[[Any, bytes, Message], Awaitable[bytes]]: ...
+
+    def send_async_ex_method(self, call: Callable) -> Callable:
         """Function decorator for extended send-async method.
 
         Version of send_async_method which is also is passed the original
@@ -207,6 +244,153 @@ class MessageSender:
             raw_response=await raw_response_awaitable,
         )
 
+    @overload
+    def send_batch_async(
+        self,
+        bound_obj: Any,
+        messages: list[Message],
+        return_exceptions: Literal[False] = False,
+    ) -> Awaitable[list[Response | None]]: ...
+
+    @overload
+    def send_batch_async(
+        self,
+        bound_obj: Any,
+        messages: list[Message],
+        return_exceptions: Literal[True],
+    ) -> Awaitable[list[Response | Exception | None]]: ...
+
+    def send_batch_async(
+        self,
+        bound_obj: Any,
+        messages: list[Message],
+        return_exceptions: bool = False,
+    ) -> Awaitable[list[Response | Exception | None]]:
+        """Send a batch of messages asynchronously as a single raw message.
+
+        The batch goes out through the send-async method as a single
+        encoded message and the receiver replies with all responses in
+        a single encoded response; this cuts per-message overhead
+        considerably when sending lots of small messages. Receivers
+        start handlers for all messages in order and (when async) run
+        them concurrently.
+
+        Results are returned in the same order as messages. By default
+        the first error encountered is raised (after all responses have
+        arrived). If 'return_exceptions' is True, exceptions are
+        instead returned in place of the responses they correspond to.
+        """
+        # Note: This call is synchronous so that the first part of it can
+        # happen synchronously (see send_async()).
+        raw_responses_awaitable = self.fetch_raw_batch_response_async(
+            bound_obj=bound_obj, messages=messages
+        )
+        return self._send_batch_async_awaitable(
+            bound_obj, messages, raw_responses_awaitable, return_exceptions
+        )
+
+    async def _send_batch_async_awaitable(
+        self,
+        bound_obj: Any,
+        messages: list[Message],
+        raw_responses_awaitable: Awaitable[list[Response | SysResponse]],
+        return_exceptions: bool,
+    ) -> list[Response | Exception | None]:
+        raw_responses = await raw_responses_awaitable
+        out: list[Response | Exception | None] = []
+        first_exc: Exception | None = None
+        for message, raw_response in zip(messages, raw_responses):
+            try:
+                out.append(
+                    self.unpack_raw_response(
+                        bound_obj=bound_obj,
+                        message=message,
+                        raw_response=raw_response,
+                    )
+                )
+            except Exception as exc:
+                if not return_exceptions:
+                    # Keep unpacking the rest so local exceptions get
+                    # cleared from all responses.
+                    if first_exc is None:
+                        first_exc = exc
+                    continue
+                out.append(exc)
+        if first_exc is not None:
+            raise first_exc
+        return out
+
+    def fetch_raw_batch_response_async(
+        self, bound_obj: Any, messages: list[Message]
+    ) -> Awaitable[list[Response | SysResponse]]:
+        """Fetch raw responses for a batch of messages.
+
+        Each result should be passed to unpack_raw_response() along with
+        its message to produce the final result.
+
+        Batches require a regular send-async method; extended ones are
+        not supported since there is no single message to pass them.
+        """
+        if self._send_async_raw_message_call is None:
+            raise RuntimeError(
+                'send_batch_async() requires a send_async_method.'
+            )
+
+        batch_encoded = self.protocol.encode_raw(
+            self.protocol.batch_to_dict(
+                [
+                    self._message_to_dict(bound_obj, message)
+                    for message in messages
+                ]
+            )
+        )
+        try:
+            send_awaitable = self._send_async_raw_message_call(
+                bound_obj, batch_encoded
+            )
+        except Exception as exc:
+            return self._batch_error_awaitable(exc, len(messages))
+
+        return self._fetch_raw_batch_response_awaitable(
+            bound_obj, messages, send_awaitable
+        )
+
+    async def _batch_error_awaitable(
+        self, exc: Exception, count: int
+    ) -> list[Response | SysResponse]:
+        return self._batch_send_error_responses(exc, count)
+
+    def _batch_send_error_responses(
+        self, exc: Exception, count: int
+    ) -> list[Response | SysResponse]:
+        responses: list[Response | SysResponse] = []
+        for _i in range(count):
+            response = ErrorSysResponse(
+                error_message='Error in MessageSender @send_async_method.',
+                error_type=(
+                    ErrorSysResponse.ErrorType.COMMUNICATION
+                    if isinstance(exc, CommunicationError)
+                    else ErrorSysResponse.ErrorType.LOCAL
+                ),
+            )
+            response.set_local_exception(exc)
+            responses.append(response)
+        return responses
+
+    async def _fetch_raw_batch_response_awaitable(
+        self,
+        bound_obj: Any,
+        messages: list[Message],
+        send_awaitable: Awaitable[str | bytes],
+    ) -> list[Response | SysResponse]:
+        try:
+            response_encoded = await send_awaitable
+        except Exception as exc:
+            return self._batch_send_error_responses(exc, len(messages))
+        return self._decode_raw_batch_response(
+            bound_obj, messages, response_encoded
+        )
+
     def fetch_raw_response(
         self, bound_obj: Any, message: Message
     ) -> Response | SysResponse:
@@ -306,7 +490,10 @@ class MessageSender:
         return response
 
     async def _fetch_raw_response_awaitable(
-        self, bound_obj: Any, message: Message, send_awaitable: Awaitable[str]
+        self,
+        bound_obj: Any,
+        message: Message,
+        send_awaitable: Awaitable[str | bytes],
     ) -> Response | SysResponse:
         try:
             response_encoded = await send_awaitable
@@ -344,15 +531,23 @@ class MessageSender:
         )
         return response
 
-    def _encode_message(self, bound_obj: Any, message: Message) -> str:
+    def _encode_message(self, bound_obj: Any, message: Message) -> str | bytes:
         """Encode a message for sending."""
+        return self.protocol.encode_raw(
+            self._message_to_dict(bound_obj, message)
+        )
+
+    def _message_to_dict(self, bound_obj: Any, message: Message) -> dict:
         msg_dict = self.protocol.message_to_dict(message)
         if self._encode_filter_call is not None:
             self._encode_filter_call(bound_obj, message, msg_dict)
-        return self.protocol.encode_dict(msg_dict)
+        return msg_dict
 
     def _decode_raw_response(
-        self, bound_obj: Any, message: Message, response_encoded: str
+        self,
+        bound_obj: Any,
+        message: Message,
+        response_encoded: str | bytes,
     ) -> Response | SysResponse:
         """Create a Response from returned data.
 
@@ -361,35 +556,94 @@ class MessageSender:
         should be used to translate to special values like None or raise
         Exceptions. This function itself should never raise Exceptions.
         """
-        response: Response | SysResponse
         try:
-            response_dict = self.protocol.decode_dict(response_encoded)
-            response = self.protocol.response_from_dict(response_dict)
-            if self._decode_filter_call is not None:
-                self._decode_filter_call(
-                    bound_obj, message, response_dict, response
-                )
+            # Receivers reply in whatever encoding we sent, but go by
+            # what actually arrived.
+            return self._response_from_dict(
+                bound_obj,
+                message,
+                self.protocol.decode_raw(response_encoded),
+                self.protocol.get_raw_encoding(response_encoded),
+            )
         except Exception as exc:
+            return self._decode_error_response(exc)
+
+    def _decode_raw_batch_response(
+        self,
+        bound_obj: Any,
+        messages: list[Message],
+        response_encoded: str | bytes,
+    ) -> list[Response | SysResponse]:
+        """Create Responses from returned batch data.
 
-            # We pragmatically log by default if decoding fails. This
-            # means a message type was likely changed in a way that
-            # breaks the protocol, but individual message handlers are
-            # likely to lump all errors together (communication and
-            # otherwise) which could cause such breakage to go
-            # unnoticed.
-            if self.protocol.log_response_decode_errors:
-                logger.exception(
-                    'Error decoding message response;'
-                    ' protocol might be broken.',
+        Like _decode_raw_response(), this should never raise Exceptions.
+        """
+        try:
+            encoding = self.protocol.get_raw_encoding(response_encoded)
+            response_dict = self.protocol.decode_raw(response_encoded)
+            response_dicts = self.protocol.batch_from_dict(response_dict)
+            if response_dicts is None:
+                # If the receiver failed to handle the batch as a whole
+                # (couldn't decode it, etc.) it sends a single error
+                # response; apply that to everything.
+                response_dicts = [response_dict] * len(messages)
+            if len(response_dicts) != len(messages):
+                raise RuntimeError(
+                    f'Got {len(response_dicts)} responses for a batch'
+                    f' of {len(messages)} messages.'
+                )
+        except Exception as exc:
+            return [self._decode_error_response(exc) for _m in messages]
+
+        responses: list[Response | SysResponse] = []
+        for message, item_dict in zip(messages, response_dicts):
+            try:
+                responses.append(
+                    self._response_from_dict(
+                        bound_obj, message, item_dict, encoding
+                    )
                 )
+            except Exception as exc:
+                responses.append(self._decode_error_response(exc))
+        return responses
 
-            response = ErrorSysResponse(
-                error_message='Error decoding raw response.',
-                error_type=ErrorSysResponse.ErrorType.LOCAL,
+    def _response_from_dict(
+        self,
+        bound_obj: Any,
+        message: Message,
+        response_dict: dict,
+        encoding: MessageEncoding,
+    ) -> Response | SysResponse:
+        response = self.protocol.response_from_dict(response_dict, encoding)
+        if self._decode_filter_call is not None:
+            self._decode_filter_call(
+                bound_obj, message, response_dict, response
             )
-            # Since we'll be looking at this locally, we can include
-            # extra info for logging/etc.
-            response.set_local_exception(exc)
+        return response
+
+    def _decode_error_response(self, exc: Exception) -> SysResponse:
+        """Create an error response for a decode failure.
+
+        Should be called from within an except block.
+        """
+        # We pragmatically log by default if decoding fails. This
+        # means a message type was likely changed in a way that
+        # breaks the protocol, but individual message handlers are
+        # likely to lump all errors together (communication and
+        # otherwise) which could cause such breakage to go
+        # unnoticed.
+        if self.protocol.log_response_decode_errors:
+            logger.exception(
+                'Error decoding message response; protocol might be broken.',
+            )
+
+        response = ErrorSysResponse(
+            error_message='Error decoding raw response.',
+            error_type=ErrorSysResponse.ErrorType.LOCAL,
+        )
+        # Since we'll be looking at this locally, we can include
+        # extra info for logging/etc.
+        response.set_local_exception(exc)
         return response
 
     def _unpack_raw_response(
@@ -498,6 +752,34 @@ class BoundMessageSender:
         assert self._obj is not None
         return self._sender.send_async(bound_obj=self._obj, message=message)
 
+    @overload
+    def send_batch_async(
+        self,
+        messages: list[Message],
+        return_exceptions: Literal[False] = False,
+    ) -> Awaitable[list[Response | None]]: ...
+
+    @overload
+    def send_batch_async(
+        self,
+        messages: list[Message],
+        return_exceptions: Literal[True],
+    ) -> Awaitable[list[Response | Exception | None]]: ...
+
+    def send_batch_async(
+        self, messages: list[Message], return_exceptions: bool = False
+    ) -> Awaitable[list[Response | Exception | None]]:
+        """Send a batch of messages asynchronously as one raw message.
+
+        See MessageSender.send_batch_async() for details.
+        """
+        assert self._obj is not None
+        return self._sender.send_batch_async(
+            bound_obj=self._obj,
+            messages=messages,
+            return_exceptions=return_exceptions,
+        )
+
     def fetch_raw_response_async_untyped(
         self, message: Message
     ) -> Awaitable[Response | SysResponse]:
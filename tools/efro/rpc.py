@@ -5,7 +5,9 @@
 import time
 import asyncio
 import logging
+import hashlib
 from enum import Enum
+from functools import cache
 from collections import deque
 from dataclasses import dataclass
 from threading import current_thread
@@ -26,6 +28,8 @@ from efro.dataclassio import (
 if TYPE_CHECKING:
     from typing import Literal, Awaitable, Callable
 
+    from compression.zstd import ZstdDict
+
 logger = logging.getLogger(__name__)
 
 # Terminology:
@@ -42,6 +46,19 @@ class _PacketType(Enum):
     RESPONSE = 3
     MESSAGE_BIG = 4
     RESPONSE_BIG = 5
+    MESSAGE_COMPRESSED = 6
+    RESPONSE_COMPRESSED = 7
+    MESSAGE_WIDE = 8
+    RESPONSE_WIDE = 9
+    MESSAGE_WIDE_COMPRESSED = 10
+    RESPONSE_WIDE_COMPRESSED = 11
+
+
+class _PayloadCompression(Enum):
+    """Leading byte of compressed packet payloads."""
+
+    ZSTD = 0
+    ZSTD_DICT = 1
 
 
 _BYTE_ORDER: Literal['big'] = 'big'
@@ -56,6 +73,14 @@ class _PeerInfo:
     # How often we'll be sending out keepalives (in seconds).
     keepalive_interval: Annotated[float, IOAttrs('k')]
 
+    # Whether we can decode zstd compressed packets (protocol 3+).
+    zstd: Annotated[bool, IOAttrs('z', store_default=False)] = False
+
+    # Id of the shared zstd dictionary we can decode with, if any.
+    zstd_dict_id: Annotated[str | None, IOAttrs('zd', store_default=False)] = (
+        None
+    )
+
 
 # Note: we are expected to be forward and backward compatible; we can
 # increment protocol freely and expect everyone else to still talk to us.
@@ -63,7 +88,39 @@ class _PeerInfo:
 # Protocol history:
 # 1 - initial release
 # 2 - gained big (32-bit len val) package/response packets
-OUR_PROTOCOL = 2
+# 3 - gained zstd compressed message/response packets
+# 4 - gained wide (32-bit message id) message/response packets
+#     (also: compressed payloads that inflate past the receiver's
+#     max_message_size now drop the connection; uncompressed ones are
+#     still not size-limited)
+OUR_PROTOCOL = 4
+
+
+# Trained zstd dictionaries start with this (little-endian 0xEC30A437).
+_ZSTD_DICT_MAGIC = b'\x37\xa4\x30\xec'
+
+
+@cache
+def _shared_zstd_dict(dict_bytes: bytes) -> ZstdDict:
+    """Return a process-wide shared ZstdDict for a dictionary's bytes.
+
+    Building a ZstdDict digests the full dictionary, so do it once per
+    process instead of once per endpoint. Bytes that aren't a trained
+    dictionary (as from ``zstd.train_dict()``) are used as raw content.
+    """
+    from compression import zstd
+
+    return zstd.ZstdDict(
+        dict_bytes, is_raw=not dict_bytes.startswith(_ZSTD_DICT_MAGIC)
+    )
+
+
+def _zstd_dict_id(dict_bytes: bytes) -> str:
+    """Return a short id for a shared zstd dictionary.
+
+    Peers only use a dictionary when both sides have the same one.
+    """
+    return hashlib.sha256(dict_bytes).hexdigest()[:16]
 
 
 def ssl_stream_writer_underlying_transport_info(
@@ -82,28 +139,6 @@ def ssl_stream_writer_underlying_transport_info(
     return '(not found)'
 
 
-class _InFlightMessage:
-    """Represents a message that is out on the wire."""
-
-    def __init__(self, message_id: int) -> None:
-        self._response: bytes | None = None
-        self._got_response = asyncio.Event()
-        self.wait_task = asyncio.create_task(
-            self._wait(), name=f'rpc in-flight-msg {message_id} wait'
-        )
-
-    async def _wait(self) -> bytes:
-        await self._got_response.wait()
-        assert self._response is not None
-        return self._response
-
-    def set_response(self, data: bytes) -> None:
-        """Set response data."""
-        assert self._response is None
-        self._response = data
-        self._got_response.set()
-
-
 class _KeepaliveTimeoutError(Exception):
     """Raised if we time out due to not receiving keepalives."""
 
@@ -132,6 +167,21 @@ class RPCEndpoint:
     # disconnect.
     DEFAULT_KEEPALIVE_TIMEOUT = 30.0
 
+    # Messages/responses at least this big get compressed by default
+    # (when the peer supports it).
+    DEFAULT_COMPRESSION_THRESHOLD = 1024
+
+    DEFAULT_COMPRESSION_LEVEL = 3
+
+    # Largest compressed message/response we will inflate for the peer
+    # by default (measured after decompression).
+    DEFAULT_MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+    # We prune finished tasks from our list only once it grows past
+    # this (and then past double its pruned size) to keep pruning cost
+    # constant per message under heavy load.
+    _MIN_TASKS_PRUNE_SIZE = 64
+
     def __init__(
         self,
         handle_raw_message_call: Callable[[bytes], Awaitable[bytes]],
@@ -144,7 +194,30 @@ class RPCEndpoint:
         debug_print_call: Callable[[str], None] | None = None,
         keepalive_interval: float = DEFAULT_KEEPALIVE_INTERVAL,
         keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        compression_threshold: int | None = DEFAULT_COMPRESSION_THRESHOLD,
+        compression_level: int = DEFAULT_COMPRESSION_LEVEL,
+        compression_dict: bytes | None = None,
+        max_message_size: int = DEFAULT_MAX_MESSAGE_SIZE,
     ) -> None:
+        """Create an endpoint for a reader/writer pair.
+
+        Outgoing messages and responses of at least
+        'compression_threshold' bytes are zstd compressed if the peer
+        supports it (pass None to never compress; we can still decode
+        compressed data from the peer). If 'compression_dict' is passed
+        and the peer has the same dictionary, it will be used for
+        compression; this can help a lot for small payloads with lots of
+        common structure. It can be a trained zstd dictionary or just
+        raw sample content.
+
+        A compressed message or response from the peer that inflates to
+        more than 'max_message_size' bytes is treated as a protocol
+        error and brings the connection down; this keeps a small
+        compressed payload from inflating into something huge.
+        Uncompressed payloads are not limited (peers have always been
+        free to send those at any size).
+        """
+        # pylint: disable=too-many-statements
         self._handle_raw_message_call = handle_raw_message_call
         self._reader = reader
         self._writer = writer
@@ -169,10 +242,22 @@ class RPCEndpoint:
         self._did_out_packets_buildup_warning = False
         self._total_bytes_read = 0
         self._create_time = time.monotonic()
+        self._compression_threshold = compression_threshold
+        self._compression_level = compression_level
+        self._compression_dict = compression_dict
+        self._compression_dict_id: str | None = None
+        self._max_message_size = max_message_size
+        if compression_dict is not None:
+            self._compression_dict_id = _zstd_dict_id(compression_dict)
+        self._compressed_bytes_written = 0
+        self._uncompressed_bytes_written = 0
+        self._compressed_bytes_read = 0
+        self._uncompressed_bytes_read = 0
 
         # Need to hold weak-refs to these otherwise it creates dep-loops
         # which keeps us alive.
         self._tasks: list[asyncio.Task] = []
+        self._tasks_prune_size = self._MIN_TASKS_PRUNE_SIZE
 
         # When we last got a keepalive or equivalent (time.monotonic value)
         self._last_keepalive_receive_time: float | None = None
@@ -180,7 +265,8 @@ class RPCEndpoint:
         # (Start near the end to make sure our looping logic is sound).
         self._next_message_id = 65530
 
-        self._in_flight_messages: dict[int, _InFlightMessage] = {}
+        # Futures for messages that are out on the wire, by message id.
+        self._in_flight_messages: dict[int, asyncio.Future[bytes]] = {}
 
         if self.debug_print:
             peername = self._writer.get_extra_info('peername')
@@ -193,6 +279,26 @@ class RPCEndpoint:
         """How many total bytes have been read."""
         return self._total_bytes_read
 
+    @property
+    def compressed_bytes_read(self) -> int:
+        """How many compressed payload bytes have been read."""
+        return self._compressed_bytes_read
+
+    @property
+    def uncompressed_bytes_read(self) -> int:
+        """How many bytes compressed payloads read have expanded to."""
+        return self._uncompressed_bytes_read
+
+    @property
+    def compressed_bytes_written(self) -> int:
+        """How many compressed payload bytes have been written."""
+        return self._compressed_bytes_written
+
+    @property
+    def uncompressed_bytes_written(self) -> int:
+        """How many bytes compressed payloads written were before that."""
+        return self._uncompressed_bytes_written
+
     def __del__(self) -> None:
         if self._run_called:
             if not self._did_close_writer:
@@ -325,9 +431,7 @@ class RPCEndpoint:
                 f'{self._label}: have peerinfo? {self._peer_info is not None}.'
             )
 
-        # message_id is a 16 bit looping value.
-        message_id = self._next_message_id
-        self._next_message_id = (self._next_message_id + 1) % 65536
+        message_id = self._allocate_message_id()
 
         if self.debug_print_io:
             self.debug_print_call(
@@ -337,24 +441,9 @@ class RPCEndpoint:
         # FIXME - should handle backpressure (waiting here if there are
         # enough packets already enqueued).
 
-        if len(message) > 65535:
-            # Payload consists of type (1b), message_id (2b),
-            # len (4b), and data.
-            self._enqueue_outgoing_packet(
-                _PacketType.MESSAGE_BIG.value.to_bytes(1, _BYTE_ORDER)
-                + message_id.to_bytes(2, _BYTE_ORDER)
-                + len(message).to_bytes(4, _BYTE_ORDER)
-                + message
-            )
-        else:
-            # Payload consists of type (1b), message_id (2b),
-            # len (2b), and data.
-            self._enqueue_outgoing_packet(
-                _PacketType.MESSAGE.value.to_bytes(1, _BYTE_ORDER)
-                + message_id.to_bytes(2, _BYTE_ORDER)
-                + len(message).to_bytes(2, _BYTE_ORDER)
-                + message
-            )
+        self._enqueue_outgoing_packet(
+            self._create_payload_packet(message_id, message, response=False)
+        )
 
         if self.debug_print_io:
             self.debug_print_call(
@@ -362,16 +451,10 @@ class RPCEndpoint:
                 f' at {self._tm()}.'
             )
 
-        # Make an entry so we know this message is out there.
-        assert message_id not in self._in_flight_messages
-        msgobj = self._in_flight_messages[message_id] = _InFlightMessage(
-            message_id
-        )
-
-        # Also add its task to our list so we properly cancel it if we
-        # die.
-        self._prune_tasks()  # Keep our list from filling with dead tasks.
-        self._tasks.append(msgobj.wait_task)
+        # Make an entry so we know this message is out there. We cancel
+        # all of these if we die.
+        future: asyncio.Future[bytes] = self._event_loop.create_future()
+        self._in_flight_messages[message_id] = future
 
         # Note: we always want to incorporate a timeout. Individual
         # messages may hang or error on the other end and this ensures
@@ -383,15 +466,38 @@ class RPCEndpoint:
 
         # Now complete the send asynchronously.
         return self._send_message(
-            message, timeout, close_on_error, msgobj.wait_task, message_id
+            message, timeout, close_on_error, future, message_id
         )
 
+    def _allocate_message_id(self) -> int:
+        """Return an id not used by any message currently in flight.
+
+        Ids loop through a 32 bit space for peers speaking protocol 4+
+        and a 16 bit one otherwise (including before we've gotten their
+        handshake).
+        """
+        peer_info = self._peer_info
+        if peer_info is not None and peer_info.protocol >= 4:
+            id_space = 1 << 32
+        else:
+            id_space = 1 << 16
+        if len(self._in_flight_messages) >= id_space:
+            raise CommunicationError('Too many messages in flight.')
+
+        # Skip past any ids still in use; with long-running messages
+        # this can happen once we've looped around.
+        while True:
+            message_id = self._next_message_id % id_space
+            self._next_message_id = message_id + 1
+            if message_id not in self._in_flight_messages:
+                return message_id
+
     async def _send_message(
         self,
         message: bytes,
         timeout: float | None,
         close_on_error: bool,
-        bytes_awaitable: asyncio.Task[bytes],
+        bytes_awaitable: asyncio.Future[bytes],
         message_id: int,
     ) -> bytes:
         # We need to know their protocol, so if we haven't gotten a
@@ -471,6 +577,9 @@ class RPCEndpoint:
 
         for task in self._get_live_tasks():
             task.cancel()
+        for future in self._in_flight_messages.values():
+            future.cancel()
+        self._in_flight_messages.clear()
 
         # Close our writer.
         assert not self._did_close_writer
@@ -651,18 +760,47 @@ class RPCEndpoint:
             elif mtype is _PacketType.RESPONSE_BIG:
                 await self._handle_response_packet(big=True)
 
+            elif mtype is _PacketType.MESSAGE_COMPRESSED:
+                await self._handle_message_packet(big=True, compressed=True)
+
+            elif mtype is _PacketType.RESPONSE_COMPRESSED:
+                await self._handle_response_packet(big=True, compressed=True)
+
+            elif mtype is _PacketType.MESSAGE_WIDE:
+                await self._handle_message_packet(big=True, wide=True)
+
+            elif mtype is _PacketType.RESPONSE_WIDE:
+                await self._handle_response_packet(big=True, wide=True)
+
+            elif mtype is _PacketType.MESSAGE_WIDE_COMPRESSED:
+                await self._handle_message_packet(
+                    big=True, compressed=True, wide=True
+                )
+
+            elif mtype is _PacketType.RESPONSE_WIDE_COMPRESSED:
+                await self._handle_response_packet(
+                    big=True, compressed=True, wide=True
+                )
+
             else:
                 assert_never(mtype)
 
-    async def _handle_message_packet(self, big: bool) -> None:
+    async def _handle_message_packet(
+        self, big: bool, compressed: bool = False, wide: bool = False
+    ) -> None:
         assert self._peer_info is not None
-        msgid = await self._read_int_16()
+        if wide:
+            msgid = await self._read_int_32()
+        else:
+            msgid = await self._read_int_16()
         if big:
             msglen = await self._read_int_32()
         else:
             msglen = await self._read_int_16()
         msg = await self._reader.readexactly(msglen)
         self._total_bytes_read += msglen
+        if compressed:
+            msg = self._decompress(msg)
         if self.debug_print_io:
             self.debug_print_call(
                 f'{self._label}: received message {msgid}'
@@ -672,8 +810,7 @@ class RPCEndpoint:
         # Create a message-task to handle this message and return
         # a response (we don't want to block while that happens).
         assert not self._closing
-        self._prune_tasks()  # Keep from filling with dead tasks.
-        self._tasks.append(
+        self._add_task(
             asyncio.create_task(
                 self._handle_raw_message(message_id=msgid, message=msg),
                 name='efro rpc message handle',
@@ -684,9 +821,14 @@ class RPCEndpoint:
                 f'{self._label}: done handling message at {self._tm()}.'
             )
 
-    async def _handle_response_packet(self, big: bool) -> None:
+    async def _handle_response_packet(
+        self, big: bool, compressed: bool = False, wide: bool = False
+    ) -> None:
         assert self._peer_info is not None
-        msgid = await self._read_int_16()
+        if wide:
+            msgid = await self._read_int_32()
+        else:
+            msgid = await self._read_int_16()
         # Protocol 2 gained 32 bit data lengths.
         if big:
             rsplen = await self._read_int_32()
@@ -699,12 +841,14 @@ class RPCEndpoint:
             )
         rsp = await self._reader.readexactly(rsplen)
         self._total_bytes_read += rsplen
+        if compressed:
+            rsp = self._decompress(rsp)
         # The message is no longer in flight, so remove its entry;
         # leaving completed entries around would grow the dict
         # unboundedly and collide with live entries once message ids
-        # wrap at 65536.
-        msgobj = self._in_flight_messages.pop(msgid, None)
-        if msgobj is None:
+        # wrap.
+        future = self._in_flight_messages.pop(msgid, None)
+        if future is None:
             # It's possible for us to get a response to a message
             # that has timed out. In this case we will have no local
             # record of it.
@@ -713,8 +857,8 @@ class RPCEndpoint:
                     f'{self._label}: got response for nonexistent'
                     f' message id {msgid}; perhaps it timed out?'
                 )
-        else:
-            msgobj.set_response(rsp)
+        elif not future.done():
+            future.set_result(rsp)
 
     async def _run_write_task(self) -> None:
         """Write to the peer."""
@@ -726,6 +870,8 @@ class RPCEndpoint:
             _PeerInfo(
                 protocol=OUR_PROTOCOL,
                 keepalive_interval=self._keepalive_interval,
+                zstd=True,
+                zstd_dict_id=self._compression_dict_id,
             )
         ).encode()
         self._writer.write(len(data).to_bytes(4, _BYTE_ORDER) + data)
@@ -856,22 +1002,150 @@ class RPCEndpoint:
                 raise RuntimeError('Response cannot be larger than 65535 bytes')
 
         # Now send back our response.
-        # Payload consists of type (1b), msgid (2b), len (2b), and data.
-        if len(response) > 65535:
-            self._enqueue_outgoing_packet(
-                _PacketType.RESPONSE_BIG.value.to_bytes(1, _BYTE_ORDER)
+        self._enqueue_outgoing_packet(
+            self._create_payload_packet(message_id, response, response=True)
+        )
+
+    def _create_payload_packet(
+        self, message_id: int, data: bytes, response: bool
+    ) -> bytes:
+        """Create a message or response packet."""
+
+        # Note that we may not have peer-info yet for messages enqueued
+        # right after connecting; those simply go out uncompressed with
+        # 16 bit ids.
+        peer_info = self._peer_info
+        wide = peer_info is not None and peer_info.protocol >= 4
+        if wide:
+            if response:
+                ptype = _PacketType.RESPONSE_WIDE
+                ptype_compressed = _PacketType.RESPONSE_WIDE_COMPRESSED
+            else:
+                ptype = _PacketType.MESSAGE_WIDE
+                ptype_compressed = _PacketType.MESSAGE_WIDE_COMPRESSED
+            idlen = 4
+        else:
+            if response:
+                ptype = _PacketType.RESPONSE
+                ptype_compressed = _PacketType.RESPONSE_COMPRESSED
+            else:
+                ptype = _PacketType.MESSAGE
+                ptype_compressed = _PacketType.MESSAGE_COMPRESSED
+            idlen = 2
+
+        if (
+            self._compression_threshold is not None
+            and len(data) >= self._compression_threshold
+            and peer_info is not None
+            and peer_info.protocol >= 3
+            and peer_info.zstd
+        ):
+            compressed = self._compress(data, peer_info)
+
+            # No point sending it compressed if that doesn't help.
+            if len(compressed) < len(data):
+                self._compressed_bytes_written += len(compressed)
+                self._uncompressed_bytes_written += len(data)
+
+                # Payload consists of type (1b), message_id (2b or 4b),
+                # len (4b), and compression-type (1b) + compressed data.
+                return (
+                    ptype_compressed.value.to_bytes(1, _BYTE_ORDER)
+                    + message_id.to_bytes(idlen, _BYTE_ORDER)
+                    + len(compressed).to_bytes(4, _BYTE_ORDER)
+                    + compressed
+                )
+
+        if wide:
+            # Payload consists of type (1b), message_id (4b),
+            # len (4b), and data.
+            return (
+                ptype.value.to_bytes(1, _BYTE_ORDER)
+                + message_id.to_bytes(4, _BYTE_ORDER)
+                + len(data).to_bytes(4, _BYTE_ORDER)
+                + data
+            )
+
+        if len(data) > 65535:
+            ptype_big = (
+                _PacketType.RESPONSE_BIG
+                if response
+                else _PacketType.MESSAGE_BIG
+            )
+            # Payload consists of type (1b), message_id (2b),
+            # len (4b), and data.
+            return (
+                ptype_big.value.to_bytes(1, _BYTE_ORDER)
                 + message_id.to_bytes(2, _BYTE_ORDER)
-                + len(response).to_bytes(4, _BYTE_ORDER)
-                + response
+                + len(data).to_bytes(4, _BYTE_ORDER)
+                + data
+            )
+
+        # Payload consists of type (1b), message_id (2b),
+        # len (2b), and data.
+        return (
+            ptype.value.to_bytes(1, _BYTE_ORDER)
+            + message_id.to_bytes(2, _BYTE_ORDER)
+            + len(data).to_bytes(2, _BYTE_ORDER)
+            + data
+        )
+
+    def _compress(self, data: bytes, peer_info: _PeerInfo) -> bytes:
+        """Compress a payload for the peer (including type byte)."""
+        from compression import zstd
+
+        if (
+            self._compression_dict is not None
+            and peer_info.zstd_dict_id == self._compression_dict_id
+        ):
+            ctype = _PayloadCompression.ZSTD_DICT
+            compressed = zstd.compress(
+                data,
+                level=self._compression_level,
+                zstd_dict=_shared_zstd_dict(self._compression_dict),
             )
         else:
-            self._enqueue_outgoing_packet(
-                _PacketType.RESPONSE.value.to_bytes(1, _BYTE_ORDER)
-                + message_id.to_bytes(2, _BYTE_ORDER)
-                + len(response).to_bytes(2, _BYTE_ORDER)
-                + response
+            ctype = _PayloadCompression.ZSTD
+            compressed = zstd.compress(data, level=self._compression_level)
+        return ctype.value.to_bytes(1, _BYTE_ORDER) + compressed
+
+    def _check_message_size(self, size: int) -> None:
+        if size > self._max_message_size:
+            raise RuntimeError(
+                'Got payload over max_message_size'
+                f' ({self._max_message_size} bytes).'
             )
 
+    def _decompress(self, data: bytes) -> bytes:
+        """Decompress a payload from the peer (including type byte)."""
+        from compression import zstd
+
+        ctype = _PayloadCompression(data[0])
+        if ctype is _PayloadCompression.ZSTD:
+            decompressor = zstd.ZstdDecompressor()
+        elif ctype is _PayloadCompression.ZSTD_DICT:
+            if self._compression_dict is None:
+                raise RuntimeError(
+                    'Got dict-compressed payload but have no dict.'
+                )
+            decompressor = zstd.ZstdDecompressor(
+                zstd_dict=_shared_zstd_dict(self._compression_dict)
+            )
+        else:
+            assert_never(ctype)
+
+        # Never inflate past the limit (plus a byte, to tell a payload
+        # that hits it exactly from one that goes over).
+        out = decompressor.decompress(
+            data[1:], max_length=self._max_message_size + 1
+        )
+        self._check_message_size(len(out))
+        if not decompressor.eof or decompressor.unused_data:
+            raise RuntimeError('Got incomplete or malformed zstd payload.')
+        self._compressed_bytes_read += len(data)
+        self._uncompressed_bytes_read += len(out)
+        return out
+
     async def _read_int_8(self) -> int:
         out = int.from_bytes(await self._reader.readexactly(1), _BYTE_ORDER)
         self._total_bytes_read += 1
@@ -924,8 +1198,14 @@ class RPCEndpoint:
         self._out_packets.append(data)
         self._have_out_packets.set()
 
-    def _prune_tasks(self) -> None:
-        self._tasks = self._get_live_tasks()
+    def _add_task(self, task: asyncio.Task) -> None:
+        # Keep our list from filling with dead tasks.
+        if len(self._tasks) >= self._tasks_prune_size:
+            self._tasks = self._get_live_tasks()
+            self._tasks_prune_size = max(
+                self._MIN_TASKS_PRUNE_SIZE, len(self._tasks) * 2
+            )
+        self._tasks.append(task)
 
     def _get_live_tasks(self) -> list[asyncio.Task]:
         return [t for t in self._tasks if not t.done()]
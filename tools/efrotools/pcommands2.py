@@ -240,5 +240,83 @@ def pcommandbatch_speed_test() -> None:
         )
 
 
+def logquery() -> None:
+    """Query a binary log file (see efro.binlog).
+
+    Usage: logquery <path> [--start TIME] [--end TIME] [--level LEVEL]
+    [--logger NAME[,NAME...]] [--json] [--blocks]
+
+    Times are ISO 8601 (naive times are taken as UTC). Loggers match
+    their children too. Pass --blocks to summarize the file's block
+    index instead of printing entries.
+    """
+    import datetime
+
+    from efro.error import CleanError
+    from efro.util import extract_arg, extract_flag
+    from efro.logging import LogLevel
+    from efro.binlog import BinaryLogReader
+    from efro.dataclassio import dataclass_to_json
+
+    args = pcommand.get_args()
+
+    def _time_arg(name: str) -> datetime.datetime | None:
+        val = extract_arg(args, name)
+        if val is None:
+            return None
+        try:
+            time = datetime.datetime.fromisoformat(val)
+        except ValueError as exc:
+            raise CleanError(f'Invalid {name} time: {val!r}.') from exc
+        if time.tzinfo is None:
+            time = time.replace(tzinfo=datetime.UTC)
+        return time
+
+    start_time = _time_arg('--start')
+    end_time = _time_arg('--end')
+    levelname = extract_arg(args, '--level')
+    loggers = extract_arg(args, '--logger')
+    as_json = extract_flag(args, '--json')
+    show_blocks = extract_flag(args, '--blocks')
+    if len(args) != 1:
+        raise CleanError('Expected one log path arg.')
+    try:
+        min_level = None if levelname is None else LogLevel[levelname.upper()]
+    except KeyError as exc:
+        raise CleanError(f'Invalid log level: {levelname!r}.') from exc
+
+    try:
+        reader = BinaryLogReader(args[0])
+    except (OSError, ValueError) as exc:
+        raise CleanError(str(exc)) from exc
+
+    if show_blocks:
+        blocks = reader.blocks()
+        for block in blocks:
+            print(
+                f'{block.start_time.isoformat()} - {block.end_time.isoformat()}'
+                f' {block.count} entries,'
+                f' {block.size} bytes ({block.raw_size} raw),'
+                f' levels {sorted(l.name for l in block.levels)},'
+                f' {len(block.names)} loggers'
+            )
+        print(f'{len(blocks)} blocks, {sum(b.count for b in blocks)} entries.')
+        return
+
+    for entry in reader.entries(
+        start_time=start_time,
+        end_time=end_time,
+        min_level=min_level,
+        names=None if loggers is None else loggers.split(','),
+    ):
+        if as_json:
+            print(dataclass_to_json(entry))
+        else:
+            print(
+                f'{entry.time.isoformat()} {entry.level.name}'
+                f' {entry.name}: {entry.message}'
+            )
+
+
 def null() -> None:
     """Do nothing. Useful for speed tests and whatnot."""